@@ -13,6 +13,7 @@ from aiida.common.lang import classproperty
 from aiida.engine import CalcJob
 
 from aiida_quantumespresso.utils.convert import convert_input_to_namelist_entry
+from aiida_quantumespresso.utils.profiling import Profiler
 
 
 class BasePwCpInputGenerator(CalcJob):
@@ -87,6 +88,9 @@ class BasePwCpInputGenerator(CalcJob):
     def prepare_for_submission(self, folder):
         """Create the input files from the input nodes passed to this instance of the `CalcJob`.
 
+        If profiling is enabled through the `PROFILING` setting or the environment variable, the timings of the phases
+        are stored in the `profiling` extra of the node.
+
         :param folder: an `aiida.common.folders.Folder` to temporarily write files on disk
         :return: `aiida.common.datastructures.CalcInfo` instance
         """
@@ -96,6 +100,11 @@ class BasePwCpInputGenerator(CalcJob):
         else:
             settings = {}
 
+        try:
+            profiler = Profiler.from_options(settings.pop('PROFILING', None))
+        except ValueError as exception:
+            raise exceptions.InputValidationError(str(exception))
+
         # Check that a pseudo potential was specified for each kind present in the `StructureData`
         kinds = [kind.name for kind in self.inputs.structure.kinds]
         if set(kinds) != set(self.inputs.pseudos.keys()):
@@ -134,11 +143,13 @@ class BasePwCpInputGenerator(CalcJob):
         ]
         if self._use_kpoints:
             arguments.append(self.inputs.kpoints)
-        input_filecontent, local_copy_pseudo_list = self._generate_PWCPinputdata(*arguments)
+        with profiler.phase('generate_input'):
+            input_filecontent, local_copy_pseudo_list = self._generate_PWCPinputdata(*arguments)
         local_copy_list += local_copy_pseudo_list
 
-        with folder.open(self.metadata.options.input_filename, 'w') as handle:
-            handle.write(input_filecontent)
+        with profiler.phase('write_input'):
+            with folder.open(self.metadata.options.input_filename, 'w') as handle:
+                handle.write(input_filecontent)
 
         # operations for restart
         symlink = settings.pop('PARENT_FOLDER_SYMLINK', self._default_symlink_usage)  # a boolean
@@ -240,6 +251,9 @@ class BasePwCpInputGenerator(CalcJob):
             unknown_keys = ', '.join(list(settings.keys()))
             raise exceptions.InputValidationError('`settings` contained unexpected keys: {}'.format(unknown_keys))
 
+        if profiler.enabled:
+            profiler.store(self.node, 'prepare_for_submission')
+
         return calcinfo
 
     @classmethod
@@ -5,6 +5,8 @@ from __future__ import print_function
 
 import copy
 import difflib
+import io
+import json
 import os
 import xml.dom.minidom
 from packaging.version import Version
@@ -56,6 +58,227 @@ def _check_and_convert(keyword, val, expected_type):
     return outval
 
 
+# Version of the layout of the indexed input specification, to be incremented when it changes, to invalidate caches
+INPUT_SPEC_CACHE_VERSION = 1
+
+INPUT_SPEC_FILENAME_PREFIX = 'INPUT_PW-'
+INPUT_SPEC_FILENAME_SUFFIX = '.xml'
+INPUT_SPEC_CACHE_SUFFIX = '.json'
+
+_INPUT_SPECS = {}
+
+
+def _get_module_dir():
+    """Return the directory of this module, which contains the XML definition files."""
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def get_available_versions():
+    """Return the sorted list of versions of `pw.x` for which an XML definition file is shipped with this module.
+
+    :return: list of version strings
+    """
+    prefix = INPUT_SPEC_FILENAME_PREFIX
+    suffix = INPUT_SPEC_FILENAME_SUFFIX
+    versions = [
+        fname[len(prefix):-len(suffix)]
+        for fname in os.listdir(_get_module_dir())
+        if fname.startswith(prefix) and fname.endswith(suffix)
+    ]
+    return sorted(versions, key=Version)
+
+
+def _get_parent_namelist(node):
+    """Return the upper case name of the namelist that contains the given node or `None` if it is part of a card."""
+    parent = node
+    try:
+        while True:
+            parent = parent.parentNode
+            if parent.tagName == 'namelist':
+                return parent.getAttribute('name').upper()
+    except AttributeError:
+        # There are also variables in cards instead of namelists: I ignore them
+        return None
+
+
+def _get_expected_type(node):
+    """Return the upper case type of a variable node, taking it from the enclosing group of variables if necessary."""
+    expected_type = node.getAttribute('type')
+    # Fix for groups of variables
+    if expected_type == '':
+        if node.parentNode.tagName == 'vargroup':
+            expected_type = node.parentNode.getAttribute('type')
+    return expected_type.upper()
+
+
+def _get_options(node):
+    """Return the list of allowed values of a `CHARACTER` variable node, or `None` if they are not enumerated."""
+    values = []
+    for option in node.getElementsByTagName('opt'):
+        values.extend(value.strip().strip('\'"') for value in option.getAttribute('val').split(','))
+    return values or None
+
+
+def compile_input_spec(handle):
+    """Compile the XML definition of the `pw.x` input into an index of all the known keywords.
+
+    The returned dictionary contains only builtin types such that it can be serialized to JSON. It has the keys:
+
+        * `variables`: scalar keywords, mapped on a dictionary with the `namelist`, `expected_type` and, for character
+          keywords with enumerated values, the allowed `options`
+        * `dimensions`: one-dimensional array keywords, mapped on a dictionary with the `namelist`, `expected_type` and
+          the `end_val` of the dimension
+        * `multidimensions`: multi-dimensional array keywords, mapped on a dictionary with the `namelist`,
+          `expected_type` and lists of the `start`, `end` values and the `indexes`
+        * `keywords`: sorted list of all known keywords
+
+    The `namelist` key is omitted for keywords that are part of a card.
+
+    :param handle: filelike object with the content of an `INPUT_PW-<version>.xml` file
+    :return: dictionary with the indexed input specification
+    :raise InternalError: if the XML definition is not consistent
+    """
+    dom = xml.dom.minidom.parse(handle)
+
+    # ========== List of known PW variables (from XML file) ===============
+    valid_kws = {}
+    for keyword in dom.getElementsByTagName('var'):
+        valid_kw = {}
+        namelist = _get_parent_namelist(keyword)
+        if namelist is not None:
+            valid_kw['namelist'] = namelist
+        valid_kw['expected_type'] = _get_expected_type(keyword)
+        if valid_kw['expected_type'] == 'CHARACTER':
+            options = _get_options(keyword)
+            if options is not None:
+                valid_kw['options'] = options
+        valid_kws[keyword.getAttribute('name').lower()] = valid_kw
+
+    # ====== List of known PW 'dimensions' (arrays) (from XML file) ===========
+    valid_dims = {}
+    for dim in dom.getElementsByTagName('dimension'):
+        valid_dim = {}
+        namelist = _get_parent_namelist(dim)
+        if namelist is not None:
+            valid_dim['namelist'] = namelist
+        valid_dim['expected_type'] = _get_expected_type(dim)
+        # I assume start_val is always 1
+        start_val = dim.getAttribute('start')
+        if start_val != '1':
+            raise InternalError(
+                "Wrong start value '{}' in input array (dimension) {}".format(start_val, dim.getAttribute('name'))
+            )
+        # I save the string as it is; somewhere else I will check for its value
+        valid_dim['end_val'] = dim.getAttribute('end')
+        valid_dims[dim.getAttribute('name').lower()] = valid_dim
+
+    # ====== List of known PW 'multidimensions' (arrays) (from XML file) ===========
+    valid_multidims = {}
+    for dim in dom.getElementsByTagName('multidimension'):
+        valid_multidim = {}
+        namelist = _get_parent_namelist(dim)
+        if namelist is not None:
+            valid_multidim['namelist'] = namelist
+
+        start_values = dim.getAttribute('start').split(',')
+        end_values = dim.getAttribute('end').split(',')
+        indexes = dim.getAttribute('indexes').split(',')
+
+        if len(set([len(start_values), len(end_values), len(indexes)])) != 1:
+            raise InternalError(
+                'XML schema defines a multidimension keyword with start, end and indexes values of unequal length'
+            )
+
+        valid_multidim['expected_type'] = dim.getAttribute('type').upper()
+        valid_multidim['start'] = start_values
+        valid_multidim['end'] = end_values
+        valid_multidim['indexes'] = indexes
+        valid_multidims[dim.getAttribute('name').lower()] = valid_multidim
+
+    return {
+        'cache_version': INPUT_SPEC_CACHE_VERSION,
+        'variables': valid_kws,
+        'dimensions': valid_dims,
+        'multidimensions': valid_multidims,
+        'keywords': sorted(set(valid_kws) | set(valid_dims) | set(valid_multidims)),
+    }
+
+
+def _load_input_spec_cache(filepath_cache, filepath_xml):
+    """Return the indexed input specification from the JSON cache or `None` if it does not exist or is outdated."""
+    try:
+        if os.path.getmtime(filepath_cache) < os.path.getmtime(filepath_xml):
+            return None
+        with io.open(filepath_cache, 'r', encoding='utf-8') as handle:
+            input_spec = json.load(handle)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if not isinstance(input_spec, dict) or input_spec.get('cache_version', None) != INPUT_SPEC_CACHE_VERSION:
+        return None
+
+    return input_spec
+
+
+def _dump_input_spec_cache(input_spec, filepath_cache):
+    """Write the indexed input specification to the JSON cache, ignoring failures, e.g. for a read-only install."""
+    try:
+        with io.open(filepath_cache, 'w', encoding='utf-8') as handle:
+            handle.write(six.text_type(json.dumps(input_spec, sort_keys=True)))
+    except (IOError, OSError):
+        try:
+            os.remove(filepath_cache)
+        except (IOError, OSError):
+            pass
+
+
+def get_input_spec(version, use_cache=True):
+    """Return the indexed input specification of `pw.x` for the given version.
+
+    The XML definition file is compiled with `compile_input_spec` only the first time the specification for a version
+    is requested in a process. The result is kept in memory and, if `use_cache` is True, also written to a JSON file
+    next to the XML definition file, which is used by subsequent processes as long as it is newer than the XML file.
+
+    :param version: string with the version number of `pw.x`
+    :param use_cache: if False, ignore both the in-memory and the on-disk cache and compile the XML definition file
+    :return: dictionary with the indexed input specification, see `compile_input_spec`. It is shared between calls
+        and should not be modified.
+    :raise QEInputValidationError: if there is no XML definition file for the given version
+    """
+    if use_cache and version in _INPUT_SPECS:
+        return _INPUT_SPECS[version]
+
+    module_dir = _get_module_dir()
+    filename = '{}{}'.format(INPUT_SPEC_FILENAME_PREFIX, version)
+    filepath_xml = os.path.join(module_dir, filename + INPUT_SPEC_FILENAME_SUFFIX)
+    filepath_cache = os.path.join(module_dir, filename + INPUT_SPEC_CACHE_SUFFIX)
+
+    if not os.path.isfile(filepath_xml):
+        versions = get_available_versions()
+        strictversions = sorted(versions + [version], key=Version)
+        pos = strictversions.index(version)
+        if pos == 0:
+            add_str = ' (the version you specified is too old)'
+        else:
+            add_str = ' (the older, closest version you can use is {})'.format(strictversions[pos - 1])
+        raise QEInputValidationError(
+            'Unknown Quantum Espresso version: {}. '
+            'Available versions: {};{}'.format(version, ', '.join(versions), add_str)
+        )
+
+    input_spec = _load_input_spec_cache(filepath_cache, filepath_xml) if use_cache else None
+
+    if input_spec is None:
+        with io.open(filepath_xml, 'rb') as handle:
+            input_spec = compile_input_spec(handle)
+        if use_cache:
+            _dump_input_spec_cache(input_spec, filepath_cache)
+
+    _INPUT_SPECS[version] = input_spec
+
+    return input_spec
+
+
 def pw_input_helper(input_params, structure, stop_at_first_error=False, flat_mode=False, version='6.2'):
     """Validate if the input dictionary for Quantum ESPRESSO is valid. Return the dictionary (possibly with small
     variations: e.g. convert integer to float where necessary, recreate the proper structure if flat_mode is True, ...)
@@ -183,147 +406,11 @@ def pw_input_helper(input_params, structure, stop_at_first_error=False, flat_mod
         'ecutwfc',
     ]}
 
-    # ===================== PARSING OF THE XML DEFINITION FILE ===============
-    module_dir = os.path.dirname(__file__)
-    if module_dir == '':
-        module_dir = os.curdir
-    xml_path = os.path.join(module_dir, 'INPUT_PW-{}.xml'.format(version))
-    try:
-        with open(xml_path, 'r') as handle:
-            dom = xml.dom.minidom.parse(handle)
-    except IOError:
-        prefix = 'INPUT_PW-'
-        suffix = '.xml'
-        versions = [
-            fname[len(prefix):-len(suffix)]
-            for fname in os.listdir(module_dir)
-            if fname.startswith(prefix) and fname.endswith(suffix)
-        ]
-        versions = sorted(versions, key=Version)
-        strictversions = versions + [version]
-        strictversions = sorted(strictversions, key=Version)
-        pos = strictversions.index(version)
-        if pos == 0:
-            add_str = ' (the version you specified is too old)'
-        else:
-            add_str = ' (the older, closest version you can use is {})'.format(strictversions[pos - 1])
-        raise QEInputValidationError(
-            'Unknown Quantum Espresso version: {}. '
-            'Available versions: {};{}'.format(version, ', '.join(versions), add_str)
-        )
-
-    # ========== List of known PW variables (from XML file) ===============
-    known_kws = dom.getElementsByTagName('var')
-    valid_kws = {}
-    for keyword in known_kws:
-        if keyword in valid_kws:
-            raise InternalError(
-                'Something strange, I found more than one '
-                "keyword '{}' in the XML description...".format(keyword)
-            )
-
-        valid_kws[keyword.getAttribute('name').lower()] = {}
-        parent = keyword
-        try:
-            while True:
-                parent = parent.parentNode
-                if parent.tagName == 'namelist':
-                    valid_kws[keyword.getAttribute('name').lower()]['namelist'] = parent.getAttribute('name').upper()
-                    break
-        except AttributeError:
-            # There are also variables in cards instead of namelists:
-            # I ignore them
-            pass
-            # raise QEInputValidationError("Unable to find namelist for "
-            #     "keyword %s." % kw.getAttribute('name'))
-        expected_type = keyword.getAttribute('type')
-        # Fix for groups of variables
-        if expected_type == '':
-            if keyword.parentNode.tagName == 'vargroup':
-                expected_type = keyword.parentNode.getAttribute('type')
-        valid_kws[keyword.getAttribute('name').lower()]['expected_type'] = expected_type.upper()
-
-    # ====== List of known PW 'dimensions' (arrays) (from XML file) ===========
-    known_dims = dom.getElementsByTagName('dimension')
-    valid_dims = {}
-    for dim in known_dims:
-        if dim in valid_dims:
-            raise InternalError(
-                'Something strange, I found more than one '
-                "keyword '{}' in the XML description...".format(dim)
-            )
-
-        valid_dims[dim.getAttribute('name').lower()] = {}
-        parent = dim
-        try:
-            while True:
-                parent = parent.parentNode
-                if parent.tagName == 'namelist':
-                    valid_dims[dim.getAttribute('name').lower()]['namelist'] = parent.getAttribute('name').upper()
-                    break
-        except AttributeError:
-            # There are also variables in cards instead of namelists:
-            # I ignore them
-            pass
-            # raise QEInputValidationError("Unable to find namelist "
-            #     "for keyword %s." % dim.getAttribute('name'))
-        expected_type = dim.getAttribute('type')
-        # Fix for groups of variables
-        if expected_type == '':
-            if dim.parentNode.tagName == 'vargroup':
-                expected_type = dim.parentNode.getAttribute('type')
-        valid_dims[dim.getAttribute('name').lower()]['expected_type'] = expected_type.upper()
-        # I assume start_val is always 1
-        start_val = dim.getAttribute('start')
-        if start_val != '1':
-            raise InternalError(
-                "Wrong start value '{}' in input array (dimension) {}".format(start_val, dim.getAttribute('name'))
-            )
-        # I save the string as it is; somewhere else I will check for its value
-        valid_dims[dim.getAttribute('name').lower()]['end_val'] = dim.getAttribute('end')
-
-    # ====== List of known PW 'multidimensions' (arrays) (from XML file) ===========
-    known_multidims = dom.getElementsByTagName('multidimension')
-    valid_multidims = {}
-    for dim in known_multidims:
-        if dim in valid_multidims:
-            raise InternalError(
-                'Something strange, I found more than one '
-                "multidimensional keyword '{}' in the XML description...".format(dim)
-            )
-
-        valid_multidims[dim.getAttribute('name').lower()] = {}
-        parent = dim
-        try:
-            while True:
-                parent = parent.parentNode
-                if parent.tagName == 'namelist':
-                    valid_multidims[dim.getAttribute('name').lower()]['namelist'] = parent.getAttribute('name').upper()
-                    break
-        except AttributeError:
-            # There are also variables in cards instead of namelists: ignore them
-            pass
-
-        expected_type = dim.getAttribute('type').upper()
-        start_values = dim.getAttribute('start').split(',')
-        end_values = dim.getAttribute('end').split(',')
-        indexes = dim.getAttribute('indexes').split(',')
-
-        valid_multidims[dim.getAttribute('name').lower()]['expected_type'] = expected_type
-        valid_multidims[dim.getAttribute('name').lower()]['start'] = start_values
-        valid_multidims[dim.getAttribute('name').lower()]['end'] = end_values
-        valid_multidims[dim.getAttribute('name').lower()]['indexes'] = indexes
-
-        if len(set([len(start_values), len(end_values), len(indexes)])) != 1:
-            raise InternalError(
-                'XML schema defines a multidimension keyword with start, end and indexes values of unequal length'
-            )
-
-    # Used to suggest valid keywords if an unknown one is found
-    valid_invars_list = list(
-        set([i.lower() for i in valid_dims] + [i.lower() for i in valid_multidims] + [i.lower() for i in valid_kws]) -
-        set(blocked_kws)
-    )
+    # ================= INDEXED SPECIFICATION OF THE XML DEFINITION FILE =================
+    input_spec = get_input_spec(version)
+    valid_kws = input_spec['variables']
+    valid_dims = input_spec['dimensions']
+    valid_multidims = input_spec['multidimensions']
 
     # =================== Check for blocked keywords ===========================
     for keyword in input_params_internal:
@@ -607,6 +694,8 @@ def pw_input_helper(input_params, structure, stop_at_first_error=False, flat_mod
         else:
             # Neither a variable nor an array
             err_str = 'Problem parsing keyword {}. '.format(keyword)
+            # Used to suggest valid keywords if an unknown one is found
+            valid_invars_list = [i for i in input_spec['keywords'] if i not in blocked_kws]
             similar_kws = difflib.get_close_matches(keyword, valid_invars_list)
             if len(similar_kws) == 1:
                 err_str += 'Maybe you wanted to specify {}?'.format(similar_kws[0])
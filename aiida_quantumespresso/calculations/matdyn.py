@@ -3,12 +3,18 @@
 from __future__ import absolute_import
 
 from aiida import orm
+from aiida.common import exceptions
 from aiida_quantumespresso.calculations.namelists import NamelistsCalculation
 from aiida_quantumespresso.data.force_constants import ForceConstantsData
 
 
 class MatdynCalculation(NamelistsCalculation):
-    """`CalcJob` implementation for the matdyn.x code of Quantum ESPRESSO."""
+    """`CalcJob` implementation for the matdyn.x code of Quantum ESPRESSO.
+
+    By default the phonon frequencies are computed on the explicit list of `kpoints`. If `dos` is set to `True` in the
+    `INPUT` namelist of the `parameters`, the phonon density of states is computed instead, on the mesh of the
+    `kpoints`, and only the density of states file is retrieved.
+    """
 
     _PHONON_FREQUENCIES_NAME = 'phonon_frequencies.dat'
     _PHONON_MODES_NAME = 'phonon_displacements.dat'
@@ -30,15 +36,24 @@ class MatdynCalculation(NamelistsCalculation):
         # yapf: disable
         super(MatdynCalculation, cls).define(spec)
         spec.input('force_constants', valid_type=ForceConstantsData, required=True)
-        spec.input('kpoints', valid_type=orm.KpointsData, help='Kpoints on which to calculate the phonon frequencies.')
+        spec.input('kpoints', valid_type=orm.KpointsData,
+            help='Kpoints on which to calculate the phonon frequencies, or the mesh of kpoints on which to calculate '
+                 'the phonon density of states if `dos` is set to `True` in the `INPUT` namelist of the parameters.')
         spec.inputs.pop('parent_folder')
         spec.output('output_parameters', valid_type=orm.Dict)
-        spec.output('output_phonon_bands', valid_type=orm.BandsData)
+        spec.output('output_phonon_bands', valid_type=orm.BandsData, required=False,
+            help='The phonon frequencies on the kpoints, only returned if the phonon density of states is not '
+                 'computed.')
+        spec.output('output_phonon_dos', valid_type=orm.XyData, required=False,
+            help='The phonon density of states and, if written by matdyn.x, its projections on the atoms, only '
+                 'returned if `dos` is set to `True` in the `INPUT` namelist of the parameters.')
         spec.default_output_node = 'output_parameters'
         spec.exit_code(100, 'ERROR_NO_RETRIEVED_FOLDER',
             message='The retrieved folder data node could not be accessed.')
         spec.exit_code(110, 'ERROR_READING_OUTPUT_FILE',
             message='The output file could not be read from the retrieved folder.')
+        spec.exit_code(111, 'ERROR_READING_DOS_FILE',
+            message='The phonon density of states file could not be read from the retrieved folder.')
         spec.exit_code(130, 'ERROR_JOB_NOT_DONE',
             message='The computation did not finish properly ("JOB DONE" not found).')
         spec.exit_code(131, 'ERROR_OUTPUT_KPOINTS_MISSING',
@@ -46,8 +61,28 @@ class MatdynCalculation(NamelistsCalculation):
         spec.exit_code(132, 'ERROR_OUTPUT_KPOINTS_INCOMMENSURATE',
             message='Number of kpoints in the inputs is not commensurate with those in the output')
 
+    @staticmethod
+    def is_dos_calculation(parameters):
+        """Return whether the parameters set `dos` to `True` in the `INPUT` namelist, regardless of the case of keys.
+
+        :param parameters: the nested dictionary of the namelists
+        :return: boolean
+        """
+        for namelist, values in parameters.items():
+            if namelist.upper() == 'INPUT':
+                return any(key.lower() == 'dos' and value for key, value in values.items())
+
+        return False
+
+    def _is_dos_calculation(self):
+        """Return whether the phonon density of states is computed by this calculation."""
+        return 'parameters' in self.inputs and self.is_dos_calculation(self.inputs.parameters.get_dict())
+
     def _get_following_text(self):
-        """Add the kpoints after the namelist."""
+        """Add the kpoints after the namelist, which are not read if the density of states is computed."""
+        if self._is_dos_calculation():
+            return u''
+
         try:
             kpoints = self.inputs.kpoints.get_kpoints()
         except AttributeError:
@@ -66,7 +101,24 @@ class MatdynCalculation(NamelistsCalculation):
         :return: `aiida.common.datastructures.CalcInfo` instance
         """
         force_constants = self.inputs.force_constants
-        self._blocked_keywords.append(('INPUT', 'flfrc', force_constants.filename))
+        blocked_keywords = list(self._blocked_keywords) + [('INPUT', 'flfrc', force_constants.filename)]
+
+        if self._is_dos_calculation():
+            try:
+                mesh, offset = self.inputs.kpoints.get_kpoints_mesh()
+            except AttributeError:
+                raise exceptions.InputValidationError('the kpoints should be a mesh to compute the density of states')
+
+            if any(offset):
+                raise exceptions.InputValidationError('the mesh of kpoints for the density of states cannot be offset')
+
+            # The frequencies and displacements on all the kpoints of the mesh are not written, nor retrieved
+            blocked_keywords = [blocked for blocked in blocked_keywords if blocked[1] not in ['flfrq', 'flvec']]
+            blocked_keywords += [('INPUT', 'flfrq', ''), ('INPUT', 'flvec', '')]
+            blocked_keywords += [('INPUT', 'nk{}'.format(index + 1), value) for index, value in enumerate(mesh)]
+            self._internal_retrieve_list = [self._PHONON_DOS_NAME]
+
+        self._blocked_keywords = blocked_keywords
 
         calcinfo = super(MatdynCalculation, self).prepare_for_submission(folder)
         calcinfo.local_copy_list.append((force_constants.uuid, force_constants.filename, force_constants.filename))
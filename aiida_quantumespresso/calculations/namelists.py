@@ -68,9 +68,16 @@ class NamelistsCalculation(CalcJob):
         return u''
 
     @classmethod
-    def set_blocked_keywords(cls, parameters):
-        """Force default values for blocked keywords. NOTE: this is different from PW/CP."""
-        for blocked in cls._blocked_keywords:
+    def set_blocked_keywords(cls, parameters, blocked_keywords=None):
+        """Force default values for blocked keywords. NOTE: this is different from PW/CP.
+
+        :param parameters: the nested dictionary of the namelists
+        :param blocked_keywords: optional list of tuples of namelist, key and value, by default those of the class
+        """
+        if blocked_keywords is None:
+            blocked_keywords = cls._blocked_keywords
+
+        for blocked in blocked_keywords:
             namelist = blocked[0].upper()
             key = blocked[1].lower()
             value = blocked[2]
@@ -159,7 +166,7 @@ class NamelistsCalculation(CalcJob):
         except KeyError:  # list of namelists not specified; do automatic detection
             namelists_toprint = self._default_namelists
 
-        parameters = self.set_blocked_keywords(parameters)
+        parameters = self.set_blocked_keywords(parameters, self._blocked_keywords)
         parameters = self.filter_namelists(parameters, namelists_toprint)
         file_content = self.generate_input_file(parameters)
         file_content += '\n' + following_text
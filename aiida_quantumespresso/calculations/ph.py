@@ -11,7 +11,7 @@ from aiida.common import datastructures, exceptions
 from aiida.engine import CalcJob
 
 from aiida_quantumespresso.calculations.pw import PwCalculation
-from aiida_quantumespresso.calculations import _lowercase_dict, _uppercase_dict
+from aiida_quantumespresso.calculations import _lowercase_dict, _uppercase_dict, _pop_parser_options
 from aiida_quantumespresso.utils.convert import convert_input_to_namelist_entry
 
 
@@ -56,6 +56,9 @@ class PhCalculation(CalcJob):
         spec.input('parent_folder', valid_type=orm.RemoteData,
             help='the folder of a completed `PwCalculation`')
         spec.output('output_parameters', valid_type=orm.Dict)
+        spec.output('output_dynamical_matrices', valid_type=orm.ArrayData, required=False,
+            help='the q-points, frequencies and eigenvectors of the dynamical matrices, only returned if the parser '
+                 'option `dynamical_matrices_as_arrays` is set to `True`')
         spec.default_output_node = 'output_parameters'
 
         # Unrecoverable errors: resources like the retrieved folder or its expected contents are missing
@@ -313,6 +316,8 @@ class PhCalculation(CalcJob):
         calcinfo.retrieve_list.append(os.path.join(filepath_xml_tensor, self._OUTPUT_XML_TENSOR_FILE_NAME))
         calcinfo.retrieve_list += settings.pop('ADDITIONAL_RETRIEVE_LIST', [])
 
+        _pop_parser_options(self, settings)
+
         if settings:
             unknown_keys = ', '.join(list(settings.keys()))
             raise exceptions.InputValidationError('`settings` contained unexpected keys: {}'.format(unknown_keys))
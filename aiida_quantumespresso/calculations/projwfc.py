@@ -3,6 +3,7 @@
 from __future__ import absolute_import
 from aiida.orm import RemoteData, FolderData, Dict, XyData
 from aiida_quantumespresso.calculations.namelists import NamelistsCalculation
+from aiida_quantumespresso.data.projections import CompactProjectionData
 
 
 class ProjwfcCalculation(NamelistsCalculation):
@@ -44,6 +45,10 @@ class ProjwfcCalculation(NamelistsCalculation):
         # if non-spin
         spec.output('projections', valid_type=ProjectionData, required=False)
         spec.output('bands', valid_type=BandsData, required=False)
+        # if the `compact_projections` parser option is set, instead of the `ProjectionData` outputs
+        spec.output('projections_compact', valid_type=CompactProjectionData, required=False,
+            help='the projections and pdos of all orbitals and spin channels in dense arrays, only returned if the '
+                 'parser option `compact_projections` is set to `True`')
         spec.default_output_node = 'output_parameters'
         spec.exit_code(
             100, 'ERROR_NO_RETRIEVED_FOLDER', message='The retrieved folder data node could not be accessed.')
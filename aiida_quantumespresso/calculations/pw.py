@@ -76,6 +76,8 @@ class PwCalculation(BasePwCpInputGenerator):
             help='The `output_band` output node of the successful calculation if present.')
         spec.output('output_kpoints', valid_type=orm.KpointsData, required=False)
         spec.output('output_atomic_occupations', valid_type=orm.Dict, required=False)
+        spec.output('output_profiling', valid_type=orm.Dict, required=False,
+            help='The timings of the phases of the parser, only if profiling was enabled with the `output` option.')
         spec.default_output_node = 'output_parameters'
 
         # Unrecoverable errors: resources like the retrieved folder or its expected contents are missing
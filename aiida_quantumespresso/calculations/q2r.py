@@ -32,6 +32,9 @@ class Q2rCalculation(NamelistsCalculation):
         super(Q2rCalculation, cls).define(spec)
         spec.input('parent_folder', valid_type=(orm.RemoteData, orm.FolderData), required=True)
         spec.output('force_constants', valid_type=ForceConstantsData)
+        spec.output('force_constants_array', valid_type=orm.ArrayData, required=False,
+            help='The parsed force constants as the array `force_constants`, only returned if the '
+                 '`store_force_constants_array` parser option is set.')
         spec.exit_code(100, 'ERROR_NO_RETRIEVED_FOLDER',
             message='The retrieved folder data node could not be accessed.')
         spec.exit_code(110, 'ERROR_READING_OUTPUT_FILE',
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Command line script to monitor a running `PwCalculation` by tailing its stdout on the remote computer."""
+from __future__ import absolute_import
+
+import os
+import time
+
+import click
+
+from aiida.cmdline.params import arguments
+from aiida.cmdline.utils import decorators, echo
+
+from . import cmd_calculation
+
+
+@cmd_calculation.command('monitor')
+@arguments.CALCULATION('calculation')
+@click.option(
+    '-i',
+    '--interval',
+    type=click.INT,
+    default=60,
+    show_default=True,
+    help='Number of seconds to wait between two reads of the stdout.'
+)
+@click.option('--once', is_flag=True, help='Read the stdout only once instead of until the calculation terminates.')
+@decorators.with_dbenv()
+def cmd_monitor(calculation, interval, once):
+    """Monitor the SCF convergence, energies and forces of a running `PwCalculation`.
+
+    Only the bytes that were appended to the stdout since the previous read are transferred and parsed.
+    """
+    from aiida.common import exceptions
+    from aiida_quantumespresso.parsers import QEOutputParsingError
+    from aiida_quantumespresso.parsers.parse_raw.pw_stream import PwStdoutIncrementalParser
+
+    try:
+        remote_folder = calculation.outputs.remote_folder
+    except (AttributeError, exceptions.NotExistent):
+        echo.echo_critical('{}<{}> does not have a remote folder yet'.format(calculation.process_label, calculation.pk))
+
+    filepath = os.path.join(remote_folder.get_remote_path(), calculation.get_option('output_filename'))
+    parser = PwStdoutIncrementalParser(calculation.inputs.parameters.get_dict())
+
+    while True:
+        # Whether the calculation is terminated has to be determined before reading, so the last read is complete
+        is_terminated = calculation.is_terminated
+
+        with remote_folder.get_authinfo().get_transport() as transport:
+            try:
+                parser.feed_from_transport(transport, filepath)
+            except IOError as exception:
+                echo.echo_critical(str(exception))
+
+        if is_terminated:
+            try:
+                parser.finalize()
+            except QEOutputParsingError as exception:
+                echo.echo_warning('failed to parse the complete stdout: {}'.format(exception))
+
+        echo_progress(*parser.poll())
+
+        if is_terminated or once:
+            break
+
+        time.sleep(interval)
+
+    echo.echo_info('read {} bytes of the stdout with {} completed steps'.format(parser.offset, parser.number_of_frames))
+
+
+def echo_progress(frames, scf_iterations):
+    """Echo the SCF iterations and trajectory frames as returned by `PwStdoutIncrementalParser.poll`."""
+    for iteration in scf_iterations:
+        echo.echo('step {frame:>4} SCF iteration {iteration:>3}: estimated scf accuracy {scf_accuracy:.4E} eV'.format(
+            **iteration))
+
+    for frame in frames:
+        values = []
+        for key, label, units in [('energy', 'energy', 'eV'), ('total_force', 'total force', 'eV/angstrom')]:
+            if key in frame:
+                values.append('{} {:.6f} {}'.format(label, frame[key][-1], units))
+        echo.echo_success('completed step: {}'.format(', '.join(values) if values else 'no energy'))
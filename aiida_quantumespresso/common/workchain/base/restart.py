@@ -9,7 +9,13 @@ from aiida.engine import CalcJob, WorkChain, ExitCode, ToContext, append_
 from aiida.plugins.entry_point import get_entry_point_names, load_entry_point
 
 from aiida_quantumespresso.common.exceptions import UnexpectedCalculationFailure
-from aiida_quantumespresso.common.workchain.utils import ErrorHandlerReport
+from aiida_quantumespresso.common.workchain.cleanup import clean_workchain_calculations
+from aiida_quantumespresso.common.workchain.utils import ErrorHandlerDispatchTable, ErrorHandlerReport
+from aiida_quantumespresso.utils.profiling import profile_step
+
+# The entry point groups of error handlers that have been loaded in this interpreter, since loading the entry points of
+# a group a second time has no effect but requires to scan all installed entry points
+_LOADED_ERROR_HANDLER_ENTRY_POINTS = set()
 
 
 class BaseRestartWorkChain(WorkChain):
@@ -63,6 +69,7 @@ class BaseRestartWorkChain(WorkChain):
         if self._calculation_class is None or not issubclass(self._calculation_class, CalcJob):
             raise ValueError('no valid CalcJob class defined for `_calculation_class` attribute')
 
+        self._error_handler_timings = {}
         self._load_error_handlers()
 
     @override
@@ -73,11 +80,18 @@ class BaseRestartWorkChain(WorkChain):
         :param load_context: context for loading instance state
         """
         super(BaseRestartWorkChain, self).load_instance_state(saved_state, load_context)
+        self._error_handler_timings = {}
         self._load_error_handlers()
 
     def _load_error_handlers(self):
-        """Load the error handlers defined through entry points, if any."""
+        """Load the error handlers defined through entry points, if any, once per interpreter."""
         if self._error_handler_entry_point is not None:
+
+            if self._error_handler_entry_point in _LOADED_ERROR_HANDLER_ENTRY_POINTS:
+                return
+
+            _LOADED_ERROR_HANDLER_ENTRY_POINTS.add(self._error_handler_entry_point)
+
             for entry_point_name in get_entry_point_names(self._error_handler_entry_point):
                 try:
                     load_entry_point(self._error_handler_entry_point, entry_point_name)
@@ -121,6 +135,7 @@ class BaseRestartWorkChain(WorkChain):
         """
         return not self.ctx.is_finished and self.ctx.iteration < self.inputs.max_iterations.value
 
+    @profile_step
     def run_calculation(self):
         """Run the next calculation, taking the input dictionary from the context at `self.ctx.inputs`."""
         from aiida_quantumespresso.utils.mapping import prepare_process_inputs
@@ -148,6 +163,7 @@ class BaseRestartWorkChain(WorkChain):
 
         return ToContext(calculations=append_(calculation))
 
+    @profile_step
     def inspect_calculation(self):
         """Analyse the results of the previous calculation and call the error handlers when necessary."""
         calculation = self.ctx.calculations[self.ctx.iteration - 1]
@@ -159,6 +175,7 @@ class BaseRestartWorkChain(WorkChain):
             # detected and the work chain should be aborted. If it returns `False`, the sanity check detected a problem
             # but has handled the problem and we should restart the cycle.
             handler = self._handle_calculation_sanity_checks(calculation)  # pylint: disable=assignment-from-no-return
+            self._store_error_handler_timings()
 
             if (isinstance(handler, ErrorHandlerReport) and
                     handler.exit_code is not None and handler.exit_code.status != 0):
@@ -188,6 +205,8 @@ class BaseRestartWorkChain(WorkChain):
             exit_code = self._handle_calculation_failure(calculation)
         except UnexpectedCalculationFailure as exception:
             exit_code = self._handle_unexpected_failure(calculation, exception)
+        finally:
+            self._store_error_handler_timings()
 
         # If the exit code returned actually has status `0` that means we consider the calculation as successful
         if isinstance(exit_code, ExitCode) and exit_code.status == 0:
@@ -195,6 +214,7 @@ class BaseRestartWorkChain(WorkChain):
 
         return exit_code
 
+    @profile_step
     def results(self):
         """Attach the outputs specified in the output specification from the last completed calculation."""
         calculation = self.ctx.calculations[self.ctx.iteration - 1]
@@ -231,18 +251,7 @@ class BaseRestartWorkChain(WorkChain):
             self.report('remote folders will not be cleaned')
             return
 
-        cleaned_calcs = []
-
-        for called_descendant in self.node.called_descendants:
-            if isinstance(called_descendant, orm.CalcJobNode):
-                try:
-                    called_descendant.outputs.remote_folder._clean()  # pylint: disable=protected-access
-                    cleaned_calcs.append(str(called_descendant.pk))
-                except (IOError, OSError, KeyError):
-                    pass
-
-        if cleaned_calcs:
-            self.report('cleaned remote folders of calculations: {}'.format(' '.join(cleaned_calcs)))
+        clean_workchain_calculations(self)
 
     def _handle_calculation_sanity_checks(self, calculation):
         """Perform a sanity check of a calculation that finished ok.
@@ -263,8 +272,9 @@ class BaseRestartWorkChain(WorkChain):
         """Call the attached error handlers if any to attempt to correct the cause of the calculation failure.
 
         The registered error handlers will be called in order based on their priority until a handler returns a report
-        that instructs to break. If the last executed error handler defines an exit code, that will be returned to
-        instruct the work chain to abort. Otherwise the work chain will continue the cycle.
+        that instructs to break. Handlers that declare the exit codes they apply to are only called if the exit status
+        of the calculation is one of them. If the last executed error handler defines an exit code, that will be
+        returned to instruct the work chain to abort. Otherwise the work chain will continue the cycle.
 
         :param calculation: the calculation that finished with a non-zero exit status
         :return: `ExitCode` if the work chain is to be aborted
@@ -276,11 +286,7 @@ class BaseRestartWorkChain(WorkChain):
         if not hasattr(self, '_error_handlers') or not self._error_handlers:
             raise UnexpectedCalculationFailure('no calculation error handlers were registered')
 
-        # Sort the handlers with a priority defined, based on their priority in reverse order
-        handlers = [handler for handler in self._error_handlers if handler.priority]
-        handlers = sorted(handlers, key=lambda x: x.priority, reverse=True)
-
-        for handler in handlers:
+        for handler in self._get_error_handler_dispatch_table().get_handlers(calculation.exit_status):
 
             handler_report = handler.method(self, calculation)
 
@@ -303,6 +309,45 @@ class BaseRestartWorkChain(WorkChain):
 
         return
 
+    @classmethod
+    def _get_error_handler_dispatch_table(cls):
+        """Return the dispatch table of the registered error handlers, which is compiled once per class.
+
+        The table is compiled again only if error handlers have been registered since, for example by loading an entry
+        point of error handlers.
+
+        :return: `ErrorHandlerDispatchTable`
+        """
+        handlers = getattr(cls, '_error_handlers', [])
+        table = cls.__dict__.get('_error_handler_dispatch_table', None)
+
+        if table is None or table.number_of_handlers != len(handlers):
+            table = ErrorHandlerDispatchTable(handlers)
+            cls._error_handler_dispatch_table = table
+
+        return table
+
+    def _store_error_handler_timings(self):
+        """Add the timings of the error handlers called since the last call to the `error_handler_timings` extra.
+
+        The extra maps the name of each handler onto the number of `calls` and the total time in `seconds` spent in it
+        over all iterations of the work chain, which allows to find slow handlers.
+        """
+        timings = getattr(self, '_error_handler_timings', None)
+
+        if not timings:
+            return
+
+        stored = self.node.get_extra('error_handler_timings', {})
+
+        for name, (calls, seconds) in timings.items():
+            entry = stored.setdefault(name, {'calls': 0, 'seconds': 0.})
+            entry['calls'] += calls
+            entry['seconds'] += seconds
+
+        self.node.set_extra('error_handler_timings', stored)
+        timings.clear()
+
     def _handle_unexpected_failure(self, calculation, exception=None):
         """Handle an unexpected failure.
 
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""Utilities to clean the remote working directories of the calculations that were run by a `WorkChain`.
+
+Instead of cleaning the remote folders one by one, each opening its own transport, the folders are grouped by the
+computer they are stored on. The folders of each computer are deleted through a single transport with batched `rm -rf`
+commands and the different computers are cleaned concurrently.
+"""
+from __future__ import absolute_import
+
+import collections
+from multiprocessing.pool import ThreadPool
+
+from six.moves import shlex_quote
+
+from aiida import orm
+from aiida.common import exceptions
+
+RemoteCleanupResult = collections.namedtuple('RemoteCleanupResult', 'success size error')
+RemoteCleanupResult.__new__.__defaults__ = (False, None, None)
+"""A namedtuple with the outcome of the cleaning of a single remote folder.
+
+:param success: boolean, `True` if the folder no longer exists on the remote
+:param size: the size in bytes of the folder before it was deleted, or `None` if it could not be determined
+:param error: string with the reason why the folder could not be deleted, or `None` if it was deleted
+"""
+
+# Maximum number of folders per `rm -rf` command, which keeps the command line well below the limits of remote shells
+BATCH_SIZE = 64
+
+# Maximum number of computers whose folders are cleaned concurrently
+MAX_WORKERS = 4
+
+
+def get_folder_sizes(transport, paths):
+    """Return the disk usage in bytes of the given folders on the remote of an open transport.
+
+    The sizes are determined with a single `du -sk` command, where the `-k` flag is used since it is defined by POSIX,
+    such that the sizes are only accurate to a kilobyte.
+
+    :param transport: an open transport
+    :param paths: list of absolute paths
+    :return: dictionary of path onto size in bytes, which contains only the folders whose size could be determined
+    """
+    command = 'du -sk {}'.format(' '.join(shlex_quote(path) for path in paths))
+    _, stdout, _ = transport.exec_command_wait(command)
+    sizes = {}
+
+    # The output contains a line with the size and path for each existing folder, even if `du` fails for others
+    for line in stdout.splitlines():
+        try:
+            size, path = line.split(None, 1)
+            sizes[path.strip()] = int(size) * 1024
+        except ValueError:
+            continue
+
+    return sizes
+
+
+def delete_folders(transport, paths, batch_size=BATCH_SIZE):
+    """Delete the given folders on the remote of a transport with batched `rm -rf` commands.
+
+    :param transport: the transport of the computer that contains the folders, it is opened by this function
+    :param paths: list of absolute paths
+    :param batch_size: the maximum number of folders to delete per command
+    :return: dictionary of path onto a `RemoteCleanupResult`
+    """
+    results = {}
+
+    with transport:
+        for start in range(0, len(paths), batch_size):
+            batch = paths[start:start + batch_size]
+            sizes = get_folder_sizes(transport, batch)
+            command = 'rm -rf {}'.format(' '.join(shlex_quote(path) for path in batch))
+            retval, _, stderr = transport.exec_command_wait(command)
+
+            for path in batch:
+                # Only if the command failed, do we have to check which of the folders could not be deleted
+                if retval == 0 or not transport.path_exists(path):
+                    results[path] = RemoteCleanupResult(True, sizes.get(path))
+                else:
+                    error = stderr.strip() or 'rm exited with status {}'.format(retval)
+                    results[path] = RemoteCleanupResult(False, sizes.get(path), error)
+
+    return results
+
+
+def clean_remote_folders(remote_folders, batch_size=BATCH_SIZE, max_workers=MAX_WORKERS):
+    """Delete the remote folders of the given `RemoteData` nodes, reusing a single transport per computer.
+
+    All database access happens in the calling thread, the threads that clean the folders of the different computers
+    only use the transports.
+
+    :param remote_folders: dictionary of arbitrary keys onto `RemoteData` nodes
+    :param batch_size: the maximum number of folders to delete per command
+    :param max_workers: the maximum number of computers that are cleaned concurrently
+    :return: ordered dictionary with the same keys onto a `RemoteCleanupResult`
+    """
+    results = {}
+    groups = collections.OrderedDict()
+
+    for key, remote_folder in remote_folders.items():
+        path = remote_folder.get_remote_path()
+
+        if not path or not path.startswith('/'):
+            results[key] = RemoteCleanupResult(False, None, 'the remote path `{}` is not absolute'.format(path))
+            continue
+
+        uuid = remote_folder.computer.uuid
+
+        if uuid not in groups:
+            try:
+                transport = remote_folder.get_authinfo().get_transport()
+            except exceptions.NotExistent as exception:
+                results[key] = RemoteCleanupResult(False, None, str(exception))
+                continue
+            groups[uuid] = (transport, collections.OrderedDict())
+
+        groups[uuid][1][key] = path
+
+    def clean_computer(group):
+        """Clean the folders of a single computer and return the results by key."""
+        transport, paths = group
+        try:
+            results_path = delete_folders(transport, list(set(paths.values())), batch_size)
+        except Exception as exception:  # pylint: disable=broad-except
+            # A computer that cannot be reached should not prevent the folders of the other computers to be cleaned
+            return {key: RemoteCleanupResult(False, None, str(exception)) for key in paths}
+        return {key: results_path[path] for key, path in paths.items()}
+
+    if groups:
+        pool = ThreadPool(max(1, min(max_workers, len(groups))))
+        try:
+            for results_computer in pool.map(clean_computer, list(groups.values())):
+                results.update(results_computer)
+        finally:
+            pool.close()
+            pool.join()
+
+    return collections.OrderedDict((key, results[key]) for key in remote_folders)
+
+
+def format_size(size):
+    """Return a human readable representation of a size in bytes."""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024:
+            return '{:.1f} {}'.format(size, unit)
+        size /= 1024.
+
+    return '{:.1f} TB'.format(size)
+
+
+def clean_workchain_calculations(workchain):
+    """Clean the remote folders of all calculations called by a workchain, directly or indirectly, and report it.
+
+    :param workchain: the running `WorkChain` instance
+    :return: dictionary of calculation pk onto a `RemoteCleanupResult`
+    """
+    remote_folders = collections.OrderedDict()
+
+    for called_descendant in workchain.node.called_descendants:
+        if isinstance(called_descendant, orm.CalcJobNode):
+            try:
+                remote_folders[called_descendant.pk] = called_descendant.outputs.remote_folder
+            except (AttributeError, KeyError):
+                pass
+
+    results = clean_remote_folders(remote_folders)
+    cleaned = [pk for pk, result in results.items() if result.success]
+    failed = [pk for pk, result in results.items() if not result.success]
+
+    if cleaned:
+        size = sum(results[pk].size or 0 for pk in cleaned)
+        workchain.report('cleaned remote folders of calculations: {}'.format(' '.join(str(pk) for pk in cleaned)))
+        workchain.report('freed approximately {} on the remote computers'.format(format_size(size)))
+
+    for pk in failed:
+        workchain.report('failed to clean remote folder of calculation<{}>: {}'.format(pk, results[pk].error))
+
+    return results
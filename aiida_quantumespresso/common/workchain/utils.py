@@ -4,8 +4,10 @@ from __future__ import absolute_import
 
 from collections import namedtuple
 from functools import wraps
+import time
 
-ErrorHandler = namedtuple('ErrorHandler', 'priority method')
+ErrorHandler = namedtuple('ErrorHandler', 'priority method exit_codes')
+ErrorHandler.__new__.__defaults__ = (None,)
 """A namedtuple to define an error handler for a :class:`~aiida.engine.processes.workchains.workchain.WorkChain`.
 
 The priority determines in which order the error handling methods are executed, with
@@ -15,6 +17,7 @@ as its sole argument. If the condition of the error handler is met, it should re
 
 :param priority: integer denoting the error handlers priority
 :param method: the workchain class method
+:param exit_codes: optional tuple of the exit statuses to which the handler applies, if `None` it applies to all
 """
 
 ErrorHandlerReport = namedtuple('ErrorHandlerReport', 'is_handled do_break exit_code')
@@ -33,7 +36,7 @@ the 'do_break' field should be set to `True`
 """
 
 
-def register_error_handler(cls, priority=None):
+def register_error_handler(cls, priority=None, exit_codes=None):
     """Decoraten any function in an error handler :class:`.BaseRestartWorkChain` sub classes.
 
     The function expects two arguments, a workchain class and a priortity. The decorator will add the function as a
@@ -51,7 +54,9 @@ def register_error_handler(cls, priority=None):
         * `calculation`: This is the calculation that failed and needs to be investigated
 
     The function body should usually consist of a single conditional that checks the calculation if
-    the error that it is designed to handle is applicable. Although not required, it is advised that
+    the error that it is designed to handle is applicable. If the handler applies to specific exit statuses, these
+    should instead be passed as `exit_codes`, in which case the body does not have to check them again, since the
+    handler is only called for those statuses. Although not required, it is advised that
     the function return an :class:`.ErrorHandlerReport` tuple when its conditional was met. If an error was handled
     it should set `is_handled` to `True`. If no other error handlers should be considered set `do_break` to `True`.
 
@@ -61,7 +66,12 @@ def register_error_handler(cls, priority=None):
         the handler will not be automatically called during calculation failure handling. This is useful to define
         handlers that one only wants to call manually, for example in the `_handle_sanity_checks` and still profit
         from the other features of this decorator.
+    :param exit_codes: optional list of `ExitCode` instances or integer exit statuses. If specified, the handler will
+        only be called during the handling of a failed calculation if its exit status is one of these. This allows the
+        work chain to skip the handlers that do not apply without calling them.
     """
+    if exit_codes is not None:
+        exit_codes = tuple(sorted(set(getattr(exit_code, 'status', exit_code) for exit_code in exit_codes)))
 
     def error_handler_decorator(handler):
         """Decorate a function to dynamically register an error handler to a `WorkChain` class."""
@@ -75,7 +85,9 @@ def register_error_handler(cls, priority=None):
                 else:
                     self.report('{}'.format(handler.__name__))
 
+            start = time.time()
             result = handler(self, calculation)
+            record_error_handler_timing(self, handler.__name__, time.time() - start)
 
             # If a handler report is returned, attach the handler's name to node's attributes
             if isinstance(result, ErrorHandlerReport):
@@ -96,8 +108,68 @@ def register_error_handler(cls, priority=None):
 
         if not hasattr(cls, '_error_handlers'):
             cls._error_handlers = []  # pylint: disable=protected-access
-        cls._error_handlers.append(ErrorHandler(priority, error_handler))  # pylint: disable=protected-access
+        handler_tuple = ErrorHandler(priority, error_handler, exit_codes)
+        cls._error_handlers.append(handler_tuple)  # pylint: disable=protected-access
 
         return error_handler
 
     return error_handler_decorator
+
+
+def record_error_handler_timing(workchain, name, elapsed):
+    """Add the time spent in a call of an error handler to the timings of the workchain instance, if it keeps them.
+
+    The timings are kept in memory in the `_error_handler_timings` attribute of the instance, which maps the name of the
+    handler onto a tuple of the number of calls and the total time in seconds, such that a call does not cost a database
+    operation. The `BaseRestartWorkChain` stores the timings in the `error_handler_timings` extra of its node.
+
+    :param workchain: the workchain instance that called the handler
+    :param name: the name of the error handler
+    :param elapsed: the time spent in the call in seconds
+    """
+    timings = getattr(workchain, '_error_handler_timings', None)
+
+    if timings is not None:
+        calls, seconds = timings.get(name, (0, 0.))
+        timings[name] = (calls + 1, seconds + elapsed)
+
+
+class ErrorHandlerDispatchTable(object):  # pylint: disable=useless-object-inheritance
+    """Priority ordered table of the error handlers that are to be called for a failed calculation of a given status.
+
+    The table is compiled once from the registered :class:`.ErrorHandler` tuples, where those without a priority are
+    excluded since they are not called automatically. For each exit status to which specific handlers apply, the list
+    of handlers is merged with those that apply to all statuses, such that the dispatch is a single dictionary lookup.
+    The relative order of handlers with equal priority is that of their registration.
+    """
+
+    def __init__(self, handlers):
+        """Construct a new instance.
+
+        :param handlers: list of :class:`.ErrorHandler` tuples
+        """
+        self.number_of_handlers = len(handlers)
+
+        handlers = sorted([handler for handler in handlers if handler.priority], key=lambda x: x.priority, reverse=True)
+
+        self._handlers = handlers
+        self._generic = [handler for handler in handlers if handler.exit_codes is None]
+        self._by_exit_status = {}
+
+        statuses = set(status for handler in handlers for status in handler.exit_codes or ())
+
+        for status in statuses:
+            self._by_exit_status[status] = [
+                handler for handler in handlers if handler.exit_codes is None or status in handler.exit_codes
+            ]
+
+    def __len__(self):
+        return len(self._handlers)
+
+    def get_handlers(self, exit_status):
+        """Return the handlers that apply to a calculation with the given exit status, sorted by priority in reverse.
+
+        :param exit_status: the integer exit status of the failed calculation
+        :return: list of :class:`.ErrorHandler` tuples
+        """
+        return self._by_exit_status.get(exit_status, self._generic)
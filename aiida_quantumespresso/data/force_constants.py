@@ -6,7 +6,7 @@ import numpy
 from six.moves import range
 
 from qe_tools.constants import bohr_to_ang
-from aiida.orm import SinglefileData
+from aiida.orm import ArrayData, SinglefileData
 
 
 class ForceConstantsData(SinglefileData):
@@ -27,6 +27,43 @@ class ForceConstantsData(SinglefileData):
         for key, value in dictionary.items():
             self.set_attribute(key, value)
 
+        # Any force constants array that was cached for a previous file is no longer valid
+        self._force_constants = None  # pylint: disable=attribute-defined-outside-init
+
+    def get_array_data(self):
+        """Return a new `ArrayData` with the parsed force constants as the array `force_constants`.
+
+        The force constants cannot be stored in the repository of this node, since a `SinglefileData` can only contain
+        the force constants file itself. Instead, the returned node can be stored alongside it, such that the array
+        does not have to be parsed from the file again, see :py:meth:`PhononInterpolator.from_force_constants_data`.
+
+        :return: an unstored `ArrayData` node
+        :raises ValueError: if the force constants cannot be parsed from the file
+        """
+        array_data = ArrayData()
+        array_data.set_array('force_constants', self.force_constants)
+        return array_data
+
+    @property
+    def force_constants(self):
+        """Return the real-space interatomic force constants.
+
+        The force constants file is parsed on the first call and the result is cached on this instance, such that
+        subsequent calls do not read the repository again.
+
+        :return: numpy array with shape `qpoints_mesh + (3, 3, number_of_atoms, number_of_atoms)` with the elements
+            C(mi1, mi2, mi3, ji1, ji2, na1, na2), see `parse_q2r_force_constants_file`
+        """
+        force_constants = getattr(self, '_force_constants', None)
+
+        if force_constants is None:
+            lines = self.get_content().splitlines()
+            _, force_constants, _ = parse_q2r_force_constants_file(lines, also_force_constants=True)
+
+        self._force_constants = force_constants  # pylint: disable=attribute-defined-outside-init
+
+        return force_constants
+
     @property
     def number_of_species(self):
         """Return the number of atom species.
@@ -124,7 +161,7 @@ def parse_q2r_force_constants_file(lines, also_force_constants=False):
         * (ji1, ji2): axis of the displacement of the two atoms (from 1 to 3)
         * (na1, na2): atom numbers in the cell.
     """
-    # pylint: disable=too-many-statements,too-many-branches,too-many-nested-blocks
+    # pylint: disable=too-many-statements,too-many-branches
 
     parsed_data = {}
     warnings = []
@@ -205,32 +242,54 @@ def parse_q2r_force_constants_file(lines, also_force_constants=False):
 
         force_constants = ()
         if also_force_constants:
-            # read force_constants
-            force_constants = numpy.zeros(qpoints_mesh + (3, 3, nat, nat), dtype=float)
-            for ji1 in range(3):
-                for ji2 in range(3):
-                    for na1 in range(nat):
-                        for na2 in range(nat):
+            force_constants = parse_q2r_force_constants_block(lines[current_line:], qpoints_mesh, nat)
 
-                            indices = tuple([int(c) for c in lines[current_line].split()])
-                            current_line += 1
-                            if (ji1 + 1, ji2 + 1, na1 + 1, na2 + 1) != indices:
-                                raise ValueError('Wrong indices in force constants')
+    except (IndexError, ValueError) as exception:
+        raise ValueError(str(exception) + '\nForce constants file could not be parsed (incorrect file format)')
 
-                            for mi3 in range(qpoints_mesh[2]):
-                                for mi2 in range(qpoints_mesh[1]):
-                                    for mi1 in range(qpoints_mesh[0]):
+    return parsed_data, force_constants, warnings
 
-                                        line = lines[current_line].split()
-                                        indices = tuple(int(c) for c in line[:3])
 
-                                        if (mi1 + 1, mi2 + 1, mi3 + 1) != indices:
-                                            raise ValueError('Wrong supercell indices in force constants')
+def parse_q2r_force_constants_block(lines, qpoints_mesh, number_of_atoms):
+    """Parse the block with the real-space interatomic force constants at the end of a QE-Q2R force constants file.
 
-                                        force_constants[mi1, mi2, mi3, ji1, ji2, na1, na2] = float(line[3])
-                                        current_line += 1
+    The block consists of one record for each combination of displacement axes and atoms, in the order
+    `(ji1, ji2, na1, na2)` with `na2` running fastest. Each record is a line with these four indices followed by one
+    line `mi1 mi2 mi3 C` for each supercell vector, with `mi1` running fastest. Since every line has exactly four
+    columns, the entire block is converted to a single numpy array in one go and the force constants are obtained by
+    reshaping and transposing it, instead of assigning the elements one by one.
 
-    except (IndexError, ValueError) as exception:
-        raise ValueError(str(exception) + '\nForce constants file could not be parsed (incorrect file format)')
+    :param lines: list of lines starting with the first record of the force constants block
+    :param qpoints_mesh: length-3 tuple with the number of q-points in each direction
+    :param number_of_atoms: number of atoms in the unit cell
+    :return: the real-space force constants as a numpy array with shape `qpoints_mesh + (3, 3, nat, nat)`
+    :raises ValueError: if the block is incomplete or the indices of the records are not in the expected order
+    """
+    nat = number_of_atoms
+    nq1, nq2, nq3 = qpoints_mesh
+    number_of_records = 9 * nat * nat
+    record_length = nq1 * nq2 * nq3 + 1
+    number_of_lines = number_of_records * record_length
 
-    return parsed_data, force_constants, warnings
+    if len(lines) < number_of_lines:
+        raise ValueError('Incomplete force constants block')
+
+    try:
+        block = numpy.array(' '.join(lines[:number_of_lines]).split(), dtype=float)
+        block = block.reshape(number_of_records, record_length, 4)
+    except ValueError:
+        raise ValueError('Wrong format of the force constants block')
+
+    # The atom and axis indices of each record, in the order in which they are written by q2r.x
+    indices = numpy.indices((3, 3, nat, nat)).reshape(4, -1).T + 1
+    if not numpy.array_equal(block[:, 0, :], indices):
+        raise ValueError('Wrong indices in force constants')
+
+    # The supercell indices `(mi1, mi2, mi3)` of each line of a record, where `mi1` runs fastest
+    indices = numpy.indices((nq3, nq2, nq1)).reshape(3, -1).T[:, ::-1] + 1
+    if not (block[:, 1:, :3] == indices).all():
+        raise ValueError('Wrong supercell indices in force constants')
+
+    force_constants = block[:, 1:, 3].reshape(3, 3, nat, nat, nq3, nq2, nq1)
+
+    return numpy.ascontiguousarray(force_constants.transpose(6, 5, 4, 0, 1, 2, 3))
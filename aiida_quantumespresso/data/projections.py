@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""Sub class of `ArrayData` to store the projections and pdos of the Quantum ESPRESSO projwfc.x code in dense arrays."""
+from __future__ import absolute_import
+
+import numpy
+from six.moves import range
+
+from aiida.orm import ArrayData
+from aiida.plugins import OrbitalFactory
+
+try:
+    from collections.abc import Sequence
+except ImportError:  # Python 2
+    from collections import Sequence
+
+# The keys of the orbital dictionaries that are stored in the orbital table, with the dtype of the field
+ORBITAL_TABLE_FIELDS = (
+    ('kind_name', None),
+    ('angular_momentum', numpy.int32),
+    ('magnetic_number', numpy.int32),
+    ('radial_nodes', numpy.int32),
+    ('position', (numpy.float64, (3,))),
+)
+
+
+class OrbitalList(Sequence):
+    """Read-only sequence of `RealhydrogenOrbital` objects that are only constructed when they are accessed.
+
+    The orbitals are defined by dictionaries with the keyword arguments of a `RealhydrogenOrbital`, which is all that is
+    needed to count or inspect them. An orbital is constructed the first time it is accessed and cached thereafter.
+    """
+
+    def __init__(self, state_dicts):
+        """Construct a new instance from the dictionaries that define the orbitals.
+
+        :param state_dicts: list of dictionaries with the keyword arguments of a `RealhydrogenOrbital`
+        """
+        self.state_dicts = state_dicts
+        self._orbitals = [None] * len(state_dicts)
+        self._orbital_class = None
+
+    def __len__(self):
+        return len(self.state_dicts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        orbital = self._orbitals[index]
+
+        if orbital is None:
+            if self._orbital_class is None:
+                self._orbital_class = OrbitalFactory('realhydrogen')
+            orbital = self._orbital_class(**self.state_dicts[index])
+            self._orbitals[index] = orbital
+
+        return orbital
+
+
+class CompactProjectionData(ArrayData):
+    """Class to store the projections and pdos of all orbitals of a `projwfc.x` calculation in a few dense arrays.
+
+    Where a `ProjectionData` stores a projection, energy and pdos array per orbital, this node stores a single array
+    `projections` with shape `(nspin, nkpoints, nbands, norbitals)`, a single `pdos` array with shape
+    `(nspin, norbitals, nenergies)` with its `energy` axis, and the definitions of the orbitals in the structured array
+    `orbitals`. The accessors select the orbitals with the same keyword arguments as those of `ProjectionData`, but the
+    orbital objects are only constructed for the selected orbitals, and each array is read from the repository only
+    once per instance.
+    """
+
+    def set_projections(self, projections, energy, pdos, orbitals, dtype=numpy.float64):
+        """Set the projections, pdos and orbitals.
+
+        :param projections: array with shape `(nspin, nkpoints, nbands, norbitals)`
+        :param energy: array with the energies of the pdos, with shape `(nenergies,)`
+        :param pdos: array with shape `(nspin, norbitals, nenergies)`
+        :param orbitals: list of dictionaries with the keys `kind_name`, `angular_momentum`, `magnetic_number`,
+            `radial_nodes` and `position` of each orbital, as returned by `parse_state_lines`
+        :param dtype: the floating point dtype in which the projections and pdos are stored, `float32` halves the size
+        :raises ValueError: if the shapes of the arrays are inconsistent with each other or the number of orbitals
+        """
+        dtype = numpy.dtype(dtype)
+        projections = numpy.asarray(projections, dtype=dtype)
+        energy = numpy.asarray(energy, dtype=numpy.float64)
+        pdos = numpy.asarray(pdos, dtype=dtype)
+
+        if projections.ndim != 4 or projections.shape[3] != len(orbitals):
+            raise ValueError('the projections should have shape (nspin, nkpoints, nbands, {})'.format(len(orbitals)))
+
+        if energy.ndim != 1 or pdos.shape != (projections.shape[0], len(orbitals), energy.shape[0]):
+            raise ValueError('the pdos should have shape ({}, {}, {})'.format(
+                projections.shape[0], len(orbitals), energy.shape[0]))
+
+        self.set_array('projections', projections)
+        self.set_array('energy', energy)
+        self.set_array('pdos', pdos)
+        self.set_array('orbitals', build_orbital_table(orbitals))
+        self._cached_arrays = {}  # pylint: disable=attribute-defined-outside-init
+        self._orbital_list = None  # pylint: disable=attribute-defined-outside-init
+
+    def _get_cached_array(self, name):
+        """Return the array with the given name, which is read from the repository only on the first call.
+
+        :param name: the name of the array
+        :return: the numpy array
+        """
+        cache = getattr(self, '_cached_arrays', None)
+
+        if cache is None:
+            cache = self._cached_arrays = {}  # pylint: disable=attribute-defined-outside-init
+
+        if name not in cache:
+            cache[name] = self.get_array(name)
+
+        return cache[name]
+
+    @property
+    def number_of_spins(self):
+        """Return the number of spin channels.
+
+        :return: a scalar
+        """
+        return self.get_shape('projections')[0]
+
+    @property
+    def number_of_orbitals(self):
+        """Return the number of orbitals.
+
+        :return: a scalar
+        """
+        return self.get_shape('projections')[3]
+
+    def get_orbital_dicts(self):
+        """Return the dictionaries that define the orbitals, without constructing the orbital objects.
+
+        :return: list of dictionaries with the keyword arguments of a `RealhydrogenOrbital`
+        """
+        table = self._get_cached_array('orbitals')
+        orbitals = []
+
+        for row in table.tolist():
+            orbital = dict(zip(table.dtype.names, row))
+            orbital['position'] = list(orbital['position'])
+            orbitals.append(orbital)
+
+        return orbitals
+
+    def get_orbital_indices(self, **kwargs):
+        """Return the indices of the orbitals that match all the given keyword arguments.
+
+        The keys of the orbital table are matched in a vectorized way. Any other key of the orbital dictionary, for
+        example `spin`, requires the orbitals to be constructed to compare their `get_orbital_dict`.
+
+        :param kwargs: the values of the keys of the orbital dictionaries to select, for example `kind_name='O'`
+        :return: integer array with the indices of the selected orbitals
+        """
+        table = self._get_cached_array('orbitals')
+        mask = numpy.ones(len(table), dtype=bool)
+        remaining = {}
+
+        for key, value in kwargs.items():
+            if key == 'position':
+                mask &= numpy.all(numpy.isclose(table['position'], numpy.asarray(value, dtype=float)), axis=1)
+            elif key in table.dtype.names:
+                mask &= table[key] == value
+            else:
+                remaining[key] = value
+
+        indices = numpy.flatnonzero(mask)
+
+        if remaining:
+            orbitals = self._get_orbital_list()
+            indices = numpy.array([
+                index for index in indices
+                if all(orbitals[index].get_orbital_dict().get(key) == value for key, value in remaining.items())
+            ], dtype=int)
+
+        return indices
+
+    def _get_orbital_list(self):
+        """Return the `OrbitalList` of all orbitals, which is cached such that each orbital is constructed only once."""
+        orbitals = getattr(self, '_orbital_list', None)
+
+        if orbitals is None:
+            orbitals = OrbitalList(self.get_orbital_dicts())
+            self._orbital_list = orbitals  # pylint: disable=attribute-defined-outside-init
+
+        return orbitals
+
+    def get_orbitals(self, **kwargs):
+        """Return the orbitals that match all the given keyword arguments, like `ProjectionData.get_orbitals`.
+
+        :param kwargs: the values of the keys of the orbital dictionaries to select, for example `kind_name='O'`
+        :return: list of `RealhydrogenOrbital` objects
+        """
+        orbitals = self._get_orbital_list()
+        return [orbitals[index] for index in self.get_orbital_indices(**kwargs)]
+
+    def get_projections(self, spin=0, **kwargs):
+        """Return the projections of the selected orbitals, like `ProjectionData.get_projections`.
+
+        :param spin: the index of the spin channel
+        :param kwargs: the values of the keys of the orbital dictionaries to select, for example `kind_name='O'`
+        :return: list of tuples of an orbital and its projections with shape `(nkpoints, nbands)`
+        """
+        orbitals = self._get_orbital_list()
+        projections = self._get_cached_array('projections')[spin]
+        return [(orbitals[index], projections[:, :, index]) for index in self.get_orbital_indices(**kwargs)]
+
+    def get_pdos(self, spin=0, **kwargs):
+        """Return the pdos of the selected orbitals, like `ProjectionData.get_pdos`.
+
+        :param spin: the index of the spin channel
+        :param kwargs: the values of the keys of the orbital dictionaries to select, for example `kind_name='O'`
+        :return: list of tuples of an orbital, its pdos array and the energy array
+        """
+        orbitals = self._get_orbital_list()
+        energy = self._get_cached_array('energy')
+        pdos = self._get_cached_array('pdos')[spin]
+        return [(orbitals[index], pdos[index], energy) for index in self.get_orbital_indices(**kwargs)]
+
+    def get_projections_array(self, spin=None, **kwargs):
+        """Return the projections of the selected orbitals as a single dense array.
+
+        :param spin: the index of the spin channel, or `None` for all spin channels
+        :param kwargs: the values of the keys of the orbital dictionaries to select, for example `kind_name='O'`
+        :return: array with shape `(nspin, nkpoints, nbands, nselected)`, without the first dimension if `spin` is given
+        """
+        projections = self._get_cached_array('projections')
+
+        if spin is not None:
+            projections = projections[spin]
+
+        if kwargs:
+            projections = projections[..., self.get_orbital_indices(**kwargs)]
+
+        return projections
+
+
+def build_orbital_table(orbitals):
+    """Return the structured array with the definitions of the given orbitals.
+
+    :param orbitals: list of dictionaries with the keys `kind_name`, `angular_momentum`, `magnetic_number`,
+        `radial_nodes` and `position` of each orbital
+    :return: structured numpy array with one row per orbital
+    """
+    length = max([len(orbital['kind_name']) for orbital in orbitals] + [1])
+    dtype = [(key, 'U{}'.format(length) if field is None else field) for key, field in ORBITAL_TABLE_FIELDS]
+    rows = [tuple(orbital[key] for key, _ in ORBITAL_TABLE_FIELDS) for orbital in orbitals]
+    return numpy.array(rows, dtype=dtype)
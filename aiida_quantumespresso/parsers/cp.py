@@ -2,6 +2,9 @@
 from __future__ import absolute_import
 
 from distutils.version import LooseVersion
+import os
+import shutil
+import tempfile
 
 import numpy
 from aiida.common import NotExistent
@@ -10,7 +13,9 @@ from aiida.parsers import Parser
 from six.moves import zip
 
 from qe_tools.constants import bohr_to_ang, hartree_to_ev, timeau_to_sec
-from aiida_quantumespresso.parsers.parse_raw.cp import parse_cp_raw_output, parse_cp_traj_stanzas
+from aiida_quantumespresso.parsers.parse_raw.cp import (
+    parse_cp_raw_output, read_cp_traj_stanzas, scan_cp_traj_stanzas, select_cp_traj_frames
+)
 
 
 class CpParser(Parser):
@@ -85,114 +90,158 @@ class CpParser(Parser):
             ('velocities', 'vel', bohr_to_ang / timeau_to_sec * 10 ** 12, out_dict['number_of_atoms']),
         ]
 
-        for name, extension, scale, elements in trajectories:
-            try:
-                with out_folder.open('{}.{}'.format(self.node.process_class._PREFIX, extension)) as datafile:
-                    data = [l.split() for l in datafile]
-                    # POSITIONS stored in angstrom
-                traj_data = parse_cp_traj_stanzas(
-                    num_elements=elements,
-                    splitlines=data,
-                    prepend_name='{}_traj'.format(name),
-                    rescale=scale
-                )
-                # here initialize the dictionary. If the parsing of positions fails, though, I don't have anything
-                # out of the CP dynamics. Therefore, the calculation status is set to FAILED.
-                if extension != 'cel':
-                    raw_trajectory['{}_ordered'.format(name)] = self._get_reordered_array(
-                        traj_data['{}_traj_data'.format(name)],
-                        reordering
-                    )
-                else:
-                    raw_trajectory['cells'] = numpy.array(traj_data['cells_traj_data'])
-                if extension == 'pos':
-                    raw_trajectory['times'] = numpy.array(traj_data['{}_traj_times'.format(name)])
-            except IOError:
-                out_dict['warnings'].append('Unable to open the {} file... skipping.'.format(extension.upper()))
+        try:
+            settings = self.node.inputs.settings.get_dict()
+        except (AttributeError, NotExistent):
+            settings = {}
+
+        parser_options = settings.get(self.get_parser_settings_key(), None) or {}
+
+        # With the `trajectory_memmap` option, the arrays are written to `.npy` files in a temporary directory and
+        # memory-mapped, instead of being kept in memory, until they are copied into the `TrajectoryData`
+        dirpath_arrays = tempfile.mkdtemp() if parser_options.get('trajectory_memmap', False) else None
+        selected_steps = None
 
-        # =============== EVP trajectory ============================
         try:
-            matrix = numpy.genfromtxt(out_folder.open('{}.evp'.format(self._node.process_class._PREFIX)))
-            # there might be a different format if the matrix has one row only
             try:
-                matrix.shape[1]
-            except IndexError:
-                matrix = numpy.array(numpy.matrix(matrix))
-
-            if LooseVersion(out_dict['creator_version']) > LooseVersion('5.1'):
-                # Between version 5.1 and 5.1.1, someone decided to change
-                # the .evp output format, without any way to know that this
-                # happened... SVN commit 11158.
-                # I here use the version number to parse, plus some
-                # heuristics to check that I'm doing the right thing
-                #print "New version"
-                raw_trajectory['steps'] = numpy.array(matrix[:,0],dtype=int)
-                raw_trajectory['evp_times']                 = matrix[:,1]                    # TPS, ps
-                raw_trajectory['electronic_kinetic_energy'] = matrix[:,2] * hartree_to_ev    # EKINC, eV
-                raw_trajectory['cell_temperature']          = matrix[:,3]                    # TEMPH, K
-                raw_trajectory['ionic_temperature']         = matrix[:,4]                    # TEMPP, K
-                raw_trajectory['scf_total_energy']          = matrix[:,5] * hartree_to_ev    # ETOT, eV
-                raw_trajectory['enthalpy']                  = matrix[:,6] * hartree_to_ev    # ENTHAL, eV
-                raw_trajectory['enthalpy_plus_kinetic']     = matrix[:,7] * hartree_to_ev    # ECONS, eV
-                raw_trajectory['energy_constant_motion']    = matrix[:,8] * hartree_to_ev    # ECONT, eV
-                raw_trajectory['volume']                    = matrix[:,9] * (bohr_to_ang**3) # volume, angstrom^3
-                raw_trajectory['pressure']                  = matrix[:,10]                    # out_press, GPa
-            else:
-                #print "Old version"
-                raw_trajectory['steps'] = numpy.array(matrix[:,0],dtype=int)
-                raw_trajectory['electronic_kinetic_energy'] = matrix[:,1] * hartree_to_ev    # EKINC, eV
-                raw_trajectory['cell_temperature']          = matrix[:,2]                    # TEMPH, K
-                raw_trajectory['ionic_temperature']         = matrix[:,3]                    # TEMPP, K
-                raw_trajectory['scf_total_energy']          = matrix[:,4] * hartree_to_ev    # ETOT, eV
-                raw_trajectory['enthalpy']                  = matrix[:,5] * hartree_to_ev    # ENTHAL, eV
-                raw_trajectory['enthalpy_plus_kinetic']     = matrix[:,6] * hartree_to_ev    # ECONS, eV
-                raw_trajectory['energy_constant_motion']    = matrix[:,7] * hartree_to_ev    # ECONT, eV
-                raw_trajectory['volume']                    = matrix[:,8] * (bohr_to_ang**3) # volume, angstrom^3
-                raw_trajectory['pressure']                  = matrix[:,9]                    # out_press, GPa
-                raw_trajectory['evp_times']                  = matrix[:,10]                    # TPS, ps
-
-            # Huristics to understand if it's correct.
-            # A better heuristics could also try to fix possible issues
-            # (in new versions of QE, it's possible to recompile it with
-            # the __OLD_FORMAT flag to get back the old version format...)
-            # but I won't do it, as there may be also other columns swapped.
-            # Better to stop and ask the user to check what's going on.
-            max_time_difference = abs(
-                numpy.array(raw_trajectory['times']) -
-                numpy.array(raw_trajectory['evp_times'])).max()
-            if max_time_difference > 1.e-4: # It is typically ~1.e-7 due to roundoff errors
-                # If there is a large discrepancy
-                # it means there is something very weird going on...
+                for name, extension, scale, elements in trajectories:
+                    filename = '{}.{}'.format(self.node.process_class._PREFIX, extension)
+                    try:
+                        with out_folder.open(filename) as datafile:
+                            steps, times = scan_cp_traj_stanzas(datafile, elements)
+
+                        # The frames are selected on the positions, and the other files are read for the same steps
+                        if selected_steps is None:
+                            frames = select_cp_traj_frames(
+                                steps,
+                                stride=parser_options.get('trajectory_stride', 1),
+                                first_step=parser_options.get('trajectory_first_step', None),
+                                last_step=parser_options.get('trajectory_last_step', None),
+                            )
+                            selected_steps = steps[frames]
+                        else:
+                            frames = numpy.flatnonzero(numpy.isin(steps, selected_steps))
+
+                        # POSITIONS stored in angstrom
+                        with out_folder.open(filename) as datafile:
+                            traj_data = read_cp_traj_stanzas(
+                                datafile,
+                                num_elements=elements,
+                                frames=frames,
+                                rescale=scale,
+                                reordering=reordering if extension != 'cel' else None,
+                                filepath=os.path.join(dirpath_arrays, name + '.npy') if dirpath_arrays else None,
+                            )
+                    except IOError:
+                        out_dict['warnings'].append('Unable to open the {} file... skipping.'.format(extension.upper()))
+                        continue
+
+                    # here initialize the dictionary. If the parsing of positions fails, though, I don't have anything
+                    # out of the CP dynamics. Therefore, the calculation status is set to FAILED.
+                    if extension != 'cel':
+                        raw_trajectory['{}_ordered'.format(name)] = traj_data
+                    else:
+                        raw_trajectory['cells'] = traj_data
+                    if extension == 'pos':
+                        raw_trajectory['times'] = times[frames]
+            except ValueError as exception:
+                self.logger.error('Failed to parse the trajectory: {}'.format(exception))
                 return self.exit_codes.ERROR_READING_TRAJECTORY_DATA
 
-            # Delete evp_times in any case, it's a duplicate of 'times'
-            del raw_trajectory['evp_times']
-        except IOError:
-            out_dict['warnings'].append('Unable to open the EVP file... skipping.')
-
-        # get the symbols from the input
-        # TODO: I should have kinds in TrajectoryData
-        input_structure = self.node.inputs.structure
-        raw_trajectory['symbols'] = [str(i.kind_name) for i in input_structure.sites]
-
-        traj = TrajectoryData()
-        traj.set_trajectory(
-            stepids=raw_trajectory['steps'],
-            cells=raw_trajectory['cells'],
-            symbols=raw_trajectory['symbols'],
-            positions=raw_trajectory['positions_ordered'],
-            times=raw_trajectory['times'],
-            velocities=raw_trajectory['velocities_ordered'],
-        )
-
-        for this_name in evp_keys:
+            # =============== EVP trajectory ============================
             try:
-                traj.set_array(this_name,raw_trajectory[this_name])
-            except KeyError:
-                # Some columns may have not been parsed, skip
-                pass
-
-        self.out('output_trajectory', traj)
+                matrix = numpy.genfromtxt(out_folder.open('{}.evp'.format(self._node.process_class._PREFIX)))
+                # there might be a different format if the matrix has one row only
+                try:
+                    matrix.shape[1]
+                except IndexError:
+                    matrix = numpy.array(numpy.matrix(matrix))
+
+                if LooseVersion(out_dict['creator_version']) > LooseVersion('5.1'):
+                    # Between version 5.1 and 5.1.1, someone decided to change
+                    # the .evp output format, without any way to know that this
+                    # happened... SVN commit 11158.
+                    # I here use the version number to parse, plus some
+                    # heuristics to check that I'm doing the right thing
+                    #print "New version"
+                    raw_trajectory['steps'] = numpy.array(matrix[:,0],dtype=int)
+                    raw_trajectory['evp_times']                 = matrix[:,1]                    # TPS, ps
+                    raw_trajectory['electronic_kinetic_energy'] = matrix[:,2] * hartree_to_ev    # EKINC, eV
+                    raw_trajectory['cell_temperature']          = matrix[:,3]                    # TEMPH, K
+                    raw_trajectory['ionic_temperature']         = matrix[:,4]                    # TEMPP, K
+                    raw_trajectory['scf_total_energy']          = matrix[:,5] * hartree_to_ev    # ETOT, eV
+                    raw_trajectory['enthalpy']                  = matrix[:,6] * hartree_to_ev    # ENTHAL, eV
+                    raw_trajectory['enthalpy_plus_kinetic']     = matrix[:,7] * hartree_to_ev    # ECONS, eV
+                    raw_trajectory['energy_constant_motion']    = matrix[:,8] * hartree_to_ev    # ECONT, eV
+                    raw_trajectory['volume']                    = matrix[:,9] * (bohr_to_ang**3) # volume, angstrom^3
+                    raw_trajectory['pressure']                  = matrix[:,10]                    # out_press, GPa
+                else:
+                    #print "Old version"
+                    raw_trajectory['steps'] = numpy.array(matrix[:,0],dtype=int)
+                    raw_trajectory['electronic_kinetic_energy'] = matrix[:,1] * hartree_to_ev    # EKINC, eV
+                    raw_trajectory['cell_temperature']          = matrix[:,2]                    # TEMPH, K
+                    raw_trajectory['ionic_temperature']         = matrix[:,3]                    # TEMPP, K
+                    raw_trajectory['scf_total_energy']          = matrix[:,4] * hartree_to_ev    # ETOT, eV
+                    raw_trajectory['enthalpy']                  = matrix[:,5] * hartree_to_ev    # ENTHAL, eV
+                    raw_trajectory['enthalpy_plus_kinetic']     = matrix[:,6] * hartree_to_ev    # ECONS, eV
+                    raw_trajectory['energy_constant_motion']    = matrix[:,7] * hartree_to_ev    # ECONT, eV
+                    raw_trajectory['volume']                    = matrix[:,8] * (bohr_to_ang**3) # volume, angstrom^3
+                    raw_trajectory['pressure']                  = matrix[:,9]                    # out_press, GPa
+                    raw_trajectory['evp_times']                  = matrix[:,10]                    # TPS, ps
+
+                # Only keep the rows of the steps that were selected from the trajectory files
+                if selected_steps is not None:
+                    mask = numpy.isin(raw_trajectory['steps'], selected_steps)
+                    for key in ['steps', 'evp_times'] + evp_keys:
+                        if key in raw_trajectory:
+                            raw_trajectory[key] = raw_trajectory[key][mask]
+
+                # Huristics to understand if it's correct.
+                # A better heuristics could also try to fix possible issues
+                # (in new versions of QE, it's possible to recompile it with
+                # the __OLD_FORMAT flag to get back the old version format...)
+                # but I won't do it, as there may be also other columns swapped.
+                # Better to stop and ask the user to check what's going on.
+                max_time_difference = abs(
+                    numpy.array(raw_trajectory['times']) -
+                    numpy.array(raw_trajectory['evp_times'])).max()
+                if max_time_difference > 1.e-4: # It is typically ~1.e-7 due to roundoff errors
+                    # If there is a large discrepancy
+                    # it means there is something very weird going on...
+                    return self.exit_codes.ERROR_READING_TRAJECTORY_DATA
+
+                # Delete evp_times in any case, it's a duplicate of 'times'
+                del raw_trajectory['evp_times']
+            except IOError:
+                out_dict['warnings'].append('Unable to open the EVP file... skipping.')
+
+            # get the symbols from the input
+            # TODO: I should have kinds in TrajectoryData
+            input_structure = self.node.inputs.structure
+            raw_trajectory['symbols'] = [str(i.kind_name) for i in input_structure.sites]
+
+            traj = TrajectoryData()
+            traj.set_trajectory(
+                stepids=raw_trajectory['steps'],
+                cells=raw_trajectory['cells'],
+                symbols=raw_trajectory['symbols'],
+                positions=raw_trajectory['positions_ordered'],
+                times=raw_trajectory['times'],
+                velocities=raw_trajectory['velocities_ordered'],
+            )
+
+            for this_name in evp_keys:
+                try:
+                    traj.set_array(this_name,raw_trajectory[this_name])
+                except KeyError:
+                    # Some columns may have not been parsed, skip
+                    pass
+
+            self.out('output_trajectory', traj)
+        finally:
+            # Any output trajectory holds a copy of the arrays, so the memory-mapped files can always be removed here
+            raw_trajectory.clear()
+            self._remove_directory(dirpath_arrays)
 
         # Remove big dictionaries that would be redundant
         # For atoms and cell, there is a small possibility that nothing is parsed
@@ -237,6 +286,17 @@ class CpParser(Parser):
         output_params = Dict(dict=out_dict)
         self.out('output_parameters', output_params)
 
+    @staticmethod
+    def get_parser_settings_key():
+        """Return the key that contains the optional parser options in the `settings` input node."""
+        return 'parser_options'
+
+    @staticmethod
+    def _remove_directory(dirpath):
+        """Remove the temporary directory with memory-mapped arrays, if any."""
+        if dirpath is not None:
+            shutil.rmtree(dirpath, ignore_errors=True)
+
     def get_linkname_trajectory(self):
         """Returns the name of the link to the output_structure (None if not present)"""
         return 'output_trajectory'
@@ -283,10 +343,3 @@ class CpParser(Parser):
                                             enumerate(reordering)])
         reordering_inverse = [_[1] for _ in sorted_indexed_reordering]
         return reordering_inverse
-
-    def _get_reordered_list(self, origlist, reordering):
-        """Given a list to reorder, a list of integer positions with the new order, return the reordered list."""
-        return [origlist[e] for e in reordering]
-
-    def _get_reordered_array(self, _input, reordering):
-        return numpy.array([self._get_reordered_list(i, reordering) for i in _input])
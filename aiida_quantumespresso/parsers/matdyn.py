@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import
 
-from six.moves import range
+import io
+import re
+import warnings
+
+import numpy
+import six
 
 from aiida import orm
 from aiida.common import exceptions
@@ -31,6 +36,14 @@ class MatdynParser(Parser):
             self.logger.error('Computation did not finish properly')
             return self.exit_codes.ERROR_JOB_NOT_DONE
 
+        try:
+            parameters = self.node.inputs.parameters.get_dict()
+        except (AttributeError, exceptions.NotExistent):
+            parameters = {}
+
+        if MatdynCalculation.is_dos_calculation(parameters):
+            return self.parse_dos(output_folder)
+
         if filename_frequencies not in output_folder.list_object_names():
             self.logger.error("The frequencies output file '{}' was not found but is required".format(filename_stdout))
             return self.exit_codes.ERROR_READING_OUTPUT_FILE
@@ -44,7 +57,8 @@ class MatdynParser(Parser):
             kpoints_for_bands = orm.KpointsData()
             kpoints_for_bands.set_kpoints(kpoints)
 
-        parsed_data = parse_raw_matdyn_phonon_file(output_folder.get_object_content(filename_frequencies))
+        with output_folder.open(filename_frequencies, 'r') as handle:
+            parsed_data = read_matdyn_phonon_frequencies(handle)
 
         try:
             num_kpoints = parsed_data.pop('num_kpoints')
@@ -70,6 +84,52 @@ class MatdynParser(Parser):
 
         return
 
+    def parse_dos(self, output_folder):
+        """Parse the phonon density of states file of a calculation with `dos` set to `True` into an `XyData`.
+
+        :param output_folder: the retrieved folder
+        :return: an exit code if the file is missing or cannot be parsed, `None` otherwise
+        """
+        filename_dos = MatdynCalculation._PHONON_DOS_NAME  # pylint: disable=protected-access
+
+        if filename_dos not in output_folder.list_object_names():
+            self.logger.error("The density of states file '{}' was not found but is required".format(filename_dos))
+            return self.exit_codes.ERROR_READING_DOS_FILE
+
+        with output_folder.open(filename_dos, 'r') as handle:
+            parsed_data = read_matdyn_phonon_dos(handle)
+
+        for message in parsed_data['warnings']:
+            self.logger.error(message)
+
+        if 'dos' not in parsed_data:
+            return self.exit_codes.ERROR_READING_DOS_FILE
+
+        frequencies = parsed_data.pop('frequencies')
+        arrays = [parsed_data.pop('dos')]
+        names = ['dos']
+
+        for index, pdos in enumerate(parsed_data.pop('pdos', [])):
+            arrays.append(pdos)
+            names.append('pdos_atom_{}'.format(index + 1))
+
+        output_dos = orm.XyData()
+        output_dos.set_x(frequencies, 'frequency', 'THz')
+        output_dos.set_y(arrays, names, ['states/THz'] * len(arrays))
+
+        self.out('output_parameters', orm.Dict(dict=parsed_data))
+        self.out('output_phonon_dos', output_dos)
+
+        return
+
+
+# Matches a minus sign that directly follows a digit, which happens when a negative number fills its whole fixed-width
+# Fortran field, such that it is glued to the previous number, e.g. `-1204.1234-1020.5360`
+REGEX_GLUED_NEGATIVE = re.compile(r'(?<=[\d.])-')
+
+# Matches the header of the frequencies file, e.g. ` &plot nbnd=   6, nks=   1 /`
+REGEX_HEADER = re.compile(r'nbnd=\s*(\d+)\s*,\s*nks=\s*(\d+)\s*/')
+
 
 def parse_raw_matdyn_phonon_file(phonon_frequencies):
     """Parses the phonon frequencies file.
@@ -81,58 +141,193 @@ def parse_raw_matdyn_phonon_file(phonon_frequencies):
          * num_kpoints: number of kpoints read from the file
          * phonon_bands: BandsData object with the bands for each kpoint
     """
-    import numpy
-    import re
+    return read_matdyn_phonon_frequencies(io.StringIO(six.text_type(phonon_frequencies)))
+
+
+def read_matdyn_phonon_frequencies(handle, chunk_size=2**22):
+    """Read the phonon frequencies file from a file handle, in chunks that are each converted at once.
 
+    After the header with the number of bands and kpoints, the file contains for each kpoint a line with its three
+    coordinates followed by the frequencies, written in fixed-width Fortran fields. Each chunk of whole lines is
+    converted at once with :py:func:`convert_chunk` and copied into a preallocated array. The file is therefore never
+    loaded as a whole and no python object is created per number.
+
+    :param handle: a file handle opened in text mode
+    :param chunk_size: the number of characters that are read and converted at once
+    :return dict parsed_data: keys:
+         * warnings: parser warnings raised
+         * num_kpoints: number of kpoints read from the file
+         * phonon_bands: numpy array with shape `(num_kpoints, num_bands)` with the frequencies in THz
+    """
     parsed_data = {}
     parsed_data['warnings'] = []
 
-    # extract numbere of bands and kpoints
-    try:
-        num_bands = int(phonon_frequencies.split('=')[1].split(',')[0])
-        num_kpoints = int(phonon_frequencies.split('=')[2].split('/')[0])
-        parsed_data['num_kpoints'] = num_kpoints
-    except (ValueError, IndexError):
+    # extract number of bands and kpoints
+    header = ''
+    while '/' not in header:
+        line = handle.readline()
+        if not line:
+            break
+        header += line
+
+    match = REGEX_HEADER.search(header)
+
+    if match is None:
         parsed_data['warnings'].append('Number of bands or kpoints unreadable in phonon frequencies file')
         return parsed_data
 
-    # initialize array of frequencies
-    freq_matrix = numpy.zeros((num_kpoints, num_bands))
+    num_bands, num_kpoints = int(match.group(1)), int(match.group(2))
+    parsed_data['num_kpoints'] = num_kpoints
 
-    split_data = phonon_frequencies.split()
-    # discard the header of the file
-    raw_data = split_data[split_data.index('/') + 1:]
+    # each kpoint consists of its three coordinates followed by its frequencies
+    values = numpy.empty(num_kpoints * (3 + num_bands))
+    count = 0
 
-    # try to improve matdyn deficiencies
-    corrected_data = []
-    for b in raw_data:
+    for chunk in iterate_line_chunks(handle, chunk_size):
         try:
-            corrected_data.append(float(b))
+            converted = convert_chunk(chunk)
         except ValueError:
-            # case in which there are two frequencies attached like -1204.1234-1020.536
-            if '-' in b:
-                c = re.split('(-)', b)
-                d = [i for i in c if i is not '']
-                for i in range(0, len(d), 2):  # d should have an even number of elements
-                    corrected_data.append(float(d[i] + d[i + 1]))
-            else:
-                # I don't know what to do
-                parsed_data['warnings'].append('Bad formatting of frequencies')
-                return parsed_data
+            parsed_data['warnings'].append('Bad formatting of frequencies')
+            return parsed_data
+
+        converted = converted[:values.size - count]
+        values[count:count + converted.size] = converted
+        count += converted.size
+
+    if count < values.size:
+        parsed_data['warnings'].append('Error while parsing the frequencies, dimension exceeded')
+        return parsed_data
+
+    parsed_data['phonon_bands'] = values.reshape(num_kpoints, 3 + num_bands)[:, 3:] * invcm_to_THz  # from cm-1 to THz
+
+    return parsed_data
+
+
+def read_matdyn_phonon_dos(handle, chunk_size=2**22):
+    """Read the phonon density of states file from a file handle, in chunks that are each converted at once.
 
-    counter = 3
-    for i in range(num_kpoints):
-        for j in range(num_bands):
-            try:
-                freq_matrix[i, j] = corrected_data[counter] * invcm_to_THz  # from cm-1 to THz
-            except ValueError:
-                parsed_data['warnings'].append('Error while parsing the frequencies')
-            except IndexError:
-                parsed_data['warnings'].append('Error while parsing the frequencies, dimension exceeded')
+    After the comment lines of the header, each line contains a frequency in cm^-1, the density of states and, as of
+    Quantum ESPRESSO v6.2, the density of states projected on each atom, in states/cm^-1.
+
+    :param handle: a file handle opened in text mode
+    :param chunk_size: the number of characters that are read and converted at once
+    :return dict parsed_data: keys:
+         * warnings: parser warnings raised
+         * frequencies: numpy array with the frequencies in THz
+         * dos: numpy array with the density of states in states/THz
+         * pdos: numpy array with shape `(number_of_atoms, number_of_frequencies)` with the projected density of
+           states in states/THz, only if present in the file
+    """
+    parsed_data = {}
+    parsed_data['warnings'] = []
+
+    line = handle.readline()
+    while line.lstrip().startswith('#'):
+        line = handle.readline()
+
+    try:
+        chunks = [convert_chunk(line)]
+        number_of_columns = chunks[0].size
+
+        for chunk in iterate_line_chunks(handle, chunk_size):
+            converted = convert_chunk(chunk)
+            number_of_rows = sum(1 for row in chunk.splitlines() if row.strip())
+
+            # the number of values of a chunk is only a multiple of its number of rows if every row is complete
+            if converted.size != number_of_rows * number_of_columns:
+                parsed_data['warnings'].append('Incomplete or empty phonon density of states file')
                 return parsed_data
-            counter += 1
-        counter += 3  # move past the kpoint coordinates
 
-    parsed_data['phonon_bands'] = freq_matrix
+            chunks.append(converted)
+    except ValueError:
+        parsed_data['warnings'].append('Bad formatting of the phonon density of states')
+        return parsed_data
+
+    if number_of_columns < 2:
+        parsed_data['warnings'].append('Incomplete or empty phonon density of states file')
+        return parsed_data
+
+    values = numpy.concatenate(chunks).reshape(-1, number_of_columns)
+    parsed_data['frequencies'] = values[:, 0] * invcm_to_THz  # from cm-1 to THz
+    parsed_data['dos'] = values[:, 1] / invcm_to_THz  # from states/cm-1 to states/THz
+
+    if number_of_columns > 2:
+        parsed_data['pdos'] = values[:, 2:].T / invcm_to_THz
 
     return parsed_data
+
+
+def iterate_line_chunks(handle, chunk_size):
+    """Yield chunks of whole lines that are read from the file handle with about the given number of characters.
+
+    :param handle: a file handle opened in text mode
+    :param chunk_size: the number of characters that are read at once
+    """
+    remainder = ''
+
+    while True:
+        content = handle.read(chunk_size)
+
+        if not content:
+            break
+
+        # only whole lines are yielded, such that no number is split over two chunks
+        chunk = remainder + content
+        end = chunk.rfind('\n') + 1
+        chunk, remainder = chunk[:end], chunk[end:]
+
+        if chunk:
+            yield chunk
+
+    if remainder:
+        yield remainder
+
+
+def convert_chunk(chunk):
+    """Convert a chunk of lines with numbers written in fixed-width Fortran fields to a flat array.
+
+    A negative number that fills its whole field is glued to the previous number, so a space is inserted before each
+    minus sign that is not the sign of an exponent, after which the chunk is converted with a single call of
+    `numpy.fromstring`. Since that call stops at the first field that is not a number, the number of converted values
+    is checked against the number of fields, which are counted by :py:func:`count_fields`.
+
+    :param chunk: string with whole lines of numbers
+    :return: flat numpy array with the numbers
+    :raises ValueError: if the chunk contains text that cannot be converted to numbers
+    """
+    # Without exponents every minus is a sign, in which case a plain replace is much faster than the regex
+    if 'E' in chunk or 'e' in chunk:
+        chunk = REGEX_GLUED_NEGATIVE.sub(' -', chunk)
+    else:
+        chunk = chunk.replace('-', ' -')
+
+    with warnings.catch_warnings():
+        # Depending on the version, numpy raises, warns or silently stops at text that cannot be converted, so instead
+        # the number of converted values is compared to the number of fields separated by whitespace
+        warnings.simplefilter('ignore', DeprecationWarning)
+        converted = numpy.fromstring(chunk, sep=' ')
+
+    number_of_fields = count_fields(chunk)
+
+    if converted.size != number_of_fields:
+        raise ValueError('only {} of the {} fields are numbers'.format(converted.size, number_of_fields))
+
+    return converted
+
+
+def count_fields(chunk):
+    """Return the number of fields separated by whitespace, counted on the characters without splitting the chunk.
+
+    :param chunk: string with whole lines of fields
+    :return: the number of fields
+    """
+    characters = numpy.frombuffer(chunk.encode('ascii', 'replace'), dtype=numpy.uint8)
+
+    if not characters.size:
+        return 0
+
+    # the whitespace characters are the space and the range from the horizontal tab to the carriage return
+    is_space = (characters == 32) | ((characters >= 9) & (characters <= 13))
+
+    # every field starts with a character that is not whitespace and either opens the chunk or follows whitespace
+    return int(not is_space[0]) + int(numpy.count_nonzero(is_space[:-1] & ~is_space[1:]))
@@ -9,13 +9,16 @@ from aiida.orm import Dict
 from aiida.parsers.parser import Parser
 from aiida_quantumespresso.parsers import convert_qe2aiida_structure, QEOutputParsingError
 from aiida_quantumespresso.parsers.parse_raw.pw import reduce_symmetries
-from aiida_quantumespresso.parsers.parse_raw.pw import parse_stdout as parse_pw_stdout
+from aiida_quantumespresso.parsers.parse_raw.pw_stream import parse_stdout_stream as parse_pw_stdout
 from aiida_quantumespresso.parsers.parse_xml.pw.parse import parse_xml as parse_pw_xml
 from aiida_quantumespresso.parsers.parse_xml.pw.exceptions import XMLParseError, XMLUnsupportedFormatError
 from aiida_quantumespresso.parsers.parse_raw.neb import parse_raw_output_neb
 from aiida_quantumespresso.parsers.pw import PwParser
 from aiida_quantumespresso.calculations.pw import PwCalculation
 
+# The valid values of the `image_parser_pool` parser option
+IMAGE_PARSER_POOLS = ('serial', 'thread')
+
 
 class NebParser(Parser):
     """`Parser` implementation for the `NebCalculation` calculation job class."""
@@ -69,11 +72,15 @@ class NebParser(Parser):
         # load the neb input parameters dictionary
         neb_input_dict = self.node.inputs.parameters.get_dict()
 
-        stdout_abspath = os.path.join(out_folder._repository._get_base_folder().abspath, filename_stdout)
+        try:
+            stdout = out_folder.get_object_content(filename_stdout)
+        except IOError:
+            self.logger.error("The standard output file '{}' could not be read".format(filename_stdout))
+            return self.exit_codes.ERROR_READING_OUTPUT_FILE
 
         # First parse the Neb output
         try:
-            neb_out_dict, iteration_data, raw_successful = parse_raw_output_neb(stdout_abspath, neb_input_dict)
+            neb_out_dict, iteration_data, raw_successful = parse_raw_output_neb(stdout, neb_input_dict)
             # TODO: why do we ignore raw_successful ?
         except QEOutputParsingError as exc:
             self.logger.error('QEOutputParsingError in parse_raw_output_neb: {}'.format(exc))
@@ -101,51 +108,51 @@ class NebParser(Parser):
 
         # Now parse the information from the individual pw calculations for the different images
         image_data = {}
+        image_parse_times = {}
         positions = []
         cells = []
-        # for each image...
+
+        # The output files of the images are read here, such that the workers only have to parse their content
+        arguments = []
+
         for i in range(num_images):
-            # check if any of the known XML output file names are present, and parse the first that we find
+            # check if any of the known XML output file names are present, and read the first that we find
             relative_output_folder = os.path.join('{}_{}'.format(PREFIX, i + 1), '{}.save'.format(PREFIX))
-            retrieved_files = self.retrieved.list_object_names(relative_output_folder)
+            retrieved_files = out_folder.list_object_names(relative_output_folder)
             for xml_filename in PwCalculation.xml_filenames:
                 if xml_filename in retrieved_files:
-                    xml_file_path = os.path.join(relative_output_folder, xml_filename)
                     try:
-                        with out_folder.open(xml_file_path) as xml_file:
-                            parsed_data_xml, logs_xml = parse_pw_xml(xml_file, None, include_deprecated_v2_keys)
+                        content_xml = out_folder.get_object_content(os.path.join(relative_output_folder, xml_filename))
                     except IOError:
                         return self.exit_codes.ERROR_OUTPUT_XML_READ
-                    except XMLParseError:
-                        return self.exit_codes.ERROR_OUTPUT_XML_PARSE
-                    except XMLUnsupportedFormatError:
-                        return self.exit_codes.ERROR_OUTPUT_XML_FORMAT
-                    except Exception:
-                        import traceback
-                        traceback.print_exc()
-                        return self.exit_codes.ERROR_UNEXPECTED_PARSER_EXCEPTION
-                    # this image is dealt with, so break the inner loop and go to the next image
                     break
             # otherwise, if none of the filenames we tried exists, exit with an error
             else:
                 self.logger.error('No xml output file found for image {}'.format(i + 1))
                 return self.exit_codes.ERROR_MISSING_XML_FILE
 
-            # look for pw output and parse it
-            pw_out_file = os.path.join('{}_{}'.format(PREFIX, i + 1), 'PW.out')
             try:
-                with out_folder.open(pw_out_file, 'r') as f:
-                    pw_out_text = f.read()  # Note: read() and not readlines()
+                content_stdout = out_folder.get_object_content(os.path.join('{}_{}'.format(PREFIX, i + 1), 'PW.out'))
             except IOError:
                 self.logger.error('No pw output file found for image {}'.format(i + 1))
                 return self.exit_codes.ERROR_READING_OUTPUT_FILE
 
-            try:
-                parsed_data_stdout, logs_stdout = parse_pw_stdout(pw_out_text, pw_input_dict, parser_options, parsed_data_xml)
-            except Exception:
-                import traceback
-                traceback.print_exc()
-                return self.exit_codes.ERROR_UNEXPECTED_PARSER_EXCEPTION
+            arguments.append((content_xml, content_stdout, pw_input_dict, parser_options, include_deprecated_v2_keys))
+
+        try:
+            image_results = self.parse_images(arguments, parser_options)
+        except ValueError as exception:
+            self.logger.error(str(exception))
+            return self.exit_codes.ERROR_INVALID_OUTPUT
+
+        # for each image...
+        for i, image_result in enumerate(image_results):
+            exit_code_label, message, parsed_data_xml, parsed_data_stdout, logs_stdout, parse_times = image_result
+
+            if exit_code_label is not None:
+                if message:
+                    self.logger.error(message)
+                return getattr(self.exit_codes, exit_code_label)
 
             parsed_structure = parsed_data_stdout.pop('structure', {})
             parsed_trajectory = parsed_data_stdout.pop('trajectory', {})
@@ -171,6 +178,7 @@ class NebParser(Parser):
 
             key = 'pw_output_image_{}'.format(i + 1)
             image_data[key] = parsed_parameters
+            image_parse_times[key] = parse_times
 
             positions.append([site.position for site in structure_data.sites])
             cells.append(structure_data.cell)
@@ -185,6 +193,8 @@ class NebParser(Parser):
         # Symbols can be obtained simply from the last image
         symbols = [str(site.kind_name) for site in structure_data.sites]
 
+        neb_out_dict['image_parse_times'] = image_parse_times
+
         output_params = Dict(dict=dict(list(neb_out_dict.items()) + list(image_data.items())))
         self.out('output_parameters', output_params)
 
@@ -229,7 +239,99 @@ class NebParser(Parser):
 
         return
 
+    @staticmethod
+    def parse_images(arguments, parser_options):
+        """Parse the output files of all images, optionally in parallel with a pool of threads.
+
+        The pool is configured with the following parser options:
+
+            * `image_parser_pool`: either 'serial' or 'thread', by default 'serial'. Since the XML and stdout parsers
+              are mostly pure python, the threads only overlap the parts that release the GIL. A pool of processes is
+              not supported, because the parser runs inside a daemon worker, which must not be forked.
+            * `image_parser_workers`: the maximum number of workers of the pool, by default the number of images, but at
+              most the number of CPUs
+
+        :param arguments: list with a tuple of arguments for `parse_image` for each image
+        :param parser_options: the dictionary of parser options
+        :return: list with the return value of `parse_image` for each image, in the same order as `arguments`
+        :raises ValueError: if the parser options have an invalid value
+        """
+        from multiprocessing import cpu_count
+        from multiprocessing.pool import ThreadPool
+
+        parser_options = parser_options or {}
+        pool_type = parser_options.get('image_parser_pool', 'serial')
+        workers = parser_options.get('image_parser_workers', min(len(arguments), cpu_count()))
+
+        if pool_type not in IMAGE_PARSER_POOLS:
+            raise ValueError('invalid `image_parser_pool` {}, choose from {}'.format(pool_type, IMAGE_PARSER_POOLS))
+
+        if not isinstance(workers, six.integer_types) or isinstance(workers, bool) or workers < 1:
+            raise ValueError('invalid `image_parser_workers` {}, should be a positive integer'.format(workers))
+
+        if pool_type == 'serial' or workers == 1 or len(arguments) == 1:
+            return [parse_image(argument) for argument in arguments]
+
+        pool = ThreadPool(processes=min(workers, len(arguments)))
+
+        try:
+            return pool.map(parse_image, arguments)
+        finally:
+            pool.close()
+            pool.join()
+
     @staticmethod
     def get_parser_settings_key():
         """Return the key that contains the optional parser options in the `settings` input node."""
         return 'parser_options'
+
+
+def parse_image(arguments):
+    """Parse the content of the XML and stdout output files of a single image of a NEB calculation.
+
+    This is a module level function that takes only plain python objects, such that it can be run by a worker of a pool.
+    Errors are therefore not raised but returned as the label of the exit code that the parser should return.
+
+    :param arguments: tuple of the content of the XML and stdout output files of the image, the pw input parameters
+        dictionary, the parser options and the boolean `include_deprecated_v2_keys`
+    :return: tuple of the exit code label and error message, which are both `None` if parsing was successful, the raw
+        parsed data of the XML and stdout, the stdout logs and a dictionary with the parse time in seconds of the
+        `xml` and `stdout` output files and the `total`
+    """
+    # pylint: disable=broad-except
+    import io
+    import time
+    import traceback
+
+    content_xml, content_stdout, pw_input_dict, parser_options, include_deprecated_v2_keys = arguments
+
+    parse_times = {}
+    time_start = time.time()
+
+    try:
+        parsed_data_xml, _ = parse_pw_xml(io.StringIO(content_xml), None, include_deprecated_v2_keys)
+    except XMLParseError:
+        return 'ERROR_OUTPUT_XML_PARSE', None, None, None, None, None
+    except XMLUnsupportedFormatError:
+        return 'ERROR_OUTPUT_XML_FORMAT', None, None, None, None, None
+    except Exception:
+        return 'ERROR_UNEXPECTED_PARSER_EXCEPTION', traceback.format_exc(), None, None, None, None
+
+    time_xml = time.time()
+    parse_times['xml'] = time_xml - time_start
+
+    try:
+        parsed_data_stdout, logs_stdout = parse_pw_stdout(
+            content_stdout, pw_input_dict, parser_options, parsed_data_xml
+        )
+    except Exception:
+        return 'ERROR_UNEXPECTED_PARSER_EXCEPTION', traceback.format_exc(), None, None, None, None
+
+    time_end = time.time()
+    parse_times['stdout'] = time_end - time_xml
+    parse_times['total'] = time_end - time_start
+
+    # Only keep the lists of messages that are used, such that the result contains only plain python objects
+    logs_stdout = {'warning': list(logs_stdout['warning']), 'error': list(logs_stdout['error'])}
+
+    return None, None, parsed_data_xml, parsed_data_stdout, logs_stdout, parse_times
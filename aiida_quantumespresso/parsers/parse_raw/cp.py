@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import
+import itertools
 from xml.dom.minidom import parseString
+
+import numpy
 from aiida_quantumespresso.parsers import QEOutputParsingError, get_parser_info
 from aiida_quantumespresso.parsers.parse_xml.pw.legacy import (read_xml_card,
                    parse_xml_child_integer,xml_card_header,parse_xml_child_bool,
@@ -10,56 +13,134 @@ from aiida_quantumespresso.parsers.parse_xml.pw.legacy import (read_xml_card,
 from six.moves import range
 
 
-def parse_cp_traj_stanzas(num_elements, splitlines, prepend_name, rescale=1.):
-    """
-    num_elements: Number of lines (with three elements) between lines with two only
-    elements (containing step number and time in ps).
-    num_elements is 3 for cell, and the number of atoms for coordinates and positions.
+# Number of lines of a stanza file that are read and converted at once by `read_cp_traj_stanzas`
+DEFAULT_CHUNK_LINES = 20000
+
 
-    splitlines: a list of lines of the file, already split in pieces using string.split
+def scan_cp_traj_stanzas(handle, num_elements):
+    """Return the step numbers and times of all the stanzas in a CP trajectory file, without reading the data.
 
-    prepend_name: a string to be prepended to the name of keys returned
-    in the return dictionary.
+    This is the first pass of reading a trajectory file, which is needed to allocate the arrays for the selected frames
+    before any of the data is converted. Only the header lines are parsed, so the memory used is proportional to the
+    number of frames but not to the number of elements.
 
-    rescale: the values in each stanza are multiplied by this factor, for units conversion
+    :param handle: filelike object of the `.pos`, `.cel` or `.vel` file, which will be read until the end
+    :param num_elements: number of lines with three elements after each line with the step and time
+    :return: tuple of integer array of step numbers and float array of times in ps
+    :raises ValueError: if a header line does not have two columns or the last stanza is incomplete
     """
     steps = []
     times = []
-    stanzas = []
-    this_stanza = []
-    start_stanza = False
     linenum = -1
-    try:
-        for linenum, l in enumerate(splitlines):
-            if len(l) == 2:
-                steps.append(int(l[0]))
-                times.append(float(l[1]))
-                start_stanza = True
-                if len(this_stanza) != 0:
-                    raise ValueError('Wrong position of short line.')
-            elif len(l) == 3:
-                if len(this_stanza) == 0 and not start_stanza:
-                    raise ValueError('Wrong position of long line.')
-                start_stanza = False
-                this_stanza.append([float(l[0])*rescale,float(l[1])*rescale,float(l[2])*rescale])
-                if len(this_stanza) == num_elements:
-                    stanzas.append(this_stanza)
-                    this_stanza = []
-            else:
-                raise ValueError('Wrong line length ({})'.format(len(l)))
-        if len(this_stanza) != 0:
-            raise ValueError('Wrong length of last block ({} lines instead of 0).'
-                             .format(len(this_stanza)))
-        if len(steps) != len(stanzas):
-            raise ValueError('Length mismatch between number of steps and number of defined stanzas.')
-        return {
-            '{}_steps'.format(prepend_name): steps,
-            '{}_times'.format(prepend_name): times,
-            '{}_data'.format(prepend_name): stanzas,
-            }
-    except Exception as e:
-        e.message = 'At line {}: {}'.format(linenum + 1, e)
-        raise e
+    stanza_length = num_elements + 1
+
+    for linenum, line in enumerate(handle):
+        if linenum % stanza_length == 0:
+            columns = line.split()
+            if len(columns) != 2:
+                raise ValueError('At line {}: Wrong line length ({}) of the header of a stanza.'.format(
+                    linenum + 1, len(columns)))
+            steps.append(int(columns[0]))
+            times.append(float(columns[1]))
+
+    if (linenum + 1) % stanza_length != 0:
+        raise ValueError('Wrong length of last block ({} lines instead of {}).'.format(
+            (linenum + 1) % stanza_length - 1, num_elements))
+
+    return numpy.array(steps, dtype=int), numpy.array(times, dtype=float)
+
+
+def select_cp_traj_frames(steps, stride=1, first_step=None, last_step=None):
+    """Return the indices of the frames to import from a trajectory, given a window of step numbers and a stride.
+
+    :param steps: array with the step number of each frame, as returned by `scan_cp_traj_stanzas`
+    :param stride: import only every `stride`-th frame within the window, starting with the first
+    :param first_step: the first step number of the window, by default the first step
+    :param last_step: the last step number of the window (inclusive), by default the last step
+    :return: sorted integer array with the indices of the selected frames
+    """
+    if stride < 1:
+        raise ValueError('the stride should be a positive integer, got {}'.format(stride))
+
+    mask = numpy.ones(len(steps), dtype=bool)
+
+    if first_step is not None:
+        mask &= steps >= first_step
+
+    if last_step is not None:
+        mask &= steps <= last_step
+
+    return numpy.flatnonzero(mask)[::stride]
+
+
+def read_cp_traj_stanzas(handle, num_elements, frames, rescale=1., reordering=None, filepath=None,
+                         chunk_lines=DEFAULT_CHUNK_LINES):
+    """Read the selected frames of a CP trajectory file into a preallocated array, one chunk of lines at a time.
+
+    The stanzas are read in chunks of at most `chunk_lines` lines, and only chunks that contain selected frames are
+    converted to floats, such that the peak memory apart from the returned array is proportional to a single chunk.
+    If `filepath` is given, the array is a `numpy.memmap` of a `.npy` file at that location instead of being kept in
+    memory.
+
+    :param handle: filelike object of the `.pos`, `.cel` or `.vel` file, positioned at the start of the file
+    :param num_elements: number of lines with three elements after each line with the step and time
+    :param frames: sorted array with the indices of the frames to read, as returned by `select_cp_traj_frames`
+    :param rescale: the values are multiplied by this factor, for units conversion
+    :param reordering: optional list such that element `i` of each frame in the result is element `reordering[i]` of
+        the frame in the file
+    :param filepath: optional filepath of a `.npy` file to create and memory-map for the result
+    :param chunk_lines: the maximum number of lines that are read at once
+    :return: float array with shape `(len(frames), num_elements, 3)`
+    :raises ValueError: if a stanza does not contain the expected number of values
+    """
+    frames = numpy.asarray(frames, dtype=int)
+    shape = (len(frames), num_elements, 3)
+    stanza_length = num_elements + 1
+    chunk_frames = max(1, chunk_lines // stanza_length)
+
+    if filepath is not None:
+        result = numpy.lib.format.open_memmap(filepath, mode='w+', dtype=numpy.float64, shape=shape)
+    else:
+        result = numpy.empty(shape, dtype=numpy.float64)
+
+    chunk_start = 0
+    position = 0
+
+    while position < len(frames):
+        lines = list(itertools.islice(handle, chunk_frames * stanza_length))
+        number_of_frames = len(lines) // stanza_length
+
+        if number_of_frames == 0:
+            raise ValueError('The trajectory file contains fewer frames than selected.')
+
+        # The positions in `frames` of the selected frames that are in the current chunk
+        end = numpy.searchsorted(frames, chunk_start + number_of_frames, side='left')
+
+        if end > position:
+            # Remove the header lines of the stanzas and convert all the values in the chunk at once
+            del lines[::stanza_length]
+            try:
+                values = numpy.array(' '.join(lines).split(), dtype=float)
+                values = values.reshape(number_of_frames, num_elements, 3)
+            except ValueError:
+                raise ValueError('Wrong number of values in the stanzas starting at line {}.'.format(
+                    chunk_start * stanza_length + 1))
+
+            values = values[frames[position:end] - chunk_start]
+
+            if reordering is not None:
+                values = values[:, reordering, :]
+
+            result[position:end] = values * rescale
+            position = end
+
+        chunk_start += number_of_frames
+
+    if filepath is not None:
+        result.flush()
+
+    return result
+
 
 def parse_cp_text_output(data,xml_data):
     """data must be a list of strings, one for each lines, as returned by readlines().
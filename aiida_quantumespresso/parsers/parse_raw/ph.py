@@ -438,4 +438,124 @@ def parse_ph_dynmat(data, logs, lattice_parameter=None, also_eigenvectors=False,
     return parsed_data
 
 
+def parse_ph_dynmat_arrays(data, logs):
+    """Parse the q-point, frequencies and eigenvectors of a single dynamical matrix file into numpy arrays.
+
+    This returns the same information as `parse_ph_dynmat` with `also_eigenvectors=True`, but instead of converting the
+    eigenvectors line by line into nested lists, the eigenvector lines of all modes are joined and converted with a
+    single numpy call. Values that cannot be read because of a broken fortran format are set to `nan`.
+
+    :param data: list of lines of the dynamical matrix file
+    :param logs: logging container to which warnings are added
+    :return: tuple of the q-point in units of 2pi/lattice_parameter with shape `(3,)`, the frequencies in cm-1 with
+        shape `(number_of_modes,)` and the complex eigenvectors with shape `(number_of_modes, number_of_atoms, 3)`
+    :raises QEOutputParsingError: if the file is not a dynamical matrix file or its eigenvectors are incomplete
+    """
+    if not data or 'Dynamical matrix file' not in data[0]:
+        raise QEOutputParsingError('Dynamical matrix is not in the expected format')
+
+    q_point = None
+    frequency_lines = []
+    end_line = None
+
+    for line_counter, line in enumerate(data):
+        if 'freq' in line or 'omega' in line:
+            frequency_lines.append(line_counter)
+        elif '**********' in line and frequency_lines:
+            end_line = line_counter
+            break
+        elif q_point is None and 'q = ' in line:
+            # q point is written several times, because it can also be rotated: the first is the one computed
+            q_point = [float(i) for i in line.split('(')[1].split(')')[0].split()]
+
+    if q_point is None or not frequency_lines:
+        raise QEOutputParsingError('No diagonalized dynamical matrix found')
+
+    if end_line is None:
+        end_line = len(data)
+
+    # Each mode is followed by one line with the three complex components of the eigenvector of each atom
+    if len(frequency_lines) > 1:
+        number_of_atoms = frequency_lines[1] - frequency_lines[0] - 1
+    else:
+        number_of_atoms = end_line - frequency_lines[0] - 1
+    number_of_modes = len(frequency_lines)
+
+    if end_line - frequency_lines[-1] - 1 != number_of_atoms:
+        raise QEOutputParsingError('Incomplete eigenvectors in dynamical matrix')
+
+    frequencies = numpy.empty(number_of_modes)
+    eigenvector_lines = []
+
+    for mode, line_counter in enumerate(frequency_lines):
+        this_freq = data[line_counter].split('[cm-1]')[0].split('=')[-1]
+
+        # exception for bad fortran coding: *** could be written instead of the number
+        if '*' in this_freq:
+            frequencies[mode] = numpy.nan
+            logs.warning.append('Wrong fortran formatting found while parsing frequencies')
+        else:
+            frequencies[mode] = float(this_freq)
+
+        eigenvector_lines.extend(data[line_counter + 1:line_counter + 1 + number_of_atoms])
+
+    try:
+        values = numpy.array(' '.join(eigenvector_lines).replace('(', ' ').replace(')', ' ').split(), dtype=float)
+        values = values.reshape(number_of_modes, number_of_atoms, 6)
+    except ValueError:
+        logs.warning.append('Wrong fortran formatting found while parsing eigenvectors')
+        values = numpy.full((number_of_modes * number_of_atoms, 6), numpy.nan)
+        for index, line in enumerate(eigenvector_lines):
+            try:
+                values[index] = [float(i) for i in line.split('(')[1].split(')')[0].split()]
+            except (ValueError, IndexError):
+                pass
+        values = values.reshape(number_of_modes, number_of_atoms, 6)
 
+    eigenvectors = values[:, :, 0::2] + 1j * values[:, :, 1::2]
+
+    return numpy.array(q_point), frequencies, eigenvectors
+
+
+def parse_ph_dynmat_files_arrays(dynamical_matrices, logs):
+    """Parse a list of dynamical matrix files into stacked numpy arrays with `parse_ph_dynmat_arrays`.
+
+    Files that do not contain frequencies, such as the first file with the list of q-points, are skipped.
+
+    :param dynamical_matrices: a list of the content of the dynamical matrix files as a string
+    :param logs: logging container to which warnings are added
+    :return: dictionary with the arrays `qpoints`, `frequencies` and `eigenvectors`, where the first dimension is the
+        index of the dynamical matrix, or `None` if no dynamical matrix was found
+    :raises QEOutputParsingError: if a file cannot be parsed or the dynamical matrices do not have the same shape
+    """
+    qpoints = []
+    frequencies = []
+    eigenvectors = []
+
+    for dynmat in dynamical_matrices:
+        lines = dynmat.split('\n')
+
+        # check if the file contains frequencies (i.e. is useful) or not
+        try:
+            _ = [float(i) for i in lines[0].split()]
+        except ValueError:
+            pass
+        else:
+            continue
+
+        q_point, this_frequencies, this_eigenvectors = parse_ph_dynmat_arrays(lines, logs)
+        qpoints.append(q_point)
+        frequencies.append(this_frequencies)
+        eigenvectors.append(this_eigenvectors)
+
+    if not qpoints:
+        return None
+
+    if len(set(array.shape for array in eigenvectors)) != 1:
+        raise QEOutputParsingError('The dynamical matrices have different numbers of modes or atoms')
+
+    return {
+        'qpoints': numpy.array(qpoints),
+        'frequencies': numpy.array(frequencies),
+        'eigenvectors': numpy.array(eigenvectors),
+    }
@@ -0,0 +1,1048 @@
+# -*- coding: utf-8 -*-
+"""Single-pass streaming parser for the stdout of Quantum ESPRESSO `pw.x`.
+
+The engine in this module consumes the stdout as a stream of lines exactly once, such that the complete content never
+has to be loaded in memory: each line is checked against a single precompiled pattern of all known markers and is only
+dispatched to the handlers of the header, the global information and the current self-consistent step if it matches.
+Quantities that span multiple lines, such as forces, stress and cell parameters, are gathered by small collector
+coroutines that are fed the following lines until they are complete.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import io
+import re
+
+import six
+
+from aiida_quantumespresso.parsers import QEOutputParsingError
+from aiida_quantumespresso.utils.buffers import TrajectoryBuffer
+from aiida_quantumespresso.utils.mapping import get_logging_container
+from qe_tools.constants import ry_to_ev, bohr_to_ang, ry_si, bohr_si
+
+from .pw import (
+    ENERGY_TERMS, MESSAGE_MAP, convert_qe_time_to_sec, grep_energy_from_line, lattice_tolerance, units_suffix,
+    default_charge_units, default_dipole_units, default_energy_units, default_force_units,
+    default_magnetization_units, default_stress_units
+)
+
+MARKER_STEP = 'Self-consistent Calculation'
+MARKER_HUBBARD = 'LDA+U parameters'
+
+MARKERS_HEADER = (
+    'lattice parameter (alat)',
+    'number of atoms/cell',
+    'number of atomic types',
+    'unit-cell volume',
+    'number of Kohn-Sham states',
+    'number of k points',
+    'Dense  grid',
+    'Smooth grid',
+)
+
+MARKERS_GLOBAL = (
+    'JOB DONE',
+    'Carrying out vdW-DF run using the following parameters:',
+    'Cartesian axes',
+    'total cpu time spent up to now is',
+    'Estimated max dynamical RAM per process',
+    'Estimated total dynamical RAM',
+    'PWSCF',
+    'nstep',
+    'bfgs converged in',
+    'number of bfgs steps',
+    'A final scf calculation at the relaxed structure',
+    'point group',
+    'c_bands',
+    'iteration',
+    MARKER_STEP,
+    MARKER_HUBBARD,
+    'Tr[ns(na)]',
+)
+
+MARKERS_STEP = (
+    'CELL_PARAMETERS',
+    'ATOMIC_POSITIONS',
+    'Computed dipole along edir',
+    'estimated scf accuracy',
+    'convergence has been achieved in',
+    'convergence NOT achieved after',
+    'End of self-consistent calculation',
+    '!',
+    'the Fermi energy is',
+    'Forces acting on atoms',
+    'Total force =',
+    'entering subroutine stress ...',
+    'Computing stress (Cartesian axis) and pressure',
+    'Dipole per cell',
+    'Dipole on Cartesian axes',
+    'ethr',
+    'Magnetic moment per site',
+    'Non-local correlation energy',
+)
+
+# A line that does not match this pattern cannot trigger any of the handlers and only has to be passed to the active
+# collectors, which is the case for the vast majority of lines, e.g. those listing the eigenvalues.
+REGEX_MARKERS = re.compile('|'.join(
+    re.escape(marker) for marker in sorted(
+        set(MARKERS_HEADER + MARKERS_GLOBAL + MARKERS_STEP) | set(MESSAGE_MAP['error']) | set(MESSAGE_MAP['warning'])
+    )
+))
+REGEX_RAM = re.compile(r'\s+([+-]?\d+(\.\d*)?|\.\d+([eE][+-]?\d+)?)\s*(Mb|MB|GB)')
+
+
+def parse_stdout_stream(stdout, input_parameters, parser_options=None, parsed_xml=None):
+    """Parse the stdout of a Quantum ESPRESSO `pw.x` calculation in a single pass over its lines.
+
+    :param stdout: an iterable of lines, e.g. an open file handle, or the stdout content as a string
+    :param input_parameters: dictionary with the input parameters
+    :param parser_options: the parser options from the settings input parameter node
+    :param parsed_xml: dictionary with data parsed from the XML output file
+    :returns: tuple of two dictionaries, with the parsed data and log messages, respectively
+    """
+    if isinstance(stdout, six.string_types):
+        stdout = io.StringIO(six.text_type(stdout))
+
+    parser = PwStdoutStreamParser(input_parameters, parser_options, parsed_xml)
+    parser.feed(stdout)
+
+    return parser.finalize()
+
+
+class PwStdoutStreamParser(object):
+    """Streaming parser for the stdout of `pw.x` that processes each line exactly once.
+
+    Lines are passed through :py:meth:`feed` and once the stream is exhausted, the results are obtained by calling
+    :py:meth:`finalize`. The parser keeps track of the header information (only when it is not already available from
+    the XML output), the global information that can appear anywhere in the output and the data of the current
+    self-consistent step, i.e. the block starting with `Self-consistent Calculation`, which is turned into a frame of
+    the trajectory.
+    """
+
+    def __init__(self, input_parameters, parser_options=None, parsed_xml=None):
+        """Construct a new instance.
+
+        :param input_parameters: dictionary with the input parameters
+        :param parser_options: the parser options from the settings input parameter node
+        :param parsed_xml: dictionary with data parsed from the XML output file. Note that the `bands` and `structure`
+            keys will be popped from it.
+        """
+        if parser_options is None:
+            parser_options = {}
+
+        if parsed_xml is None:
+            parsed_xml = {}
+
+        self.input_parameters = input_parameters
+        self.lelfield = input_parameters.get('CONTROL', {}).get('lelfield', False)
+        self.parse_atomic_occupations = parser_options.get('parse_atomic_occupations', False)
+
+        self.logs = get_logging_container()
+        self.messages = get_logging_container()
+        self.parsed_data = {}
+        self.trajectory_data = TrajectoryBuffer()
+        self.bands_data = parsed_xml.pop('bands', {})
+        self.structure_data = parsed_xml.pop('structure', {})
+
+        self.job_done = False
+        self.vdw_correction = False
+        self.maximum_ionic_steps = None
+        self.marker_bfgs_converged = False
+        self.c_bands_error = False
+        self.atomic_occupations = {}
+
+        # The header is only parsed from the stdout if the XML did not provide the basic information
+        self.header = {}
+        self.header_from_stdout = not parsed_xml.get('number_of_bands', None)
+        self.parse_header = self.header_from_stdout
+
+        if self.header_from_stdout:
+            self.nat = None
+            self.alat = None
+        else:
+            self.nat = self.structure_data['number_of_atoms']
+            self.trajectory_data.number_of_atoms = self.nat
+            self.ntyp = self.structure_data['number_of_species']
+            self.alat = self.structure_data['lattice_parameter_xml']
+            self.volume = self.structure_data['cell']['volume']
+
+        self.in_step = False
+        self.trajectory_frame = {}
+        self.last_line_ethr = None
+        self.last_line_vdw = None
+        self.magnetic_block = None
+
+        self.collectors_step = []
+        self.collectors_global = []
+
+        self._trailing_line = True
+        self._finalized = False
+
+    def feed(self, lines):
+        """Parse the given lines, which can be the complete stdout or any consecutive part of it.
+
+        :param lines: an iterable of lines including their line terminators, e.g. an open file handle
+        """
+        parse_line = self.parse_line
+        line = None
+
+        for line in lines:
+            parse_line(line.rstrip('\n'))
+
+        if line is not None:
+            self._trailing_line = line.endswith('\n')
+
+    def parse_line(self, line):
+        """Parse a single line of the stdout, without line terminator."""
+        if self.collectors_global:
+            self._send(self.collectors_global, line)
+
+        if self.in_step and (self.collectors_step or self.magnetic_block is not None):
+            # The line that starts a new step only belongs to the current step up to the marker
+            line_step = line.partition(MARKER_STEP)[0]
+            if self.collectors_step:
+                self._send(self.collectors_step, line_step)
+            if self.magnetic_block is not None:
+                self._parse_magnetic_moment(line_step)
+
+        if REGEX_MARKERS.search(line) is None:
+            return
+
+        self._detect_important_message(line)
+
+        if self.parse_header:
+            self._parse_header(line)
+
+        self._parse_global(line)
+
+        if MARKER_STEP in line:
+            prefix, _, suffix = line.partition(MARKER_STEP)
+            if self.in_step:
+                self._parse_step(prefix)
+                self._end_step()
+            self._start_step()
+            line = suffix
+
+        if self.in_step:
+            self._parse_step(line)
+
+    def finalize(self):
+        """Close the stream and return the parsed data.
+
+        :returns: tuple of two dictionaries, with the parsed data and log messages, respectively
+        """
+        if self._finalized:
+            raise RuntimeError('the parser has already been finalized')
+
+        self._finalized = True
+
+        # Splitting the content on newlines gives an empty string after the final line terminator, which is also seen
+        # by the multi-line handlers, so for consistency the same empty line is parsed here.
+        if self._trailing_line:
+            self.parse_line('')
+
+        if self.in_step:
+            self._end_step()
+
+        for collector in self.collectors_global:
+            collector.close()
+
+        self.collectors_global = []
+
+        if not self.job_done:
+            self.messages.error.insert(0, 'ERROR_OUTPUT_STDOUT_INCOMPLETE')
+
+        parsed_data = self.parsed_data
+        trajectory_data = self.trajectory_data
+
+        if self.header_from_stdout:
+            header = self.header
+            basic = {}
+
+            if 'alat' in header and 'volume' in header:
+                basic['lattice_parameter_initial'] = header['alat']
+
+                if 'nbnd' in header:
+                    basic['number_of_bands'] = header['nbnd']
+
+                    # these are not crucial, so parsing does not fail if they are not found
+                    for key, name in [('nk', 'number_of_k_points'), ('fft_grid', 'fft_grid'),
+                                      ('smooth_fft_grid', 'smooth_fft_grid')]:
+                        if key not in header:
+                            break
+                        basic[name] = header[key]
+
+            if 'number_of_bands' not in basic:
+                # Basic information could not be loaded so only return the important messages if there are any
+                basic['trajectory'] = {}
+                if self.messages.error or self.messages.warning:
+                    return basic, self.messages
+                raise QEOutputParsingError('Parser cannot load basic info.')
+
+            if 'nat' not in header or 'ntyp' not in header:
+                raise QEOutputParsingError('Parser cannot load basic info.')
+
+            basic.update(parsed_data)
+            parsed_data = basic
+            nat, ntyp, volume = header['nat'], header['ntyp'], header['volume']
+        else:
+            nat, ntyp, volume = self.nat, self.ntyp, self.volume
+
+        parsed_data['number_of_atoms'] = nat
+        parsed_data['number_of_species'] = ntyp
+        parsed_data['volume'] = volume
+
+        logs = self.logs
+        for level in ['error', 'warning']:
+            logs[level] = self.messages[level] + logs[level]
+
+        if self.c_bands_error:
+            logs.warning.append('c_bands: at least 1 eigenvalues not converged')
+
+        # check consistency of scf_accuracy and scf_iterations
+        if 'scf_accuracy' in trajectory_data:
+            if 'scf_iterations' in trajectory_data:
+                if len(trajectory_data['scf_accuracy']) != sum(trajectory_data['scf_iterations']):
+                    logs.warning.append(
+                        'the length of scf_accuracy does not match the sum of the elements of scf_iterations.'
+                    )
+            else:
+                logs.warning.append('"the scf_accuracy array was parsed but the scf_iterations was not.')
+
+        if self.parse_atomic_occupations:
+            parsed_data['atomic_occupations'] = self.atomic_occupations
+
+        # Ionic calculations and BFGS algorithm did not print that calculation is converged
+        if 'atomic_positions_relax' in trajectory_data and not self.marker_bfgs_converged:
+            logs.error.append('ERROR_IONIC_CONVERGENCE_NOT_REACHED')
+
+        # Ionic calculation that hit the maximum number of ionic steps. Note: does not necessarily mean that convergence
+        # was not reached as it could have occurred in the last step.
+        maximum_ionic_steps = self.maximum_ionic_steps
+        if maximum_ionic_steps is not None and maximum_ionic_steps == parsed_data.get('number_ionic_steps', None):
+            logs.warning.append('ERROR_MAXIMUM_IONIC_STEPS_REACHED')
+
+        # Remove duplicate log messages by turning it into a set. Then convert back to list as that is what is expected
+        logs.error = list(set(logs.error))
+        logs.warning = list(set(logs.warning))
+
+        parsed_data['bands'] = self.bands_data
+        parsed_data['structure'] = self.structure_data
+        trajectory_data.trim()
+        parsed_data['trajectory'] = trajectory_data
+
+        return parsed_data, logs
+
+    @staticmethod
+    def _send(collectors, line):
+        """Send a line to each of the given collectors, removing those that are complete."""
+        for collector in list(collectors):
+            try:
+                collector.send(line)
+            except StopIteration:
+                collectors.remove(collector)
+
+    def _add_collector(self, collectors, collector):
+        """Prime the collector coroutine and add it to the given list of active collectors."""
+        try:
+            next(collector)
+        except StopIteration:
+            return
+        collectors.append(collector)
+
+    def _append(self, key, value, units=None):
+        """Append a value to the trajectory data and optionally set the units of the quantity."""
+        self.trajectory_data.append(key, value)
+        if units is not None:
+            self.parsed_data[key + units_suffix] = units
+
+    def _detect_important_message(self, line):
+        """Match any known error and warning messages."""
+        for marker, message in MESSAGE_MAP['error'].items():
+            if marker in line:
+                self.messages.error.append(line if message is None else message)
+
+        for marker, message in MESSAGE_MAP['warning'].items():
+            if marker in line:
+                self.messages.warning.append(line if message is None else message)
+
+    def _parse_header(self, line):
+        """Parse the basic information printed before the first `Smooth grid` line."""
+        header = self.header
+
+        if 'lattice parameter (alat)' in line:
+            header['alat'] = float(line.split('=')[1].split('a.u')[0]) * bohr_to_ang
+            self.alat = header['alat']
+        elif 'number of atoms/cell' in line:
+            header['nat'] = int(line.split('=')[1])
+            self.nat = header['nat']
+            self.trajectory_data.number_of_atoms = self.nat
+        elif 'number of atomic types' in line:
+            header['ntyp'] = int(line.split('=')[1])
+        elif 'unit-cell volume' in line:
+            if '(a.u.)^3' in line:
+                volume = float(line.split('=')[1].split('(a.u.)^3')[0])
+            else:
+                # occurs in v5.3.0
+                volume = float(line.split('=')[1].split('a.u.^3')[0])
+            header['volume'] = volume * bohr_to_ang**3
+        elif 'number of Kohn-Sham states' in line:
+            header['nbnd'] = int(line.split('=')[1])
+        elif 'number of k points' in line:
+            nk = int(line.split('=')[1].split()[0])
+            if self.input_parameters.get('SYSTEM', {}).get('nspin', 1) > 1:
+                # QE counts twice each k-point in spin-polarized calculations
+                nk /= 2
+            header['nk'] = nk
+        elif 'Dense  grid' in line:
+            header['fft_grid'] = [int(g) for g in line.split('(')[1].split(')')[0].split(',')]
+        elif 'Smooth grid' in line:
+            header['smooth_fft_grid'] = [int(g) for g in line.split('(')[1].split(')')[0].split(',')]
+            self.parse_header = False
+
+    def _parse_global(self, line):
+        """Parse quantities that can be considered isolated information, independent of the ionic step."""
+        parsed_data = self.parsed_data
+
+        if 'JOB DONE' in line:
+            self.job_done = True
+
+        if self.parse_atomic_occupations:
+            if MARKER_HUBBARD in line:
+                # Only the occupations of the last block are retained
+                self.atomic_occupations = {}
+                line = line.split(MARKER_HUBBARD)[-1]
+            self._parse_atomic_occupation(line)
+
+        # to be used for later
+        if 'Carrying out vdW-DF run using the following parameters:' in line:
+            self.vdw_correction = True
+
+        elif 'Cartesian axes' in line:
+            # this is the part when initial positions and chemical symbols are printed (they do not change during a run)
+            if self.nat is not None:
+                self._add_collector(self.collectors_global, self._collect_atomic_species_name())
+
+        # parse the initialization time (take only first occurence)
+        elif 'init_wall_time_seconds' not in parsed_data and 'total cpu time spent up to now is' in line:
+            init_time = float(line.split('total cpu time spent up to now is')[1].split('secs')[0])
+            parsed_data['init_wall_time_seconds'] = init_time
+
+        # parse dynamical RAM estimates
+        elif 'Estimated max dynamical RAM per process' in line:
+            self._parse_ram(line, 'estimated_ram_per_process')
+
+        # parse dynamical RAM estimates
+        elif 'Estimated total dynamical RAM' in line:
+            self._parse_ram(line, 'estimated_ram_total')
+
+        # parse the global file, for informations that are written only once
+        elif 'PWSCF' in line and 'WALL' in line:
+            try:
+                time = line.split('CPU')[1].split('WALL')[0]
+                parsed_data['wall_time'] = time
+            except Exception:
+                self.logs.warning.append('Error while parsing wall time.')
+            else:
+                try:
+                    parsed_data['wall_time_seconds'] = convert_qe_time_to_sec(time)
+                except ValueError:
+                    raise QEOutputParsingError('Unable to convert wall_time in seconds.')
+
+        # for later control on relaxation-dynamics convergence
+        elif 'nstep' in line and '=' in line:
+            self.maximum_ionic_steps = int(line.split()[2])
+
+        elif 'bfgs converged in' in line:
+            self.marker_bfgs_converged = True
+
+        elif 'number of bfgs steps' in line:
+            parsed_data['number_ionic_steps'] = parsed_data.get('number_ionic_steps', 0) + 1
+
+        elif 'A final scf calculation at the relaxed structure' in line:
+            parsed_data['final_scf'] = True
+
+        elif 'point group' in line:
+            if 'k-point group' not in line:
+                try:
+                    # Split line in components delimited by either space(s) or parenthesis and filter out empty strings
+                    line_elems = [_f for _f in re.split(r' +|\(|\)', line) if _f]
+                    parsed_data['pointgroup_international'] = line_elems[-1]
+                    parsed_data['pointgroup_schoenflies'] = line_elems[-2]
+                except Exception:
+                    self.logs.warning.append('Problem parsing point group, I found: {}'.format(line.strip()))
+
+        # special parsing of c_bands error
+        elif 'c_bands' in line and 'eigenvalues not converged' in line:
+            self.c_bands_error = True
+
+        elif 'iteration #' in line:
+            if 'Calculation restarted' not in line and 'Calculation stopped' not in line:
+                parsed_data['total_number_of_scf_iterations'] = parsed_data.get('total_number_of_scf_iterations', 0) + 1
+
+            # if there is another iteration, c_bands is not necessarily a problem
+            # I put a warning only if c_bands error appears in the last iteration
+            self.c_bands_error = False
+
+    def _parse_ram(self, line, key):
+        """Parse a dynamical RAM estimate."""
+        match = REGEX_RAM.match(line.split('>')[-1])
+        if match:
+            try:
+                self.parsed_data[key] = float(match.group(1))
+                self.parsed_data['{}{}'.format(key, units_suffix)] = match.group(4)
+            except (IndexError, ValueError):
+                pass
+
+    def _parse_atomic_occupation(self, line):
+        """Parse the Hubbard occupation of a single atom."""
+        if 'Tr[ns(na)]' not in line:
+            return
+
+        values = line.split('=')
+        atomic_index = values[0].split()[1]
+        occupations = values[1].split()
+
+        if len(occupations) == 1:
+            self.atomic_occupations[atomic_index] = {'total': occupations[0]}
+        elif len(occupations) == 3:
+            self.atomic_occupations[atomic_index] = {
+                'up': occupations[0],
+                'down': occupations[1],
+                'total': occupations[2]
+            }
+
+    def _start_step(self):
+        """Start a new self-consistent step, which corresponds to a new frame of the trajectory."""
+        self.in_step = True
+        self.trajectory_frame = {}
+        self.last_line_ethr = None
+        self.last_line_vdw = None
+        self.magnetic_block = None
+
+    def _end_step(self):
+        """Close the current step, aborting multi-line quantities that were not complete."""
+        for collector in self.collectors_step:
+            collector.close()
+
+        self.collectors_step = []
+        self.magnetic_block = None
+        self.in_step = False
+
+        # End of trajectory frame, only keep last entries for dipole related values
+        if self.lelfield is True:
+            values = []
+
+            for key in [
+                'electronic_dipole_cell_average', 'electronic_dipole_cartesian_axes', 'ionic_dipole_cell_average',
+                'ionic_dipole_cartesian_axes'
+            ]:
+                try:
+                    values.append((key, self.trajectory_frame[key][-1]))
+                except (KeyError, IndexError):
+                    # Only add them if all four properties were successfully parsed
+                    break
+            else:
+                for key, value in values:
+                    self.trajectory_data.append(key, value)
+
+    def _parse_step(self, line):
+        """Parse a line of the current self-consistent step."""
+        # Keep track of the lines that are looked up backwards by the handlers of the end of the SCF cycle and energy
+        if 'ethr' in line:
+            self.last_line_ethr = line
+
+        if 'Non-local correlation energy' in line:
+            self.last_line_vdw = line
+
+        if 'Magnetic moment per site' in line and self.nat is not None:
+            if self.magnetic_block is None or not self.magnetic_block['pending']:
+                self.magnetic_block = {'moments': [], 'charges': [], 'pending': False}
+        elif 'iteration' in line:
+            if self.magnetic_block is not None and not self.magnetic_block['pending']:
+                self.magnetic_block = None
+
+        if 'CELL_PARAMETERS' in line:
+            self._add_collector(self.collectors_step, self._collect_cell(line))
+
+        elif 'ATOMIC_POSITIONS' in line:
+            self._add_collector(self.collectors_step, self._collect_positions(line))
+
+        # Computed dipole correction in slab geometries.
+        # save dipole in debye units, only at last iteration of scf cycle
+        elif 'Computed dipole along edir' in line:
+            self._add_collector(self.collectors_step, self._collect_dipole())
+
+        # saving the SCF convergence accuracy for each SCF cycle
+        # If for some step this line is not printed, the later check with the scf_accuracy array length should catch it
+        elif 'estimated scf accuracy' in line:
+            try:
+                self._append('scf_accuracy', float(line.split()[-2]) * ry_to_ev)
+            except Exception:
+                self.logs.warning.append('Error while parsing scf accuracy.')
+
+        elif 'convergence has been achieved in' in line or 'convergence NOT achieved after' in line:
+            try:
+                self._append('scf_iterations', int(line.split('iterations')[0].split()[-1]))
+            except Exception:
+                self.logs.warning.append('Error while parsing scf iterations.')
+
+        elif 'Calculation stopped in scf loop at iteration' in line:
+            try:
+                self._append('scf_iterations', int(line.split()[-1]))
+            except Exception:
+                self.logs.warning.append('Error while parsing scf iterations.')
+
+        elif 'End of self-consistent calculation' in line:
+            self._parse_end_of_scf()
+
+        # grep energy and possibly, magnetization
+        elif '!' in line:
+            self._add_collector(self.collectors_step, self._collect_energy(line))
+
+        elif 'the Fermi energy is' in line:
+            try:
+                self._append('fermi_energy', float(line.split('is')[1].split('ev')[0]), default_energy_units)
+            except Exception:
+                self.logs.warning.append('Error while parsing Fermi energy from the output file.')
+
+        elif 'Forces acting on atoms' in line:
+            self._add_collector(self.collectors_step, self._collect_forces())
+
+        elif 'Total force =' in line:
+            try:  # note that I can't check the units: not written in output!
+                value = float(line.split('=')[1].split('Total')[0]) * ry_to_ev / bohr_to_ang
+                self._append('total_force', value, default_force_units)
+            except Exception:
+                self.logs.warning.append('Error while parsing total force.')
+
+        elif ('entering subroutine stress ...' in line) or ('Computing stress (Cartesian axis) and pressure' in line):
+            self._add_collector(self.collectors_step, self._collect_stress())
+
+        # Electronic and ionic dipoles when 'lelfield' was set to True in input parameters
+        elif self.lelfield is True:
+
+            if 'Electronic Dipole per cell' in line:
+                value = float(line.split()[-1])
+                self.trajectory_frame.setdefault('electronic_dipole_cell_average', []).append(value)
+
+            elif 'Ionic Dipole per cell' in line:
+                value = float(line.split()[-1])
+                self.trajectory_frame.setdefault('ionic_dipole_cell_average', []).append(value)
+
+            elif 'Electronic Dipole on Cartesian axes' in line:
+                key = 'electronic_dipole_cartesian_axes'
+                self._add_collector(self.collectors_step, self._collect_dipole_cartesian_axes(key))
+
+            elif 'Ionic Dipole on Cartesian axes' in line:
+                key = 'ionic_dipole_cartesian_axes'
+                self._add_collector(self.collectors_step, self._collect_dipole_cartesian_axes(key))
+
+    def _parse_end_of_scf(self):
+        """Parse the energy threshold and magnetic moments that precede the end of a self-consistent cycle."""
+        # parse energy threshold for diagonalization algorithm
+        try:
+            self._append('energy_threshold', float(self.last_line_ethr.split('=')[1].split(',')[0]))
+        except Exception:
+            self.logs.warning.append('Error while parsing ethr.')
+
+        # parse final magnetic moments, if present, which are only considered if printed after the last iteration
+        if self.magnetic_block is not None:
+            self.magnetic_block['pending'] = True
+            self._commit_magnetic_moments()
+
+    def _parse_magnetic_moment(self, line):
+        """Parse a line of a block of magnetic moments per site."""
+        block = self.magnetic_block
+
+        if len(block['moments']) < self.nat and 'atom:' in line:
+            block['moments'].append(float(line.split('magn:')[1].split()[0]))
+            block['charges'].append(float(line.split('charge:')[1].split()[0]))
+            self._commit_magnetic_moments()
+
+    def _commit_magnetic_moments(self):
+        """Add the current block of magnetic moments to the trajectory if it is complete and the SCF cycle ended."""
+        block = self.magnetic_block
+
+        if block['pending'] and len(block['moments']) == self.nat:
+            self._append('atomic_magnetic_moments', block['moments'], default_magnetization_units)
+            self._append('atomic_charges', block['charges'], default_charge_units)
+            self.magnetic_block = None
+
+    def _collect_atomic_species_name(self):
+        """Collect the chemical symbols following the `Cartesian axes` line."""
+        try:
+            for _ in range(10):
+                line = yield
+                if 'site n.' in line and 'atom' in line:
+                    break
+            else:
+                return
+
+            names = []
+            while len(names) < self.nat:
+                fields = (yield).split()
+                # the block is incomplete if the output ends before all sites are listed
+                if len(fields) < 2:
+                    return
+                names.append(fields[1])
+        except GeneratorExit:
+            return
+
+        self.trajectory_data['atomic_species_name'] = names
+
+    def _collect_cell(self, line):
+        """Collect the lattice vectors following a `CELL_PARAMETERS` line."""
+        try:
+            lines = []
+            for _ in range(3):
+                lines.append((yield))
+        except GeneratorExit:
+            self.logs.warning.append('Error while parsing relaxation cell parameters.')
+            return
+
+        try:
+            cell = [[float(s) for s in vector.split()] for vector in lines]
+            lattice = line.split('(')[1].split(')')[0].split('=')
+            units = lattice[0].lower()
+
+            if units not in ['alat', 'bohr', 'angstrom']:
+                raise QEOutputParsingError(
+                    'Error while parsing cell_parameters: unsupported units {}'.format(lattice[0])
+                )
+
+            if 'alat' in units:
+                cell = [[self.alat * bohr_to_ang * s for s in vector] for vector in cell]
+                lattice_parameter_b = float(lattice[1])
+                if abs(lattice_parameter_b - self.alat) > lattice_tolerance:
+                    raise QEOutputParsingError(
+                        'Lattice parameters mismatch! {} vs {}'.format(lattice_parameter_b, self.alat)
+                    )
+            elif 'bohr' in units:
+                cell = [[bohr_to_ang * s for s in vector] for vector in cell]
+
+            self._append('lattice_vectors_relax', cell)
+        except Exception:
+            self.logs.warning.append('Error while parsing relaxation cell parameters.')
+
+    def _collect_positions(self, line):
+        """Collect the atomic positions following an `ATOMIC_POSITIONS` line."""
+        warning = 'Error while parsing relaxation atomic positions.'
+
+        try:
+            key = 'atomic_positions_relax'
+            metric = line.split('(')[1].split(')')[0]
+            if metric == 'crystal':
+                key = 'atomic_fractionals_relax'
+            elif metric not in ['alat', 'bohr', 'angstrom']:
+                raise QEOutputParsingError('Error while parsing atomic_positions: units not supported.')
+        except Exception:
+            self.logs.warning.append(warning)
+            return
+
+        if self.nat is None:
+            return
+
+        positions = []
+
+        try:
+            while len(positions) < self.nat:
+                tau = [float(s) for s in (yield).split()[1:4]]
+                if metric == 'alat':
+                    tau = [self.alat * s for s in tau]
+                elif metric == 'bohr':
+                    tau = [bohr_to_ang * s for s in tau]
+                positions.append(tau)
+        except GeneratorExit:
+            self.logs.warning.append(warning)
+            return
+        except Exception:
+            self.logs.warning.append(warning)
+            return
+
+        self._append(key, positions)
+
+    def _collect_dipole(self):
+        """Collect the dipole correction, which is only kept if it is the last one before the end of the SCF cycle."""
+        try:
+            for _ in range(3):
+                line = yield
+
+            value = None
+            try:
+                units = line.split()[-1]
+                if default_dipole_units.lower() not in units.lower():  # only debye
+                    raise QEOutputParsingError(
+                        'Error parsing the dipole correction. Units {} are not supported.'.format(units)
+                    )
+                value = float(line.split()[-2])
+            except IndexError:  # on units
+                pass
+
+            # save only the last dipole correction
+            while 'Computed dipole along edir' not in line:
+                line = yield
+                if 'End of self-consistent calculation' in line:
+                    if value is not None:
+                        self._append('dipole', value, default_dipole_units)
+                    break
+        except GeneratorExit:
+            # The dipole is also written at the beginning of a new bfgs iteration
+            return
+
+    def _collect_energy(self, line):
+        """Collect the total energy, its accuracy and decomposition and the magnetization following a `!` line."""
+        warning = 'Error while parsing for energy terms.'
+
+        try:
+            energy = float(line.split('=')[1].split('Ry')[0]) * ry_to_ev
+        except Exception:
+            self.logs.warning.append(warning)
+            return
+
+        line_vdw = self.last_line_vdw
+
+        try:
+            lines = [(yield), (yield)]
+        except GeneratorExit:
+            self.logs.warning.append(warning)
+            return
+
+        try:
+            accuracy = float(lines[1].split('<')[1].split('Ry')[0]) * ry_to_ev
+        except Exception:
+            self.logs.warning.append(warning)
+            return
+
+        for key, value in [['energy', energy], ['energy_accuracy', accuracy]]:
+            self._append(key, value, default_energy_units)
+
+        try:
+            index = 0
+            while True:
+                if index < len(lines):
+                    line = lines[index]
+                    index += 1
+                else:
+                    line = yield
+
+                for string, key in ENERGY_TERMS:
+                    if string in line:
+                        self._append(key, grep_energy_from_line(line), default_energy_units)
+
+                # magnetizations
+                if 'total magnetization' in line:
+                    this_m = line.split('=')[1].split('Bohr')[0]
+                    try:  # magnetization might be a scalar
+                        value = float(this_m)
+                    except ValueError:  # but can also be a three vector component in non-collinear calcs
+                        value = [float(i) for i in this_m.split()]
+                    self._append('total_magnetization', value, default_magnetization_units)
+
+                elif 'absolute magnetization' in line:
+                    value = float(line.split('=')[1].split('Bohr')[0])
+                    self._append('absolute_magnetization', value, default_magnetization_units)
+
+                # exit loop
+                elif 'convergence' in line:
+                    break
+
+            if self.vdw_correction:
+                if line_vdw is None:
+                    raise QEOutputParsingError('Non-local correlation energy not found.')
+                self._append('energy_vdw', grep_energy_from_line(line_vdw))
+                self.parsed_data['energy_vdw' + units_suffix] = default_energy_units
+        except GeneratorExit:
+            self.logs.warning.append(warning)
+        except Exception:
+            self.logs.warning.append(warning)
+
+    def _collect_forces(self):
+        """Collect the forces on the atoms following the `Forces acting on atoms` line."""
+        if self.nat is None:
+            return
+
+        forces = []
+
+        try:
+            while len(forces) < self.nat:
+                line = yield
+                if 'atom ' in line:
+                    # CONVERT FORCES IN eV/Ang
+                    forces.append([float(s) * ry_to_ev / bohr_to_ang for s in line.split('=')[1].split()])
+        except GeneratorExit:
+            self.logs.warning.append('Error while parsing forces.')
+            return
+        except Exception:
+            self.logs.warning.append('Error while parsing forces.')
+            return
+
+        self._append('forces', forces, default_force_units)
+
+    def _collect_stress(self):
+        """Collect the stress tensor following the start of the stress computation."""
+        lines = []
+        window = 10 + 5 * self.vdw_correction
+        index = None
+
+        try:
+            while len(lines) < window or (index is not None and len(lines) < index + 4):
+                lines.append((yield))
+                if len(lines) <= window and 'P=' in lines[-1]:
+                    index = len(lines) - 1
+                if len(lines) == window and index is None:
+                    break
+        except GeneratorExit:
+            self.logs.warning.append('Error while parsing stress tensor.')
+            return
+
+        try:
+            if index is None or '(Ry/bohr**3)' not in lines[index]:
+                raise QEOutputParsingError('Error while parsing stress: unexpected units.')
+            stress = []
+            for line in lines[index + 1:index + 4]:
+                stress.append([float(s) * 10**(-9) * ry_si / (bohr_si)**3 for s in line.split()[0:3]])
+            self._append('stress', stress, default_stress_units)
+        except Exception:
+            self.logs.warning.append('Error while parsing stress tensor.')
+
+    def _collect_dipole_cartesian_axes(self, key):
+        """Collect the three components of a dipole on the Cartesian axes."""
+        try:
+            lines = []
+            for _ in range(3):
+                lines.append((yield))
+        except GeneratorExit:
+            return
+
+        value = [float(line.split()[1]) for line in lines]
+        self.trajectory_frame.setdefault(key, []).append(value)
+
+
+class PwStdoutIncrementalParser(PwStdoutStreamParser):
+    """Resumable parser for the stdout of a running `pw.x` calculation, which is fed the bytes appended to the file.
+
+    The parser keeps the byte offset up to which the file has been read and buffers the incomplete last line, such that
+    the file can be read in arbitrary consecutive byte ranges, e.g. each time a monitor checks the running calculation.
+    The trajectory frames, i.e. the self-consistent steps, and the SCF iterations that were completed since the last
+    call are returned by :py:meth:`poll`. A step is complete once the next step starts or the parser is finalized. The
+    state lives in memory, so the same instance has to be used for all consecutive byte ranges of a file.
+
+    Once the calculation has finished, :py:meth:`finalize` returns the same data as `parse_stdout_stream` for the
+    complete stdout.
+    """
+
+    def __init__(self, input_parameters, parser_options=None, parsed_xml=None):
+        """Construct a new instance.
+
+        :param input_parameters: dictionary with the input parameters
+        :param parser_options: the parser options from the settings input parameter node
+        :param parsed_xml: dictionary with data parsed from the XML output file, which is usually not available yet
+        """
+        super(PwStdoutIncrementalParser, self).__init__(input_parameters, parser_options, parsed_xml)
+        self.offset = 0
+        self.number_of_frames = 0
+        self._partial_line = b''
+        self._frame_start = {}
+        self._frames = []
+        self._scf_iterations = []
+
+    @property
+    def parsed_offset(self):
+        """Return the byte offset of the end of the last complete line that has been parsed."""
+        return self.offset - len(self._partial_line)
+
+    def feed_bytes(self, data, offset=None):
+        """Parse the given bytes, which should directly follow the bytes that were fed before.
+
+        :param data: the bytes of the stdout starting at `offset`, which can end in the middle of a line
+        :param offset: optional byte offset of the data in the file, to check that no data was skipped or repeated
+        :raises ValueError: if the offset is not the one up to which the file has been read
+        """
+        if offset is not None and offset != self.offset:
+            raise ValueError('the data starts at byte {} but the file has been read up to byte {}'.format(
+                offset, self.offset))
+
+        self.offset += len(data)
+        lines = (self._partial_line + data).split(b'\n')
+        self._partial_line = lines.pop()
+
+        self.feed(line.decode('utf-8', 'replace') + u'\n' for line in lines)
+
+    def feed_from_transport(self, transport, filepath):
+        """Read the bytes that were appended to a remote file since the last call and parse them.
+
+        :param transport: an open transport of the computer that contains the file
+        :param filepath: the absolute path of the stdout file on the remote
+        :return: the number of bytes that were read
+        """
+        from six.moves import shlex_quote
+
+        command = 'tail -c +{} {}'.format(self.offset + 1, shlex_quote(filepath))
+        retval, stdout, stderr = transport.exec_command_wait(command)
+
+        if retval != 0:
+            raise IOError('failed to read `{}`: {}'.format(filepath, stderr.strip()))
+
+        data = stdout.encode('utf-8') if isinstance(stdout, six.text_type) else stdout
+        self.feed_bytes(data)
+
+        return len(data)
+
+    def poll(self):
+        """Return the trajectory frames and SCF iterations that were completed since the last call.
+
+        Each frame is a dictionary of the trajectory quantities onto the list of values that were added during the
+        corresponding step. Each SCF iteration is a dictionary with the index of the `frame` it belongs to, the number
+        of the `iteration` within that step, starting from one, and the estimated `scf_accuracy` in eV.
+
+        :return: tuple of the list of new frames and the list of new SCF iterations
+        """
+        frames, self._frames = self._frames, []
+        scf_iterations, self._scf_iterations = self._scf_iterations, []
+
+        return frames, scf_iterations
+
+    def finalize(self):
+        """Parse the incomplete last line, if any, close the stream and return the parsed data.
+
+        :returns: tuple of two dictionaries, with the parsed data and log messages, respectively
+        """
+        if self._partial_line:
+            self.feed([self._partial_line.decode('utf-8', 'replace')])
+            self._partial_line = b''
+
+        return super(PwStdoutIncrementalParser, self).finalize()
+
+    def _start_step(self):
+        """Start a new self-consistent step, recording the length of each trajectory quantity at its start."""
+        super(PwStdoutIncrementalParser, self)._start_step()
+        self._frame_start = {key: len(values) for key, values in self.trajectory_data.items()}
+
+    def _end_step(self):
+        """Close the current step and add the values that were added to the trajectory during it as a new frame."""
+        super(PwStdoutIncrementalParser, self)._end_step()
+
+        frame = {}
+
+        for key, values in self.trajectory_data.items():
+            if key == 'atomic_species_name':
+                continue
+            start = self._frame_start.get(key, 0)
+            if len(values) > start:
+                frame[key] = values[start:]
+
+        self._frames.append(frame)
+        self.number_of_frames += 1
+
+    def _append(self, key, value, units=None):
+        """Append a value to the trajectory data and record it as an SCF iteration if it is the SCF accuracy."""
+        super(PwStdoutIncrementalParser, self)._append(key, value, units)
+
+        if key == 'scf_accuracy':
+            iteration = len(self.trajectory_data[key]) - self._frame_start.get(key, 0)
+            self._scf_iterations.append({
+                'frame': self.number_of_frames,
+                'iteration': iteration,
+                'scf_accuracy': value
+            })
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Process-wide cache of compiled XML schemas used to decode the XML output of `pw.x`.
+
+Compiling one of the XSD files that ship with this package takes considerably longer than decoding a typical
+`data-file-schema.xml` with it. Since the compiled `XMLSchema` instances are not modified while decoding, they can
+be safely shared between all parsing calls in the same process, such that the compilation cost is paid only once per
+daemon worker instead of once per calculation.
+"""
+from __future__ import absolute_import
+
+import os
+import threading
+
+from xmlschema import XMLSchema
+
+from .versions import DIRPATH_SCHEMAS, get_available_xml_schemas
+
+
+class XMLSchemaCache(object):
+    """Thread-safe cache of compiled `XMLSchema` instances keyed on the absolute filepath of the schema file."""
+
+    def __init__(self):
+        self._schemas = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, schema_filepath):
+        return self._get_key(schema_filepath) in self._schemas
+
+    def __len__(self):
+        return len(self._schemas)
+
+    @staticmethod
+    def _get_key(schema_filepath):
+        return os.path.normcase(os.path.abspath(schema_filepath))
+
+    def get(self, schema_filepath):
+        """Return the compiled `XMLSchema` for the given schema file, compiling it if it is not yet cached.
+
+        :param schema_filepath: filepath of the XSD schema file
+        :return: `XMLSchema` instance
+        :raises xmlschema.exceptions.URLError: if the schema file cannot be opened. Failures are not cached.
+        """
+        return self._get_or_compile(schema_filepath, count=True)
+
+    def warm_up(self, schema_filenames=None):
+        """Compile and cache the given schemas upfront, for example when a daemon worker starts.
+
+        :param schema_filenames: optional list of schema filenames in the `schemas` directory of this module. By
+            default all available schemas are compiled.
+        :return: list of the absolute filepaths of the schemas that are now cached
+        """
+        if schema_filenames is None:
+            schema_filenames = get_available_xml_schemas()
+
+        schema_filepaths = []
+
+        for filename in sorted(schema_filenames):
+            schema_filepath = self._get_key(os.path.join(DIRPATH_SCHEMAS, filename))
+            self._get_or_compile(schema_filepath, count=False)
+            schema_filepaths.append(schema_filepath)
+
+        return schema_filepaths
+
+    def _get_or_compile(self, schema_filepath, count):
+        """Return the cached schema or compile and cache it, optionally updating the hit and miss counters."""
+        key = self._get_key(schema_filepath)
+
+        with self._lock:
+            try:
+                schema = self._schemas[key]
+            except KeyError:
+                # Compile while holding the lock, such that concurrent threads requesting the same schema do not each
+                # pay the compilation cost.
+                schema = XMLSchema(key)
+                self._schemas[key] = schema
+                if count:
+                    self.misses += 1
+            else:
+                if count:
+                    self.hits += 1
+
+        return schema
+
+    def clear(self):
+        """Remove all compiled schemas from the cache and reset the counters."""
+        with self._lock:
+            self._schemas.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_statistics(self):
+        """Return a dictionary with the number of cached schemas and the cache hit and miss counters."""
+        with self._lock:
+            return {
+                'size': len(self._schemas),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_XML_SCHEMA_CACHE = XMLSchemaCache()
+
+
+def get_xml_schema_cache():
+    """Return the `XMLSchemaCache` instance that is shared by the entire process."""
+    return _XML_SCHEMA_CACHE
+
+
+def get_xml_schema(schema_filepath):
+    """Return the compiled `XMLSchema` for the given schema file from the process-wide cache.
+
+    :param schema_filepath: filepath of the XSD schema file
+    :return: `XMLSchema` instance
+    """
+    return _XML_SCHEMA_CACHE.get(schema_filepath)
+
+
+def warm_up_xml_schema_cache(schema_filenames=None):
+    """Compile all (or the given) schemas into the process-wide cache, e.g. when a daemon worker starts.
+
+    :param schema_filenames: optional list of schema filenames, by default all available schemas are compiled
+    :return: list of the absolute filepaths of the schemas that are now cached
+    """
+    return _XML_SCHEMA_CACHE.warm_up(schema_filenames)
@@ -2,16 +2,19 @@
 from __future__ import absolute_import
 from __future__ import print_function
 
+import contextlib
+
 import numpy as np
-from xmlschema import XMLSchema
 from xmlschema.etree import ElementTree
 from xmlschema.exceptions import URLError
 
 from aiida_quantumespresso.utils.mapping import get_logging_container
 from qe_tools.constants import hartree_to_ev, bohr_to_ang
 
+from .cache import get_xml_schema
 from .exceptions import XMLParseError
 from .legacy import parse_pw_xml_pre_6_2
+from .sections import LazyXMLDocument
 from .versions import get_xml_file_version, get_schema_filepath, get_default_schema_filepath, QeXmlVersion
 
 
@@ -42,7 +45,89 @@ def cell_volume(a1, a2, a3):
     return abs(float(a1[0] * a_mid_0 + a1[1] * a_mid_1 + a1[2] * a_mid_2))
 
 
-def parse_xml(xml_file, dir_with_bands=None, include_deprecated_v2_keys=False):
+def get_ks_energies_elements(xml):
+    """Return the `band_structure` element of the output and its `ks_energies` child elements.
+
+    :param xml: parsed XML, either an `ElementTree` or its root `Element`
+    :return: tuple of the `band_structure` element, or None if the document contains no band structure, and the list of
+        its `ks_energies` elements
+    """
+    root = xml.getroot() if hasattr(xml, 'getroot') else xml
+    band_structure = root.find('output/band_structure')
+
+    if band_structure is None:
+        return None, []
+
+    return band_structure, band_structure.findall('ks_energies')
+
+
+@contextlib.contextmanager
+def detached_ks_energies(band_structure, ks_energies):
+    """Context manager that temporarily removes all but the first `ks_energies` element from the band structure.
+
+    The schema decoding of the eigenvalues and occupations of all k-points into nested python objects dominates the
+    time and memory to parse the XML of calculations with many k-points and bands. They are read directly into arrays
+    by `read_ks_energies` instead. The first element is kept such that the decoded document still validates.
+
+    :param band_structure: the `band_structure` element or None
+    :param ks_energies: the list of `ks_energies` elements of the band structure
+    """
+    detached = ks_energies[1:] if band_structure is not None else []
+
+    for element in detached:
+        band_structure.remove(element)
+
+    try:
+        yield
+    finally:
+        for element in detached:
+            band_structure.append(element)
+
+
+def read_ks_energies(ks_energies, num_bands):
+    """Read the k-points, weights, eigenvalues and occupations of the `ks_energies` elements into arrays.
+
+    The arrays are preallocated and filled with a single pass over the elements, without schema decoding.
+
+    :param ks_energies: the list of `ks_energies` elements of the band structure
+    :param num_bands: the total number of bands of each k-point, i.e. summed over the spin channels
+    :returns: tuple of the arrays with the k-points in units of 2pi/alat with shape `(nks, 3)`, the weights with shape
+        `(nks,)` and the eigenvalues in Hartree and occupations, both with shape `(nks, num_bands)`
+    :raises XMLParseError: if the number of values of a k-point is not the expected one
+    """
+    num_k_points = len(ks_energies)
+    k_points = np.empty((num_k_points, 3))
+    k_points_weights = np.empty(num_k_points)
+    eigenvalues = np.empty((num_k_points, num_bands))
+    occupations = np.empty((num_k_points, num_bands))
+
+    for index, ks_state in enumerate(ks_energies):
+        k_point = ks_state.find('k_point')
+        try:
+            k_points[index] = k_point.text.split()
+            k_points_weights[index] = k_point.get('weight')
+            eigenvalues[index] = ks_state.find('eigenvalues').text.split()
+            occupations[index] = ks_state.find('occupations').text.split()
+        except (AttributeError, ValueError) as exception:
+            raise XMLParseError('invalid ks_energies element for k-point {}: {}'.format(index + 1, exception))
+
+    return k_points, k_points_weights, eigenvalues, occupations
+
+
+def log_validation_errors(logs, errors, schema_filepath):
+    """Add the validation errors of the decoding of the XML document to the error logs.
+
+    :param logs: the logging container
+    :param errors: list of validation errors
+    :param schema_filepath: the filepath of the XML schema that was used for the validation
+    """
+    if errors:
+        logs.error.append('{} XML schema validation error(s) schema: {}:'.format(len(errors), schema_filepath))
+        for err in errors:
+            logs.error.append(str(err))
+
+
+def parse_xml(xml_file, dir_with_bands=None, include_deprecated_v2_keys=False, decode_sections=None):
     try:
         xml_parsed = ElementTree.parse(xml_file)
     except ElementTree.ParseError:
@@ -52,7 +137,7 @@ def parse_xml(xml_file, dir_with_bands=None, include_deprecated_v2_keys=False):
 
     try:
         if xml_file_version == QeXmlVersion.POST_6_2:
-            parsed_data, logs = parse_pw_xml_post_6_2(xml_parsed, include_deprecated_v2_keys)
+            parsed_data, logs = parse_pw_xml_post_6_2(xml_parsed, include_deprecated_v2_keys, decode_sections)
         elif xml_file_version == QeXmlVersion.PRE_6_2:
             xml_file.seek(0)
             parsed_data, logs = parse_pw_xml_pre_6_2(xml_file, dir_with_bands, include_deprecated_v2_keys)
@@ -65,29 +150,37 @@ def parse_xml(xml_file, dir_with_bands=None, include_deprecated_v2_keys=False):
     return parsed_data, logs
 
 
-def parse_pw_xml_post_6_2(xml, include_deprecated_v2_keys=False):
+def parse_pw_xml_post_6_2(xml, include_deprecated_v2_keys=False, decode_sections=None):
     """Parse the content of XML output file written by `pw.x` with the new schema-based XML format.
 
+    By default the complete document is decoded and validated through the XML schema. If `decode_sections` is a list,
+    the elements of the document are instead only decoded and validated when they are accessed, see `LazyXMLDocument`,
+    such that the sections that are not needed for the parsed data are never decoded. Validation errors in those
+    sections are then not reported.
+
     :param xml: parsed XML
     :param include_deprecated_v2_keys: boolean, if True, includes deprecated keys from old parser v2
+    :param decode_sections: optional list of sections, either names of `sections.XML_SECTIONS` or paths relative to
+        the root element, that should be decoded and validated even if they are not needed. If not specified, the
+        complete document is decoded and validated.
     :returns: tuple of two dictionaries, with the parsed data and log messages, respectively
     """
     e_bohr2_to_coulomb_m2 = 57.214766  # e/a0^2 to C/m^2 (electric polarization) from Wolfram Alpha
 
     logs = get_logging_container()
 
-    # detect schema name+path from XML contents
+    # detect schema name+path from XML contents, the compiled schema is retrieved from the process-wide cache
     schema_filepath = get_schema_filepath(xml)
 
     try:
-        xsd = XMLSchema(schema_filepath)
+        xsd = get_xml_schema(schema_filepath)
     except URLError:
 
         # If loading the XSD file specified in the XML file fails, we try the default
         schema_filepath_default = get_default_schema_filepath()
 
         try:
-            xsd = XMLSchema(schema_filepath_default)
+            xsd = get_xml_schema(schema_filepath_default)
         except URLError:
             raise XMLParseError('Could not open or parse the XSD files {} and {}'.format(schema_filepath, schema_filepath_default))
         else:
@@ -100,15 +193,35 @@ def parse_pw_xml_post_6_2(xml, include_deprecated_v2_keys=False):
     #  xml_dictionary['key']['$'] returns its content
     #  xml_dictionary['key']['@attr'] returns its attribute 'attr'
     #  xml_dictionary['key']['nested_key'] goes one level deeper.
+    #
+    # With `decode_sections`, the sections of the document are only decoded when they are accessed. The Kohn-Sham
+    # energies are excluded from the decoding of the band structure and read separately into arrays, see
+    # `read_ks_energies`.
+    band_structure_element, ks_energies_elements = get_ks_energies_elements(xml)
+
+    if decode_sections is None:
+        with detached_ks_energies(band_structure_element, ks_energies_elements):
+            xml_dictionary, errors = xsd.to_dict(xml, validation='lax')
+        log_validation_errors(logs, errors, schema_filepath)
+
+        inputs = xml_dictionary['input']
+        outputs = xml_dictionary['output']
+    else:
+        document = LazyXMLDocument(xml, xsd, validation='lax')
 
-    xml_dictionary, errors = xsd.to_dict(xml, validation='lax')
-    if errors:
-        logs.error.append('{} XML schema validation error(s) schema: {}:'.format(len(errors), schema_filepath))
-        for err in errors:
-            logs.error.append(str(err))
+        with detached_ks_energies(band_structure_element, ks_energies_elements):
+            for section in decode_sections:
+                try:
+                    document.decode(section)
+                except KeyError:
+                    logs.warning.append('the requested XML section `{}` is not present'.format(section))
+
+            if band_structure_element is not None:
+                document.decode('output/band_structure')
 
-    inputs = xml_dictionary['input']
-    outputs = xml_dictionary['output']
+        xml_dictionary = document.get_section()
+        inputs = xml_dictionary.get_section('input')
+        outputs = xml_dictionary.get_section('output')
 
     lattice_vectors = [
         [x * bohr_to_ang for x in outputs['atomic_structure']['cell']['a1']],
@@ -370,30 +483,22 @@ def parse_pw_xml_post_6_2(xml, include_deprecated_v2_keys=False):
             if num_bands is None:
                 num_bands = num_bands_up + num_bands_down   # backwards compatibility;
 
-        k_points = []
-        k_points_weights = []
-        ks_states = band_structure['ks_energies']
-        for ks_state in ks_states:
-            k_points.append([kp * 2 * np.pi / output_alat_angstrom for kp in ks_state['k_point']['$']])
-            k_points_weights.append(ks_state['k_point']['@weight'])
+        k_points, k_points_weights, band_eigenvalues, band_occupations = read_ks_energies(
+            ks_energies_elements, num_bands
+        )
+        k_points = (k_points * 2 * np.pi / output_alat_angstrom).tolist()
+        k_points_weights = k_points_weights.tolist()
 
+        # The eigenvalues and occupations of each k-point are stored contiguously for all bands, which are split into
+        # the two spin channels for a collinear spin-polarized calculation
         if not spins:
-            band_eigenvalues = [[]]
-            band_occupations = [[]]
-            for ks_state in ks_states:
-                band_eigenvalues[0].append(ks_state['eigenvalues']['$'])
-                band_occupations[0].append(ks_state['occupations']['$'])
+            band_eigenvalues = band_eigenvalues[np.newaxis, :, :]
+            band_occupations = band_occupations[np.newaxis, :, :]
         else:
-            band_eigenvalues = [[], []]
-            band_occupations = [[], []]
-            for ks_state in ks_states:
-                band_eigenvalues[0].append(ks_state['eigenvalues']['$'][0:num_bands_up])
-                band_eigenvalues[1].append(ks_state['eigenvalues']['$'][num_bands_up:num_bands])
-                band_occupations[0].append(ks_state['occupations']['$'][0:num_bands_up])
-                band_occupations[1].append(ks_state['occupations']['$'][num_bands_up:num_bands])
+            band_eigenvalues = np.stack([band_eigenvalues[:, :num_bands_up], band_eigenvalues[:, num_bands_up:]])
+            band_occupations = np.stack([band_occupations[:, :num_bands_up], band_occupations[:, num_bands_up:]])
 
-        band_eigenvalues = np.array(band_eigenvalues) * hartree_to_ev
-        band_occupations = np.array(band_occupations)
+        band_eigenvalues = band_eigenvalues * hartree_to_ev
 
         if not spins:
             parser_assert_equal(band_eigenvalues.shape, (1, num_k_points, num_bands),
@@ -562,4 +667,8 @@ def parse_pw_xml_post_6_2(xml, include_deprecated_v2_keys=False):
 
     xml_data['structure'] = structure_data
 
+    # The validation errors of the lazily decoded sections are only known once all the accessed sections are decoded
+    if decode_sections is not None:
+        log_validation_errors(logs, document.errors, schema_filepath)
+
     return xml_data, logs
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""Lazy access to the sections of the schema-based XML output of `pw.x`.
+
+Decoding the whole XML document through the XML schema materializes many parts that the parser never looks at, for
+example the `step` elements with the intermediate structures, energies and forces of every ionic step of a relaxation.
+The classes in this module decode an element of the document only when it is accessed and cache the decoded data, such
+that only the parts that are actually used are decoded and validated.
+"""
+from __future__ import absolute_import
+
+import xmlschema
+
+# Short names for the sections of the document that can be requested to be decoded with the `decode_xml_sections`
+# parser option. Any other path relative to the root element of the document can be requested as well.
+XML_SECTIONS = {
+    'structure': 'output/atomic_structure',
+    'band_structure': 'output/band_structure',
+    'symmetries': 'output/symmetries',
+    'magnetization': 'output/magnetization',
+    'forces': 'output/forces',
+    'convergence_info': 'output/convergence_info',
+}
+
+# The XSD elements of the schemas are looked up by their path, which is relatively expensive, once per process. The
+# cache is bounded by the number of schemas times the number of paths that are decoded.
+_XSD_ELEMENTS = {}
+
+
+class LazyXMLDocument(object):  # pylint: disable=useless-object-inheritance
+    """XML document whose elements are decoded through the XML schema only when they are accessed.
+
+    The decoded data of each element is cached, as are the validation errors that were encountered while decoding it.
+    The data of an element that is contained in an element that was decoded before is taken from the cached data of
+    the latter, instead of being decoded a second time. Validation errors in elements that are never decoded are not
+    reported.
+    """
+
+    def __init__(self, xml, xsd, validation='lax'):
+        """Construct a new instance.
+
+        :param xml: parsed XML, either an `ElementTree` or its root `Element`
+        :param xsd: the `XMLSchema` to decode the document with
+        :param validation: the validation mode of the decoding, see `XMLSchema.to_dict`
+        """
+        self._root = xml.getroot() if hasattr(xml, 'getroot') else xml
+        self._xsd = xsd
+        self._validation = validation
+        self._decoded = {}
+        self._resource = None
+        self.errors = []
+
+    def __contains__(self, path):
+        return self._root.find(XML_SECTIONS.get(path, path)) is not None
+
+    @property
+    def decoded_paths(self):
+        """Return the sorted list of paths of the elements that have been decoded."""
+        return sorted(self._decoded)
+
+    def get_section(self, path=''):
+        """Return a lazy mapping of the child elements of the element with the given path.
+
+        :param path: path of the element relative to the root element, which is selected by the empty string
+        :return: `LazyXMLSection` instance
+        """
+        return LazyXMLSection(self, XML_SECTIONS.get(path, path))
+
+    def get_child_tags(self, path=''):
+        """Return the unique tags of the child elements of the element with the given path in document order.
+
+        :param path: path of the element relative to the root element, which is selected by the empty string
+        :raises KeyError: if the document does not contain the element
+        """
+        element = self._root.find(path) if path else self._root
+
+        if element is None:
+            raise KeyError(path)
+
+        tags = []
+        for child in element:
+            if child.tag not in tags:
+                tags.append(child.tag)
+
+        return tags
+
+    def decode(self, path):
+        """Return the decoded data of the element with the given path, decoding it if it has not been decoded yet.
+
+        If the path matches multiple elements, as for repeated elements such as `step`, a list is returned, like for
+        the decoding of the complete document.
+
+        :param path: path of the element relative to the root element, or one of the names of `XML_SECTIONS`
+        :return: the decoded data
+        :raises KeyError: if the document does not contain the element
+        """
+        path = XML_SECTIONS.get(path, path)
+
+        try:
+            return self._get_decoded(path)
+        except KeyError:
+            pass
+
+        elements = self._root.findall(path)
+        xsd_element = self._get_xsd_element(path)
+
+        if not elements or xsd_element is None:
+            raise KeyError(path)
+
+        # The elements are decoded directly by their XSD element, since decoding through the schema with a path checks
+        # the complete schema and looks up the XSD element again on each call
+        decoded = []
+        for element in elements:
+            data, errors = xsd_element.decode(element, validation=self._validation)
+            decoded.append(data)
+            self.errors.extend(self._locate_errors(errors))
+
+        data = decoded[0] if len(decoded) == 1 else decoded
+        self._decoded[path] = data
+
+        return data
+
+    def _locate_errors(self, errors):
+        """Set the document as the source of the validation errors, such that they report the path of their element.
+
+        :param errors: list of validation errors of the decoding of an element
+        :return: the list of validation errors
+        """
+        if errors and self._resource is None:
+            self._resource = xmlschema.XMLResource(self._root)
+
+        for error in errors:
+            error.source = self._resource
+
+        return errors
+
+    def _get_xsd_element(self, path):
+        """Return the XSD element of the schema for the element with the given path, or None if it does not exist."""
+        key = (self._xsd, path)
+
+        try:
+            return _XSD_ELEMENTS[key]
+        except KeyError:
+            xsd_element = self._xsd.find('/{}/{}'.format(self._root.tag, path))
+            if xsd_element is not None:
+                _XSD_ELEMENTS[key] = xsd_element
+
+        return xsd_element
+
+    def _get_decoded(self, path):
+        """Return the decoded data of the element with the given path from the cache.
+
+        :raises KeyError: if neither the element nor one of its parents has been decoded
+        """
+        keys = path.split('/')
+
+        for index in range(len(keys), 0, -1):
+            try:
+                data = self._decoded['/'.join(keys[:index])]
+            except KeyError:
+                continue
+
+            for key in keys[index:]:
+                if not isinstance(data, dict):
+                    raise KeyError(path)
+                data = data[key]
+
+            return data
+
+        raise KeyError(path)
+
+
+class LazyXMLSection(object):  # pylint: disable=useless-object-inheritance
+    """Read-only mapping of the child elements of an element of a `LazyXMLDocument` onto their decoded data.
+
+    The keys are the tags of the child elements, which are known without decoding anything. A value is decoded only
+    when it is accessed, for example ``section['band_structure']`` decodes only the `band_structure` element.
+    """
+
+    def __init__(self, document, path=''):
+        """Construct a new instance.
+
+        :param document: the `LazyXMLDocument` that contains the element
+        :param path: path of the element relative to the root element, which is selected by the empty string
+        """
+        self._document = document
+        self._path = path
+
+    def _get_child_path(self, key):
+        return '{}/{}'.format(self._path, key) if self._path else key
+
+    def __contains__(self, key):
+        return self._get_child_path(key) in self._document
+
+    def __getitem__(self, key):
+        return self._document.decode(self._get_child_path(key))
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def get(self, key, default=None):
+        """Return the decoded data of the child element with the given tag, or `default` if there is no such element."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def get_section(self, key):
+        """Return a lazy mapping of the child elements of the child element with the given tag."""
+        return LazyXMLSection(self._document, self._get_child_path(key))
+
+    def keys(self):
+        """Return the list of the unique tags of the child elements."""
+        return self._document.get_child_tags(self._path)
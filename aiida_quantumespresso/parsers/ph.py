@@ -10,6 +10,7 @@ from aiida.common import exceptions
 from aiida.parsers.parser import Parser
 from aiida_quantumespresso.calculations.ph import PhCalculation
 from aiida_quantumespresso.parsers.parse_raw.ph import parse_raw_ph_output as parse_stdout
+from aiida_quantumespresso.parsers.parse_raw.ph import parse_ph_dynmat_files_arrays
 
 
 class PhParser(Parser):
@@ -52,11 +53,31 @@ class PhParser(Parser):
             dynmat_files.append(self.retrieved.get_object_content(os.path.join(dynmat_folder, filename)))
 
         try:
-            parsed_data, logs = parse_stdout(stdout, tensor_file, dynmat_files)
+            settings = self.node.inputs.settings.get_dict()
+        except (AttributeError, exceptions.NotExistent):
+            settings = {}
+
+        parser_options = settings.get(self.get_parser_settings_key(), None) or {}
+
+        # With the `dynamical_matrices_as_arrays` option, the dynamical matrices are stored in an `ArrayData` instead of
+        # the output parameters, which then only contain the scalar metadata
+        dynamical_matrices_as_arrays = parser_options.get('dynamical_matrices_as_arrays', False)
+        dynamical_matrices = None
+
+        try:
+            if dynamical_matrices_as_arrays:
+                parsed_data, logs = parse_stdout(stdout, tensor_file)
+                dynamical_matrices = parse_ph_dynmat_files_arrays(dynmat_files, logs)
+            else:
+                parsed_data, logs = parse_stdout(stdout, tensor_file, dynmat_files)
         except Exception:
             self.logger.error(traceback.format_exc())
             return self.exit_codes.ERROR_UNEXPECTED_PARSER_EXCEPTION
 
+        if dynamical_matrices is not None:
+            parsed_data['number_of_dynamical_matrices'] = len(dynamical_matrices['qpoints'])
+            self.out('output_dynamical_matrices', self.build_output_dynamical_matrices(dynamical_matrices))
+
         self.emit_logs(logs)
         self.out('output_parameters', orm.Dict(dict=parsed_data))
 
@@ -66,6 +87,32 @@ class PhParser(Parser):
         if 'ERROR_CONVERGENCE_NOT_REACHED' in logs['error']:
             return self.exit_codes.ERROR_CONVERGENCE_NOT_REACHED
 
+    @staticmethod
+    def get_parser_settings_key():
+        """Return the key that contains the optional parser options in the `settings` input node."""
+        return 'parser_options'
+
+    @staticmethod
+    def build_output_dynamical_matrices(dynamical_matrices):
+        """Build the `ArrayData` with the q-points, frequencies and eigenvectors of the dynamical matrices.
+
+        The complex eigenvectors are stored as two real arrays, because the array data only supports real numbers.
+
+        :param dynamical_matrices: dictionary with the arrays returned by `parse_ph_dynmat_files_arrays`
+        :return: an `ArrayData` node
+        """
+        eigenvectors = dynamical_matrices['eigenvectors']
+
+        array = orm.ArrayData()
+        array.set_array('qpoints', dynamical_matrices['qpoints'])
+        array.set_array('frequencies', dynamical_matrices['frequencies'])
+        array.set_array('eigenvectors_real', eigenvectors.real.copy())
+        array.set_array('eigenvectors_imag', eigenvectors.imag.copy())
+        array.set_attribute('qpoints_units', '2pi/lattice_parameter')
+        array.set_attribute('frequencies_units', 'cm-1')
+
+        return array
+
     def emit_logs(self, *args):
         """Emit the messages in one or multiple "log dictionaries" through the logger of the parser.
 
@@ -10,120 +10,136 @@ from six.moves import range
 from aiida.common import NotExistent, LinkType
 from aiida.orm import Dict, ProjectionData, BandsData, XyData, CalcJobNode
 from aiida.parsers import Parser
-from aiida.plugins import OrbitalFactory
 
+from aiida_quantumespresso.data.projections import CompactProjectionData, OrbitalList
 from aiida_quantumespresso.parsers import QEOutputParsingError
 from aiida_quantumespresso.parsers import parse_raw_out_basic
 
 
-def find_orbitals_from_statelines(out_info_dict):
-    """This function reads in all the state_lines, that is, the lines describing which atomic states, taken from the
-    pseudopotential, are used for the projection. Then it converts these state_lines into a set of orbitals.
+def parse_state_lines(out_info_dict):
+    """Parse the state lines, that is, the lines describing which atomic states, taken from the pseudopotential, are
+    used for the projection, into the dictionaries that define the corresponding orbitals.
+
+    The radial nodes of a state are the number of states before it with the same atom, angular momentum and magnetic
+    number, which are counted per state in a dictionary in a single pass over the state lines.
 
     :param out_info_dict: contains various technical internals useful in parsing
-    :return: orbitals, a list of orbitals suitable for setting ProjectionData
+    :return: list of dictionaries with the keyword arguments of a `RealhydrogenOrbital`
+    :raises QEOutputParsingError: if the state lines cannot be parsed
     """
     out_file = out_info_dict['out_file']
+    sites = out_info_dict['structure'].sites
     atomnum_re = re.compile(r'atom (.*?)\(')
     element_re = re.compile(r'\((.*?)\)')
     lnum_re = re.compile(r'l=(.*?)m=')
     mnum_re = re.compile(r'm=(.*?)\)')
-    wfc_lines = out_info_dict['wfc_lines']
-    state_lines = [out_file[wfc_line] for wfc_line in wfc_lines]
+    counts = {}
     state_dicts = []
-    for state_line in state_lines:
+
+    for wfc_line in out_info_dict['wfc_lines']:
+        state_line = out_file[wfc_line]
         try:
-            state_dict = {}
-            state_dict['atomnum'] = int(atomnum_re.findall(state_line)[0])
-            state_dict['atomnum'] -= 1  # to keep with orbital indexing
-            state_dict['kind_name'] = element_re.findall(state_line)[0].strip()
-            state_dict['angular_momentum'] = int(lnum_re.findall(state_line)[0])
-            state_dict['magnetic_number'] = int(mnum_re.findall(state_line)[0])
-            state_dict['magnetic_number'] -= 1  # to keep with orbital indexing
+            atomnum = int(atomnum_re.findall(state_line)[0]) - 1  # to keep with orbital indexing
+            kind_name = element_re.findall(state_line)[0].strip()
+            angular_momentum = int(lnum_re.findall(state_line)[0])
+            magnetic_number = int(mnum_re.findall(state_line)[0]) - 1  # to keep with orbital indexing
         except ValueError:
             raise QEOutputParsingError('State lines are not formatted in a standard way.')
-        state_dicts.append(state_dict)
-
-    # here is some logic to figure out the value of radial_nodes to use
-    new_state_dicts = []
-    for i in range(len(state_dicts)):
-        radial_nodes = 0
-        state_dict = state_dicts[i].copy()
-        for j in range(i - 1, -1, -1):
-            if state_dict == state_dicts[j]:
-                radial_nodes += 1
-        state_dict['radial_nodes'] = radial_nodes
-        new_state_dicts.append(state_dict)
-    state_dicts = new_state_dicts
-
-    # here is some logic to assign positions based on the atom_index
-    structure = out_info_dict['structure']
-    for state_dict in state_dicts:
-        site_index = state_dict.pop('atomnum')
-        state_dict['position'] = structure.sites[site_index].position
-
-    # here we set the resulting state_dicts to a new set of orbitals
-    orbitals = []
-    RealhydrogenOrbital = OrbitalFactory('realhydrogen')
-    for state_dict in state_dicts:
-        orbitals.append(RealhydrogenOrbital(**state_dict))
-
-    return orbitals
 
+        key = (atomnum, kind_name, angular_momentum, magnetic_number)
+        radial_nodes = counts.get(key, 0)
+        counts[key] = radial_nodes + 1
+
+        state_dicts.append({
+            'position': sites[atomnum].position,
+            'kind_name': kind_name,
+            'angular_momentum': angular_momentum,
+            'magnetic_number': magnetic_number,
+            'radial_nodes': radial_nodes,
+        })
+
+    return state_dicts
 
-def spin_dependent_subparser(out_info_dict):
-    """This find the projection and bands arrays from the out_file and out_info_dict. Used to handle the different
-    possible spin-cases in a convenient manner.
+
+def find_orbitals_from_statelines(out_info_dict):
+    """This function reads in all the state_lines, that is, the lines describing which atomic states, taken from the
+    pseudopotential, are used for the projection. Then it converts these state_lines into a set of orbitals.
+
+    The orbitals are returned as an `OrbitalList`, which only constructs an orbital when it is accessed. This only
+    benefits the `compact_projections` output, which needs nothing but the dictionaries that define the orbitals. The
+    default `ProjectionData` output validates every orbital, so there all orbitals are constructed anyway.
 
     :param out_info_dict: contains various technical internals useful in parsing
-    :return: ProjectionData, BandsData parsed from out_file
+    :return: orbitals, an `OrbitalList` of orbitals suitable for setting ProjectionData
     """
+    return OrbitalList(parse_state_lines(out_info_dict))
+
+
+# Matches the line with the energy of a band, e.g. `==== e(   1) =    -5.51537 eV ====` or `e =  -5.51537 eV`
+REGEX_BAND_ENERGY = re.compile(r'\s*(?:==== )?e(?:\(\s*\d+\))?\s*=\s*([-+]?\d*\.?\d+)')
+
 
+def parse_band_projections(out_info_dict):
+    """Parse the band energies and the projections onto the atomic states of one spin channel from the stdout.
+
+    The projections of a band are printed as `psi = 0.498*[#   1]+0.498*[#   5]+`, possibly continued on more lines,
+    between the line with its energy and the `|psi|^2` line. The blocks of all bands are joined, stripped of everything
+    but the pairs of coefficients and state indices, which are converted at once with `numpy.fromstring` and assigned
+    to their band and state with a single vectorized assignment.
+
+    :param out_info_dict: contains various technical internals useful in parsing
+    :return: tuple of the band energies with shape `(k_states, num_bands)` and the projections with shape
+        `(k_states, num_bands, num_wfc)`
+    :raises QEOutputParsingError: if the projections cannot be parsed
+    """
     out_file = out_info_dict['out_file']
-    spin_down = out_info_dict['spin_down']
-    od = out_info_dict  #using a shorter name for convenience
-    #   regular expressions needed for later parsing
-    WaveFraction1_re = re.compile(r'\=(.*?)\*')  # state composition 1
-    WaveFractionremain_re = re.compile(r'\+(.*?)\*')  # state comp 2
-    FunctionId_re = re.compile(r'\#(.*?)\]')  # state identity
-    # primes arrays for the later parsing
-    num_wfc = len(od['wfc_lines'])
-    bands = np.zeros([od['k_states'], od['num_bands']])
-    projection_arrays = np.zeros([od['k_states'], od['num_bands'], num_wfc])
+    k_states = out_info_dict['k_states']
+    num_bands = out_info_dict['num_bands']
+    num_wfc = len(out_info_dict['wfc_lines'])
+    num_states = k_states * num_bands
+    offset = num_states if out_info_dict['spin_down'] else 0
+    e_lines = out_info_dict['e_lines'][offset:offset + num_states]
+    psi_lines = out_info_dict['psi_lines'][offset:offset + num_states]
+    error = 'the standard out file does not comply with the official documentation.'
+
+    if len(e_lines) != num_states or len(psi_lines) != num_states:
+        raise QEOutputParsingError(error)
 
     try:
-        for i in range(od['k_states']):
-            if spin_down:
-                i += od['k_states']
-            # grabs band energy
-            for j in range(i * od['num_bands'], (i + 1) * od['num_bands'], 1):
-                out_ind = od['e_lines'][j]
-                try:
-                    # post ~6.3 output format "e ="
-                    val = out_file[out_ind].split()[2]
-                    float(val)
-                except ValueError:
-                    # pre ~6.3 output format? "==== e("
-                    val = out_file[out_ind].split()[4]
-                bands[i % od['k_states']][j % od['num_bands']] = val
-                #subloop grabs pdos
-                wave_fraction = []
-                wave_id = []
-                for k in range(od['e_lines'][j] + 1, od['psi_lines'][j], 1):
-                    out_line = out_file[k]
-                    wave_fraction += WaveFraction1_re.findall(out_line)
-                    wave_fraction += WaveFractionremain_re.findall(out_line)
-                    wave_id += FunctionId_re.findall(out_line)
-                if len(wave_id) != len(wave_fraction):
-                    raise IndexError
-                for l in range(len(wave_id)):
-                    wave_id[l] = int(wave_id[l])
-                    wave_fraction[l] = float(wave_fraction[l])
-                    #sets relevant values in pdos_array
-                    projection_arrays[i % od['k_states']][j % od['num_bands']][wave_id[l] - 1] = wave_fraction[l]
-    except IndexError:
-        raise QEOutputParsingError('the standard out file does not ' 'comply with the official ' 'documentation.')
+        bands = [REGEX_BAND_ENERGY.match(out_file[index]).group(1) for index in e_lines]
+    except AttributeError:
+        raise QEOutputParsingError(error)
+
+    blocks = [''.join(out_file[e_line + 1:psi_line]) for e_line, psi_line in zip(e_lines, psi_lines)]
+    counts = np.array([block.count('*[') for block in blocks], dtype=int)
+    text = ''.join(blocks).replace('psi =', ' ').replace('*[#', ' ').replace(']', ' ').replace('+', ' ')
+    pairs = np.fromstring(text, sep=' ')
+
+    if pairs.size != 2 * counts.sum():
+        raise QEOutputParsingError(error)
+
+    pairs = pairs.reshape(-1, 2)
+    band_indices = np.repeat(np.arange(num_states), counts)
+    wfc_indices = pairs[:, 1].astype(int) - 1
 
+    if wfc_indices.size and (wfc_indices.min() < 0 or wfc_indices.max() >= num_wfc):
+        raise QEOutputParsingError(error)
+
+    projection_arrays = np.zeros((num_states, num_wfc))
+    projection_arrays[band_indices, wfc_indices] = pairs[:, 0]
+    bands = np.array(bands, dtype=float).reshape(k_states, num_bands)
+
+    return bands, projection_arrays.reshape(k_states, num_bands, num_wfc)
+
+
+def build_bands_data(out_info_dict, bands):
+    """Build the `BandsData` with the given band energies and the kpoints of the parent calculation, if possible.
+
+    :param out_info_dict: contains various technical internals useful in parsing
+    :param bands: array with the band energies with shape `(k_states, num_bands)`
+    :return: BandsData
+    """
+    od = out_info_dict  #using a shorter name for convenience
     bands_data = BandsData()
     # Attempts to retrieve the kpoints from the parent calc
     parent_calc = out_info_dict['parent_calc']
@@ -140,6 +156,19 @@ def spin_dependent_subparser(out_info_dict):
 
     bands_data.set_bands(bands, units='eV')
 
+    return bands_data
+
+
+def spin_dependent_subparser(out_info_dict):
+    """This find the projection and bands arrays from the out_file and out_info_dict. Used to handle the different
+    possible spin-cases in a convenient manner.
+
+    :param out_info_dict: contains various technical internals useful in parsing
+    :return: ProjectionData, BandsData parsed from out_file
+    """
+    bands, projection_arrays = parse_band_projections(out_info_dict)
+    bands_data = build_bands_data(out_info_dict, bands)
+
     orbitals = out_info_dict['orbitals']
     if len(orbitals) != np.shape(projection_arrays[0, 0, :])[0]:
         raise QEOutputParsingError(
@@ -159,8 +188,9 @@ def spin_dependent_subparser(out_info_dict):
     #insert here some logic to assign pdos to the orbitals
     pdos_arrays = spin_dependent_pdos_subparser(out_info_dict)
     energy_arrays = [out_info_dict['energy']] * len(orbitals)
+    # The `ProjectionData` validates each orbital, so all the orbitals of the lazy `OrbitalList` are constructed here
     projection_data.set_projectiondata(
-        orbitals,
+        list(orbitals),
         list_of_projections=projections,
         list_of_energy=energy_arrays,
         list_of_pdos=pdos_arrays,
@@ -170,6 +200,44 @@ def spin_dependent_subparser(out_info_dict):
     return bands_data, projection_data
 
 
+def compact_subparser(out_info_dict, spin_channels, dtype=np.float64):
+    """Parse the bands of each spin channel and the projections and pdos of all spin channels into a single node.
+
+    Instead of a `ProjectionData` per spin channel, with an orbital object and arrays for each orbital, the
+    projections and pdos of all orbitals and spin channels are stored in the dense arrays of a `CompactProjectionData`.
+
+    :param out_info_dict: contains various technical internals useful in parsing
+    :param spin_channels: list of the values of `spin_down` of the spin channels to parse
+    :param dtype: the floating point dtype in which the projections and pdos are stored
+    :return: list of the BandsData of each spin channel, CompactProjectionData
+    """
+    num_orbitals = len(out_info_dict['orbitals'])
+    bands_data_list = []
+    projections = []
+    pdos = []
+
+    for spin_down in spin_channels:
+        out_info_dict['spin_down'] = spin_down
+        bands, projection_arrays = parse_band_projections(out_info_dict)
+        pdos_arrays = spin_dependent_pdos_subparser(out_info_dict)
+
+        if projection_arrays.shape[2] != num_orbitals or len(pdos_arrays) != num_orbitals:
+            raise QEOutputParsingError(
+                'the number of projections or pdos arrays does not agree with the number of orbitals'
+            )
+
+        bands_data_list.append(build_bands_data(out_info_dict, bands))
+        projections.append(projection_arrays)
+        pdos.append(pdos_arrays)
+
+    projection_data = CompactProjectionData()
+    projection_data.set_projections(
+        projections, out_info_dict['energy'], pdos, out_info_dict['orbitals'].state_dicts, dtype=dtype
+    )
+
+    return bands_data_list, projection_data
+
+
 def natural_sort_key(sort_key, _nsre=re.compile('([0-9]+)')):
     """Pass to ``key`` for ``str.sort`` to achieve natural sorting. For example, ``["2", "11", "1"]`` will be sorted to
     ``["1", "2", "11"]`` instead of ``["1", "11", "2"]``
@@ -186,6 +254,33 @@ def natural_sort_key(sort_key, _nsre=re.compile('([0-9]+)')):
     return keys
 
 
+def read_pdos_columns(handle):
+    """Read the columns of a `pdos_tot` or `pdos_atm` file written by `projwfc.x` into a two-dimensional array.
+
+    The numbers are converted in a single call of `numpy.fromstring` after the comment lines of the header are skipped.
+    Only if the file does not consist of rows with the same number of columns, it is read with `numpy.genfromtxt`.
+
+    :param handle: a file handle opened in text mode
+    :return: array with shape `(number_of_energies, number_of_columns)`
+    """
+    content = handle.read()
+    start = 0
+
+    while content.startswith('#', start):
+        start = content.find('\n', start) + 1
+        if start == 0:
+            return np.empty((0, 0))
+
+    end = content.find('\n', start)
+    number_of_columns = len(content[start:end if end >= 0 else None].split())
+    values = np.fromstring(content[start:], sep=' ')
+
+    if not number_of_columns or values.size % number_of_columns:
+        return np.atleast_2d(np.genfromtxt(content.splitlines()))
+
+    return values.reshape(-1, number_of_columns)
+
+
 def spin_dependent_pdos_subparser(out_info_dict):
     """Finds and labels the pdos arrays associated with the out_info_dict.
 
@@ -268,7 +363,7 @@ class ProjwfcParser(Parser):
             pdostot_filename = fnmatch.filter(out_filenames, '*pdos_tot*')[0]
             with out_folder.open(pdostot_filename, 'r') as pdostot_file:
                 # Columns: Energy(eV), Ldos, Pdos
-                pdostot_array = np.genfromtxt(pdostot_file)
+                pdostot_array = read_pdos_columns(pdostot_file)
                 energy = pdostot_array[:, 0]
                 dos = pdostot_array[:, 1]
         except (OSError, KeyError):
@@ -280,7 +375,7 @@ class ProjwfcParser(Parser):
         pdos_atm_array_dict = {}
         for name in pdos_atm_filenames:
             with out_folder.open(name, 'r') as pdosatm_file:
-                pdos_atm_array_dict[name] = np.genfromtxt(pdosatm_file)
+                pdos_atm_array_dict[name] = read_pdos_columns(pdosatm_file)
 
         # finding the bands and projections
         # we create a dictionary the progressively accumulates more info
@@ -288,8 +383,16 @@ class ProjwfcParser(Parser):
         out_info_dict['out_file'] = out_file
         out_info_dict['energy'] = energy
         out_info_dict['pdos_atm_array_dict'] = pdos_atm_array_dict
+
         try:
-            new_nodes_list = self._parse_bands_and_projections(out_info_dict)
+            settings = self.node.inputs.settings.get_dict()
+        except (AttributeError, NotExistent):
+            settings = {}
+
+        parser_options = settings.get(self.get_parser_settings_key(), None) or {}
+
+        try:
+            new_nodes_list = self._parse_bands_and_projections(out_info_dict, parser_options)
         except QEOutputParsingError as err:
             self.logger.error('Error parsing bands and projections: {}'.format(err))
             traceback.print_exc()
@@ -302,14 +405,27 @@ class ProjwfcParser(Parser):
         Dos_out.set_y(dos, 'Dos', 'states/eV')
         self.out('Dos', Dos_out)
 
-    def _parse_bands_and_projections(self, out_info_dict):
+    @staticmethod
+    def get_parser_settings_key():
+        """Return the key that contains the optional parser options in the `settings` input node."""
+        return 'parser_options'
+
+    def _parse_bands_and_projections(self, out_info_dict, parser_options=None):
         """Function that parses the standard output into bands and projection data.
 
         :param out_info_dict: used to pass technical internal variables
                               to helper functions in compact form
+        :param parser_options: optional dictionary with the parser options, with the `compact_projections` option, a
+            single `CompactProjectionData` is created instead of a `ProjectionData` for each spin channel
         :return: append_nodes_list a list containing BandsData and
                  ProjectionData parsed from standard_out
         """
+        parser_options = parser_options or {}
+        compact_dtype = parser_options.get('compact_projections_dtype', 'float64')
+
+        if compact_dtype not in ['float32', 'float64']:
+            raise QEOutputParsingError('invalid `compact_projections_dtype`: {}'.format(compact_dtype))
+
         out_file = out_info_dict['out_file']  # Note: we expect a list of lines
         out_info_dict['k_lines'] = []
         out_info_dict['e_lines'] = []
@@ -379,7 +495,15 @@ class ProjwfcParser(Parser):
         out_info_dict['structure'] = structure
         out_info_dict['orbitals'] = find_orbitals_from_statelines(out_info_dict)
 
-        if spin:
+        if parser_options.get('compact_projections', False):
+            if spin:
+                bands_data_list, projection_data = compact_subparser(out_info_dict, [False, True], compact_dtype)
+                append_nodes_list += [('bands_up', bands_data_list[0]), ('bands_down', bands_data_list[1])]
+            else:
+                bands_data_list, projection_data = compact_subparser(out_info_dict, [False], compact_dtype)
+                append_nodes_list += [('bands', bands_data_list[0])]
+            append_nodes_list += [('projections_compact', projection_data)]
+        elif spin:
             # I had to guess what the ordering of the spin is, because
             # the projwfc.x documentation doesn't say, but looking at the
             # source code I found:
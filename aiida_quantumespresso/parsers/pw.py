@@ -9,6 +9,7 @@ from aiida.parsers import Parser
 
 from aiida_quantumespresso.parsers.parse_raw.pw import reduce_symmetries
 from aiida_quantumespresso.utils.mapping import get_logging_container
+from aiida_quantumespresso.utils.profiling import Profiler
 
 
 class PwParser(Parser):
@@ -20,8 +21,10 @@ class PwParser(Parser):
         Two nodes that are expected are the default 'retrieved' `FolderData` node which will store the retrieved files
         permanently in the repository. The second required node is a filepath under the key `retrieved_temporary_files`
         which should contain the temporary retrieved files.
+
+        If profiling is enabled through the `profiling` parser option or the environment variable, the timings of the
+        phases of the parsing are stored in the `profiling` extra of the node or attached as the `output_profiling`.
         """
-        dir_with_bands = None
         self.exit_code_xml = None
         self.exit_code_stdout = None
         self.exit_code_parser = None
@@ -39,6 +42,27 @@ class PwParser(Parser):
         # Look for optional settings input node and potential 'parser_options' dictionary within it
         parser_options = settings.get(self.get_parser_settings_key(), None)
 
+        try:
+            self.profiler = Profiler.from_options((parser_options or {}).get('profiling', None))
+        except ValueError as exception:
+            self.logger.warning('profiling is disabled: {}'.format(exception))
+            self.profiler = Profiler(enabled=False)
+
+        try:
+            return self.parse_outputs(settings, parser_options, **kwargs)
+        finally:
+            self.store_profiling()
+
+    def parse_outputs(self, settings, parser_options, **kwargs):
+        """Parse the retrieved files into output nodes and return an exit code if a problem was detected.
+
+        :param settings: the dictionary of the `settings` input node
+        :param parser_options: the optional dictionary with parser options
+        """
+        # pylint: disable=too-many-locals
+        dir_with_bands = None
+        profiler = self.profiler
+
         # Verify that the retrieved_temporary_folder is within the arguments if temporary files were specified
         if self.node.get_attribute('retrieve_temporary_list', None):
             try:
@@ -46,55 +70,62 @@ class PwParser(Parser):
             except KeyError:
                 return self.exit(self.exit_codes.ERROR_NO_RETRIEVED_TEMPORARY_FOLDER)
 
-        parameters = self.node.inputs.parameters.get_dict()
-        parsed_xml, logs_xml = self.parse_xml(dir_with_bands, parser_options)
-        parsed_stdout, logs_stdout = self.parse_stdout(parameters, parser_options, parsed_xml)
+        with profiler.phase('read_inputs'):
+            parameters = self.node.inputs.parameters.get_dict()
 
-        parsed_bands = parsed_stdout.pop('bands', {})
-        parsed_structure = parsed_stdout.pop('structure', {})
-        parsed_trajectory = parsed_stdout.pop('trajectory', {})
-        parsed_parameters = self.build_output_parameters(parsed_stdout, parsed_xml)
+        with profiler.phase('parse_xml'):
+            parsed_xml, logs_xml = self.parse_xml(dir_with_bands, parser_options)
 
-        # Append the last frame of some of the smaller trajectory arrays to the parameters for easy querying
-        self.final_trajectory_frame_to_parameters(parsed_parameters, parsed_trajectory)
+        with profiler.phase('parse_stdout'):
+            parsed_stdout, logs_stdout = self.parse_stdout(parameters, parser_options, parsed_xml)
 
-        # If the parser option 'all_symmetries' is False, we reduce the raw parsed symmetries to save space
-        all_symmetries = False if parser_options is None else parser_options.get('all_symmetries', False)
-        if not all_symmetries and 'cell' in parsed_structure:
-            reduce_symmetries(parsed_parameters, parsed_structure, self.logger)
+        with profiler.phase('build_outputs'):
+            parsed_bands = parsed_stdout.pop('bands', {})
+            parsed_structure = parsed_stdout.pop('structure', {})
+            parsed_trajectory = parsed_stdout.pop('trajectory', {})
+            parsed_parameters = self.build_output_parameters(parsed_stdout, parsed_xml)
 
-        structure = self.build_output_structure(parsed_structure)
-        kpoints = self.build_output_kpoints(parsed_parameters, structure)
-        bands = self.build_output_bands(parsed_bands, kpoints)
-        trajectory = self.build_output_trajectory(parsed_trajectory, structure)
+            # Append the last frame of some of the smaller trajectory arrays to the parameters for easy querying
+            self.final_trajectory_frame_to_parameters(parsed_parameters, parsed_trajectory)
 
-        # Determine whether the input kpoints were defined as a mesh or as an explicit list
-        try:
-            self.node.inputs.kpoints.get_kpoints()
-        except AttributeError:
-            input_kpoints_explicit = False
-        else:
-            input_kpoints_explicit = True
+            # If the parser option 'all_symmetries' is False, we reduce the raw parsed symmetries to save space
+            all_symmetries = False if parser_options is None else parser_options.get('all_symmetries', False)
+            if not all_symmetries and 'cell' in parsed_structure:
+                reduce_symmetries(parsed_parameters, parsed_structure, self.logger)
 
-        # Only attach the `KpointsData` as output if there will be no `BandsData` output and inputs were defined as mesh
-        if kpoints and not bands and not input_kpoints_explicit:
-            self.out('output_kpoints', kpoints)
+            structure = self.build_output_structure(parsed_structure)
+            kpoints = self.build_output_kpoints(parsed_parameters, structure)
+            bands = self.build_output_bands(parsed_bands, kpoints)
+            trajectory = self.build_output_trajectory(parsed_trajectory, structure)
 
-        if bands:
-            self.out('output_band', bands)
+            # Determine whether the input kpoints were defined as a mesh or as an explicit list
+            try:
+                self.node.inputs.kpoints.get_kpoints()
+            except AttributeError:
+                input_kpoints_explicit = False
+            else:
+                input_kpoints_explicit = True
 
-        if trajectory:
-            self.out('output_trajectory', trajectory)
+            # Only attach the `KpointsData` as output if there will be no `BandsData` output and inputs were defined
+            # as mesh
+            if kpoints and not bands and not input_kpoints_explicit:
+                self.out('output_kpoints', kpoints)
 
-        if not structure.is_stored:
-            self.out('output_structure', structure)
+            if bands:
+                self.out('output_band', bands)
 
-        # Separate the atomic_occupations dictionary in its own node if it is present
-        atomic_occupations = parsed_parameters.pop('atomic_occupations', None)
-        if atomic_occupations:
-            self.out('output_atomic_occupations', orm.Dict(dict=atomic_occupations))
+            if trajectory:
+                self.out('output_trajectory', trajectory)
 
-        self.out('output_parameters', orm.Dict(dict=parsed_parameters))
+            if not structure.is_stored:
+                self.out('output_structure', structure)
+
+            # Separate the atomic_occupations dictionary in its own node if it is present
+            atomic_occupations = parsed_parameters.pop('atomic_occupations', None)
+            if atomic_occupations:
+                self.out('output_atomic_occupations', orm.Dict(dict=atomic_occupations))
+
+            self.out('output_parameters', orm.Dict(dict=parsed_parameters))
 
         # Emit the logs returned by the XML and stdout parsing through the logger
         # If the calculation was an initialization run, reset the XML logs because they will contain a lot of verbose
@@ -121,10 +152,27 @@ class PwParser(Parser):
 
         # First determine issues that can occurr for all calculation types. Note that the generic errors, that are
         # common to all types are done first. If a problem is found there, we return the exit code and don't continue
-        for validator in [self.validate_electronic, self.validate_dynamics, self.validate_ionic]:
-            exit_code = validator(trajectory, parsed_parameters, logs_stdout)
-            if exit_code:
-                return self.exit(exit_code)
+        with profiler.phase('validate'):
+            for validator in [self.validate_electronic, self.validate_dynamics, self.validate_ionic]:
+                exit_code = validator(trajectory, parsed_parameters, logs_stdout)
+                if exit_code:
+                    return self.exit(exit_code)
+
+    def store_profiling(self):
+        """Store the results of the profiler of the parsing, if it is enabled.
+
+        The results are stored in the `profiling` extra of the node under the `parse` key, or attached as the
+        `output_profiling` output node if the `output` profiling option was set.
+        """
+        profiler = getattr(self, 'profiler', None)
+
+        if profiler is None or not profiler.enabled:
+            return
+
+        if profiler.output:
+            self.out('output_profiling', orm.Dict(dict=profiler.stop()))
+        else:
+            profiler.store(self.node, 'parse')
 
     def get_calculation_type(self):
         """Return the type of the calculation."""
@@ -277,9 +325,15 @@ class PwParser(Parser):
         except (TypeError,KeyError):
             include_deprecated_keys = False
 
+        # Sections of the XML that should be decoded lazily, in which case only these and the needed ones are validated
+        try:
+            decode_sections = parser_options['decode_xml_sections']
+        except (TypeError, KeyError):
+            decode_sections = None
+
         try:
             with self.retrieved.open(xml_files[0]) as xml_file:
-                parsed_data, logs = parse_xml(xml_file, dir_with_bands, include_deprecated_keys)
+                parsed_data, logs = parse_xml(xml_file, dir_with_bands, include_deprecated_keys, decode_sections)
         except IOError:
             self.exit_code_xml = self.exit_codes.ERROR_OUTPUT_XML_READ
         except XMLParseError:
@@ -301,7 +355,7 @@ class PwParser(Parser):
         :param parsed_xml: the raw parsed data from the XML output
         :return: tuple of two dictionaries, first with raw parsed data and second with log messages
         """
-        from aiida_quantumespresso.parsers.parse_raw.pw import parse_stdout
+        from aiida_quantumespresso.parsers.parse_raw.pw_stream import parse_stdout_stream
 
         logs = get_logging_container()
         parsed_data = {}
@@ -312,14 +366,13 @@ class PwParser(Parser):
             self.exit_code_stdout = self.exit_codes.ERROR_OUTPUT_STDOUT_MISSING
             return parsed_data, logs
 
+        # The stdout is parsed in a single pass directly from the file handle, without loading it in memory as a whole
         try:
-            stdout = self.retrieved.get_object_content(filename_stdout)
+            with self.retrieved.open(filename_stdout) as handle:
+                parsed_data, logs = parse_stdout_stream(handle, parameters, parser_options, parsed_xml)
         except IOError:
             self.exit_code_stdout = self.exit_codes.ERROR_OUTPUT_STDOUT_READ
             return parsed_data, logs
-
-        try:
-            parsed_data, logs = parse_stdout(stdout, parameters, parser_options, parsed_xml)
         except Exception:
             import traceback
             traceback.print_exc()
@@ -416,29 +469,32 @@ class PwParser(Parser):
     def build_output_trajectory(parsed_trajectory, structure):
         """Build the output trajectory from the raw parsed trajectory data.
 
+        The raw parsed trajectory data is typically a `TrajectoryBuffer`, whose quantities are already numpy arrays, which
+        are set on the `TrajectoryData` without copying them.
+
         :param parsed_trajectory: the raw parsed trajectory data
         :return: a `TrajectoryData` or None
         """
         fractional = False
 
         if 'atomic_positions_relax' in parsed_trajectory:
-            positions = numpy.array(parsed_trajectory.pop('atomic_positions_relax'))
+            positions = numpy.asarray(parsed_trajectory.pop('atomic_positions_relax'))
         elif 'atomic_fractionals_relax' in parsed_trajectory:
             fractional = True
-            positions = numpy.array(parsed_trajectory.pop('atomic_fractionals_relax'))
+            positions = numpy.asarray(parsed_trajectory.pop('atomic_fractionals_relax'))
         else:
             # The positions were never printed, the calculation did not change the structure
             positions = numpy.array([[site.position for site in structure.sites]])
 
         try:
-            cells = numpy.array(parsed_trajectory.pop('lattice_vectors_relax'))
+            cells = numpy.asarray(parsed_trajectory.pop('lattice_vectors_relax'))
         except KeyError:
             # The cell is never printed, the calculation was at fixed cell
             cells = numpy.array([structure.cell])
 
         # Ensure there are as many frames for cell as positions, even when the calculation was done at fixed cell
         if len(cells) == 1 and len(positions) > 1:
-            cells = numpy.array([cells[0]] * len(positions))
+            cells = numpy.repeat(cells, len(positions), axis=0)
 
         if fractional:
             # convert positions to cartesian
@@ -456,7 +512,7 @@ class PwParser(Parser):
         )
 
         for key, value in parsed_trajectory.items():
-            trajectory.set_array(key, numpy.array(value))
+            trajectory.set_array(key, numpy.asarray(value))
 
         return trajectory
 
@@ -564,9 +620,9 @@ class PwParser(Parser):
 
     def get_extended_symmetries(self):
         """Return the extended dictionary of symmetries based on reduced symmetries stored in output parameters."""
-        from aiida_quantumespresso.parsers.parse_raw.pw import get_symmetry_mapping
+        from aiida_quantumespresso.parsers.parse_raw.pw import SYMMETRY_INDEX
 
-        possible_symmetries = get_symmetry_mapping()
+        possible_symmetries = SYMMETRY_INDEX
         parameters = self.node.get_outgoing(node_class=orm.Dict).get_node_by_label('output_parameters')
 
         symmetries_extended = []
@@ -583,9 +639,9 @@ class PwParser(Parser):
                     pass
 
             # expand the rest
-            symmetry['name'] = possible_symmetries[element['symmetry_number']]['name']
-            symmetry['rotation'] = possible_symmetries[element['symmetry_number']]['matrix']
-            symmetry['inversion'] = possible_symmetries[element['symmetry_number']]['inversion']
+            symmetry['name'] = possible_symmetries[element['symmetry_number']].name
+            symmetry['rotation'] = possible_symmetries[element['symmetry_number']].matrix.copy()
+            symmetry['inversion'] = possible_symmetries[element['symmetry_number']].inversion
 
             symmetries_extended.append(symmetry)
 
@@ -32,7 +32,31 @@ class Q2rParser(Parser):
             self.logger.error('Computation did not finish properly')
             return self.exit_codes.ERROR_JOB_NOT_DONE
 
+        try:
+            settings = self.node.inputs.settings.get_dict()
+        except exceptions.NotExistent:
+            settings = {}
+
+        parser_options = settings.get(self.get_parser_settings_key(), {})
+
         with output_folder.open(filename_force_constants, 'rb') as handle:
-            self.out('force_constants', ForceConstantsData(file=handle))
+            force_constants = ForceConstantsData(file=handle)
+
+        # Optionally also store the force constants as an array, such that they do not have to be parsed again
+        if parser_options.get('store_force_constants_array', False):
+            try:
+                force_constants_array = force_constants.get_array_data()
+            except ValueError as exception:
+                self.logger.error('Failed to parse the force constants: {}'.format(exception))
+                return self.exit_codes.ERROR_READING_FORCE_CONSTANTS_FILE
+
+            self.out('force_constants_array', force_constants_array)
+
+        self.out('force_constants', force_constants)
 
         return
+
+    @staticmethod
+    def get_parser_settings_key():
+        """Return the key that contains the optional parser options in the `settings` input node."""
+        return 'parser_options'
@@ -2,6 +2,95 @@
 """Utilities for `BandsData` nodes."""
 from __future__ import absolute_import
 
+import numpy
+
+
+def _get_occupations(bands):
+    """Return the `occupations` array of a `BandsData` node with an explicit spin channel dimension.
+
+    :param bands: the `BandsData` node
+    :return: array with shape `(spin channels, kpoints, bands)`
+    :raises ValueError: if `bands` is not a `BandsData` node
+    :raises ValueError: if `bands` does not contain the array `occupations`
+    :raises ValueError: if `occupations` array has an invalid shape
+    """
+    from aiida.orm import BandsData
+
+    if not isinstance(bands, BandsData):
+        raise ValueError('bands should be a `{}` node'.format(BandsData.__name__))
+
+    try:
+        occupations = bands.get_array('occupations')
+    except KeyError:
+        raise ValueError('BandsData does not contain a `occupations` array')
+
+    return _add_spin_dimension(occupations, 'occupations')
+
+
+def _add_spin_dimension(array, name):
+    """Return the array with a spin channel as first dimension, which is added if the array has only two dimensions.
+
+    :raises ValueError: if the array does not have two or three dimensions
+    """
+    array = numpy.asarray(array)
+
+    # For spin-polarized calculations the array should have 3 dimensions, otherwise just 2.
+    if array.ndim == 3:
+        return array
+
+    if array.ndim == 2:
+        return array[numpy.newaxis, :, :]
+
+    raise ValueError('invalid shape for `{}` array'.format(name))
+
+
+def get_occupied_band_counts(occupations, threshold=0.005):
+    """Return the number of occupied bands for each spin channel and kpoint of an array of occupations.
+
+    The bands at a kpoint are occupied up to the first band with an occupation below the threshold, which is the LUMO,
+    and the index of the LUMO is therefore equal to the number of occupied bands. See `get_highest_occupied_band` for
+    the conditions that the occupations have to satisfy.
+
+    :param occupations: array with shape `(spin channels, kpoints, bands)` or `(kpoints, bands)`, where the latter is
+        used for non spin-polarized and noncollinear calculations
+    :param threshold: the occupation below which a band is considered as unoccupied
+    :return: integer array with shape `(spin channels, kpoints)`
+    :raises ValueError: if `occupations` array has an invalid shape
+    :raises ValueError: if any occupation above LUMO exceeds `2 * threshold`
+    :raises ValueError: if the last band has an occupation above the threshold
+    """
+    occupations = _add_spin_dimension(occupations, 'occupations')
+    number_of_bands = occupations.shape[-1]
+
+    # The LUMO is the first band below the threshold, `argmax` returns zero for kpoints without such band, but those
+    # always fail the check on the last band below
+    unoccupied = occupations < threshold
+    lumo_indices = numpy.argmax(unoccupied, axis=-1)
+
+    above_lumo = numpy.arange(number_of_bands) > lumo_indices[..., numpy.newaxis]
+    occupied_above_lumo = above_lumo & (occupations > 2 * threshold) & unoccupied.any(axis=-1)[..., numpy.newaxis]
+    occupied_last_band = occupations[..., -1] >= threshold
+
+    # Report the first invalid kpoint in the order of spin channels and kpoints, where for a given kpoint an occupied
+    # band above the LUMO takes precedence over an occupied last band
+    invalid = occupied_above_lumo.any(axis=-1) | occupied_last_band
+
+    if invalid.any():
+        # pylint: disable=invalid-name,unbalanced-tuple-unpacking
+        l, k = numpy.unravel_index(numpy.argmax(invalid), invalid.shape)
+        kpoint = occupations[l, k]
+
+        if occupied_above_lumo[l, k].any():
+            n = numpy.argmax(occupied_above_lumo[l, k])
+            lumo_index = lumo_indices[l, k]
+            warning_args = [kpoint[n], n, kpoint[lumo_index], lumo_index, l, k]
+            raise ValueError('Occupation of {} at n={} after lumo lkn<{},{},{}>'.format(*warning_args))
+
+        warning_args = [kpoint[-1], l, k, len(kpoint)]
+        raise ValueError('Occupation of {} at last band lkn<{},{},{}>'.format(*warning_args))
+
+    return lumo_indices
+
 
 def get_highest_occupied_band(bands, threshold=0.005):
     """Retun the index of the highest-occupied molecular orbital.
@@ -30,54 +119,90 @@ def get_highest_occupied_band(bands, threshold=0.005):
     :raises ValueError: if any occupation above LUMO exceeds `2 * threshold`
     :raises ValueError: if the last band has an occupation above the threshold
     """
-    from numpy import shape
-    from aiida.orm import BandsData
+    occupations = _get_occupations(bands)
 
-    if not isinstance(bands, BandsData):
-        raise ValueError('bands should be a `{}` node'.format(BandsData.__name__))
+    # Note that the LUMO band indices are 0-indexed, so the actual band number is one higher, but the band number of the
+    # HOMO is one lower than that, which therefore corresponds exactly to the 0-indexed LUMO index
+    homo = int(get_occupied_band_counts(occupations, threshold).max())
 
-    try:
-        occupations = bands.get_array('occupations')
-    except KeyError:
-        raise ValueError('BandsData does not contain a `occupations` array')
+    return homo
 
-    lumo_indices = []
 
-    # For spin-polarized calculations the `occupations` array should have 3 dimensions, otherwise just 2.
-    if len(shape(occupations)) == 3:
-        spin_channels = occupations
-    elif len(shape(occupations)) == 2:
-        spin_channels = [occupations]
-    else:
-        raise ValueError('invalid shape for `occupations` array')
+def get_band_properties(occupations, eigenvalues, threshold=0.005):
+    """Return the HOMO, LUMO, band edges, band gap and metal/insulator classification of a band structure.
 
-    for l, spin_channel in enumerate(spin_channels):  # pylint: disable=invalid-name
-        for k, kpoint in enumerate(spin_channel):
+    The system is classified as an insulator if, for each spin channel, the same number of bands is occupied at all
+    kpoints, the occupied bands are fully occupied within the threshold and the highest occupied state is lower in
+    energy than the lowest unoccupied state. Otherwise it is classified as a metal and the band gap is zero.
 
-            lumo_index = None
-            lumo_occupation = None
+    :param occupations: array with shape `(spin channels, kpoints, bands)` or `(kpoints, bands)`
+    :param eigenvalues: array of the band energies with the same shape as `occupations`
+    :param threshold: the occupation below which a band is considered as unoccupied
+    :return: dictionary with the band numbers, starting from one, of the `homo` and `lumo` over all spin channels and
+        kpoints, the `valence_band_maximum` and `conduction_band_minimum`, which are `None` if there are no occupied or
+        unoccupied bands, respectively, the `band_gap` and the boolean `is_insulator`
+    :raises ValueError: if the occupations are invalid, see `get_occupied_band_counts`
+    :raises ValueError: if the shapes of the occupations and eigenvalues differ
+    """
+    occupations = _add_spin_dimension(occupations, 'occupations')
+    eigenvalues = _add_spin_dimension(eigenvalues, 'eigenvalues')
 
-            for n, occupation in enumerate(kpoint):  # pylint: disable=invalid-name
-                if lumo_index is not None:
+    if occupations.shape != eigenvalues.shape:
+        raise ValueError('the shapes of the occupations {} and eigenvalues {} differ'.format(
+            occupations.shape, eigenvalues.shape))
 
-                    # If the occupation of this band exceeds twice that of the threshold, it is considered to be not
-                    # empty and since it comes after the LUMO, we raise
-                    if occupation > 2 * threshold:
-                        warning_args = [occupation, n, lumo_occupation, lumo_index, l, k]
-                        raise ValueError('Occupation of {} at n={} after lumo lkn<{},{},{}>'.format(*warning_args))
+    counts = get_occupied_band_counts(occupations, threshold)
+    occupied = numpy.arange(occupations.shape[-1]) < counts[..., numpy.newaxis]
 
-                elif occupation < threshold:
-                    lumo_index = n
-                    lumo_occupation = occupation
-                    lumo_indices.append(lumo_index)
+    valence_band_maximum = float(eigenvalues[occupied].max()) if occupied.any() else None
+    conduction_band_minimum = float(eigenvalues[~occupied].min())
 
-            else:  # pylint: disable=useless-else-on-loop
-                if kpoint[-1] >= threshold:
-                    warning_args = [kpoint[-1], l, k, len(kpoint)]
-                    raise ValueError('Occupation of {} at last band lkn<{},{},{}>'.format(*warning_args))
+    uniform = (counts == counts[:, :1]).all()
+    fully_occupied = (occupations[occupied] >= occupations.max() - threshold).all()
+    is_insulator = bool(
+        uniform and fully_occupied and
+        (valence_band_maximum is None or valence_band_maximum < conduction_band_minimum)
+    )
 
-    # Note that the LUMO band indices are 0-indexed, so the actual band number is one higher, but the band number of the
-    # HOMO is one lower than that, which therefore corresponds exactly to the 0-indexed LUMO index
-    homo = max(lumo_indices)
+    if is_insulator and valence_band_maximum is not None:
+        band_gap = conduction_band_minimum - valence_band_maximum
+    else:
+        band_gap = 0.
 
-    return homo
+    return {
+        'homo': int(counts.max()),
+        'lumo': int(counts.max()) + 1,
+        'valence_band_maximum': valence_band_maximum,
+        'conduction_band_minimum': conduction_band_minimum,
+        'band_gap': band_gap,
+        'is_insulator': is_insulator,
+    }
+
+
+def get_band_properties_batch(bands_nodes, threshold=0.005):
+    """Return the band properties of `get_band_properties` for each of a list of `BandsData` nodes.
+
+    Nodes whose occupations are invalid do not interrupt the analysis of the others: all their properties are `None`
+    and the reason is stored under the key `error`.
+
+    :param bands_nodes: an iterable of `BandsData` nodes
+    :param threshold: the occupation below which a band is considered as unoccupied
+    :return: list of dictionaries, one for each node in the same order, that also contain the `pk` of the node and
+        the `units` of the band energies
+    """
+    keys = ['homo', 'lumo', 'valence_band_maximum', 'conduction_band_minimum', 'band_gap', 'is_insulator']
+    results = []
+
+    for bands in bands_nodes:
+        try:
+            occupations = _get_occupations(bands)
+            result = get_band_properties(occupations, bands.get_bands(), threshold)
+        except (ValueError, KeyError, AttributeError) as exception:
+            result = {key: None for key in keys}
+            result['error'] = str(exception)
+
+        result['pk'] = getattr(bands, 'pk', None)
+        result['units'] = getattr(bands, 'units', None)
+        results.append(result)
+
+    return results
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""Growable columnar buffers to accumulate the frames of a trajectory while parsing.
+
+Appending each frame as nested lists of python floats costs several times the memory of the equivalent numpy array
+and requires yet another copy when the lists are converted at the end of the parsing. Instead, each quantity of the
+trajectory is stored in a `GrowableArray`, which copies every frame directly into a preallocated numpy array whose
+capacity is doubled whenever it is full, such that appending has an amortized constant cost.
+"""
+from __future__ import absolute_import
+
+import numpy
+
+# Placeholder in the frame shapes of `TrajectoryBuffer.FRAME_SHAPES` for the number of atoms
+NAT = 'nat'
+
+
+class GrowableArray(object):  # pylint: disable=useless-object-inheritance
+    """Numpy array of frames with a fixed shape, to which frames can be appended at an amortized constant cost.
+
+    The shape and data type of the frames are taken from the first appended frame, unless they are defined explicitly.
+    Indexing and iterating return python objects, like the equivalent list of frames would, while the `array` property
+    and `numpy.asarray` return a view of the frames without copying them.
+    """
+
+    def __init__(self, frame_shape=None, dtype=None, capacity=16):
+        """Construct a new instance.
+
+        :param frame_shape: the shape of a single frame, by default the shape of the first appended frame
+        :param dtype: the numpy data type of the frames, by default the type of the first appended frame
+        :param capacity: the number of frames for which memory is allocated initially
+        """
+        if capacity < 1:
+            raise ValueError('capacity should be a positive integer, got {}'.format(capacity))
+
+        self.frame_shape = None if frame_shape is None else tuple(frame_shape)
+        self.dtype = None if dtype is None else numpy.dtype(dtype)
+        self._capacity = capacity
+        self._data = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for frame in self.array:
+            yield frame.tolist()
+
+    def __getitem__(self, index):
+        return self.array[index].tolist()
+
+    def __array__(self, dtype=None):
+        if dtype is None:
+            return self.array
+        return self.array.astype(dtype, copy=False)
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.tolist())
+
+    @property
+    def array(self):
+        """Return a view of the appended frames, without the unused capacity.
+
+        :return: numpy array with the frames along the first axis
+        """
+        if self._data is None:
+            return numpy.empty((0,) + (self.frame_shape or ()), dtype=self.dtype or float)
+        return self._data[:self._size]
+
+    @property
+    def nbytes(self):
+        """Return the number of bytes that are allocated by the buffer, including the unused capacity."""
+        return 0 if self._data is None else self._data.nbytes
+
+    def append(self, frame):
+        """Append a frame, growing the buffer if it is full.
+
+        :param frame: a scalar or nested sequence of numbers
+        :raises ValueError: if the frame is not numeric or its shape differs from the frame shape of the buffer
+        """
+        value = numpy.asarray(frame)
+
+        if value.dtype.kind not in 'biuf':
+            raise ValueError('frames should be numeric, got data type {}'.format(value.dtype))
+
+        if self.frame_shape is None:
+            self.frame_shape = value.shape
+
+        if value.shape != self.frame_shape:
+            raise ValueError('frame has shape {} but the buffer expects {}'.format(value.shape, self.frame_shape))
+
+        if self._data is None:
+            self.dtype = self.dtype or value.dtype
+            self._data = numpy.empty((self._capacity,) + self.frame_shape, dtype=self.dtype)
+        elif not numpy.can_cast(value.dtype, self.dtype, casting='safe'):
+            # For example a float is appended to a buffer of integers: upcast all frames instead of truncating
+            self.dtype = numpy.result_type(self.dtype, value.dtype)
+            self._data = self._data.astype(self.dtype)
+
+        if self._size == len(self._data):
+            data = numpy.empty((2 * len(self._data),) + self.frame_shape, dtype=self.dtype)
+            data[:self._size] = self._data
+            self._data = data
+
+        self._data[self._size] = value
+        self._size += 1
+
+    def trim(self):
+        """Release the unused capacity, which is done in place unless views of the frames are still referenced."""
+        if self._data is None or self._size == len(self._data):
+            return
+
+        try:
+            self._data.resize((self._size,) + self.frame_shape)
+        except ValueError:
+            # The memory cannot be reallocated while other arrays refer to it, so simply keep the unused capacity
+            pass
+
+    def tolist(self):
+        """Return the frames as a list of python objects."""
+        return self.array.tolist()
+
+
+class TrajectoryBuffer(dict):
+    """Dictionary of the quantities of a trajectory onto a `GrowableArray` with their frames.
+
+    Quantities are added through :py:meth:`append`. The frame shapes of the quantities listed in `FRAME_SHAPES` are
+    known beforehand, given the number of atoms, while those of other quantities are taken from their first frame. If
+    a frame cannot be stored in the array of its quantity, because it is not numeric or its shape differs from that of
+    the previous frames, the quantity falls back to a plain list of frames. Values can also be set directly, as for any
+    dictionary, for example for the atomic species names that are not a quantity per frame.
+    """
+
+    FRAME_SHAPES = {
+        'atomic_charges': (NAT,),
+        'atomic_fractionals_relax': (NAT, 3),
+        'atomic_magnetic_moments': (NAT,),
+        'atomic_positions_relax': (NAT, 3),
+        'electronic_dipole_cartesian_axes': (3,),
+        'forces': (NAT, 3),
+        'ionic_dipole_cartesian_axes': (3,),
+        'lattice_vectors_relax': (3, 3),
+        'stress': (3, 3),
+    }
+
+    def __init__(self, number_of_atoms=None):
+        """Construct a new instance.
+
+        :param number_of_atoms: the number of atoms, which can also be set later as long as no frames were appended
+        """
+        super(TrajectoryBuffer, self).__init__()
+        self.number_of_atoms = number_of_atoms
+
+    def get_frame_shape(self, key):
+        """Return the frame shape of the given quantity, or `None` if it is not known beforehand.
+
+        :param key: the name of the quantity
+        """
+        frame_shape = self.FRAME_SHAPES.get(key, None)
+
+        if frame_shape is None or (NAT in frame_shape and self.number_of_atoms is None):
+            return None
+
+        return tuple(self.number_of_atoms if dimension == NAT else dimension for dimension in frame_shape)
+
+    def append(self, key, frame):
+        """Append a frame to the given quantity.
+
+        :param key: the name of the quantity
+        :param frame: a scalar or nested sequence of numbers
+        """
+        frames = self.get(key, None)
+
+        if frames is None:
+            frames = GrowableArray(self.get_frame_shape(key))
+            self[key] = frames
+
+        try:
+            frames.append(frame)
+        except ValueError:
+            self[key] = frames.tolist() + [frame]
+
+    def trim(self):
+        """Release the unused capacity of the arrays of all quantities, once no more frames will be appended."""
+        for frames in self.values():
+            if isinstance(frames, GrowableArray):
+                frames.trim()
+
+    def tolist(self):
+        """Return a dictionary with the frames of all quantities as lists of python objects."""
+        return {key: frames.tolist() if hasattr(frames, 'tolist') else frames for key, frames in self.items()}
@@ -29,6 +29,76 @@ def get_logging_container():
     })
 
 
+class ReadOnlyMapping(Mapping):
+    """Read-only view of a dictionary, which is used for data that is shared and therefore should not be modified."""
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        """Construct a new instance.
+
+        :param data: the dictionary to view
+        """
+        self._data = data
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def items(self):
+        return self._data.items()
+
+    def keys(self):
+        return self._data.keys()
+
+    def values(self):
+        return self._data.values()
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self._data)
+
+
+def freeze_mapping(value):
+    """Return a read-only copy of a nested structure of mappings and lists.
+
+    :param value: the value to freeze, mappings are converted into `ReadOnlyMapping` and lists into tuples
+    :return: the frozen value
+    """
+    if isinstance(value, Mapping):
+        return ReadOnlyMapping({key: freeze_mapping(item) for key, item in value.items()})
+
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_mapping(item) for item in value)
+
+    return value
+
+
+def thaw_mapping(value):
+    """Return a mutable copy of a nested structure of mappings and lists, which is the inverse of `freeze_mapping`.
+
+    :param value: the value to thaw, mappings are converted into dictionaries and tuples into lists
+    :return: the thawed value
+    """
+    if isinstance(value, Mapping):
+        return {key: thaw_mapping(item) for key, item in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        return [thaw_mapping(item) for item in value]
+
+    return value
+
+
 def update_mapping(original, source):
     """Update a nested dictionary with another optionally nested dictionary.
 
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""Utilities to compute phonon frequencies from the real-space force constants of a `ForceConstantsData` node.
+
+This implements the same Fourier interpolation of the interatomic force constants as `matdyn.x`, such that phonon
+dispersions and densities of states can be computed in the current process instead of through a `MatdynCalculation`.
+"""
+from __future__ import absolute_import
+
+import itertools
+
+import numpy
+from six.moves import range
+
+from qe_tools.constants import timeau_to_sec
+
+# Conversion factor from the angular frequency in Rydberg atomic units to the frequency in THz
+RY_TO_THZ = 1.0 / (4 * numpy.pi * timeau_to_sec * 1.0E12)
+
+ACOUSTIC_SUM_RULES = (None, 'simple')
+
+
+class PhononInterpolator(object):
+    """Fourier interpolation of real-space interatomic force constants onto arbitrary q-points.
+
+    The force constants of each pair of atoms are assigned to the periodic images of the supercell lattice vectors
+    that lie within the Wigner-Seitz cell of the supercell, with weights for images that are on its boundary, exactly
+    like `matdyn.x` does. The weighted force constants are collected once in a dense array over the lattice vectors,
+    such that the dynamical matrices of a batch of q-points are obtained by a single matrix product and diagonalized
+    with a single stacked call to `numpy.linalg.eigh`.
+
+    .. note:: only the short-range part is interpolated. The non-analytic long-range dipole-dipole contribution of
+        polar materials, that `matdyn.x` adds back when the effective charges are present, is not included.
+    """
+
+    def __init__(self, force_constants, cell, positions, masses, asr='simple'):
+        """Construct a new instance and precompute the weighted force constants.
+
+        :param force_constants: the force constants in Ry/bohr^2 as an array with shape
+            `qpoints_mesh + (3, 3, nat, nat)`, as returned by `ForceConstantsData.force_constants`
+        :param cell: the unit cell as a 3x3 array where rows are the lattice vectors
+        :param positions: the cartesian positions of the atoms with shape `(nat, 3)`, in the same units as `cell`
+        :param masses: the masses of the atoms in amu_ry
+        :param asr: the acoustic sum rule to impose on the force constants: None or 'simple'
+        :raises ValueError: if the acoustic sum rule is not supported or the shapes of the arrays are inconsistent
+        """
+        if asr not in ACOUSTIC_SUM_RULES:
+            raise ValueError('unsupported acoustic sum rule `{}`, choose from {}'.format(asr, ACOUSTIC_SUM_RULES))
+
+        force_constants = numpy.array(force_constants, dtype=float)
+        cell = numpy.array(cell, dtype=float)
+        positions = numpy.array(positions, dtype=float)
+        masses = numpy.array(masses, dtype=float)
+
+        number_of_atoms = len(masses)
+
+        if force_constants.shape[3:] != (3, 3, number_of_atoms, number_of_atoms) or cell.shape != (3, 3):
+            raise ValueError('the shapes of the force constants, cell, positions and masses are inconsistent')
+
+        if asr == 'simple':
+            # Correct the on-site force constants such that a rigid translation of the crystal costs no energy
+            correction = force_constants.sum(axis=(0, 1, 2, 6))
+            for atom in range(number_of_atoms):
+                force_constants[0, 0, 0, :, :, atom, atom] -= correction[:, :, atom]
+
+        self.number_of_atoms = number_of_atoms
+        self.number_of_modes = 3 * number_of_atoms
+        self.lattice_vectors, self.weighted_force_constants = self._get_weighted_force_constants(
+            force_constants, cell, positions
+        )
+
+        # Mass factor 1 / sqrt(m_a m_b) of each element of the dynamical matrix in the (atom, axis) ordering
+        inverse_sqrt_masses = numpy.repeat(1.0 / numpy.sqrt(masses), 3)
+        self.mass_factors = numpy.outer(inverse_sqrt_masses, inverse_sqrt_masses)
+
+    @classmethod
+    def from_force_constants_data(cls, force_constants, asr='simple', force_constants_array=None):
+        """Construct a new instance from a `ForceConstantsData` node.
+
+        :param force_constants: a `ForceConstantsData` node
+        :param asr: the acoustic sum rule to impose on the force constants: None or 'simple'
+        :param force_constants_array: optional `ArrayData` with the array `force_constants`, as returned by the
+            `force_constants_array` output of a `Q2rCalculation`, in which case the file is not parsed
+        :return: `PhononInterpolator` instance
+        """
+        atom_list = force_constants.atom_list
+        masses = [atom[1] for atom in atom_list]
+        positions = [atom[2:] for atom in atom_list]
+
+        if force_constants_array is not None:
+            array = force_constants_array.get_array('force_constants')
+        else:
+            array = force_constants.force_constants
+
+        return cls(array, force_constants.cell, positions, masses, asr=asr)
+
+    @staticmethod
+    def _get_weighted_force_constants(force_constants, cell, positions, tolerance=1.0E-6):
+        """Assign the force constants to the lattice vectors within the Wigner-Seitz cell of the supercell.
+
+        :return: tuple of the integer lattice vectors with shape `(nR, 3)` and the weighted force constants with shape
+            `(nR, 9 * nat**2)`, where the last dimension is the flattened `(3, 3, nat, nat)` block
+        """
+        # pylint: disable=too-many-locals
+        mesh = numpy.array(force_constants.shape[:3])
+        number_of_atoms = positions.shape[0]
+        tolerance *= numpy.dot(cell[0], cell[0])
+
+        # Vectors that define the Wigner-Seitz cell of the supercell: all the supercell lattice vectors up to two
+        # supercells away, where a point `r` is inside the cell if `r.v <= |v|^2 / 2` for all vectors `v`.
+        supercell = cell * mesh[:, None]
+        multiples = numpy.array([index for index in itertools.product(range(-2, 3), repeat=3) if any(index)])
+        boundaries = numpy.dot(multiples, supercell)
+        boundaries_offset = 0.5 * numpy.einsum('ij,ij->i', boundaries, boundaries)
+
+        # All candidate lattice vectors in units of the unit cell vectors, as considered by `matdyn.x`
+        ranges = [numpy.arange(-2 * size, 2 * size + 1) for size in mesh]
+        candidates = numpy.stack(numpy.meshgrid(*ranges, indexing='ij'), axis=-1).reshape(-1, 3)
+        candidates_cartesian = numpy.dot(candidates, cell)
+
+        # The index of the supercell force constants that corresponds to each of the candidates
+        indices = tuple((candidates % mesh).T)
+
+        weights = numpy.zeros((len(candidates), number_of_atoms, number_of_atoms))
+
+        for atom_a, atom_b in itertools.product(range(number_of_atoms), repeat=2):
+            vectors = candidates_cartesian + positions[atom_a] - positions[atom_b]
+            projections = numpy.dot(vectors, boundaries.T) - boundaries_offset
+            inside = (projections <= tolerance).all(axis=1)
+            degeneracy = (numpy.abs(projections[inside]) < tolerance).sum(axis=1) + 1
+            weights[inside, atom_a, atom_b] = 1.0 / degeneracy
+
+        selected = weights.any(axis=(1, 2))
+        weights = weights[selected]
+        selected_indices = tuple(index[selected] for index in indices)
+
+        # Shape (nR, 3, 3, nat, nat) with the weights broadcast over the two cartesian axes
+        weighted = force_constants[selected_indices] * weights[:, None, None, :, :]
+
+        return candidates[selected], weighted.reshape(len(weights), -1)
+
+    def get_dynamical_matrices(self, qpoints):
+        """Return the dynamical matrices, divided by the square root of the masses, for the given q-points.
+
+        :param qpoints: array with shape `(nq, 3)` of q-points in crystal coordinates
+        :return: complex array with shape `(nq, 3 * nat, 3 * nat)` with the rows and columns ordered by atom first
+            and cartesian axis second
+        """
+        qpoints = numpy.atleast_2d(numpy.array(qpoints, dtype=float))
+        phases = 2 * numpy.pi * numpy.dot(qpoints, self.lattice_vectors.T)
+
+        # The real and imaginary parts of the Fourier sum as two matrix products, which avoids complex force constants
+        matrices = numpy.dot(numpy.cos(phases), self.weighted_force_constants)
+        matrices = matrices - 1j * numpy.dot(numpy.sin(phases), self.weighted_force_constants)
+
+        nat = self.number_of_atoms
+        matrices = matrices.reshape(-1, 3, 3, nat, nat).transpose(0, 3, 1, 4, 2).reshape(-1, 3 * nat, 3 * nat)
+        matrices *= self.mass_factors
+
+        # Impose hermiticity, as `matdyn.x` does, to remove numerical noise
+        return 0.5 * (matrices + numpy.conj(matrices.transpose(0, 2, 1)))
+
+    def get_frequencies(self, qpoints, batch_size=256):
+        """Return the phonon frequencies at the given q-points.
+
+        Imaginary frequencies, corresponding to negative eigenvalues of the dynamical matrix, are returned as negative
+        numbers, following the convention of `matdyn.x`.
+
+        :param qpoints: array with shape `(nq, 3)` of q-points in crystal coordinates
+        :param batch_size: the number of q-points whose dynamical matrices are constructed and diagonalized at once
+        :return: array with shape `(nq, 3 * nat)` with the frequencies in THz in ascending order for each q-point
+        """
+        qpoints = numpy.atleast_2d(numpy.array(qpoints, dtype=float))
+        frequencies = numpy.empty((len(qpoints), self.number_of_modes))
+
+        for start in range(0, len(qpoints), batch_size):
+            eigenvalues = numpy.linalg.eigvalsh(self.get_dynamical_matrices(qpoints[start:start + batch_size]))
+            frequencies[start:start + batch_size] = numpy.sign(eigenvalues) * numpy.sqrt(numpy.abs(eigenvalues))
+
+        return frequencies * RY_TO_THZ
+
+    def get_density_of_states(self, qpoints_mesh, frequency_step=0.05, smearing=0.1, batch_size=256):
+        """Return the phonon density of states computed on a uniform Gamma-centered grid of q-points.
+
+        Each frequency is broadened with a normalized gaussian, such that the density of states integrates to the
+        number of modes, `3 * nat`.
+
+        :param qpoints_mesh: length-3 sequence with the number of q-points in each direction
+        :param frequency_step: the spacing of the frequency grid in THz
+        :param smearing: the standard deviation of the gaussian broadening in THz
+        :param batch_size: the number of q-points whose dynamical matrices are constructed and diagonalized at once
+        :return: tuple of two arrays with the frequency grid in THz and the density of states in states/THz
+        """
+        qpoints = numpy.stack(
+            numpy.meshgrid(*[numpy.arange(size) / float(size) for size in qpoints_mesh], indexing='ij'), axis=-1
+        ).reshape(-1, 3)
+
+        frequencies = self.get_frequencies(qpoints, batch_size=batch_size).ravel()
+
+        minimum = numpy.floor((frequencies.min() - 5 * smearing) / frequency_step) * frequency_step
+        maximum = numpy.ceil((frequencies.max() + 5 * smearing) / frequency_step) * frequency_step
+        grid = numpy.arange(minimum, maximum + 0.5 * frequency_step, frequency_step)
+        dos = numpy.zeros_like(grid)
+
+        # Accumulate the broadened frequencies in chunks to bound the size of the temporary array
+        normalization = 1.0 / (len(qpoints) * smearing * numpy.sqrt(2 * numpy.pi))
+        for start in range(0, len(frequencies), batch_size * self.number_of_modes):
+            chunk = frequencies[start:start + batch_size * self.number_of_modes]
+            dos += numpy.exp(-0.5 * ((grid[:, None] - chunk[None, :]) / smearing)**2).sum(axis=1)
+
+        return grid, dos * normalization
+
+
+def get_phonon_bands(force_constants, kpoints, asr='simple', batch_size=256):
+    """Compute the phonon frequencies of a `ForceConstantsData` node at the given kpoints.
+
+    :param force_constants: a `ForceConstantsData` node
+    :param kpoints: a `KpointsData` node with an explicit list of kpoints or a mesh
+    :param asr: the acoustic sum rule to impose on the force constants: None or 'simple'
+    :param batch_size: the number of q-points whose dynamical matrices are diagonalized at once
+    :return: a `BandsData` node with the frequencies in THz, the same units as used by the `MatdynParser`
+    """
+    from aiida import orm
+
+    try:
+        qpoints = kpoints.get_kpoints()
+        kpoints_for_bands = kpoints.clone()
+    except AttributeError:
+        qpoints = kpoints.get_kpoints_mesh(print_list=True)
+        kpoints_for_bands = orm.KpointsData()
+        kpoints_for_bands.set_kpoints(qpoints)
+
+    interpolator = PhononInterpolator.from_force_constants_data(force_constants, asr=asr)
+
+    bands = orm.BandsData()
+    bands.set_kpointsdata(kpoints_for_bands)
+    bands.set_bands(interpolator.get_frequencies(qpoints, batch_size=batch_size), units='THz')
+
+    return bands
+
+
+def get_phonon_dos(force_constants, qpoints_mesh, asr='simple', frequency_step=0.05, smearing=0.1, batch_size=256):
+    """Compute the phonon density of states of a `ForceConstantsData` node.
+
+    :param force_constants: a `ForceConstantsData` node
+    :param qpoints_mesh: length-3 sequence with the number of q-points in each direction
+    :param asr: the acoustic sum rule to impose on the force constants: None or 'simple'
+    :param frequency_step: the spacing of the frequency grid in THz
+    :param smearing: the standard deviation of the gaussian broadening in THz
+    :param batch_size: the number of q-points whose dynamical matrices are diagonalized at once
+    :return: a `XyData` node with the frequencies in THz as x and the density of states in states/THz as y
+    """
+    from aiida import orm
+
+    interpolator = PhononInterpolator.from_force_constants_data(force_constants, asr=asr)
+    frequencies, dos = interpolator.get_density_of_states(
+        qpoints_mesh, frequency_step=frequency_step, smearing=smearing, batch_size=batch_size
+    )
+
+    xy_data = orm.XyData()
+    xy_data.set_x(frequencies, 'frequency', 'THz')
+    xy_data.set_y(dos, 'dos', 'states/THz')
+
+    return xy_data
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""Opt-in instrumentation to record where the time is spent when preparing, parsing and running processes.
+
+The instrumentation is disabled by default and costs nothing but a function call per phase when it is. It can be
+enabled per calculation through the `profiling` parser option or `PROFILING` setting, or for all processes run by a
+daemon by setting the environment variable `AIIDA_QUANTUMESPRESSO_PROFILING` before starting it. The variable can be
+set to `1` to time the phases, or to `memory` to also track the peak of the memory allocated by python during each
+phase with `tracemalloc`, which slows down the code considerably.
+
+The timings are stored in the `profiling` extra of the process node, such that slow calculations and phases can be
+found with a query on the provenance graph, for example the extras of a `PwCalculation` could look like::
+
+    {
+        'profiling': {
+            'prepare_for_submission': {'phases': {'generate_input': {'calls': 1, 'seconds': 0.01}}, 'seconds': 0.02},
+            'parse': {'phases': {'parse_xml': {'calls': 1, 'seconds': 0.2}, ...}, 'seconds': 0.5},
+        }
+    }
+"""
+from __future__ import absolute_import
+
+import collections
+import contextlib
+import functools
+import os
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+ENVIRONMENT_VARIABLE = 'AIIDA_QUANTUMESPRESSO_PROFILING'
+
+# Name of the extra of the process node in which the results are stored
+EXTRAS_KEY = 'profiling'
+
+
+def get_profiling_options(value=None):
+    """Return the normalized profiling options for the given option value or the environment variable.
+
+    :param value: the value of the profiling option of a process, which can be `None`, in which case the environment
+        variable determines whether profiling is enabled, a boolean or a dictionary with the optional boolean keys
+        `trace_memory`, to track the peak memory of each phase, and `output`, to attach the results as an output node
+        instead of storing them in the extras, if the process supports it.
+    :return: dictionary with the keys `trace_memory` and `output`, or `None` if profiling is disabled
+    :raises ValueError: if the value is not a boolean or a dictionary with known keys
+    """
+    if value is None:
+        variable = os.environ.get(ENVIRONMENT_VARIABLE, '').strip().lower()
+        if variable in ['', '0', 'false', 'no', 'off']:
+            return None
+        value = {'trace_memory': variable == 'memory'}
+
+    if isinstance(value, bool):
+        value = {} if value else None
+
+    if value is None:
+        return None
+
+    if not isinstance(value, dict):
+        raise ValueError('the profiling option should be a boolean or a dictionary, got {}'.format(type(value)))
+
+    unknown = set(value.keys()) - {'trace_memory', 'output'}
+
+    if unknown:
+        raise ValueError('unknown keys in the profiling option: {}'.format(', '.join(sorted(unknown))))
+
+    return {'trace_memory': bool(value.get('trace_memory', False)), 'output': bool(value.get('output', False))}
+
+
+class Profiler(object):  # pylint: disable=useless-object-inheritance
+    """Record the number of calls, the wall time and optionally the peak memory of named phases.
+
+    Phases are delimited with the :py:meth:`phase` context manager or the :py:meth:`timed` decorator and can be
+    nested, in which case the time of the inner phase is also included in that of the outer one. A disabled profiler
+    records nothing, such that the instrumentation can stay in place in production code.
+    """
+
+    def __init__(self, enabled=True, trace_memory=False, output=False):
+        """Construct a new instance, which starts the clock of the total time.
+
+        :param enabled: boolean, if False, the phases are not recorded
+        :param trace_memory: boolean, if True, the peak memory of each phase is traced with `tracemalloc`, which is
+            ignored on Python 2 where it is not available
+        :param output: boolean, if True, the results should be attached as an output node instead of stored in the
+            extras, which is up to the process that uses the profiler
+        """
+        self.enabled = enabled
+        self.output = enabled and output
+        self.trace_memory = enabled and trace_memory and tracemalloc is not None
+        self.phases = collections.OrderedDict()
+        self._start = default_timer()
+        self._peaks = []
+        self._memory_peak = 0
+        self._started_tracing = False
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    @classmethod
+    def from_options(cls, value=None):
+        """Construct a profiler for the value of a profiling option, see :py:func:`get_profiling_options`.
+
+        :param value: the value of the profiling option, or `None` to rely on the environment variable
+        :return: a `Profiler`, which is disabled if profiling is not enabled by the option or environment variable
+        """
+        options = get_profiling_options(value)
+
+        if options is None:
+            return cls(enabled=False)
+
+        return cls(trace_memory=options['trace_memory'], output=options['output'])
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Context manager that records the time spent in the block as a call of the phase with the given name.
+
+        :param name: the name of the phase
+        """
+        if not self.enabled:
+            yield
+            return
+
+        if self.trace_memory:
+            self._enter_memory_phase()
+
+        start = default_timer()
+
+        try:
+            yield
+        finally:
+            entry = self.phases.setdefault(name, {'calls': 0, 'seconds': 0.})
+            entry['calls'] += 1
+            entry['seconds'] += default_timer() - start
+
+            if self.trace_memory:
+                peak = self._exit_memory_phase()
+                entry['memory_peak'] = max(entry.get('memory_peak', 0), peak)
+
+    def timed(self, name=None):
+        """Return a decorator that records each call of the decorated function as a call of the phase.
+
+        :param name: the name of the phase, by default the name of the function
+        """
+
+        def decorator(function):
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.phase(name or function.__name__):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def _enter_memory_phase(self):
+        """Start tracking the peak memory of a new, possibly nested, phase."""
+        current, peak = tracemalloc.get_traced_memory()
+
+        # The peak since the last reset also belongs to the enclosing phase, whose peak is kept on the stack
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+
+        self._peaks.append(current)
+        self._reset_peak()
+
+    def _exit_memory_phase(self):
+        """Stop tracking the peak memory of the innermost phase and return it in bytes."""
+        peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+
+        self._memory_peak = max(self._memory_peak, peak)
+        self._reset_peak()
+        return peak
+
+    @staticmethod
+    def _reset_peak():
+        """Reset the peak of the traced memory, which is only possible as of Python 3.9.
+
+        On older versions the peak of a phase is the peak of the whole process since tracing was started.
+        """
+        try:
+            tracemalloc.reset_peak()
+        except AttributeError:
+            pass
+
+    def get_results(self):
+        """Return the recorded phases and the total time since the profiler was constructed.
+
+        :return: dictionary with the `phases`, each a dictionary with the number of `calls`, the total time in
+            `seconds` and, if memory was traced, the `memory_peak` in bytes, and the total time in `seconds`
+        """
+        results = {'phases': {name: dict(entry) for name, entry in self.phases.items()}}
+        results['seconds'] = default_timer() - self._start
+
+        if self.trace_memory:
+            results['memory_peak'] = max(self._memory_peak, tracemalloc.get_traced_memory()[1])
+
+        return results
+
+    def stop(self):
+        """Stop tracing the memory, if it was started by this profiler, and return the results.
+
+        :return: the results of :py:meth:`get_results`
+        """
+        results = self.get_results()
+
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+        return results
+
+    def store(self, node, name):
+        """Stop the profiler and store its results under the given name in the `profiling` extra of the node.
+
+        :param node: the process node
+        :param name: the key in the extra, for example the name of the method that was profiled
+        :return: the results of :py:meth:`get_results`
+        """
+        results = self.stop()
+        extra = node.get_extra(EXTRAS_KEY, {})
+        extra[name] = results
+        node.set_extra(EXTRAS_KEY, extra)
+        return results
+
+
+def profile_step(function):
+    """Decorate a step of a `WorkChain` to record its calls and wall time in the `profiling` extra of its node.
+
+    Since work chains have no common input to configure this, the steps are only profiled if the environment variable
+    is set. The timings are added up over all calls of each step in the `steps` key of the extra.
+    """
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        if get_profiling_options() is None:
+            return function(self, *args, **kwargs)
+
+        start = default_timer()
+
+        try:
+            return function(self, *args, **kwargs)
+        finally:
+            elapsed = default_timer() - start
+            extra = self.node.get_extra(EXTRAS_KEY, {})
+            entry = extra.setdefault('steps', {}).setdefault(function.__name__, {'calls': 0, 'seconds': 0.})
+            entry['calls'] += 1
+            entry['seconds'] += elapsed
+            self.node.set_extra(EXTRAS_KEY, extra)
+
+    return wrapper
+
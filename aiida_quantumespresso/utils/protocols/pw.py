@@ -7,21 +7,53 @@ import os
 from copy import deepcopy
 import six
 
+from aiida_quantumespresso.utils.mapping import freeze_mapping, thaw_mapping
+
+# The files with the metadata of the pseudopotential libraries, whose modification times invalidate the cache
+_PSEUDO_METADATA_FILENAMES = (
+    'sssp_efficiency_1.0.json',
+    'sssp_precision_1.0.json',
+    'sssp_efficiency_1.1.json',
+    'sssp_precision_1.1.json',
+)
+
+# The read-only modifiers of all protocols, which are built once per process, and the modification times of the files
+_PROTOCOL_MODIFIERS_CACHE = {'mtimes': None, 'protocols': None}
+
+
+def _get_pseudo_metadata_filepath(filename):
+    """Return the absolute path of a json file in the current folder."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+
 
 def _load_pseudo_metadata(filename):
     """Load from the current folder a json file containing metadata (incl.
 
     suggested cutoffs) for a library of pseudopotentials.
     """
-    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)) as handle:
+    with open(_get_pseudo_metadata_filepath(filename)) as handle:
         return json.load(handle)
 
 
 def _get_all_protocol_modifiers():
     """Return the information on all possibile modifiers for all known protocols.
 
-    It is a function so we can lazily load the jsons.
+    The modifiers are built only once per process, which loads the jsons lazily, and are returned as a read-only mapping
+    since they are shared by all callers. They are built again only when one of the jsons has been modified since.
+
+    :return: `ReadOnlyMapping` of the protocol name onto its modifiers
     """
+    mtimes = tuple(os.path.getmtime(_get_pseudo_metadata_filepath(filename)) for filename in _PSEUDO_METADATA_FILENAMES)
+
+    if _PROTOCOL_MODIFIERS_CACHE['mtimes'] != mtimes:
+        _PROTOCOL_MODIFIERS_CACHE['protocols'] = freeze_mapping(_build_all_protocol_modifiers())
+        _PROTOCOL_MODIFIERS_CACHE['mtimes'] = mtimes
+
+    return _PROTOCOL_MODIFIERS_CACHE['protocols']
+
+
+def _build_all_protocol_modifiers():
+    """Build the information on all possibile modifiers for all known protocols from the jsons."""
     protocols = {
         'theos-ht-1.0': {
             'pseudo': {
@@ -134,15 +166,17 @@ class ProtocolManager(object):
                     "You specified 'custom' as a modifier name for 'pseudo', but you did not provide "
                     "a 'pseudo_data' key."
                 )
-        else:
-            pseudo_data = self.get_pseudo_data(pseudo_modifier_name)
 
         # Check that there are no unknown modifiers
         if modifiers_copy:
             raise ValueError('Unknown modifiers specified: {}'.format(','.join(sorted(modifiers_copy))))
 
         retdata = self.get_parameters_data(parameters_modifier_name)
-        retdata['pseudo_data'] = pseudo_data
+
+        if pseudo_modifier_name == 'custom':
+            retdata['pseudo_data'] = pseudo_data
+        else:
+            retdata['pseudo_data'] = self.get_pseudo_data(pseudo_modifier_name)
 
         return retdata
 
@@ -155,8 +189,8 @@ class ProtocolManager(object):
         return self.modifiers.get('parameters_default', None)
 
     def get_parameters_data(self, modifier_name):
-        """Given a parameter modifier name, return a dictionary of data associated to it."""
-        return self.modifiers['parameters'][modifier_name]
+        """Given a parameter modifier name, return a copy of the data associated to it."""
+        return deepcopy(thaw_mapping(self.modifiers['parameters'][modifier_name]))
 
     def get_pseudo_modifier_names(self):
         """Get all valid pseudopotential modifier names."""
@@ -167,8 +201,8 @@ class ProtocolManager(object):
         return self.modifiers.get('pseudo_default', None)
 
     def get_pseudo_data(self, modifier_name):
-        """Given a pseudo modifier name, return the ``pseudo_data`` associated to it."""
-        return self.modifiers['pseudo'][modifier_name]
+        """Given a pseudo modifier name, return a copy of the ``pseudo_data`` associated to it."""
+        return deepcopy(thaw_mapping(self.modifiers['pseudo'][modifier_name]))
 
     def check_pseudos(self, modifier_name=None, pseudo_data=None):
         """Given a pseudo modifier name, checks which pseudos exist in the DB.
@@ -184,10 +218,7 @@ class ProtocolManager(object):
               pseudos for which one (or more) pseudos were found with the same MD5, but associated to different elements
               (listed in `list-of-elements-found`)
         """
-        from aiida.orm import QueryBuilder
-        from aiida.plugins import DataFactory
-
-        UpfData = DataFactory('upf')
+        from aiida_quantumespresso.utils.pseudopotential import get_pseudos_by_md5
 
         if modifier_name is None:
             modifier_name = self.get_default_pseudo_modifier_name()
@@ -203,7 +234,8 @@ class ProtocolManager(object):
         else:
             if pseudo_data is not None:
                 raise ValueError("You passed a pseudo_data, but the modifier name is not 'custom'!")
-            pseudo_data = self.get_pseudo_data(modifier_name)
+            # The shared read-only data is only read here, so it does not have to be copied
+            pseudo_data = self.modifiers['pseudo'][modifier_name]
 
         # No pseudo found
         missing = set()
@@ -212,12 +244,11 @@ class ProtocolManager(object):
         # Pseudo with MD5 found, but wrong element!
         mismatch = {}
 
-        for element, this_pseudo_data in six.iteritems(pseudo_data):
-            md5 = this_pseudo_data['md5']
+        # Resolve the checksums of all elements at once with a single query
+        matches = get_pseudos_by_md5([this_pseudo_data['md5'] for this_pseudo_data in pseudo_data.values()])
 
-            builder = QueryBuilder()
-            builder.append(UpfData, filters={'attributes.md5': md5}, project=['uuid', 'attributes.element'])
-            res = builder.all()
+        for element, this_pseudo_data in six.iteritems(pseudo_data):
+            res = matches[this_pseudo_data['md5']]
             if len(res) >= 1:
                 this_mismatch_elements = []
                 for this_uuid, this_element in res:
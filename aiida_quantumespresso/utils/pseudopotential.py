@@ -72,6 +72,55 @@ def get_pseudos_of_calc(calc):
     return pseudos
 
 
+def get_pseudos_by_uuid(uuids):
+    """Return the nodes with the given UUIDs, which are all loaded with a single query.
+
+    :param uuids: iterable of UUIDs
+    :return: dictionary mapping each UUID on its node. UUIDs for which no node exists are not included. Note that the
+        nodes are not necessarily `UpfData` instances, which is left to the caller to verify.
+    """
+    from aiida.orm import Node, QueryBuilder
+
+    uuids = list(set(uuids))
+
+    if not uuids:
+        return {}
+
+    builder = QueryBuilder().append(Node, filters={'uuid': {'in': uuids}})
+
+    return {node.uuid: node for [node] in builder.iterall()}
+
+
+def get_pseudos_by_md5(md5s):
+    """Return the UUIDs and elements of the `UpfData` nodes with the given MD5 checksums, using a single query.
+
+    The result is not cached, since new nodes with the same checksums can be stored at any time.
+
+    :param md5s: iterable of MD5 checksums
+    :return: dictionary mapping each checksum on a list of tuples `(uuid, element)` of the matching nodes, in the order
+        in which they were stored. The list is empty if no node matches the checksum.
+    """
+    from aiida.orm import QueryBuilder
+
+    pseudos = {md5: [] for md5 in set(md5s)}
+
+    if not pseudos:
+        return pseudos
+
+    builder = QueryBuilder().append(
+        UpfData,
+        filters={'attributes.md5': {'in': list(pseudos)}},
+        project=['uuid', 'attributes.element', 'attributes.md5'],
+        tag='upf'
+    )
+    builder.order_by({'upf': 'id'})
+
+    for uuid, element, md5 in builder.iterall():
+        pseudos[md5].append((uuid, element))
+
+    return pseudos
+
+
 def get_pseudos_from_dict(structure, pseudos_uuids):
     """Return mapping of structure kind names onto `UpfData` instances defined per element by `pseudos_uuids`.
 
@@ -83,7 +132,8 @@ def get_pseudos_from_dict(structure, pseudos_uuids):
         }
 
     i.e. it shoud associate a chemical element name to a UUID of a UpfData node in the database, and a structure, return
-    a dictionary associating each kind name with its UpfData object.
+    a dictionary associating each kind name with its UpfData object. The nodes of all kinds are fetched at once with
+    `get_pseudos_by_uuid`.
 
     :param structure: a StructureData
     :param pseudos_uuids: a dictionary of UUIDs of UpfData for each chemical element, as specified above
@@ -91,18 +141,24 @@ def get_pseudos_from_dict(structure, pseudos_uuids):
     :raise NotExistent: if no UPF for an element in the group is found in the group.
     """
     from aiida.common import NotExistent
-    from aiida.orm import load_node
 
-    pseudo_list = {}
+    uuids = {}
     for kind in structure.kinds:
         symbol = kind.symbol
         try:
-            uuid = pseudos_uuids[symbol]
+            uuids[kind.name] = pseudos_uuids[symbol]
         except KeyError:
             raise NotExistent('No UPF for element {} found in the provided pseudos_uuids dictionary'.format(symbol))
+
+    nodes = get_pseudos_by_uuid(uuids.values())
+
+    pseudo_list = {}
+    for kind in structure.kinds:
+        symbol = kind.symbol
+        uuid = uuids[kind.name]
         try:
-            upf = load_node(uuid)
-        except NotExistent:
+            upf = nodes[uuid]
+        except KeyError:
             raise NotExistent(
                 'No node found associated to the UUID {} given for element {} '
                 'in the provided pseudos_uuids dictionary'.format(uuid, symbol)
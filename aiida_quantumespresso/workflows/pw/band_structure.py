@@ -114,18 +114,19 @@ class PwBandStructureWorkChain(WorkChain):
 
     def run_bands(self):
         """Run the `PwBandsWorkChain` to compute the band structure."""
+        # The pseudos are resolved once and shared by all sub processes
+        protocol, protocol_modifiers = self._get_protocol()
+        checked_pseudos = protocol.check_pseudos(
+            modifier_name=protocol_modifiers.get('pseudo', None),
+            pseudo_data=protocol_modifiers.get('pseudo_data', None))
+        pseudos = get_pseudos_from_dict(self.inputs.structure, checked_pseudos['found'])
+
         def get_common_inputs():
             """Return the dictionary of inputs to be used as the basis for each `PwBaseWorkChain`."""
-            protocol, protocol_modifiers = self._get_protocol()
-            checked_pseudos = protocol.check_pseudos(
-                modifier_name=protocol_modifiers.get('pseudo', None),
-                pseudo_data=protocol_modifiers.get('pseudo_data', None))
-            known_pseudos = checked_pseudos['found']
-
             inputs = AttributeDict({
                 'pw': {
                     'code': self.inputs.code,
-                    'pseudos': get_pseudos_from_dict(self.inputs.structure, known_pseudos),
+                    'pseudos': dict(pseudos),
                     'parameters': self.ctx.parameters,
                     'metadata': {},
                 }
@@ -350,105 +350,97 @@ def _handle_unrecoverable_failure(self, calculation):
         return ErrorHandlerReport(True, True, self.exit_codes.ERROR_UNRECOVERABLE_FAILURE)
 
 
-@register_error_handler(PwBaseWorkChain, 580)
+@register_error_handler(PwBaseWorkChain, 580, exit_codes=PwCalculation.get_exit_statuses([
+    'ERROR_OUT_OF_WALLTIME',
+]))
 def _handle_out_of_walltime(self, calculation):
     """Handle `ERROR_OUT_OF_WALLTIME` exit code: calculation shut down neatly and we can simply restart."""
-    if calculation.exit_status == PwCalculation.spec().exit_codes.ERROR_OUT_OF_WALLTIME.status:
-        try:
-            self.ctx.inputs.structure = calculation.outputs.output_structure
-        except exceptions.NotExistent:
-            self.ctx.restart_calc = calculation
-            self.report_error_handled(calculation, 'simply restart from the last calculation')
-        else:
-            self.ctx.restart_calc = None
-            self.report_error_handled(calculation, 'out of walltime: structure changed so restarting from scratch')
+    try:
+        self.ctx.inputs.structure = calculation.outputs.output_structure
+    except exceptions.NotExistent:
+        self.ctx.restart_calc = calculation
+        self.report_error_handled(calculation, 'simply restart from the last calculation')
+    else:
+        self.ctx.restart_calc = None
+        self.report_error_handled(calculation, 'out of walltime: structure changed so restarting from scratch')
 
-        return ErrorHandlerReport(True, True)
+    return ErrorHandlerReport(True, True)
 
 
-@register_error_handler(PwBaseWorkChain, 570)
+@register_error_handler(PwBaseWorkChain, 570, exit_codes=PwCalculation.get_exit_statuses([
+    'ERROR_IONIC_CONVERGENCE_REACHED_EXCEPT_IN_FINAL_SCF',
+]))
 def _handle_vcrelax_converged_except_final_scf(self, calculation):
     """Handle `ERROR_IONIC_CONVERGENCE_REACHED_EXCEPT_IN_FINAL_SCF` exit code.
 
     Convergence reached in `vc-relax` except thresholds exceeded in final scf: consider as converged.
     """
-    exit_code_labels = [
-        'ERROR_IONIC_CONVERGENCE_REACHED_EXCEPT_IN_FINAL_SCF',
-    ]
-
-    if calculation.exit_status in PwCalculation.get_exit_statuses(exit_code_labels):
-        self.ctx.is_finished = True
-        self.ctx.restart_calc = calculation
-        action = 'ionic convergence thresholds met except in final scf: consider structure relaxed.'
-        self.report_error_handled(calculation, action)
-        self.results()  # Call the results method to attach the output nodes
-        return ErrorHandlerReport(True, True, self.exit_codes.ERROR_IONIC_CONVERGENCE_REACHED_EXCEPT_IN_FINAL_SCF)
-
-
-@register_error_handler(PwBaseWorkChain, 560)
+    self.ctx.is_finished = True
+    self.ctx.restart_calc = calculation
+    action = 'ionic convergence thresholds met except in final scf: consider structure relaxed.'
+    self.report_error_handled(calculation, action)
+    self.results()  # Call the results method to attach the output nodes
+    return ErrorHandlerReport(True, True, self.exit_codes.ERROR_IONIC_CONVERGENCE_REACHED_EXCEPT_IN_FINAL_SCF)
+
+
+@register_error_handler(PwBaseWorkChain, 560, exit_codes=PwCalculation.get_exit_statuses([
+    'ERROR_IONIC_CONVERGENCE_NOT_REACHED',
+    'ERROR_IONIC_CYCLE_EXCEEDED_NSTEP',
+    'ERROR_IONIC_CYCLE_BFGS_HISTORY_FAILURE',
+    'ERROR_IONIC_CYCLE_BFGS_HISTORY_AND_FINAL_SCF_FAILURE',
+]))
 def _handle_relax_recoverable_ionic_convergence_error(self, calculation):
     """Handle various exit codes for recoverable `vc-relax` or `relax` calculations with failed ionic convergence.
 
     These exit codes signify that the ionic convergence thresholds were not met, but the output structure is usable, so
     the solution is to simply restart from scratch but from the output structure.
     """
-    exit_code_labels = [
-        'ERROR_IONIC_CONVERGENCE_NOT_REACHED',
-        'ERROR_IONIC_CYCLE_EXCEEDED_NSTEP',
-        'ERROR_IONIC_CYCLE_BFGS_HISTORY_FAILURE',
-        'ERROR_IONIC_CYCLE_BFGS_HISTORY_AND_FINAL_SCF_FAILURE',
-    ]
-
-    if calculation.exit_status in PwCalculation.get_exit_statuses(exit_code_labels):
-        self.ctx.restart_calc = None
-        self.ctx.inputs.structure = calculation.outputs.output_structure
-        action = 'no ionic convergence but clean shutdown: restarting from scratch but using output structure.'
-        self.report_error_handled(calculation, action)
-        return ErrorHandlerReport(True, True)
+    self.ctx.restart_calc = None
+    self.ctx.inputs.structure = calculation.outputs.output_structure
+    action = 'no ionic convergence but clean shutdown: restarting from scratch but using output structure.'
+    self.report_error_handled(calculation, action)
+    return ErrorHandlerReport(True, True)
 
 
-@register_error_handler(PwBaseWorkChain, 550)
+@register_error_handler(PwBaseWorkChain, 550, exit_codes=PwCalculation.get_exit_statuses([
+    'ERROR_IONIC_CYCLE_ELECTRONIC_CONVERGENCE_NOT_REACHED',
+    'ERROR_IONIC_CONVERGENCE_REACHED_FINAL_SCF_FAILED',
+]))
 def _handle_relax_recoverable_electronic_convergence_error(self, calculation):
     """Handle various exit codes for recoverable `vc-relax` or `relax` calculations with failed electronic convergence.
 
     These exit codes signify that the electronic convergence thresholds were not met, but the output structure is
     usable, so the solution is to simply restart from scratch but from the output structure.
     """
-    exit_code_labels = [
-        'ERROR_IONIC_CYCLE_ELECTRONIC_CONVERGENCE_NOT_REACHED',
-        'ERROR_IONIC_CONVERGENCE_REACHED_FINAL_SCF_FAILED',
-    ]
+    factor = self.defaults.delta_factor_mixing_beta
+    mixing_beta = self.ctx.inputs.parameters.get('ELECTRONS', {}).get('mixing_beta', self.defaults.qe.mixing_beta)
+    mixing_beta_new = mixing_beta * factor
 
-    if calculation.exit_status in PwCalculation.get_exit_statuses(exit_code_labels):
-
-        factor = self.defaults.delta_factor_mixing_beta
-        mixing_beta = self.ctx.inputs.parameters.get('ELECTRONS', {}).get('mixing_beta', self.defaults.qe.mixing_beta)
-        mixing_beta_new = mixing_beta * factor
-
-        self.ctx.restart_calc = None
-        self.ctx.inputs.parameters.setdefault('ELECTRONS', {})['mixing_beta'] = mixing_beta_new
-        self.ctx.inputs.structure = calculation.outputs.output_structure
-        action = 'no electronic convergence but clean shutdown: reduced beta mixing from {} to {} restarting from ' \
-                 'scratch but using output structure.'.format(mixing_beta, mixing_beta_new)
-        self.report_error_handled(calculation, action)
-        return ErrorHandlerReport(True, True)
+    self.ctx.restart_calc = None
+    self.ctx.inputs.parameters.setdefault('ELECTRONS', {})['mixing_beta'] = mixing_beta_new
+    self.ctx.inputs.structure = calculation.outputs.output_structure
+    action = 'no electronic convergence but clean shutdown: reduced beta mixing from {} to {} restarting from ' \
+             'scratch but using output structure.'.format(mixing_beta, mixing_beta_new)
+    self.report_error_handled(calculation, action)
+    return ErrorHandlerReport(True, True)
 
 
-@register_error_handler(PwBaseWorkChain, 410)
+@register_error_handler(PwBaseWorkChain, 410, exit_codes=PwCalculation.get_exit_statuses([
+    'ERROR_ELECTRONIC_CONVERGENCE_NOT_REACHED',
+]))
 def _handle_electronic_convergence_not_achieved(self, calculation):
     """Handle `ERROR_ELECTRONIC_CONVERGENCE_NOT_REACHED`: decrease the mixing beta and restart from scratch."""
-    if calculation.exit_status == PwCalculation.spec().exit_codes.ERROR_ELECTRONIC_CONVERGENCE_NOT_REACHED.status:
-        factor = self.defaults.delta_factor_mixing_beta
-        mixing_beta = self.ctx.inputs.parameters.get('ELECTRONS', {}).get('mixing_beta', self.defaults.qe.mixing_beta)
-        mixing_beta_new = mixing_beta * factor
+    factor = self.defaults.delta_factor_mixing_beta
+    mixing_beta = self.ctx.inputs.parameters.get('ELECTRONS', {}).get('mixing_beta', self.defaults.qe.mixing_beta)
+    mixing_beta_new = mixing_beta * factor
 
-        self.ctx.restart_calc = calculation
-        self.ctx.inputs.parameters.setdefault('ELECTRONS', {})['mixing_beta'] = mixing_beta_new
+    self.ctx.restart_calc = calculation
+    self.ctx.inputs.parameters.setdefault('ELECTRONS', {})['mixing_beta'] = mixing_beta_new
 
-        action = 'reduced beta mixing from {} to {} and restarting from the last ' \
-            'calculation'.format(mixing_beta, mixing_beta_new)
-        self.report_error_handled(calculation, action)
-        return ErrorHandlerReport(True, True)
+    action = 'reduced beta mixing from {} to {} and restarting from the last ' \
+        'calculation'.format(mixing_beta, mixing_beta_new)
+    self.report_error_handled(calculation, action)
+    return ErrorHandlerReport(True, True)
 
 
 @register_error_handler(PwBaseWorkChain)
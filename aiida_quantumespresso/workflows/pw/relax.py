@@ -2,12 +2,11 @@
 """Workchain to relax a structure using Quantum ESPRESSO pw.x."""
 from __future__ import absolute_import
 
-from six.moves import map
-
 from aiida import orm
 from aiida.common import AttributeDict, exceptions
 from aiida.engine import WorkChain, ToContext, if_, while_, append_
 from aiida.plugins import CalculationFactory, WorkflowFactory
+from aiida_quantumespresso.common.workchain.cleanup import clean_workchain_calculations
 from aiida_quantumespresso.utils.mapping import prepare_process_inputs
 
 PwCalculation = CalculationFactory('quantumespresso.pw')
@@ -224,15 +223,4 @@ class PwRelaxWorkChain(WorkChain):
             self.report('remote folders will not be cleaned')
             return
 
-        cleaned_calcs = []
-
-        for called_descendant in self.node.called_descendants:
-            if isinstance(called_descendant, orm.CalcJobNode):
-                try:
-                    called_descendant.outputs.remote_folder._clean()  # pylint: disable=protected-access
-                    cleaned_calcs.append(called_descendant.pk)
-                except (IOError, OSError, KeyError):
-                    pass
-
-        if cleaned_calcs:
-            self.report('cleaned remote folders of calculations: {}'.format(' '.join(map(str, cleaned_calcs))))
+        clean_workchain_calculations(self)
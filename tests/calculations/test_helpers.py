@@ -2,6 +2,8 @@
 """Tests for the calculation input helper utilities."""
 from __future__ import absolute_import
 
+import os
+
 import pytest
 
 from aiida_quantumespresso.calculations.helpers import pw_input_helper, QEInputValidationError
@@ -33,3 +35,29 @@ def test_pw_helper_multidimensional(aiida_profile, generate_structure):
     with pytest.raises(QEInputValidationError):
         parameters['SYSTEM']['hubbard_j'] = [[1, 'Ge', 15.7]]  # Second element is a non-existing structure kind name
         pw_input_helper(parameters, structure, version='6.4')
+
+
+def test_get_input_spec(tmpdir, monkeypatch):
+    """Test the indexed input specification and its on-disk cache."""
+    import shutil
+    from aiida_quantumespresso.calculations import helpers
+
+    dirpath_module = os.path.dirname(helpers.__file__)
+    shutil.copy(os.path.join(dirpath_module, 'INPUT_PW-6.4.xml'), str(tmpdir))
+    monkeypatch.setattr(helpers, '_get_module_dir', lambda: str(tmpdir))
+    monkeypatch.setattr(helpers, '_INPUT_SPECS', {})
+
+    input_spec = helpers.get_input_spec('6.4')
+    assert input_spec['variables']['calculation']['namelist'] == 'CONTROL'
+    assert 'vc-relax' in input_spec['variables']['calculation']['options']
+    assert input_spec['dimensions']['hubbard_u'] == {'namelist': 'SYSTEM', 'expected_type': 'REAL', 'end_val': 'ntyp'}
+    assert input_spec['multidimensions']['hubbard_j']['indexes'] == ['i', 'ityp']
+    assert helpers.get_input_spec('6.4') is input_spec
+
+    # The specification should have been cached next to the XML file and be identical when read back from the cache
+    assert tmpdir.join('INPUT_PW-6.4.json').check(file=True)
+    monkeypatch.setattr(helpers, '_INPUT_SPECS', {})
+    assert helpers.get_input_spec('6.4') == input_spec
+
+    with pytest.raises(QEInputValidationError, match=r'the older, closest version you can use is 6.4'):
+        helpers.get_input_spec('6.5')
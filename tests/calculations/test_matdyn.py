@@ -47,3 +47,36 @@ def test_matdyn_default(
     # Checks on the files written to the sandbox folder as raw input
     assert sorted(fixture_sandbox.get_content_list()) == sorted(['aiida.in'])
     file_regression.check(input_written, encoding='utf-8', extension='.in')
+
+
+def test_matdyn_dos(
+    aiida_profile, fixture_sandbox, generate_calc_job, fixture_code, generate_kpoints_mesh, file_regression
+):
+    """Test a `MatdynCalculation` that computes the phonon density of states on the mesh of the kpoints."""
+    from aiida import orm
+
+    entry_point_name = 'quantumespresso.matdyn'
+
+    filepath = os.path.join(os.path.dirname(__file__), 'fixtures', 'matdyn', 'default', 'force_constants.dat')
+    force_constants = ForceConstantsData(filepath)
+
+    inputs = {
+        'code': fixture_code(entry_point_name),
+        'force_constants': force_constants,
+        'kpoints': generate_kpoints_mesh(2),
+        'parameters': orm.Dict(dict={'INPUT': {'dos': True}}),
+        'metadata': {
+            'options': get_default_options()
+        }
+    }
+
+    calc_info = generate_calc_job(fixture_sandbox, entry_point_name, inputs)
+
+    # Only the density of states is retrieved, not the frequencies on all the kpoints of the mesh
+    retrieve_list = ['aiida.out', MatdynCalculation._PHONON_DOS_NAME]  # pylint: disable=protected-access
+    assert sorted(calc_info.retrieve_list) == sorted(retrieve_list)
+
+    with fixture_sandbox.open('aiida.in') as handle:
+        input_written = handle.read()
+
+    file_regression.check(input_written, encoding='utf-8', extension='.in')
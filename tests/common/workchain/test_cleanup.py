@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the :py:mod:`~aiida_quantumespresso.common.workchain.cleanup` module."""
+from __future__ import absolute_import
+
+import collections
+import io
+import os
+
+from aiida_quantumespresso.common.workchain.cleanup import clean_remote_folders, delete_folders
+
+
+class MockTransport(object):  # pylint: disable=useless-object-inheritance
+    """Transport that records the executed commands and deletes the folders of the local file system."""
+
+    def __init__(self, undeletable=()):
+        self.commands = []
+        self.undeletable = undeletable
+        self.is_open = False
+
+    def __enter__(self):
+        self.is_open = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.is_open = False
+
+    def exec_command_wait(self, command):
+        """Return a successful `du` or the result of the `rm` that does not delete the undeletable folders."""
+        import shlex
+        import shutil
+
+        assert self.is_open
+        self.commands.append(command)
+        name, _, paths = command.split(None, 2)
+        paths = shlex.split(paths)
+
+        if name == 'du':
+            return 0, ''.join('4\t{}\n'.format(path) for path in paths if os.path.exists(path)), ''
+
+        for path in paths:
+            if path not in self.undeletable:
+                shutil.rmtree(path, ignore_errors=True)
+
+        if any(path in self.undeletable for path in paths):
+            return 1, '', 'Permission denied'
+
+        return 0, '', ''
+
+    def path_exists(self, path):
+        return os.path.exists(path)
+
+
+class MockRemoteData(object):  # pylint: disable=useless-object-inheritance
+    """Object with the interface of a `RemoteData` node that is used by the cleanup."""
+
+    class Computer(object):  # pylint: disable=useless-object-inheritance,too-few-public-methods
+        """Computer with only a UUID."""
+
+        def __init__(self, uuid):
+            self.uuid = uuid
+
+    def __init__(self, path, transport, uuid='localhost'):
+        self.path = path
+        self.transport = transport
+        self.computer = self.Computer(uuid)
+
+    def get_remote_path(self):
+        return self.path
+
+    def get_authinfo(self):
+        return self
+
+    def get_transport(self):
+        return self.transport
+
+
+def create_folders(tmpdir, number):
+    """Create the given number of folders that each contain a single file and return their paths."""
+    paths = []
+    for index in range(number):
+        dirpath = str(tmpdir.mkdir('folder_{}'.format(index)))
+        with io.open(os.path.join(dirpath, 'aiida.out'), 'w') as handle:
+            handle.write(u'output')
+        paths.append(dirpath)
+    return paths
+
+
+def test_delete_folders(tmpdir):
+    """Test that the folders are deleted in batches through a single transport and that failures are reported."""
+    paths = create_folders(tmpdir, 5)
+    transport = MockTransport(undeletable=paths[:1])
+
+    results = delete_folders(transport, paths, batch_size=2)
+
+    # Three batches with one `du` and one `rm` each
+    assert len(transport.commands) == 6
+    assert not results[paths[0]].success
+    assert results[paths[0]].error == 'Permission denied'
+    assert all(results[path].success and results[path].size == 4096 for path in paths[1:])
+    assert [os.path.exists(path) for path in paths] == [True, False, False, False, False]
+
+
+def test_clean_remote_folders(tmpdir):
+    """Test that the remote folders are grouped by computer and the results are returned by key in input order."""
+    paths = create_folders(tmpdir, 4)
+    transports = [MockTransport(), MockTransport()]
+    remote_folders = collections.OrderedDict([
+        (1, MockRemoteData(paths[0], transports[0], 'computer_a')),
+        (2, MockRemoteData(paths[1], transports[1], 'computer_b')),
+        (3, MockRemoteData(paths[2], transports[0], 'computer_a')),
+        (4, MockRemoteData('relative/path', transports[0], 'computer_a')),
+    ])
+
+    results = clean_remote_folders(remote_folders, max_workers=2)
+
+    assert list(results) == [1, 2, 3, 4]
+    assert all(results[key].success for key in [1, 2, 3])
+    assert not results[4].success
+    assert os.path.exists(paths[3])
+    assert not any(os.path.exists(path) for path in paths[:3])
+
+    # A single `du` and `rm` per computer
+    assert [len(transport.commands) for transport in transports] == [2, 2]
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the :py:mod:`~aiida_quantumespresso.common.workchain.utils` module."""
+from __future__ import absolute_import
+
+from aiida_quantumespresso.common.workchain.utils import ErrorHandler, ErrorHandlerDispatchTable
+
+
+def test_error_handler_dispatch_table():
+    """Test that the handlers are dispatched by exit status in order of priority, excluding those without priority."""
+    handlers = [
+        ErrorHandler(600, 'unrecoverable'),
+        ErrorHandler(None, 'manual'),
+        ErrorHandler(410, 'electronic', exit_codes=(410,)),
+        ErrorHandler(580, 'walltime', exit_codes=(400,)),
+        ErrorHandler(560, 'ionic', exit_codes=(500, 501)),
+        ErrorHandler(500, 'generic'),
+    ]
+
+    table = ErrorHandlerDispatchTable(handlers)
+    assert table.number_of_handlers == 6
+    assert len(table) == 5
+
+    def get_methods(exit_status):
+        return [handler.method for handler in table.get_handlers(exit_status)]
+
+    assert get_methods(400) == ['unrecoverable', 'walltime', 'generic']
+    assert get_methods(410) == ['unrecoverable', 'generic', 'electronic']
+    assert get_methods(501) == ['unrecoverable', 'ionic', 'generic']
+    assert get_methods(300) == ['unrecoverable', 'generic']
@@ -38,3 +38,73 @@ def test_cp_default(
         'parameters': results['output_parameters'].get_dict(),
         'trajectory': results['output_trajectory'].attributes
     })
+
+
+def test_cp_trajectory_options(
+    aiida_profile, fixture_localhost, generate_calc_job_node, generate_parser, generate_inputs
+):
+    """Test the parser options to import a subset of the frames of the trajectory with memory-mapped arrays."""
+    import numpy
+
+    entry_point_calc_job = 'quantumespresso.cp'
+    entry_point_parser = 'quantumespresso.cp'
+
+    node = generate_calc_job_node(entry_point_calc_job, fixture_localhost, 'default', generate_inputs)
+    parser = generate_parser(entry_point_parser)
+    results, calcfunction = parser.parse_from_node(node, store_provenance=False)
+    expected = results['output_trajectory']
+
+    generate_inputs['settings'] = orm.Dict(
+        dict={
+            'parser_options': {
+                'trajectory_stride': 3,
+                'trajectory_first_step': 2,
+                'trajectory_last_step': 9,
+                'trajectory_memmap': True,
+            }
+        }
+    )
+    node = generate_calc_job_node(entry_point_calc_job, fixture_localhost, 'default', generate_inputs)
+    parser = generate_parser(entry_point_parser)
+    results, calcfunction = parser.parse_from_node(node, store_provenance=False)
+
+    assert calcfunction.is_finished_ok, calcfunction.exit_message
+
+    trajectory = results['output_trajectory']
+    indices = [1, 4, 7]
+
+    assert trajectory.get_array('steps').tolist() == [2, 5, 8]
+
+    for name in expected.get_arraynames():
+        assert numpy.array_equal(trajectory.get_array(name), expected.get_array(name)[indices]), name
+
+
+def test_cp_trajectory_memmap_cleanup(
+    aiida_profile, fixture_localhost, generate_calc_job_node, generate_parser, generate_inputs, monkeypatch
+):
+    """Test that the directory of the memory-mapped arrays is removed when the parser raises an unexpected exception."""
+    import os
+    import tempfile
+    from aiida_quantumespresso.parsers import cp
+
+    dirpaths = []
+    mkdtemp_original = tempfile.mkdtemp
+
+    def mkdtemp():
+        dirpaths.append(mkdtemp_original())
+        return dirpaths[-1]
+
+    def set_trajectory(*_, **__):
+        raise KeyError('positions_ordered')
+
+    monkeypatch.setattr(cp.tempfile, 'mkdtemp', mkdtemp)
+    monkeypatch.setattr(cp.TrajectoryData, 'set_trajectory', set_trajectory)
+
+    generate_inputs['settings'] = orm.Dict(dict={'parser_options': {'trajectory_memmap': True}})
+    node = generate_calc_job_node('quantumespresso.cp', fixture_localhost, 'default', generate_inputs)
+    parser = generate_parser('quantumespresso.cp')
+    _, calcfunction = parser.parse_from_node(node, store_provenance=False)
+
+    assert calcfunction.is_excepted
+    assert len(dirpaths) == 1
+    assert not os.path.exists(dirpaths[0])
@@ -34,3 +34,90 @@ def test_matdyn_default(aiida_profile, fixture_localhost, generate_calc_job_node
         'output_parameters': results['output_parameters'].get_dict(),
         'output_phonon_bands': results['output_phonon_bands'].attributes
     })
+
+
+def test_matdyn_dos(aiida_profile, fixture_localhost, generate_calc_job_node, generate_parser):
+    """Test a `matdyn.x` calculation of the phonon density of states with the density of states projected on atoms."""
+    entry_point_calc_job = 'quantumespresso.matdyn'
+    entry_point_parser = 'quantumespresso.matdyn'
+
+    inputs = generate_inputs()
+    inputs.parameters = orm.Dict(dict={'INPUT': {'dos': True}})
+
+    node = generate_calc_job_node(entry_point_calc_job, fixture_localhost, 'dos', inputs)
+    parser = generate_parser(entry_point_parser)
+    results, calcfunction = parser.parse_from_node(node, store_provenance=False)
+
+    assert calcfunction.is_finished, calcfunction.exception
+    assert calcfunction.is_finished_ok, calcfunction.exit_message
+    assert 'output_phonon_bands' not in results
+
+    output_dos = results['output_phonon_dos']
+    frequency_name, frequencies, frequency_units = output_dos.get_x()
+    y_arrays = output_dos.get_y()
+
+    assert (frequency_name, frequency_units) == ('frequency', 'THz')
+    assert [name for name, _, _ in y_arrays] == ['dos', 'pdos_atom_1', 'pdos_atom_2']
+    assert all(units == 'states/THz' and array.shape == frequencies.shape for _, array, units in y_arrays)
+
+
+def test_read_matdyn_phonon_frequencies():
+    """Test the chunked reader of the frequencies file, including numbers that are glued to the previous one."""
+    import io
+    from qe_tools.constants import invcm_to_THz
+    from aiida_quantumespresso.parsers.matdyn import read_matdyn_phonon_frequencies
+
+    content = (
+        u' &plot nbnd=   4, nks=   2 /\n'
+        u'            0.000000  0.000000  0.000000\n'
+        u'-1204.1234-1020.5360  -21.3032  585.5869\n'
+        u'           -0.500000  0.000000  0.000000\n'
+        u'  100.0000-1000.0000\n'
+        u'  300.0000  400.0000\n'
+    )
+    expected = [[-1204.1234, -1020.536, -21.3032, 585.5869], [100., -1000., 300., 400.]]
+
+    # A chunk size that is smaller than a line should give the same result
+    for chunk_size in [7, 2**22]:
+        parsed_data = read_matdyn_phonon_frequencies(io.StringIO(content), chunk_size=chunk_size)
+        assert not parsed_data['warnings']
+        assert parsed_data['num_kpoints'] == 2
+        assert (parsed_data['phonon_bands'] / invcm_to_THz).round(4).tolist() == expected
+
+    parsed_data = read_matdyn_phonon_frequencies(io.StringIO(content.replace('300.0000', '********')))
+    assert parsed_data['warnings'] == ['Bad formatting of frequencies']
+
+    parsed_data = read_matdyn_phonon_frequencies(io.StringIO(content[:-12]))
+    assert parsed_data['warnings'] == ['Error while parsing the frequencies, dimension exceeded']
+
+
+def test_read_matdyn_phonon_dos():
+    """Test the reader of the phonon density of states file with the density of states projected on the atoms."""
+    import io
+    from qe_tools.constants import invcm_to_THz
+    from aiida_quantumespresso.parsers.matdyn import read_matdyn_phonon_dos
+
+    content = (
+        u'# Frequency[cm^-1] DOS PDOS\n'
+        u' -1.0000000000E+00  0.0000000000E+00  0.0000E+00  0.0000E+00\n'
+        u'  0.0000000000E+00  2.0000000000E-05  1.5000E-05  5.0000E-06\n'
+        u'  1.0000000000E+00  4.0000000000E-05  3.0000E-05  1.0000E-05\n'
+    )
+
+    parsed_data = read_matdyn_phonon_dos(io.StringIO(content), chunk_size=20)
+
+    assert not parsed_data['warnings']
+    assert (parsed_data['frequencies'] / invcm_to_THz).round(6).tolist() == [-1., 0., 1.]
+    assert (parsed_data['dos'] * invcm_to_THz).round(10).tolist() == [0., 2.E-5, 4.E-5]
+    assert parsed_data['pdos'].shape == (2, 3)
+    assert (parsed_data['pdos'].sum(axis=0) * invcm_to_THz).round(10).tolist() == [0., 2.E-5, 4.E-5]
+
+    parsed_data = read_matdyn_phonon_dos(io.StringIO(content[:-13]))
+    assert parsed_data['warnings'] == ['Incomplete or empty phonon density of states file']
+
+    # A row whose density of states overflowed its field should not be dropped silently
+    for chunk_size in [20, 2**22]:
+        corrupted = io.StringIO(content.replace('2.0000000000E-05', '****************'))
+        parsed_data = read_matdyn_phonon_dos(corrupted, chunk_size=chunk_size)
+        assert parsed_data['warnings'] == ['Bad formatting of the phonon density of states']
+        assert 'dos' not in parsed_data
@@ -68,8 +68,14 @@ def test_neb_default(
     assert 'output_trajectory' in results
     assert 'iteration_array' not in results
 
+    # The parse times are not deterministic, so they are checked separately from the regression data
+    parameters = results['output_parameters'].get_dict()
+    image_parse_times = parameters.pop('image_parse_times')
+    assert sorted(image_parse_times.keys()) == ['pw_output_image_{}'.format(i) for i in range(1, 4)]
+    assert all(sorted(times.keys()) == ['stdout', 'total', 'xml'] for times in image_parse_times.values())
+
     data = {
-        'parameters': results['output_parameters'].get_dict(),
+        'parameters': parameters,
         'output_mep': results['output_mep'].attributes,
         'output_trajectory': results['output_trajectory'].attributes,
     }
@@ -131,3 +137,39 @@ def test_neb_deprecated_keys(aiida_profile, fixture_localhost, generate_calc_job
             assert dictionary['fixed_occupations'] is False
             assert dictionary['smearing_method'] is True
             assert dictionary['tetrahedron_method'] is False
+
+
+def test_neb_image_parser_pool(aiida_profile, fixture_localhost, generate_calc_job_node, generate_parser):
+    """Test that parsing the images with a pool of threads gives the same outputs as parsing them serially."""
+    name = 'default'
+    entry_point_calc_job = 'quantumespresso.neb'
+    entry_point_parser = 'quantumespresso.neb'
+
+    outputs = {}
+
+    for parser_options in [None, {'image_parser_pool': 'thread', 'image_parser_workers': 2}]:
+        node = generate_calc_job_node(entry_point_calc_job, fixture_localhost, name, generate_inputs(parser_options))
+        parser = generate_parser(entry_point_parser)
+        results, calcfunction = parser.parse_from_node(node, store_provenance=False)
+
+        assert calcfunction.is_finished_ok, calcfunction.exit_message
+
+        parameters = results['output_parameters'].get_dict()
+        parameters.pop('image_parse_times')
+        outputs['thread' if parser_options else 'serial'] = (
+            parameters, results['output_trajectory'].get_array('positions')
+        )
+
+    assert outputs['thread'][0] == outputs['serial'][0]
+    assert np.array_equal(outputs['thread'][1], outputs['serial'][1])
+
+
+def test_neb_image_parser_pool_invalid(aiida_profile, fixture_localhost, generate_calc_job_node, generate_parser):
+    """Test that an invalid value for the `image_parser_pool` parser option is reported."""
+    inputs = generate_inputs(parser_options={'image_parser_pool': 'invalid'})
+    node = generate_calc_job_node('quantumespresso.neb', fixture_localhost, 'default', inputs)
+    parser = generate_parser('quantumespresso.neb')
+    _, calcfunction = parser.parse_from_node(node, store_provenance=False)
+
+    assert calcfunction.is_finished
+    assert calcfunction.exit_status == node.process_class.exit_codes.ERROR_INVALID_OUTPUT.status
@@ -2,8 +2,15 @@
 """Tests for the `PhParser`."""
 from __future__ import absolute_import
 
+import io
+import os
+
+import numpy
+
 from aiida import orm
 
+DIRPATH_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'ph')
+
 
 def generate_inputs():
     """Return only those inputs that the parser will expect to be there."""
@@ -59,3 +66,63 @@ def test_ph_out_of_walltime(aiida_profile, fixture_localhost, generate_calc_job_
     assert calcfunction.exit_status == node.process_class.exit_codes.ERROR_OUT_OF_WALLTIME.status
     assert 'output_parameters' in results
     data_regression.check(results['output_parameters'].get_dict())
+
+
+def test_ph_dynamical_matrices_as_arrays(
+    aiida_profile, fixture_localhost, generate_calc_job_node, generate_parser, data_regression
+):
+    """Test a default `ph.x` calculation with the `dynamical_matrices_as_arrays` parser option."""
+    name = 'default'
+    entry_point_calc_job = 'quantumespresso.ph'
+    entry_point_parser = 'quantumespresso.ph'
+
+    inputs = {'settings': orm.Dict(dict={'parser_options': {'dynamical_matrices_as_arrays': True}})}
+    node = generate_calc_job_node(entry_point_calc_job, fixture_localhost, name, inputs)
+    parser = generate_parser(entry_point_parser)
+    results, calcfunction = parser.parse_from_node(node, store_provenance=False)
+
+    assert calcfunction.is_finished, calcfunction.exception
+    assert calcfunction.is_finished_ok, calcfunction.exit_message
+    assert 'output_dynamical_matrices' in results
+
+    output_parameters = results['output_parameters'].get_dict()
+    assert not any(key.startswith('dynamical_matrix_') for key in output_parameters)
+    assert output_parameters['number_of_dynamical_matrices'] == 1
+
+    array = results['output_dynamical_matrices']
+    assert array.get_array('qpoints').shape == (1, 3)
+    assert array.get_array('eigenvectors_real').shape == (1, 6, 2, 3)
+    assert array.get_array('eigenvectors_imag').shape == (1, 6, 2, 3)
+    data_regression.check({
+        'qpoints': array.get_array('qpoints').tolist(),
+        'frequencies': array.get_array('frequencies').tolist(),
+    })
+
+
+def test_parse_ph_dynmat_arrays():
+    """Test that `parse_ph_dynmat_arrays` returns the same values as `parse_ph_dynmat`."""
+    from aiida_quantumespresso.parsers.parse_raw.ph import parse_ph_dynmat, parse_ph_dynmat_arrays
+    from aiida_quantumespresso.utils.mapping import get_logging_container
+
+    with io.open(os.path.join(DIRPATH_FIXTURES, 'default', 'DYN_MAT', 'dynamical-matrix-1')) as handle:
+        lines = handle.read().split('\n')
+
+    logs = get_logging_container()
+    expected = parse_ph_dynmat(lines, logs, also_eigenvectors=True)
+    q_point, frequencies, eigenvectors = parse_ph_dynmat_arrays(lines, logs)
+
+    expected_eigenvectors = numpy.array(expected['eigenvectors'])
+    assert numpy.allclose(q_point, expected['q_point'])
+    assert numpy.allclose(frequencies, expected['frequencies'])
+    assert numpy.allclose(eigenvectors.real, expected_eigenvectors[..., 0])
+    assert numpy.allclose(eigenvectors.imag, expected_eigenvectors[..., 1])
+    assert not logs.warning
+
+    # A file with a single mode, whose eigenvector lines run until the end of the file
+    index_first = next(index for index, line in enumerate(lines) if 'freq' in line)
+    index_second = next(index for index, line in enumerate(lines) if 'freq' in line and index > index_first)
+    q_point, frequencies, eigenvectors = parse_ph_dynmat_arrays(lines[:index_second], logs)
+
+    assert numpy.allclose(frequencies, expected['frequencies'][:1])
+    assert numpy.allclose(eigenvectors.real, expected_eigenvectors[:1, ..., 0])
+    assert not logs.warning
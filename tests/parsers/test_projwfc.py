@@ -49,3 +49,143 @@ def test_projwfc_default(
         'projections':
         {k: v for k, v in results['projections'].attributes.items() if k not in ['reference_bandsdata_uuid']}
     })
+
+
+def test_projwfc_compact_projections(
+    aiida_profile, fixture_localhost, generate_calc_job_node, generate_parser, generate_inputs
+):
+    """Test ``ProjwfcParser`` with the ``compact_projections`` parser option against the default ``ProjectionData``."""
+    entry_point_calc_job = 'quantumespresso.projwfc'
+    entry_point_parser = 'quantumespresso.projwfc'
+
+    node = generate_calc_job_node(entry_point_calc_job, fixture_localhost, 'default', generate_inputs)
+    expected, _ = generate_parser(entry_point_parser).parse_from_node(node, store_provenance=False)
+
+    generate_inputs.settings = orm.Dict(dict={'parser_options': {'compact_projections': True}})
+    node = generate_calc_job_node(entry_point_calc_job, fixture_localhost, 'default', generate_inputs)
+    results, calcfunction = generate_parser(entry_point_parser).parse_from_node(node, store_provenance=False)
+
+    assert calcfunction.is_finished_ok, calcfunction.exit_message
+    assert 'projections' not in results
+    assert 'bands' in results
+
+    compact = results['projections_compact']
+    projections = expected['projections']
+
+    assert compact.number_of_spins == 1
+    assert compact.get_array('projections').shape == (1, 36, 8, 8)
+    assert compact.get_array('pdos').shape == (1, 8, 22)
+    keys = ['kind_name', 'angular_momentum', 'magnetic_number', 'radial_nodes', 'position']
+    assert compact.get_orbital_dicts() == [
+        {key: orbital.get_orbital_dict()[key] for key in keys} for orbital in projections.get_orbitals()
+    ]
+
+    for selectors in [{}, {'kind_name': 'Si', 'angular_momentum': 1}, {'magnetic_number': 0}]:
+        for (_, array), (_, array_expected) in zip(
+            compact.get_projections(**selectors), projections.get_projections(**selectors)
+        ):
+            assert (array == array_expected).all()
+        for (_, pdos, energy), (_, pdos_expected, energy_expected) in zip(
+            compact.get_pdos(**selectors), projections.get_pdos(**selectors)
+        ):
+            assert (energy == energy_expected).all()
+            assert (pdos == pdos_expected).all()
+        assert len(compact.get_orbitals(**selectors)) == len(projections.get_orbitals(**selectors))
+
+
+def test_parse_band_projections():
+    """Test the parsing of the band energies and projections, including coefficients continued on the next line."""
+    from aiida_quantumespresso.parsers.projwfc import parse_band_projections
+
+    out_file = [
+        ' k =   0.0000000000  0.0000000000  0.0000000000\n',
+        '==== e(   1) =    -5.51537 eV ==== \n',
+        '     psi = 0.498*[#   1]+0.498*[#   3]+\n',
+        '    |psi|^2 = 0.997\n',
+        '==== e(   2) =     6.50822 eV ==== \n',
+        '     psi = 0.446*[#   2]+0.034*[#   3]+\n',
+        '          +0.002*[#   1]+\n',
+        '    |psi|^2 = 0.482\n',
+    ]
+    out_info_dict = {
+        'out_file': out_file,
+        'e_lines': [1, 4],
+        'psi_lines': [3, 7],
+        'wfc_lines': [None] * 3,
+        'k_states': 1,
+        'num_bands': 2,
+        'spin_down': False,
+    }
+
+    bands, projections = parse_band_projections(out_info_dict)
+
+    assert bands.tolist() == [[-5.51537, 6.50822]]
+    assert projections.tolist() == [[[0.498, 0., 0.498], [0.002, 0.446, 0.034]]]
+
+
+def test_read_pdos_columns():
+    """Test that the columns of a pdos file are read after its header."""
+    import io
+    from aiida_quantumespresso.parsers.projwfc import read_pdos_columns
+
+    content = u'# E (eV)   ldos(E)   pdos(E)\n  5.903  0.339E+00  0.113E+00\n  6.003 -0.701E-01  0.234E-01\n'
+
+    assert read_pdos_columns(io.StringIO(content)).tolist() == [[5.903, 0.339, 0.113], [6.003, -0.0701, 0.0234]]
+
+
+def test_find_orbitals_from_statelines(monkeypatch):
+    """Test the radial nodes of the states and that the orbitals are only constructed when they are accessed."""
+    from aiida_quantumespresso.data import projections
+    from aiida_quantumespresso.parsers import projwfc
+
+    constructed = []
+
+    def orbital_factory(entry_point):
+        assert entry_point == 'realhydrogen'
+        return lambda **kwargs: constructed.append(kwargs) or kwargs
+
+    monkeypatch.setattr(projections, 'OrbitalFactory', orbital_factory)
+
+    out_file = [
+        '     state #   1: atom   1 (Si ), wfc  1 (l=0 m= 1)\n',
+        '     state #   2: atom   1 (Si ), wfc  2 (l=0 m= 1)\n',
+        '     state #   3: atom   1 (Si ), wfc  3 (l=1 m= 1)\n',
+        '     state #   4: atom   2 (Si ), wfc  1 (l=0 m= 1)\n',
+        '     state #   5: atom   1 (Si ), wfc  4 (l=0 m= 1)\n',
+    ]
+    sites = [AttributeDict({'position': (0., 0., 0.)}), AttributeDict({'position': (1., 1., 1.)})]
+    structure = AttributeDict({'sites': sites})
+    out_info_dict = {'out_file': out_file, 'wfc_lines': list(range(5)), 'structure': structure}
+
+    orbitals = projwfc.find_orbitals_from_statelines(out_info_dict)
+
+    assert len(orbitals) == 5
+    assert not constructed
+    assert [state['radial_nodes'] for state in orbitals.state_dicts] == [0, 1, 0, 0, 2]
+    assert orbitals[3] == {
+        'position': (1., 1., 1.),
+        'kind_name': 'Si',
+        'angular_momentum': 0,
+        'magnetic_number': 0,
+        'radial_nodes': 0,
+    }
+    assert len(constructed) == 1
+
+    assert list(orbitals)[3] is orbitals[3]
+    assert len(constructed) == 5
+
+
+def test_build_orbital_table():
+    """Test the structured array with the definitions of the orbitals of a ``CompactProjectionData``."""
+    from aiida_quantumespresso.data.projections import build_orbital_table
+
+    orbitals = [
+        {'kind_name': 'Si', 'angular_momentum': 0, 'magnetic_number': 0, 'radial_nodes': 0, 'position': [0., 0., 0.]},
+        {'kind_name': 'Si1', 'angular_momentum': 1, 'magnetic_number': 2, 'radial_nodes': 1, 'position': [1., 1., 1.]},
+    ]
+    table = build_orbital_table(orbitals)
+
+    assert table.shape == (2,)
+    assert table['kind_name'].tolist() == ['Si', 'Si1']
+    assert table['position'].shape == (2, 3)
+    assert (table['angular_momentum'] == 1).tolist() == [False, True]
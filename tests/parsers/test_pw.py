@@ -140,6 +140,28 @@ def test_pw_default_xml_191206(
     })
 
 
+def test_pw_default_profiling(aiida_profile, fixture_localhost, generate_calc_job_node, generate_parser,
+                              generate_inputs_default):
+    """Test that the timings of the phases of the parser are attached as an output if the profiling option is set."""
+    name = 'default'
+    entry_point_calc_job = 'quantumespresso.pw'
+    entry_point_parser = 'quantumespresso.pw'
+
+    generate_inputs_default['settings'] = orm.Dict(dict={'parser_options': {'profiling': {'output': True}}})
+    node = generate_calc_job_node(entry_point_calc_job, fixture_localhost, name, generate_inputs_default)
+    parser = generate_parser(entry_point_parser)
+    results, calcfunction = parser.parse_from_node(node, store_provenance=False)
+
+    assert calcfunction.is_finished_ok, calcfunction.exit_message
+    assert 'output_profiling' in results
+
+    profiling = results['output_profiling'].get_dict()
+    phases = ['read_inputs', 'parse_xml', 'parse_stdout', 'build_outputs', 'validate']
+    assert sorted(profiling['phases']) == sorted(phases)
+    assert all(profiling['phases'][phase]['calls'] == 1 for phase in phases)
+    assert profiling['seconds'] >= sum(profiling['phases'][phase]['seconds'] for phase in phases)
+
+
 def test_pw_initialization_xml_new(
     aiida_profile, fixture_localhost, generate_calc_job_node, generate_parser, generate_inputs_default, data_regression
 ):
@@ -697,3 +719,126 @@ def test_pw_npools_too_high(
     assert calcfunction.is_finished, calcfunction.exception
     assert calcfunction.is_failed, calcfunction.exit_status
     assert calcfunction.exit_status == node.process_class.exit_codes.ERROR_NPOOLS_TOO_HIGH.status
+
+
+def test_pw_xml_schema_cache():
+    """Test that the compiled XML schemas are cached and shared by subsequent calls in the same process."""
+    from aiida_quantumespresso.parsers.parse_xml.pw.cache import XMLSchemaCache
+    from aiida_quantumespresso.parsers.parse_xml.pw.versions import get_available_xml_schemas
+
+    cache = XMLSchemaCache()
+    schema_filepaths = cache.warm_up()
+
+    assert len(schema_filepaths) == len(get_available_xml_schemas())
+    assert cache.get_statistics() == {'size': len(schema_filepaths), 'hits': 0, 'misses': 0}
+
+    schema = cache.get(schema_filepaths[0])
+    assert cache.get(schema_filepaths[0]) is schema
+    assert cache.get_statistics()['hits'] == 2
+
+    cache.clear()
+    assert cache.get(schema_filepaths[0]) is not schema
+    assert cache.get_statistics() == {'size': 1, 'hits': 0, 'misses': 1}
+
+
+def test_symmetry_index():
+    """Test that `reduce_symmetries` classifies the symmetry operations through the `SYMMETRY_INDEX`."""
+    import logging
+    import numpy
+    from aiida_quantumespresso.parsers.parse_raw.pw import SYMMETRY_INDEX, get_symmetry_mapping, reduce_symmetries
+
+    symmetries = get_symmetry_mapping()
+    assert len(SYMMETRY_INDEX) == len(symmetries) == 64
+
+    for index, symmetry in enumerate(symmetries):
+        sign = -1 if symmetry['inversion'] else 1
+        assert SYMMETRY_INDEX.find_by_name(symmetry['name']) == index
+        assert SYMMETRY_INDEX.find_by_matrix(symmetry['matrix'] * sign + 1.E-8) == index
+
+    with pytest.raises(ValueError):
+        SYMMETRY_INDEX[0].matrix[0, 0] = 2.
+
+    # For a cubic cell the crystal coordinates are the cartesian ones, the unknown name is classified by its matrix
+    operations = []
+    for symmetry in symmetries:
+        rotation = symmetry['matrix'] * (-1 if symmetry['inversion'] else 1)
+        operations.append({'name': symmetry['name'], 'rotation': rotation.tolist(), 't_rev': '0'})
+    operations[1]['name'] = 'unknown'
+
+    parsed_parameters = {'symmetries': operations[:48], 'lattice_symmetries': operations[48:]}
+    reduce_symmetries(parsed_parameters, {'cell': {'lattice_vectors': numpy.eye(3) * 5.}}, logging.getLogger())
+
+    assert [symmetry['symmetry_number'] for symmetry in parsed_parameters['symmetries']] == list(range(48))
+    assert [symmetry['symmetry_number'] for symmetry in parsed_parameters['lattice_symmetries']] == list(range(48, 64))
+
+
+def test_pw_xml_ks_energies():
+    """Test that the Kohn-Sham energies are read into arrays and that the element tree is restored after decoding."""
+    import os
+    from xmlschema.etree import ElementTree
+    from aiida_quantumespresso.parsers.parse_xml.pw.exceptions import XMLParseError
+    from aiida_quantumespresso.parsers.parse_xml.pw.parse import parse_pw_xml_post_6_2, read_ks_energies
+
+    filepath = os.path.join(os.path.dirname(__file__), 'fixtures', 'pw', 'default_xml_191206', 'data-file-schema.xml')
+    xml = ElementTree.parse(filepath)
+    ks_energies = xml.getroot().findall('output/band_structure/ks_energies')
+
+    parsed_data, logs = parse_pw_xml_post_6_2(xml)
+    assert not logs.error
+    assert xml.getroot().findall('output/band_structure/ks_energies') == ks_energies
+    assert parsed_data['bands']['bands'].shape == (1, 4, 6)
+    assert parsed_data['k_points_weights'] == [0.25, 0.75, 0.75, 0.25]
+
+    k_points, weights, eigenvalues, occupations = read_ks_energies(ks_energies, 6)
+    assert k_points.shape == (4, 3)
+    assert weights.shape == (4,)
+    assert eigenvalues[0, 0] == -1.190515686562308e-1
+    assert (occupations[0] == 1.).all()
+
+    with pytest.raises(XMLParseError):
+        read_ks_energies(ks_energies, 5)
+
+
+def test_pw_xml_lazy_sections():
+    """Test that the sections of the XML are only decoded when accessed and that they can be decoded on request."""
+    import os
+    import re
+    from xmlschema.etree import ElementTree
+    from aiida_quantumespresso.parsers.parse_xml.pw.cache import get_xml_schema
+    from aiida_quantumespresso.parsers.parse_xml.pw.parse import parse_pw_xml_post_6_2
+    from aiida_quantumespresso.parsers.parse_xml.pw.sections import LazyXMLDocument
+    from aiida_quantumespresso.parsers.parse_xml.pw.versions import get_schema_filepath
+
+    dirpath = os.path.join(os.path.dirname(__file__), 'fixtures', 'pw', 'initialization_xml_new')
+    filepath = os.path.join(dirpath, 'data-file-schema.xml')
+    xml = ElementTree.parse(filepath)
+    xsd = get_xml_schema(get_schema_filepath(xml))
+
+    document = LazyXMLDocument(xml, xsd)
+    outputs = document.get_section('output')
+    assert 'atomic_structure' in outputs
+    assert 'band_structure' not in outputs
+    assert document.decoded_paths == []
+
+    assert outputs['atomic_structure']['@nat'] == 2
+    assert document.decoded_paths == ['output/atomic_structure']
+    assert outputs.get('band_structure', None) is None
+
+    # An element contained in a decoded element is taken from the decoded data of the latter
+    assert document.decode('output')['atomic_structure'] == document.decode('structure')
+    assert document.errors
+
+    # The complete document is validated by default, whereas with `decode_sections` only the validation errors of the
+    # decoded sections are reported, with the same location in the document
+    _, logs_full = parse_pw_xml_post_6_2(ElementTree.parse(filepath))
+    _, logs_lazy = parse_pw_xml_post_6_2(ElementTree.parse(filepath), decode_sections=[])
+    _, logs_sections = parse_pw_xml_post_6_2(ElementTree.parse(filepath), decode_sections=['output', 'absent'])
+    assert len(logs_lazy.error) < len(logs_full.error)
+    assert len(logs_sections.warning) == 1
+
+    # The errors refer to the elements of the separately parsed documents by their memory address
+    def mask_addresses(errors):
+        return [re.sub(r' at 0x[0-9a-f]+', '', error) for error in errors]
+
+    assert mask_addresses(logs_sections.error) == mask_addresses(logs_full.error)
+    assert all('Path:' in error for error in logs_full.error[1:])
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name,redefined-outer-name
+"""Tests of the streaming `pw.x` stdout parser."""
+from __future__ import absolute_import
+
+import glob
+import io
+import os
+
+import numpy
+import pytest
+
+from aiida_quantumespresso.parsers.parse_raw.pw import parse_stdout
+from aiida_quantumespresso.parsers.parse_raw.pw_stream import (
+    parse_stdout_stream, PwStdoutIncrementalParser, PwStdoutStreamParser
+)
+from aiida_quantumespresso.utils.buffers import GrowableArray
+
+DIRPATH_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURES_STDOUT = sorted(
+    os.path.relpath(os.path.dirname(filepath), DIRPATH_FIXTURES).replace(os.sep, '/')
+    for filepath in glob.glob(os.path.join(DIRPATH_FIXTURES, 'pw', '*', 'aiida.out')) +
+    glob.glob(os.path.join(DIRPATH_FIXTURES, 'neb', '*', '*', 'PW.out'))
+)
+
+
+def normalize(value):
+    """Recursively convert arrays, array buffers and tuples into lists such that parsed dictionaries can be compared."""
+    if isinstance(value, dict):
+        return {key: normalize(sub_value) for key, sub_value in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(sub_value) for sub_value in value]
+    if isinstance(value, (numpy.ndarray, GrowableArray)):
+        return normalize(value.tolist())
+    return value
+
+
+def get_regression_data(parsed_data, logs):
+    """Return the parsed data and the error and warning logs as a dictionary for the `data_regression` fixture."""
+    return {'parsed_data': normalize(parsed_data), 'errors': sorted(logs.error), 'warnings': sorted(logs.warning)}
+
+
+@pytest.mark.parametrize('fixture', FIXTURES_STDOUT)
+def test_fixtures(fixture, data_regression):
+    """Test the data and the logs that are parsed from the stdout of all `pw.x` outputs in the fixtures."""
+    dirpath = os.path.join(DIRPATH_FIXTURES, *fixture.split('/'))
+    filename = 'PW.out' if fixture.startswith('neb') else 'aiida.out'
+
+    with io.open(os.path.join(dirpath, filename), 'r') as handle:
+        parsed_data, logs = parse_stdout_stream(handle, {})
+
+    data_regression.check(get_regression_data(parsed_data, logs))
+
+
+def test_parse_stdout():
+    """Test that parsing the stdout content as a string gives the same result as parsing it from the file handle."""
+    with io.open(os.path.join(DIRPATH_FIXTURES, 'pw', 'vcrelax_success', 'aiida.out'), 'r') as handle:
+        content = handle.read()
+        handle.seek(0)
+        expected_data, expected_logs = parse_stdout_stream(handle, {})
+
+    parsed_data, logs = parse_stdout(content, {})
+
+    assert normalize(parsed_data) == normalize(expected_data)
+    assert logs == expected_logs
+
+
+@pytest.mark.parametrize('fixture', ['default', 'relax_success', 'vcrelax_success'])
+def test_truncated(fixture):
+    """Test that outputs that are cut at arbitrary lines, as for interrupted calculations, can be parsed.
+
+    The energies of the steps that are complete where the output is cut have to be the same as those of the full output.
+    """
+    with io.open(os.path.join(DIRPATH_FIXTURES, 'pw', fixture, 'aiida.out'), 'r') as handle:
+        lines = handle.read().split('\n')
+
+    expected_data, _ = parse_stdout_stream('\n'.join(lines), {})
+    expected_energies = normalize(expected_data['trajectory']['energy'])
+
+    for index in range(0, len(lines), 11):
+        parsed_data, _ = parse_stdout_stream('\n'.join(lines[:index]) + '\n', {})
+        energies = normalize(parsed_data.get('trajectory', {}).get('energy', []))
+        assert energies == expected_energies[:len(energies)]
+
+
+def test_synthetic(data_regression):
+    """Test the quantities that do not occur in the fixtures: magnetization, vdW, dipoles and Hubbard."""
+    with io.open(os.path.join(DIRPATH_FIXTURES, 'pw', 'vcrelax_success', 'aiida.out'), 'r') as handle:
+        lines = handle.read().split('\n')
+
+    stdout = []
+
+    for line in lines:
+        if 'Cartesian axes' in line:
+            stdout.append('     Carrying out vdW-DF run using the following parameters:')
+        if 'End of self-consistent calculation' in line:
+            stdout.extend([
+                '     Computed dipole along edir(3) : ',
+                '        Elec. dipole   0.1 Ry au,   0.3136 Debye',
+                '        Ion. dipole    0.1 Ry au,   0.3136 Debye',
+                '        Dipole         0.1 Ry au,   0.4136 Debye',
+                '     Magnetic moment per site:',
+                '     atom:    1    charge:    6.1234    magn:    0.5000    constr:    0.0000',
+                '     atom:    2    charge:    6.1000    magn:   -0.5000    constr:    0.0000',
+            ])
+        if line.startswith('!'):
+            stdout.append('     Non-local correlation energy =     0.12345 Ry')
+        if 'convergence has been achieved' in line:
+            stdout.extend([
+                '     total magnetization       =     2.00 Bohr mag/cell',
+                '     absolute magnetization    =     2.10 Bohr mag/cell',
+            ])
+        stdout.append(line)
+        if 'End of self-consistent calculation' in line:
+            stdout.extend([
+                '     Electronic Dipole per cell (Ry a.u.)  0.1',
+                '     Ionic Dipole per cell (Ry a.u.)  0.2',
+                '     Electronic Dipole on Cartesian axes',
+                '     1  0.1',
+                '     2  0.2',
+                '     3  0.3',
+                '     Ionic Dipole on Cartesian axes',
+                '     1  0.4',
+                '     2  0.5',
+                '     3  0.6',
+                '     LDA+U parameters:',
+                '     atom    1   Tr[ns(na)] (up, down, total) =   1.0  1.0  2.0',
+                '     atom    2   Tr[ns(na)] =   2.0',
+            ])
+
+    stdout = '\n'.join(stdout)
+    parameters = {'CONTROL': {'lelfield': True}}
+
+    parsed_data, logs = parse_stdout_stream(stdout, parameters, {'parse_atomic_occupations': True})
+
+    for key in ['atomic_magnetic_moments', 'dipole', 'energy_vdw', 'electronic_dipole_cartesian_axes', 'stress']:
+        assert key in parsed_data['trajectory']
+
+    data_regression.check(get_regression_data(parsed_data, logs))
+
+
+def test_feed_in_chunks():
+    """Test that feeding the stdout in arbitrary chunks of lines gives the same result as parsing it at once."""
+    with io.open(os.path.join(DIRPATH_FIXTURES, 'pw', 'vcrelax_success', 'aiida.out'), 'r') as handle:
+        lines = handle.readlines()
+
+    expected_data, _ = parse_stdout_stream(lines, {})
+
+    parser = PwStdoutStreamParser({})
+    for index in range(0, len(lines), 7):
+        parser.feed(lines[index:index + 7])
+    parsed_data, _ = parser.finalize()
+
+    assert normalize(parsed_data) == normalize(expected_data)
+
+
+def test_incremental_parser():
+    """Test that feeding the stdout as byte ranges gives the same result and reports the steps as they complete."""
+    with io.open(os.path.join(DIRPATH_FIXTURES, 'pw', 'vcrelax_success', 'aiida.out'), 'rb') as handle:
+        content = handle.read()
+
+    expected_data, _ = parse_stdout_stream(content.decode('utf-8'), {})
+
+    parser = PwStdoutIncrementalParser({})
+    frames = []
+    scf_iterations = []
+
+    # The chunk size does not align with the lines, such that most chunks end in the middle of a line
+    for offset in range(0, len(content), 1000):
+        parser.feed_bytes(content[offset:offset + 1000], offset=offset)
+        new_frames, new_scf_iterations = parser.poll()
+        frames.extend(new_frames)
+        scf_iterations.extend(new_scf_iterations)
+
+    # The last step is only complete once the parser is finalized
+    assert len(frames) == len(expected_data['trajectory']['energy']) - 1
+    assert parser.offset == len(content)
+
+    with pytest.raises(ValueError):
+        parser.feed_bytes(b'', offset=0)
+
+    parsed_data, _ = parser.finalize()
+    new_frames, new_scf_iterations = parser.poll()
+    frames.extend(new_frames)
+    scf_iterations.extend(new_scf_iterations)
+
+    assert normalize(parsed_data) == normalize(expected_data)
+    assert [frame['energy'][0] for frame in frames] == list(expected_data['trajectory']['energy'])
+    assert [iteration['scf_accuracy'] for iteration in scf_iterations] == list(
+        expected_data['trajectory']['scf_accuracy'])
+    assert [iteration['iteration'] for iteration in scf_iterations if iteration['frame'] == 0] == list(
+        range(1, expected_data['trajectory']['scf_iterations'][0] + 1))
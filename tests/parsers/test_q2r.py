@@ -24,3 +24,42 @@ def test_q2r_default(aiida_profile, fixture_localhost, generate_calc_job_node, g
     assert not orm.Log.objects.get_logs_for(node)
     assert 'force_constants' in results
     data_regression.check(results['force_constants'].get_content())
+
+
+def test_q2r_force_constants_array(aiida_profile, fixture_localhost, generate_calc_job_node, generate_parser):
+    """Test a default `q2r.x` calculation with the `store_force_constants_array` parser option."""
+    import numpy
+    from aiida_quantumespresso.data.force_constants import parse_q2r_force_constants_file
+    from aiida_quantumespresso.utils.phonons import PhononInterpolator
+
+    entry_point_calc_job = 'quantumespresso.q2r'
+    entry_point_parser = 'quantumespresso.q2r'
+
+    inputs = generate_inputs()
+    inputs['settings'] = orm.Dict(dict={'parser_options': {'store_force_constants_array': True}})
+
+    node = generate_calc_job_node(entry_point_calc_job, fixture_localhost, 'default', inputs)
+    parser = generate_parser(entry_point_parser)
+    results, calcfunction = parser.parse_from_node(node, store_provenance=False)
+
+    assert calcfunction.is_finished_ok, calcfunction.exit_message
+
+    force_constants = results['force_constants']
+    force_constants_array = results['force_constants_array']
+    _, expected, _ = parse_q2r_force_constants_file(force_constants.get_content().splitlines(), True)
+
+    # Both outputs have to be storable, i.e. the force constants file is the only object of the `SinglefileData`
+    force_constants.store()
+    force_constants_array.store()
+
+    force_constants = orm.load_node(force_constants.pk)
+    force_constants_array = orm.load_node(force_constants_array.pk)
+
+    assert force_constants.list_object_names() == [force_constants.filename]
+    assert numpy.array_equal(force_constants.force_constants, expected)
+    assert force_constants_array.get_array('force_constants').shape == (1, 1, 1, 3, 3, 2, 2)
+    assert numpy.array_equal(force_constants_array.get_array('force_constants'), expected)
+
+    interpolator = PhononInterpolator.from_force_constants_data(force_constants, asr=None)
+    interpolator_array = PhononInterpolator.from_force_constants_data(force_constants, None, force_constants_array)
+    assert numpy.array_equal(interpolator.weighted_force_constants, interpolator_array.weighted_force_constants)
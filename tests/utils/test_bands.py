@@ -5,7 +5,7 @@ from __future__ import absolute_import
 import numpy
 import pytest
 
-from aiida_quantumespresso.utils.bands import get_highest_occupied_band
+from aiida_quantumespresso.utils.bands import get_band_properties, get_band_properties_batch, get_highest_occupied_band
 
 
 class TestGetHighestOccupiedBand(object):
@@ -94,3 +94,80 @@ class TestGetHighestOccupiedBand(object):
         bands.store()
         homo = get_highest_occupied_band(bands)
         assert homo == 4
+
+
+def test_get_band_properties_insulator():
+    """Test `get_band_properties` for a spin-polarized insulator with a different number of bands per spin channel."""
+    occupations = numpy.array([[
+        [1., 1., 0., 0.],
+        [1., 1., 0., 0.],
+    ], [
+        [1., 0., 0., 0.],
+        [1., 0., 0., 0.],
+    ]])
+    eigenvalues = numpy.array([[
+        [-2., -1., 2., 3.],
+        [-2., -0.5, 1.5, 3.],
+    ], [
+        [-2., 1., 2., 3.],
+        [-2., 1.2, 2., 3.],
+    ]])
+
+    properties = get_band_properties(occupations, eigenvalues)
+    assert properties['homo'] == 2
+    assert properties['lumo'] == 3
+    assert properties['valence_band_maximum'] == -0.5
+    assert properties['conduction_band_minimum'] == 1.
+    assert properties['band_gap'] == 1.5
+    assert properties['is_insulator']
+
+
+def test_get_band_properties_metal():
+    """Test `get_band_properties` for metals, with either a varying number of occupied bands or partial occupations."""
+    eigenvalues = numpy.array([
+        [-2., -1., 1., 3.],
+        [-2., 0.5, 1.5, 3.],
+    ])
+
+    occupations = numpy.array([
+        [2., 2., 0., 0.],
+        [2., 2., 1., 0.],
+    ])
+    properties = get_band_properties(occupations, eigenvalues)
+    assert properties['homo'] == 3
+    assert properties['band_gap'] == 0.
+    assert not properties['is_insulator']
+
+    occupations = numpy.array([
+        [2., 1.2, 0., 0.],
+        [2., 0.8, 0., 0.],
+    ])
+    properties = get_band_properties(occupations, eigenvalues)
+    assert properties['homo'] == 2
+    assert properties['band_gap'] == 0.
+    assert not properties['is_insulator']
+
+    with pytest.raises(ValueError):
+        get_band_properties(occupations, eigenvalues[:, :3])
+
+
+def test_get_band_properties_batch(aiida_profile):
+    """Test `get_band_properties_batch` for a list of nodes that includes a node with invalid occupations."""
+    from aiida.orm import BandsData
+
+    nodes = []
+
+    for occupations in [[[2., 2., 0.]], [[2., 2., 2.]]]:
+        bands = BandsData()
+        bands.set_kpoints([[0., 0., 0.]])
+        bands.set_bands([[-1., 0., 1.]], units='eV', occupations=occupations)
+        nodes.append(bands.store())
+
+    results = get_band_properties_batch(nodes)
+    assert [result['pk'] for result in results] == [node.pk for node in nodes]
+    assert results[0]['homo'] == 2
+    assert results[0]['band_gap'] == 1.
+    assert results[0]['is_insulator']
+    assert results[0]['units'] == 'eV'
+    assert results[1]['homo'] is None
+    assert 'last band' in results[1]['error']
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the :py:mod:`~aiida_quantumespresso.utils.buffers` module."""
+from __future__ import absolute_import
+
+import numpy
+import pytest
+
+from aiida_quantumespresso.utils.buffers import GrowableArray, TrajectoryBuffer
+
+
+def test_growable_array():
+    """Test that frames are appended beyond the initial capacity and are returned as a view or python objects."""
+    frames = [[[index, 0.5], [1., 2.]] for index in range(5)]
+    array = GrowableArray(capacity=2)
+
+    for frame in frames:
+        array.append(frame)
+
+    assert len(array) == 5
+    assert array.nbytes == 8 * 2 * 2 * 8
+    assert array[-1] == frames[-1]
+    assert array[1:3] == frames[1:3]
+    assert list(array) == frames
+    assert numpy.asarray(array).shape == (5, 2, 2)
+    assert numpy.shares_memory(numpy.asarray(array), array.array)
+
+    array.trim()
+    assert array.nbytes == 5 * 2 * 2 * 8
+    assert array.tolist() == frames
+
+    with pytest.raises(ValueError):
+        array.append([1., 2.])
+
+    with pytest.raises(ValueError):
+        GrowableArray(capacity=0)
+
+
+def test_growable_array_upcast():
+    """Test that the frames are upcast instead of truncated when a float is appended to an array of integers."""
+    array = GrowableArray()
+    array.append(1)
+    array.append(2.5)
+
+    assert array.dtype == numpy.float64
+    assert array.tolist() == [1., 2.5]
+
+
+def test_trajectory_buffer():
+    """Test the frame shapes that are known from the number of atoms and the fallback to lists."""
+    buffer = TrajectoryBuffer(number_of_atoms=2)
+    buffer.append('forces', [[0., 0., 1.], [0., 0., -1.]])
+    buffer.append('energy', -10.)
+    buffer.append('energy', -11.)
+    buffer.append('total_magnetization', 1.)
+    buffer.append('total_magnetization', [0., 0., 1.])
+    buffer['atomic_species_name'] = ['Si', 'Si']
+
+    assert buffer['forces'].frame_shape == (2, 3)
+    assert buffer['energy'][-1] == -11.
+    assert isinstance(buffer['total_magnetization'], list)
+    assert buffer.tolist() == {
+        'forces': [[[0., 0., 1.], [0., 0., -1.]]],
+        'energy': [-10., -11.],
+        'total_magnetization': [1., [0., 0., 1.]],
+        'atomic_species_name': ['Si', 'Si'],
+    }
+
+    # Positions for a different number of atoms than declared are stored in a list as well
+    buffer.append('atomic_positions_relax', [[0., 0., 0.]])
+    assert buffer['atomic_positions_relax'] == [[[0., 0., 0.]]]
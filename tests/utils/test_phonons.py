@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the :py:mod:`~aiida_quantumespresso.utils.phonons` module."""
+from __future__ import absolute_import
+
+import io
+import os
+
+import numpy
+import pytest
+
+from aiida_quantumespresso.utils import phonons
+from aiida_quantumespresso.utils.phonons import PhononInterpolator
+
+DIRPATH_TESTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def generate_force_constants():
+    """Return a `ForceConstantsData` node for one of the force constants files in the test fixtures."""
+
+    def _generate_force_constants(relative_path):
+        from aiida_quantumespresso.data.force_constants import ForceConstantsData
+        return ForceConstantsData(os.path.join(DIRPATH_TESTS, *relative_path))
+
+    return _generate_force_constants
+
+
+def test_matdyn_fixture(aiida_profile, generate_force_constants):
+    """Test that the frequencies are identical to those computed by `matdyn.x` for the same force constants."""
+    from qe_tools.constants import invcm_to_THz
+    from aiida_quantumespresso.parsers.matdyn import parse_raw_matdyn_phonon_file
+
+    filepath = ['parsers', 'fixtures', 'q2r', 'default', 'real_space_force_constants.dat']
+    force_constants = generate_force_constants(filepath)
+
+    filepath = os.path.join(DIRPATH_TESTS, 'parsers', 'fixtures', 'matdyn', 'default', 'phonon_frequencies.dat')
+    with io.open(filepath, 'r') as handle:
+        expected = parse_raw_matdyn_phonon_file(handle.read())['phonon_bands']
+
+    # The reference calculation did not apply any acoustic sum rule
+    interpolator = PhononInterpolator.from_force_constants_data(force_constants, asr=None)
+    frequencies = interpolator.get_frequencies([[0., 0., 0.]])
+
+    # The frequencies in the reference file are written with four decimals in cm^-1
+    assert numpy.allclose(frequencies, expected, rtol=0, atol=1.0E-4 * invcm_to_THz)
+
+
+def test_acoustic_sum_rule(aiida_profile, generate_force_constants):
+    """Test that the simple acoustic sum rule makes the acoustic frequencies at Gamma vanish."""
+    force_constants = generate_force_constants(['calculations', 'fixtures', 'matdyn', 'default', 'force_constants.dat'])
+
+    # Gamma is on the grid of the force constants, so without sum rule the frequencies of the dynamical matrix computed
+    # by `ph.x` in the `ph` parser fixture for the same system should be reproduced exactly
+    frequencies = PhononInterpolator.from_force_constants_data(force_constants, asr=None).get_frequencies([0, 0, 0])
+    assert numpy.allclose(frequencies[0], [-0.638653] * 3 + [17.555455] * 3, rtol=0, atol=1.0E-5)
+
+    frequencies = PhononInterpolator.from_force_constants_data(force_constants).get_frequencies([0, 0, 0])
+    assert numpy.allclose(frequencies[0, :3], 0, atol=1.0E-3)
+
+    with pytest.raises(ValueError):
+        PhononInterpolator.from_force_constants_data(force_constants, asr='crystal')
+
+
+def test_batches(aiida_profile, generate_force_constants):
+    """Test that the result does not depend on the batch size and that time-reversal symmetry is respected."""
+    force_constants = generate_force_constants(['calculations', 'fixtures', 'matdyn', 'default', 'force_constants.dat'])
+    interpolator = PhononInterpolator.from_force_constants_data(force_constants)
+
+    qpoints = numpy.random.RandomState(0).uniform(-0.5, 0.5, (25, 3))
+    frequencies = interpolator.get_frequencies(qpoints)
+
+    assert frequencies.shape == (25, 6)
+    assert numpy.allclose(interpolator.get_frequencies(qpoints, batch_size=4), frequencies)
+    assert numpy.allclose(interpolator.get_frequencies(-qpoints), frequencies)
+
+
+def test_get_phonon_bands(aiida_profile, generate_force_constants):
+    """Test the `get_phonon_bands` and `get_phonon_dos` functions."""
+    from aiida import orm
+    from aiida_quantumespresso.utils.phonons import get_phonon_bands, get_phonon_dos
+
+    force_constants = generate_force_constants(['calculations', 'fixtures', 'matdyn', 'default', 'force_constants.dat'])
+
+    kpoints = orm.KpointsData()
+    kpoints.set_kpoints([[0., 0., 0.], [0.5, 0., 0.5], [0.5, 0.5, 0.5]])
+
+    bands = get_phonon_bands(force_constants, kpoints)
+    assert bands.get_bands().shape == (3, 6)
+    assert bands.units == 'THz'
+
+    dos = get_phonon_dos(force_constants, [4, 4, 4])
+    frequencies = dos.get_x()[1]
+    density = dos.get_y()[0][1]
+    assert numpy.isclose(numpy.sum(density) * (frequencies[1] - frequencies[0]), 6.0, rtol=1.0E-3)
+
+
+@pytest.mark.parametrize('qpoints_mesh', [(2, 2, 2), (3, 3, 2)])
+def test_commensurate_qpoints(qpoints_mesh):
+    """Test that the dynamical matrices that define the force constants are reproduced on the q-points of their mesh.
+
+    The force constants are the discrete Fourier transform of dynamical matrices on the q-points mesh, as computed by
+    `q2r.x`. The interpolation assigns them to the images of the lattice vectors within the Wigner-Seitz cell of the
+    supercell, where images on its boundary share the force constants through their weights. On the q-points of the
+    mesh the phase factors of all images of a lattice vector are the same, so the original matrices have to be
+    recovered exactly for any cell and atomic positions, which would not be the case with wrong weights or phases.
+    """
+    random = numpy.random.RandomState(0)
+    number_of_atoms = 2
+    mesh = numpy.array(qpoints_mesh)
+
+    # A primitive fcc cell with the atoms at the silicon positions, such that many images lie on the boundaries
+    cell = 5.0 * numpy.array([[-0.5, 0., 0.5], [0., 0.5, 0.5], [-0.5, 0.5, 0.]])
+    positions = numpy.array([[0., 0., 0.], [-1.25, 1.25, 1.25]])
+    masses = numpy.array([28.0, 12.0])
+
+    # Random force constants that are symmetric under the exchange of the two atoms and axes combined with `R -> -R`,
+    # which makes the dynamical matrices hermitian
+    force_constants = random.uniform(-1, 1, tuple(mesh) + (3, 3, number_of_atoms, number_of_atoms))
+    opposite = tuple(numpy.ix_(*[-numpy.arange(size) % size for size in mesh]))
+    force_constants = 0.5 * (force_constants + force_constants[opposite].transpose(0, 1, 2, 4, 3, 6, 5))
+
+    qpoints = numpy.stack(numpy.meshgrid(*[numpy.arange(size) / float(size) for size in mesh], indexing='ij'), -1)
+    qpoints = qpoints.reshape(-1, 3)
+    vectors = numpy.stack(numpy.meshgrid(*[numpy.arange(size) for size in mesh], indexing='ij'), -1).reshape(-1, 3)
+
+    # The dynamical matrices on the mesh as the plain Fourier sum over the lattice vectors of a single supercell
+    phases = numpy.exp(-2j * numpy.pi * numpy.dot(qpoints, vectors.T))
+    expected = numpy.dot(phases, force_constants.reshape(len(vectors), -1)).reshape(-1, 3, 3, 2, 2)
+    expected = expected.transpose(0, 3, 1, 4, 2).reshape(-1, 6, 6)
+    expected *= numpy.outer(numpy.repeat(masses**-0.5, 3), numpy.repeat(masses**-0.5, 3))
+
+    interpolator = PhononInterpolator(force_constants, cell, positions, masses, asr=None)
+
+    assert numpy.allclose(interpolator.get_dynamical_matrices(qpoints), expected)
+
+    eigenvalues = numpy.linalg.eigvalsh(expected)
+    frequencies = numpy.sign(eigenvalues) * numpy.sqrt(numpy.abs(eigenvalues)) * phonons.RY_TO_THZ
+    assert numpy.allclose(interpolator.get_frequencies(qpoints), frequencies)
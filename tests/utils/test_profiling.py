@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the :py:mod:`~aiida_quantumespresso.utils.profiling` module."""
+from __future__ import absolute_import
+
+import pytest
+
+from aiida_quantumespresso.utils import profiling
+from aiida_quantumespresso.utils.profiling import Profiler, get_profiling_options, profile_step
+
+
+class MockNode(object):  # pylint: disable=useless-object-inheritance
+    """Object with the interface of a node that is used to store the extras."""
+
+    def __init__(self):
+        self.extras = {}
+
+    def get_extra(self, key, default=None):
+        return self.extras.get(key, default)
+
+    def set_extra(self, key, value):
+        self.extras[key] = value
+
+
+def test_get_profiling_options(monkeypatch):
+    """Test the normalization of the profiling option and the fallback onto the environment variable."""
+    monkeypatch.delenv(profiling.ENVIRONMENT_VARIABLE, raising=False)
+
+    assert get_profiling_options() is None
+    assert get_profiling_options(False) is None
+    assert get_profiling_options(True) == {'trace_memory': False, 'output': False}
+    assert get_profiling_options({'output': True}) == {'trace_memory': False, 'output': True}
+
+    monkeypatch.setenv(profiling.ENVIRONMENT_VARIABLE, 'memory')
+    assert get_profiling_options() == {'trace_memory': True, 'output': False}
+    assert get_profiling_options(False) is None
+
+    monkeypatch.setenv(profiling.ENVIRONMENT_VARIABLE, '0')
+    assert get_profiling_options() is None
+
+    with pytest.raises(ValueError):
+        get_profiling_options({'unknown': True})
+
+    with pytest.raises(ValueError):
+        get_profiling_options('yes')
+
+
+def test_profiler():
+    """Test that nested phases and decorated functions are recorded and the results are stored in the extras."""
+    profiler = Profiler(trace_memory=True)
+
+    @profiler.timed()
+    def allocate(size):
+        return [0] * size
+
+    with profiler.phase('outer'):
+        with profiler.phase('inner'):
+            allocate(10**5)
+        allocate(10**4)
+
+    node = MockNode()
+    results = profiler.store(node, 'parse')
+    phases = results['phases']
+
+    assert node.extras == {'profiling': {'parse': results}}
+    assert phases['allocate']['calls'] == 2
+    assert phases['inner']['calls'] == phases['outer']['calls'] == 1
+    assert phases['outer']['seconds'] >= phases['inner']['seconds']
+    assert phases['outer']['memory_peak'] >= phases['inner']['memory_peak'] > 8 * 10**5
+    assert results['seconds'] >= phases['outer']['seconds']
+    assert not profiler.trace_memory or not profiling.tracemalloc.is_tracing()
+
+
+def test_profiler_disabled():
+    """Test that a disabled profiler records nothing."""
+    profiler = Profiler.from_options(False)
+
+    with profiler.phase('phase'):
+        pass
+
+    assert not profiler.enabled
+    assert not profiler.phases
+
+
+def test_profile_step(monkeypatch):
+    """Test that the calls of a work chain step are added up in the extras only if the environment variable is set."""
+
+    class MockWorkChain(object):  # pylint: disable=useless-object-inheritance,too-few-public-methods
+        """Object with the interface of a work chain that is used by the decorator."""
+
+        def __init__(self):
+            self.node = MockNode()
+
+        @profile_step
+        def run_calculation(self):
+            return 'result'
+
+    workchain = MockWorkChain()
+
+    monkeypatch.delenv(profiling.ENVIRONMENT_VARIABLE, raising=False)
+    assert workchain.run_calculation() == 'result'
+    assert not workchain.node.extras
+
+    monkeypatch.setenv(profiling.ENVIRONMENT_VARIABLE, '1')
+    workchain.run_calculation()
+    workchain.run_calculation()
+    assert workchain.node.extras['profiling']['steps']['run_calculation']['calls'] == 2
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the :py:mod:`~aiida_quantumespresso.utils.protocols.pw` module."""
+from __future__ import absolute_import
+
+import pytest
+
+from aiida_quantumespresso.utils.protocols import pw as protocols
+
+
+def test_protocol_modifiers_cache():
+    """Test that the modifiers are shared and read-only, and that the returned protocol data is a copy."""
+    manager = protocols.ProtocolManager('testing')
+    assert protocols.ProtocolManager('testing').modifiers is manager.modifiers
+
+    with pytest.raises(TypeError):
+        manager.modifiers['pseudo']['SSSP-efficiency-1.1']['Si'] = {}
+
+    pseudo_data = manager.get_pseudo_data('SSSP-efficiency-1.1')
+    parameters = manager.get_parameters_data('fast')
+    assert isinstance(pseudo_data, dict)
+    assert isinstance(parameters['kpoints_mesh_offset'], list)
+
+    pseudo_data['Si'] = {}
+    parameters['kpoints_mesh_offset'].append(0.)
+    assert manager.get_pseudo_data('SSSP-efficiency-1.1')['Si'] != {}
+    assert manager.get_parameters_data('fast')['kpoints_mesh_offset'] == [0., 0., 0.]
+
+    data = manager.get_protocol_data()
+    cutoff = data['pseudo_data']['Si']['cutoff']
+    data['pseudo_data']['Si']['cutoff'] = 0
+    data['kpoints_mesh_offset'].append(0.)
+
+    data = protocols.ProtocolManager('testing').get_protocol_data()
+    assert data['pseudo_data']['Si']['cutoff'] == cutoff
+    assert data['kpoints_mesh_offset'] == [0., 0., 0.]
+
+    # The modifiers are built again if the modification times of the files changed
+    protocols._PROTOCOL_MODIFIERS_CACHE['mtimes'] = None  # pylint: disable=protected-access
+    assert protocols.ProtocolManager('testing').modifiers is not manager.modifiers
+    assert protocols.ProtocolManager('testing').get_protocol_data() == data
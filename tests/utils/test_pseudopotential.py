@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the :py:mod:`~aiida_quantumespresso.utils.pseudopotential` module."""
+from __future__ import absolute_import
+
+import pytest
+
+from aiida_quantumespresso.utils import pseudopotential
+
+
+def test_get_pseudos_from_dict(aiida_profile, generate_structure, generate_upf_data):
+    """Test that `get_pseudos_from_dict` resolves all kinds with the nodes of the given UUIDs."""
+    from aiida.common import NotExistent
+    from aiida.orm import Dict
+
+    upf = generate_upf_data('Si').store()
+    structure = generate_structure()
+
+    pseudos = pseudopotential.get_pseudos_from_dict(structure, {'Si': upf.uuid})
+    assert list(pseudos.keys()) == ['Si']
+    assert pseudos['Si'].uuid == upf.uuid
+
+    with pytest.raises(NotExistent):
+        pseudopotential.get_pseudos_from_dict(structure, {'Ge': upf.uuid})
+
+    with pytest.raises(ValueError):
+        pseudopotential.get_pseudos_from_dict(structure, {'Si': Dict().store().uuid})
+
+
+def test_get_pseudos_by_md5(aiida_profile, generate_upf_data):
+    """Test that `get_pseudos_by_md5` returns all nodes with the given checksums that are currently stored."""
+    from aiida.orm import QueryBuilder, UpfData
+
+    def get_expected(md5):
+        """Return the tuples of the UUID and element of the nodes with the given checksum, queried directly."""
+        builder = QueryBuilder().append(
+            UpfData, filters={'attributes.md5': md5}, project=['uuid', 'attributes.element'], tag='upf'
+        )
+        builder.order_by({'upf': 'id'})
+        return [tuple(row) for row in builder.all()]
+
+    upf = generate_upf_data('Si').store()
+    md5 = upf.md5sum
+
+    pseudos = pseudopotential.get_pseudos_by_md5([md5, 'unknown'])
+    assert pseudos == {md5: get_expected(md5), 'unknown': []}
+    assert (upf.uuid, 'Si') in pseudos[md5]
+
+    # A node with the same checksum that is stored later should be found by subsequent calls
+    upf_duplicate = generate_upf_data('Si').store()
+    assert upf_duplicate.md5sum == md5
+
+    pseudos = pseudopotential.get_pseudos_by_md5([md5])
+    assert pseudos == {md5: get_expected(md5)}
+    assert (upf_duplicate.uuid, 'Si') in pseudos[md5]
+    assert pseudopotential.get_pseudos_by_md5([]) == {}
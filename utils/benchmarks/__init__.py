@@ -0,0 +1 @@
+"""Benchmarks of performance critical parts of the package, to be run manually during development."""
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark of the band occupation analysis of `utils.bands` against the original loop over all occupations."""
+from __future__ import absolute_import
+from __future__ import division
+
+import click
+import numpy
+
+from fixtures import setup_path, timed
+
+setup_path()
+
+# pylint: disable=wrong-import-position
+from aiida_quantumespresso.utils.bands import get_band_properties, get_occupied_band_counts
+
+
+def get_highest_occupied_band_loop(occupations, threshold):
+    """Reference implementation that loops over the spin channels, kpoints and bands in python."""
+    lumo_indices = []
+    spin_channels = occupations if occupations.ndim == 3 else [occupations]
+
+    for l, spin_channel in enumerate(spin_channels):  # pylint: disable=invalid-name
+        for k, kpoint in enumerate(spin_channel):
+            lumo_index = None
+            lumo_occupation = None
+
+            for n, occupation in enumerate(kpoint):  # pylint: disable=invalid-name
+                if lumo_index is not None:
+                    if occupation > 2 * threshold:
+                        warning_args = [occupation, n, lumo_occupation, lumo_index, l, k]
+                        raise ValueError('Occupation of {} at n={} after lumo lkn<{},{},{}>'.format(*warning_args))
+                elif occupation < threshold:
+                    lumo_index = n
+                    lumo_occupation = occupation
+                    lumo_indices.append(lumo_index)
+
+            if kpoint[-1] >= threshold:
+                warning_args = [kpoint[-1], l, k, len(kpoint)]
+                raise ValueError('Occupation of {} at last band lkn<{},{},{}>'.format(*warning_args))
+
+    return max(lumo_indices)
+
+
+def generate_bands(spin_channels, kpoints, bands, seed=0):
+    """Return the occupations and eigenvalues of a metallic band structure with Fermi-Dirac smearing.
+
+    :return: tuple of occupations and eigenvalues, both with shape `(spin_channels, kpoints, bands)`
+    """
+    random = numpy.random.RandomState(seed)
+    eigenvalues = numpy.sort(random.uniform(-10., 10., size=(spin_channels, kpoints, bands)), axis=-1)
+    eigenvalues[..., bands // 2:] += 20.
+    occupations = (2. / spin_channels) / (numpy.exp(eigenvalues / 0.1) + 1.)
+
+    return occupations, eigenvalues
+
+
+@click.command()
+@click.option('-k', '--kpoints', type=int, default=1000, show_default=True, help='Number of kpoints.')
+@click.option('-b', '--bands', type=int, default=100, show_default=True, help='Number of bands.')
+@click.option('-n', '--calls', type=int, default=5, show_default=True, help='Number of calls per implementation.')
+def benchmark(kpoints, bands, calls):
+    """Time the determination of the highest occupied band of a band structure with and without spin polarization."""
+    threshold = 0.005
+
+    for spin_channels in [1, 2]:
+        occupations, eigenvalues = generate_bands(spin_channels, kpoints, bands)
+
+        if spin_channels == 1:
+            occupations, eigenvalues = occupations[0], eigenvalues[0]
+
+        homo = int(get_occupied_band_counts(occupations, threshold).max())
+        assert homo == get_highest_occupied_band_loop(occupations, threshold), 'the HOMO differs from the reference'
+
+        _, elapsed_loop = timed(get_highest_occupied_band_loop, occupations, threshold, repetitions=calls)
+        _, elapsed_vectorized = timed(get_occupied_band_counts, occupations, threshold, repetitions=calls)
+        _, elapsed_properties = timed(get_band_properties, occupations, eigenvalues, threshold, repetitions=calls)
+
+        click.echo(
+            '{} spin channel(s), {} kpoints, {} bands: loop {:.2f} ms/call, vectorized {:.2f} ms/call, '
+            'with band gap {:.2f} ms/call'.format(
+                spin_channels, kpoints, bands, elapsed_loop * 1E3, elapsed_vectorized * 1E3, elapsed_properties * 1E3
+            )
+        )
+
+
+if __name__ == '__main__':
+    benchmark()  # pylint: disable=no-value-for-parameter
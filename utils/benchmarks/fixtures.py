@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""Generate production-sized outputs for the parser benchmarks by scaling up the test fixtures.
+
+Each scaler copies one of the fixture folders in `tests/parsers/fixtures` and then enlarges the files that dominate the
+parsing cost by an integer `scale` factor, e.g. by replicating ionic steps, k-points or trajectory frames, such that the
+output remains valid for the parser. Every scaler returns a dictionary with the properties of the generated output that
+are needed to construct consistent inputs for the calculation node, such as the number of k-points.
+
+The module also provides what all benchmark scripts share: `setup_path` puts the root of the repository on the path,
+such that the scripts use the package of this repository, and `timed` measures the wall time of a function call.
+"""
+from __future__ import absolute_import
+from __future__ import division
+
+import io
+import os
+import shutil
+import sys
+from timeit import default_timer
+
+import numpy
+
+FILEPATH_SCRIPT = os.path.split(os.path.realpath(__file__))[0]
+FILEPATH_ROOT = os.path.realpath(os.path.join(FILEPATH_SCRIPT, os.pardir, os.pardir))
+FILEPATH_FIXTURES = os.path.join(FILEPATH_ROOT, 'tests', 'parsers', 'fixtures')
+
+
+def setup_path():
+    """Put the root of the repository at the front of the path, such that the package of this repository is imported."""
+    if FILEPATH_ROOT not in sys.path:
+        sys.path.insert(0, FILEPATH_ROOT)
+
+
+def timed(function, *args, **kwargs):
+    """Call the function with the given arguments and return the result and the average wall time of a call.
+
+    :param function: the function to call
+    :param args: the positional arguments of the function
+    :param kwargs: the keyword arguments of the function, except for `repetitions`, the number of calls to average
+        over, which is 1 by default
+    :return: tuple of the result of the last call and the average wall time of a call in seconds
+    """
+    repetitions = kwargs.pop('repetitions', 1)
+    result = None
+    start = default_timer()
+
+    for _ in range(repetitions):
+        result = function(*args, **kwargs)
+
+    return result, (default_timer() - start) / repetitions
+
+
+def read_lines(filepath):
+    """Return the lines of the given file, including the line endings."""
+    with io.open(filepath, 'r') as handle:
+        return handle.readlines()
+
+
+def write_lines(filepath, lines):
+    """Write the given lines, which should include the line endings, to the given file."""
+    with io.open(filepath, 'w') as handle:
+        handle.writelines(lines)
+
+
+def find_lines(lines, marker):
+    """Return the indices of the lines that contain the given marker."""
+    return [index for index, line in enumerate(lines) if marker in line]
+
+
+def replicate_block(lines, start, end, scale):
+    """Return the lines where the block `lines[start:end]` is repeated `scale` times in place.
+
+    :param lines: list of lines
+    :param start: index of the first line of the block
+    :param end: index of the first line after the block
+    :param scale: total number of occurrences of the block in the result
+    """
+    return lines[:start] + lines[start:end] * scale + lines[end:]
+
+
+def replicate_stanzas(lines, stanza_length, scale, header_length=0):
+    """Return the lines of a trajectory file, of stanzas that start with a step and time, repeated `scale` times.
+
+    The steps and times of each copy are shifted by the last step and time of the original file, such that they keep
+    increasing monotonically as in a longer run.
+
+    :param lines: list of lines of a `cp.x` trajectory file, e.g. the `.pos`, `.vel` or `.cel` file
+    :param stanza_length: number of lines per stanza, including the line with the step and time
+    :param scale: number of copies of the trajectory
+    :param header_length: number of header lines that precede the first stanza
+    """
+    header, body = lines[:header_length], lines[header_length:]
+    number_of_stanzas = len(body) // stanza_length
+
+    if number_of_stanzas == 0:
+        return list(lines)
+
+    last_step, last_time = body[(number_of_stanzas - 1) * stanza_length].split()[:2]
+    last_step, last_time = int(last_step), float(last_time)
+    result = list(header)
+
+    for copy in range(scale):
+        for index, line in enumerate(body[:number_of_stanzas * stanza_length]):
+            if index % stanza_length == 0:
+                columns = line.split()
+                step = int(columns[0]) + copy * last_step
+                time = float(columns[1]) + copy * last_time
+                line = '{:>7d}  {:.8f}  {}\n'.format(step, time, '  '.join(columns[2:])).replace('  \n', '\n')
+            result.append(line)
+
+    return result
+
+
+def copy_fixture(relative_path, dirpath_target):
+    """Copy the fixture folder with the given path relative to the parser fixtures to the target folder."""
+    if os.path.exists(dirpath_target):
+        shutil.rmtree(dirpath_target)
+    shutil.copytree(os.path.join(FILEPATH_FIXTURES, *relative_path), dirpath_target)
+
+
+def scale_pw(dirpath, scale):
+    """Generate a variable-cell relaxation with `scale` times the intermediate ionic steps of the fixture."""
+    copy_fixture(['pw', 'vcrelax_success'], dirpath)
+    filepath = os.path.join(dirpath, 'aiida.out')
+    lines = read_lines(filepath)
+
+    # Replicate an intermediate ionic step, i.e. the block between the second and third SCF cycle
+    indices = find_lines(lines, 'Self-consistent Calculation')
+    write_lines(filepath, replicate_block(lines, indices[1], indices[2], scale))
+
+    return {'calculation': 'vc-relax', 'number_of_scf_cycles': len(indices) + scale - 1}
+
+
+def scale_ph(dirpath, scale):
+    """Generate a `ph.x` output with `scale` times the dynamical matrices of the fixture."""
+    copy_fixture(['ph', 'default'], dirpath)
+    dirpath_dynmat = os.path.join(dirpath, 'DYN_MAT')
+    filepath = os.path.join(dirpath_dynmat, 'dynamical-matrix-1')
+
+    for index in range(2, scale + 1):
+        shutil.copy(filepath, os.path.join(dirpath_dynmat, 'dynamical-matrix-{}'.format(index)))
+
+    return {'number_of_dynamical_matrices': scale}
+
+
+def scale_q2r(dirpath, scale):
+    """Generate a `q2r.x` output with random force constants on a cubic mesh of about `scale` q-points."""
+    copy_fixture(['q2r', 'default'], dirpath)
+    filepath = os.path.join(dirpath, 'real_space_force_constants.dat')
+    lines = read_lines(filepath)
+
+    number_of_atoms = int(lines[0].split()[1])
+
+    # The mesh is the line before the first block header, which is the first line with four integers
+    for index, line in enumerate(lines):
+        columns = line.split()
+        if len(columns) == 4 and all(column.lstrip('-').isdigit() for column in columns):
+            break
+
+    header = lines[:index - 1]
+    size = max(int(round(scale**(1. / 3.))), 1)
+    mesh = (size, size, size)
+    random = numpy.random.RandomState(0)
+    blocks = [''.join(header), '{:4d}{:4d}{:4d}\n'.format(*mesh)]
+    supercell = [
+        '{:4d}{:4d}{:4d}'.format(m1, m2, m3)
+        for m3 in range(1, size + 1)
+        for m2 in range(1, size + 1)
+        for m1 in range(1, size + 1)
+    ]
+
+    for i in range(1, 4):
+        for j in range(1, 4):
+            for na in range(1, number_of_atoms + 1):
+                for nb in range(1, number_of_atoms + 1):
+                    values = random.normal(scale=1.E-2, size=len(supercell))
+                    blocks.append('{:4d}{:4d}{:4d}{:4d}\n'.format(i, j, na, nb))
+                    blocks.extend('{}{:20.11E}\n'.format(m, value) for m, value in zip(supercell, values))
+
+    write_lines(filepath, blocks)
+
+    return {'qpoints_mesh': list(mesh), 'number_of_atoms': number_of_atoms}
+
+
+def scale_matdyn(dirpath, scale):
+    """Generate a `matdyn.x` output with `scale` times the q-points of the fixture."""
+    copy_fixture(['matdyn', 'default'], dirpath)
+    filepath = os.path.join(dirpath, 'phonon_frequencies.dat')
+    lines = read_lines(filepath)
+
+    number_of_kpoints = int(lines[0].split('=')[2].split('/')[0]) * scale
+    header = '{}nks={:5d} /\n'.format(lines[0].split('nks=')[0], number_of_kpoints)
+    write_lines(filepath, [header] + lines[1:] * scale)
+
+    return {'number_of_kpoints': number_of_kpoints}
+
+
+def scale_projwfc(dirpath, scale):
+    """Generate a `projwfc.x` output with `scale` times the k-points of the fixture."""
+    copy_fixture(['projwfc', 'default'], dirpath)
+    filepath = os.path.join(dirpath, 'aiida.out')
+    lines = read_lines(filepath)
+
+    # The projections of all k-points are printed between the first k-point and the Lowdin charges
+    start = find_lines(lines, ' k = ')[0]
+    end = find_lines(lines, 'Lowdin Charges')[0]
+    write_lines(filepath, replicate_block(lines, start, end, scale))
+
+    return {'number_of_kpoints': len(find_lines(lines, ' k = ')) * scale}
+
+
+def scale_dos(dirpath, scale):
+    """Generate a `dos.x` output with an energy grid that is `scale` times finer than that of the fixture."""
+    copy_fixture(['dos', 'default'], dirpath)
+    filepath = os.path.join(dirpath, 'aiida.dos')
+    lines = read_lines(filepath)
+
+    data = numpy.loadtxt(lines[1:], ndmin=2)
+    energy = numpy.linspace(data[0, 0], data[-1, 0], (len(data) - 1) * scale + 1)
+    columns = [energy] + [numpy.interp(energy, data[:, 0], data[:, index]) for index in range(1, data.shape[1])]
+    rows = ['{:8.3f}{}\n'.format(row[0], ''.join('{:12.4E}'.format(value) for value in row[1:]))
+            for row in numpy.column_stack(columns)]
+    write_lines(filepath, lines[:1] + rows)
+
+    return {'number_of_energies': len(energy)}
+
+
+def scale_cp(dirpath, scale):
+    """Generate a `cp.x` output with a trajectory that is `scale` times longer than that of the fixture."""
+    copy_fixture(['cp', 'default'], dirpath)
+    number_of_atoms = None
+
+    for extension, header_length in [('pos', 0), ('vel', 0), ('for', 0), ('cel', 0), ('evp', 1)]:
+        filepath = os.path.join(dirpath, 'aiida.{}'.format(extension))
+        lines = read_lines(filepath)
+
+        if not lines:
+            continue
+
+        if extension == 'evp':
+            stanza_length = 1
+        elif extension == 'cel':
+            stanza_length = 4
+        else:
+            # The first line of the second stanza is the only other line with two columns
+            stanza_length = [len(line.split()) for line in lines[1:]].index(2) + 1
+            number_of_atoms = stanza_length - 1
+
+        write_lines(filepath, replicate_stanzas(lines, stanza_length, scale, header_length))
+
+    return {'number_of_atoms': number_of_atoms}
+
+
+def scale_neb(dirpath, scale):
+    """Generate a `neb.x` output with `scale` times the intermediate path iterations of the fixture."""
+    copy_fixture(['neb', 'default'], dirpath)
+    filepath = os.path.join(dirpath, 'aiida.out')
+    lines = read_lines(filepath)
+
+    indices = find_lines(lines, '------------------------------ iteration')
+    write_lines(filepath, replicate_block(lines, indices[1], indices[2], scale))
+
+    return {'number_of_images': 3}
+
+
+SCALERS = {
+    'pw': scale_pw,
+    'ph': scale_ph,
+    'q2r': scale_q2r,
+    'matdyn': scale_matdyn,
+    'projwfc': scale_projwfc,
+    'dos': scale_dos,
+    'cp': scale_cp,
+    'neb': scale_neb,
+}
+
+
+def generate_fixture(name, dirpath, scale):
+    """Generate the scaled output for the parser with the given name in the given folder.
+
+    :param name: name of the parser, one of the keys of `SCALERS`
+    :param dirpath: folder in which to write the output, it is replaced if it exists
+    :param scale: integer scale factor, where 1 reproduces the original fixture
+    :return: dictionary with the properties of the generated output
+    """
+    if scale < 1:
+        raise ValueError('the scale should be a positive integer, got {}'.format(scale))
+
+    try:
+        scaler = SCALERS[name]
+    except KeyError:
+        raise ValueError('unknown parser `{}`, choose from {}'.format(name, ', '.join(sorted(SCALERS))))
+
+    return scaler(dirpath, scale)
+
+
+def get_folder_size(dirpath):
+    """Return the total size in bytes of all files in the given folder and its subfolders."""
+    size = 0
+    for root, _, filenames in os.walk(dirpath):
+        size += sum(os.path.getsize(os.path.join(root, filename)) for filename in filenames)
+    return size
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark of the reader of the phonon frequencies file of `matdyn.x` against the original implementation.
+
+A synthetic file is generated for a dense mesh of q-points, with the fixed-width Fortran layout of `matdyn.x`, in which
+the frequencies of a fraction of the modes are below -1000 cm^-1, such that they are glued to the previous number.
+"""
+from __future__ import absolute_import
+from __future__ import division
+import io
+import os
+import re
+import shutil
+import tempfile
+
+import click
+import numpy
+
+from fixtures import setup_path, timed
+
+setup_path()
+
+# pylint: disable=wrong-import-position
+from qe_tools.constants import invcm_to_THz
+from aiida_quantumespresso.parsers.matdyn import read_matdyn_phonon_frequencies
+
+
+def parse_raw_matdyn_phonon_file_split(phonon_frequencies):
+    """Reference implementation that splits the whole file, fixes glued numbers one by one and fills the array."""
+    parsed_data = {}
+    parsed_data['warnings'] = []
+
+    num_bands = int(phonon_frequencies.split('=')[1].split(',')[0])
+    num_kpoints = int(phonon_frequencies.split('=')[2].split('/')[0])
+    parsed_data['num_kpoints'] = num_kpoints
+
+    freq_matrix = numpy.zeros((num_kpoints, num_bands))
+    split_data = phonon_frequencies.split()
+    raw_data = split_data[split_data.index('/') + 1:]
+
+    corrected_data = []
+    for value in raw_data:
+        try:
+            corrected_data.append(float(value))
+        except ValueError:
+            parts = [part for part in re.split('(-)', value) if part != '']
+            for i in range(0, len(parts), 2):
+                corrected_data.append(float(parts[i] + parts[i + 1]))
+
+    counter = 3
+    for i in range(num_kpoints):
+        for j in range(num_bands):
+            freq_matrix[i, j] = corrected_data[counter] * invcm_to_THz
+            counter += 1
+        counter += 3
+
+    parsed_data['phonon_bands'] = freq_matrix
+
+    return parsed_data
+
+
+def generate_frequencies(filepath, num_qpoints, num_modes, seed=0):
+    """Write a phonon frequencies file with the given number of q-points and modes in the layout of `matdyn.x`."""
+    random = numpy.random.RandomState(seed)
+    line_coordinates = '          ' + '{:10.6f}' * 3 + '\n'
+    line_frequencies = '{:10.4f}' * num_modes + '\n'
+
+    with io.open(filepath, 'w') as handle:
+        handle.write(u' &plot nbnd={:4d}, nks={:8d} /\n'.format(num_modes, num_qpoints))
+
+        for _ in range(num_qpoints):
+            frequencies = random.uniform(-50, 1000, num_modes)
+            # The original implementation can only separate glued numbers if the first one is negative as well
+            glued = numpy.flatnonzero(random.uniform(size=num_modes // 2) < 0.05) * 2 + 1
+            frequencies[glued - 1] = -21.3032
+            frequencies[glued] = -1234.5678
+            handle.write(line_coordinates.format(*random.uniform(-0.5, 0.5, 3)))
+            handle.write(line_frequencies.format(*frequencies))
+
+
+@click.command()
+@click.option('-q', '--qpoints', type=int, default=100000, show_default=True, help='Number of q-points.')
+@click.option('-m', '--modes', type=int, default=24, show_default=True, help='Number of phonon modes.')
+def benchmark(qpoints, modes):
+    """Compare the throughput of the chunked frequencies reader to the original implementation."""
+    dirpath = tempfile.mkdtemp()
+
+    try:
+        filepath = os.path.join(dirpath, 'phonon_frequencies.dat')
+        generate_frequencies(filepath, qpoints, modes)
+        size = os.path.getsize(filepath) / 1E6
+
+        def read_split():
+            with io.open(filepath, 'r') as handle:
+                return parse_raw_matdyn_phonon_file_split(handle.read())
+
+        def read_chunked():
+            with io.open(filepath, 'r') as handle:
+                return read_matdyn_phonon_frequencies(handle)
+
+        expected, elapsed_split = timed(read_split)
+        result, elapsed_chunked = timed(read_chunked)
+    finally:
+        shutil.rmtree(dirpath)
+
+    assert not result['warnings'], result['warnings']
+    assert numpy.array_equal(result['phonon_bands'], expected['phonon_bands']), 'the parsed frequencies differ'
+
+    click.echo('frequencies file of {:.1f} MB with {} q-points and {} modes'.format(size, qpoints, modes))
+    click.echo('split:   {:.3f} s, {:6.1f} MB/s'.format(elapsed_split, size / elapsed_split))
+    click.echo('chunked: {:.3f} s, {:6.1f} MB/s, speedup {:.1f}x'.format(
+        elapsed_chunked, size / elapsed_chunked, elapsed_split / elapsed_chunked))
+
+
+if __name__ == '__main__':
+    benchmark()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,451 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark of the wall time, peak memory and allocations of the output parsers on scaled up test fixtures.
+
+The outputs are generated with the scalers of the `fixtures` module next to this script and parsed with the full
+`Parser.parse_from_node` of each parser, i.e. including the creation of the output nodes, as in a daemon worker. The
+calculation nodes are stored in a temporary test profile, unless an existing profile is explicitly selected.
+
+The results are written to a JSON file, and two such files can be compared with the `compare` command::
+
+    python utils/benchmarks/parsers.py run --scale 200 --output before.json
+    python utils/benchmarks/parsers.py run --scale 200 --output after.json
+    python utils/benchmarks/parsers.py compare before.json after.json
+"""
+from __future__ import absolute_import
+from __future__ import division
+import collections
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+
+import click
+import six
+
+import fixtures
+
+fixtures.setup_path()
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+PARSERS = collections.OrderedDict([
+    ('pw', 'quantumespresso.pw'),
+    ('ph', 'quantumespresso.ph'),
+    ('q2r', 'quantumespresso.q2r'),
+    ('matdyn', 'quantumespresso.matdyn'),
+    ('projwfc', 'quantumespresso.projwfc'),
+    ('dos', 'quantumespresso.dos'),
+    ('cp', 'quantumespresso.cp'),
+    ('neb', 'quantumespresso.neb'),
+])
+
+
+def reset_peak_rss():
+    """Reset the peak resident set size of the current process, which is only supported on Linux.
+
+    :return: True if the peak was reset, False if the peak is that of the lifetime of the process
+    """
+    try:
+        with io.open('/proc/self/clear_refs', 'w') as handle:
+            handle.write(u'5')
+    except (IOError, OSError):
+        return False
+    return True
+
+
+def get_memory_status(key):
+    """Return the value in bytes of the given key of `/proc/self/status`, or `None` if it is not available."""
+    try:
+        with io.open('/proc/self/status', 'r') as handle:
+            for line in handle:
+                if line.startswith(key + ':'):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError):
+        pass
+    return None
+
+
+def get_rss():
+    """Return the current resident set size of this process in bytes, falling back on the peak if not available."""
+    rss = get_memory_status('VmRSS')
+    return rss if rss is not None else get_peak_rss()
+
+
+def get_peak_rss():
+    """Return the peak resident set size of this process in bytes."""
+    peak = get_memory_status('VmHWM')
+    if peak is None:
+        # The maximum resident set size is reported in bytes on macOS and in kilobytes on Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != 'darwin':
+            peak *= 1024
+    return peak
+
+
+def get_computer():
+    """Return a `Computer` for localhost, creating it if it does not exist yet."""
+    from aiida import orm
+    from aiida.common import exceptions
+
+    label = 'localhost-parser-benchmarks'
+
+    try:
+        return orm.Computer.objects.get(name=label)
+    except exceptions.NotExistent:
+        computer = orm.Computer(
+            name=label,
+            description='localhost computer for the parser benchmarks',
+            hostname='localhost',
+            workdir=tempfile.gettempdir(),
+            transport_type='local',
+            scheduler_type='direct'
+        ).store()
+        computer.set_default_mpiprocs_per_machine(1)
+        return computer
+
+
+def get_structure():
+    """Return a `StructureData` representing bulk silicon, which is the system of all the fixtures."""
+    from aiida import orm
+
+    param = 5.43
+    cell = [[param / 2., param / 2., 0], [param / 2., 0, param / 2.], [0, param / 2., param / 2.]]
+    structure = orm.StructureData(cell=cell)
+    structure.append_atom(position=(0., 0., 0.), symbols='Si', name='Si')
+    structure.append_atom(position=(param / 4., param / 4., param / 4.), symbols='Si', name='Si')
+
+    return structure
+
+
+def flatten_inputs(inputs, prefix=''):
+    """Flatten nested inputs into a list of tuples of link labels and nodes, with namespaces joined by `__`."""
+    flat_inputs = []
+    for key, value in six.iteritems(inputs):
+        if isinstance(value, dict):
+            flat_inputs.extend(flatten_inputs(value, prefix=prefix + key + '__'))
+        else:
+            flat_inputs.append((prefix + key, value))
+    return flat_inputs
+
+
+def create_calc_job_node(entry_point_name, computer, dirpath=None, inputs=None):
+    """Create a stored `CalcJobNode` with the given inputs and with the files of `dirpath` as the `retrieved` folder.
+
+    :param entry_point_name: entry point name of the calculation class
+    :param computer: a `Computer` instance
+    :param dirpath: optional folder with the output files of the calculation
+    :param inputs: optional dictionary of input nodes, where nested dictionaries correspond to namespaces
+    :return: the `CalcJobNode`
+    """
+    from aiida import orm
+    from aiida.common import LinkType
+    from aiida.plugins.entry_point import format_entry_point_string
+
+    entry_point = format_entry_point_string('aiida.calculations', entry_point_name)
+
+    node = orm.CalcJobNode(computer=computer, process_type=entry_point)
+    node.set_attribute('input_filename', 'aiida.in')
+    node.set_attribute('output_filename', 'aiida.out')
+    node.set_attribute('error_filename', 'aiida.err')
+    node.set_option('resources', {'num_machines': 1, 'num_mpiprocs_per_machine': 1})
+    node.set_option('max_wallclock_seconds', 1800)
+
+    for link_label, input_node in flatten_inputs(inputs or {}):
+        input_node.store()
+        node.add_incoming(input_node, link_type=LinkType.INPUT_CALC, link_label=link_label)
+
+    node.store()
+
+    if dirpath is not None:
+        retrieved = orm.FolderData()
+        retrieved.put_object_from_tree(dirpath)
+        retrieved.add_incoming(node, link_type=LinkType.CREATE, link_label='retrieved')
+        retrieved.store()
+
+        remote_folder = orm.RemoteData(computer=computer, remote_path=tempfile.gettempdir())
+        remote_folder.add_incoming(node, link_type=LinkType.CREATE, link_label='remote_folder')
+        remote_folder.store()
+
+    return node
+
+
+def get_inputs(name, computer, properties):
+    """Return the input nodes that the parser with the given name expects for an output with the given properties.
+
+    :param name: name of the parser, one of the keys of `PARSERS`
+    :param computer: a `Computer` instance
+    :param properties: dictionary with the properties of the generated output as returned by its scaler
+    :return: dictionary of input nodes
+    """
+    from aiida import orm
+    from aiida.common import LinkType
+
+    if name == 'pw':
+        structure = get_structure()
+        kpoints = orm.KpointsData()
+        kpoints.set_cell_from_structure(structure)
+        kpoints.set_kpoints_mesh_from_density(0.15)
+        return {
+            'structure': structure,
+            'kpoints': kpoints,
+            'parameters': orm.Dict(dict={'CONTROL': {
+                'calculation': properties['calculation']
+            }}),
+            'settings': orm.Dict()
+        }
+
+    if name == 'matdyn':
+        kpoints = orm.KpointsData()
+        kpoints.set_kpoints([[0., 0., 0.]] * properties['number_of_kpoints'])
+        return {'kpoints': kpoints}
+
+    if name == 'projwfc':
+        kpoints = orm.KpointsData()
+        kpoints.set_kpoints_mesh([4, 4, 4])
+        dirpath_parent = os.path.join(fixtures.FILEPATH_FIXTURES, 'pw', 'default')
+        parent = create_calc_job_node('quantumespresso.pw', computer, dirpath_parent, {
+            'structure': get_structure(),
+            'kpoints': kpoints
+        })
+        parameters = orm.Dict(dict={'number_of_spin_components': 1})
+        parameters.add_incoming(parent, link_type=LinkType.CREATE, link_label='output_parameters')
+        parameters.store()
+        return {'parent_folder': parent.outputs.remote_folder}
+
+    if name == 'cp':
+        return {'structure': get_structure(), 'parameters': orm.Dict(dict={})}
+
+    if name == 'neb':
+        return {
+            'parameters': orm.Dict(dict={'PATH': {
+                'num_of_images': properties['number_of_images']
+            }}),
+            'pw': {
+                'parameters': orm.Dict()
+            },
+        }
+
+    return {}
+
+
+def parse(parser_class, node):
+    """Parse the outputs of the node with the full machinery of `Parser.parse_from_node`.
+
+    :return: tuple of the exit status and the number of output nodes
+    """
+    results, calcfunction = parser_class.parse_from_node(node, store_provenance=False)
+    return calcfunction.exit_status, len(results)
+
+
+def benchmark_parser(name, dirpath, scale, repetitions):
+    """Generate the scaled output for the given parser and measure the parsing.
+
+    :param name: name of the parser, one of the keys of `PARSERS`
+    :param dirpath: folder in which to generate the output
+    :param scale: integer scale factor of the test fixture
+    :param repetitions: number of timed repetitions
+    :return: dictionary with the results
+    """
+    from aiida.plugins import ParserFactory
+
+    entry_point_name = PARSERS[name]
+    properties = fixtures.generate_fixture(name, dirpath, scale)
+    computer = get_computer()
+    node = create_calc_job_node(entry_point_name, computer, dirpath, get_inputs(name, computer, properties))
+    parser_class = ParserFactory(entry_point_name)
+
+    # The first call is not timed, since it includes the import of modules and the population of caches
+    exit_status, number_of_outputs = parse(parser_class, node)
+
+    wall_times = []
+    peak_rss = []
+    peak_rss_is_reset = True
+
+    for _ in range(repetitions):
+        gc.collect()
+        peak_rss_is_reset = reset_peak_rss() and peak_rss_is_reset
+        baseline = get_rss()
+        _, elapsed = fixtures.timed(parse, parser_class, node)
+        wall_times.append(elapsed)
+        peak_rss.append(get_peak_rss() - baseline)
+
+    result = {
+        'entry_point': entry_point_name,
+        'properties': properties,
+        'size_bytes': fixtures.get_folder_size(dirpath),
+        'exit_status': exit_status,
+        'number_of_outputs': number_of_outputs,
+        'wall_time': {
+            'min': min(wall_times),
+            'median': sorted(wall_times)[len(wall_times) // 2],
+            'max': max(wall_times),
+        },
+        'peak_rss_bytes': max(peak_rss),
+        'peak_rss_is_reset': peak_rss_is_reset,
+        'traced_peak_bytes': None,
+        'traced_retained_bytes': None,
+    }
+    result['throughput_mb_per_s'] = result['size_bytes'] / 1.E6 / result['wall_time']['min']
+
+    # Allocations are traced in a separate run, since tracing slows down the parsing considerably
+    if tracemalloc is not None:
+        gc.collect()
+        tracemalloc.start()
+        parse(parser_class, node)
+        result['traced_retained_bytes'], result['traced_peak_bytes'] = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return result
+
+
+def get_metadata(scale, repetitions):
+    """Return a dictionary with the metadata of the benchmark run, to judge whether two runs can be compared."""
+    import aiida
+    import aiida_quantumespresso
+    import numpy
+
+    return {
+        'date': datetime.datetime.now().isoformat(),
+        'scale': scale,
+        'repetitions': repetitions,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'aiida_core': aiida.__version__,
+        'aiida_quantumespresso': aiida_quantumespresso.__version__,
+        'numpy': numpy.__version__,
+    }
+
+
+def run_benchmarks(names, scale, repetitions, echo):
+    """Run the benchmarks for the parsers with the given names in the currently loaded profile."""
+    results = collections.OrderedDict()
+    dirpath = tempfile.mkdtemp()
+
+    try:
+        for name in names:
+            results[name] = benchmark_parser(name, os.path.join(dirpath, name), scale, repetitions)
+            echo(name, results[name])
+    finally:
+        shutil.rmtree(dirpath)
+
+    return results
+
+
+def format_result(name, result):
+    """Return a line of the table of results of a single parser."""
+    traced = result['traced_peak_bytes']
+    return '{:<8s} {:>8.2f} MB {:>9.4f} s {:>8.2f} MB/s {:>9.1f} MB {:>9s} MB  exit status {}'.format(
+        name, result['size_bytes'] / 1.E6, result['wall_time']['min'], result['throughput_mb_per_s'],
+        result['peak_rss_bytes'] / 1.E6, '{:.1f}'.format(traced / 1.E6) if traced is not None else '-',
+        result['exit_status']
+    )
+
+
+@click.group()
+def cli():
+    """Benchmark the output parsers on scaled up test fixtures."""
+
+
+@cli.command()
+@click.option('-p', '--parser', 'names', type=click.Choice(list(PARSERS)), multiple=True, help='Parsers to benchmark.')
+@click.option('-s', '--scale', type=int, default=100, show_default=True, help='Scale factor of the test fixtures.')
+@click.option('-r', '--repetitions', type=int, default=3, show_default=True, help='Number of timed repetitions.')
+@click.option('-o', '--output', type=click.Path(), default='benchmark_parsers.json', show_default=True)
+@click.option(
+    '--profile',
+    type=str,
+    default=None,
+    help='Use this existing profile instead of a temporary test profile. Note that the nodes are stored in it.'
+)
+def run(names, scale, repetitions, output, profile):
+    """Run the benchmarks and write the results to a JSON file."""
+    names = names or list(PARSERS)
+
+    def echo(name, result):
+        click.echo(format_result(name, result))
+
+    click.echo('{:<8s} {:>11s} {:>11s} {:>13s} {:>12s} {:>12s}'.format(
+        'parser', 'size', 'wall time', 'throughput', 'peak RSS', 'traced peak'
+    ))
+
+    if profile is not None:
+        from aiida import load_profile
+        load_profile(profile)
+        results = run_benchmarks(names, scale, repetitions, echo)
+    else:
+        from aiida.manage.tests import test_manager
+        with test_manager():
+            results = run_benchmarks(names, scale, repetitions, echo)
+
+    content = {'metadata': get_metadata(scale, repetitions), 'results': results}
+
+    with io.open(output, 'w') as handle:
+        handle.write(six.text_type(json.dumps(content, indent=2)))
+
+    click.echo('Results written to {}'.format(output))
+
+
+@cli.command()
+@click.argument('reference', type=click.File('r'))
+@click.argument('candidate', type=click.File('r'))
+def compare(reference, candidate):
+    """Compare the results of a CANDIDATE run with those of a REFERENCE run."""
+    reference = json.load(reference)
+    candidate = json.load(candidate)
+
+    for key in ['scale', 'python', 'platform']:
+        if reference['metadata'][key] != candidate['metadata'][key]:
+            click.echo('Warning: the runs differ in `{}`: {} and {}'.format(
+                key, reference['metadata'][key], candidate['metadata'][key]
+            ))
+
+    click.echo('{:<8s} {:>22s} {:>24s} {:>24s}'.format('parser', 'wall time', 'peak RSS', 'traced peak'))
+
+    for name, result in candidate['results'].items():
+        try:
+            before = reference['results'][name]
+        except KeyError:
+            continue
+
+        columns = []
+        for after_value, before_value, unit, factor in [
+            (result['wall_time']['min'], before['wall_time']['min'], 's', 1.),
+            (result['peak_rss_bytes'], before['peak_rss_bytes'], 'MB', 1.E-6),
+            (result['traced_peak_bytes'], before['traced_peak_bytes'], 'MB', 1.E-6),
+        ]:
+            if after_value is None or before_value is None:
+                columns.append('{:>24s}'.format('-'))
+            else:
+                ratio = after_value / before_value if before_value else float('nan')
+                columns.append('{:>10.3f} -> {:>7.3f} {:<2s} x{:.2f}'.format(
+                    before_value * factor, after_value * factor, unit, ratio
+                ).rjust(24))
+
+        click.echo('{:<8s} {}'.format(name, ' '.join(columns)))
+
+
+@cli.command()
+@click.argument('dirpath', type=click.Path())
+@click.option('-p', '--parser', 'names', type=click.Choice(list(PARSERS)), multiple=True, help='Parsers to generate.')
+@click.option('-s', '--scale', type=int, default=100, show_default=True, help='Scale factor of the test fixtures.')
+def generate(dirpath, names, scale):
+    """Only write the scaled up outputs to subfolders of DIRPATH, e.g. to inspect them or to profile a parser."""
+    for name in names or list(PARSERS):
+        properties = fixtures.generate_fixture(name, os.path.join(dirpath, name), scale)
+        click.echo('{:<8s} {:>8.2f} MB  {}'.format(
+            name, fixtures.get_folder_size(os.path.join(dirpath, name)) / 1.E6, properties
+        ))
+
+
+if __name__ == '__main__':
+    cli()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark and accuracy check of the Fourier interpolation of force constants in `utils.phonons`."""
+from __future__ import absolute_import
+from __future__ import division
+import io
+import os
+
+import click
+import numpy
+
+from fixtures import FILEPATH_FIXTURES, setup_path, timed
+
+setup_path()
+
+# pylint: disable=wrong-import-position
+from aiida_quantumespresso.data.force_constants import parse_q2r_force_constants_file
+from aiida_quantumespresso.parsers.matdyn import parse_raw_matdyn_phonon_file
+from aiida_quantumespresso.utils.phonons import PhononInterpolator
+
+
+def get_synthetic_interpolator(number_of_atoms, mesh):
+    """Return an interpolator for random force constants of a cubic cell with the given number of atoms."""
+    random = numpy.random.RandomState(0)
+    force_constants = random.normal(size=tuple(mesh) + (3, 3, number_of_atoms, number_of_atoms))
+    cell = 5.0 * numpy.eye(3)
+    positions = random.uniform(0, 5.0, (number_of_atoms, 3))
+    masses = numpy.full(number_of_atoms, 25000.)
+
+    return PhononInterpolator(force_constants, cell, positions, masses)
+
+
+@click.command()
+@click.option('-a', '--atoms', type=int, default=16, show_default=True, help='Number of atoms of the synthetic system.')
+@click.option('-m', '--mesh', type=int, default=4, show_default=True, help='Size of the cubic q-point mesh of the IFCs.')
+@click.option('-q', '--qpoints', type=int, default=2000, show_default=True, help='Number of q-points to interpolate.')
+@click.option('-b', '--batch-size', type=int, default=256, show_default=True, help='Number of q-points per batch.')
+def benchmark(atoms, mesh, qpoints, batch_size):
+    """Check the accuracy against `matdyn.x` and time the interpolation for a synthetic system."""
+    with io.open(os.path.join(FILEPATH_FIXTURES, 'q2r', 'default', 'real_space_force_constants.dat')) as handle:
+        parsed, force_constants, _ = parse_q2r_force_constants_file(handle.read().splitlines(), True)
+
+    with io.open(os.path.join(FILEPATH_FIXTURES, 'matdyn', 'default', 'phonon_frequencies.dat')) as handle:
+        expected = parse_raw_matdyn_phonon_file(handle.read())['phonon_bands']
+
+    atom_list = parsed['atom_list']
+    positions = [atom[2:] for atom in atom_list]
+    masses = [atom[1] for atom in atom_list]
+    interpolator = PhononInterpolator(force_constants, parsed['cell'], positions, masses, asr=None)
+    deviation = numpy.abs(interpolator.get_frequencies([[0., 0., 0.]]) - expected).max()
+    click.echo('Maximum deviation from the `matdyn.x` fixture: {:.3e} THz'.format(deviation))
+
+    interpolator, elapsed = timed(get_synthetic_interpolator, atoms, [mesh] * 3)
+    click.echo('Setup for {} atoms and {}x{}x{} mesh: {:.3f} s'.format(atoms, mesh, mesh, mesh, elapsed))
+
+    qpoints = numpy.random.RandomState(1).uniform(-0.5, 0.5, (qpoints, 3))
+
+    _, elapsed = timed(interpolator.get_frequencies, qpoints, batch_size=batch_size)
+    click.echo('{} q-points in batches of {}: {:.3f} s'.format(len(qpoints), batch_size, elapsed))
+
+    _, elapsed = timed(interpolator.get_frequencies, qpoints[:len(qpoints) // 10], batch_size=1)
+    click.echo('{} q-points one at a time: {:.3f} s'.format(len(qpoints) // 10, elapsed))
+
+
+if __name__ == '__main__':
+    benchmark()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark of the reading of the projections and pdos files of `projwfc.x` against the original implementation.
+
+A synthetic output is generated for a supercell with many atomic states, where each band is projected onto a random
+selection of states, together with a `pdos_atm` file per atomic wavefunction. The parsing of the state lines into the
+definitions of the orbitals is compared as well, which does not construct the orbital objects themselves.
+"""
+from __future__ import absolute_import
+from __future__ import division
+import io
+import re
+
+import click
+import numpy
+
+from fixtures import setup_path, timed
+
+setup_path()
+
+# pylint: disable=wrong-import-position
+from aiida_quantumespresso.parsers.projwfc import parse_band_projections, parse_state_lines, read_pdos_columns
+
+
+def parse_band_projections_loop(out_info_dict):
+    """Reference implementation that applies three regular expressions to each line and fills the arrays in a loop."""
+    out_file = out_info_dict['out_file']
+    od = out_info_dict  # pylint: disable=invalid-name
+    wave_fraction_first = re.compile(r'\=(.*?)\*')
+    wave_fraction_remain = re.compile(r'\+(.*?)\*')
+    function_id = re.compile(r'\#(.*?)\]')
+    num_wfc = len(od['wfc_lines'])
+    bands = numpy.zeros([od['k_states'], od['num_bands']])
+    projection_arrays = numpy.zeros([od['k_states'], od['num_bands'], num_wfc])
+
+    for i in range(od['k_states']):
+        if od['spin_down']:
+            i += od['k_states']
+        for j in range(i * od['num_bands'], (i + 1) * od['num_bands'], 1):
+            out_ind = od['e_lines'][j]
+            try:
+                val = out_file[out_ind].split()[2]
+                float(val)
+            except ValueError:
+                val = out_file[out_ind].split()[4]
+            bands[i % od['k_states']][j % od['num_bands']] = val
+            wave_fraction = []
+            wave_id = []
+            for k in range(od['e_lines'][j] + 1, od['psi_lines'][j], 1):
+                out_line = out_file[k]
+                wave_fraction += wave_fraction_first.findall(out_line)
+                wave_fraction += wave_fraction_remain.findall(out_line)
+                wave_id += function_id.findall(out_line)
+            for index, wave in enumerate(wave_id):
+                value = float(wave_fraction[index])
+                projection_arrays[i % od['k_states']][j % od['num_bands']][int(wave) - 1] = value
+
+    return bands, projection_arrays
+
+
+def parse_state_lines_quadratic(out_info_dict):
+    """Reference implementation that counts the radial nodes of each state by comparing it to all previous states."""
+    out_file = out_info_dict['out_file']
+    atomnum_re = re.compile(r'atom (.*?)\(')
+    element_re = re.compile(r'\((.*?)\)')
+    lnum_re = re.compile(r'l=(.*?)m=')
+    mnum_re = re.compile(r'm=(.*?)\)')
+    state_dicts = []
+
+    for wfc_line in out_info_dict['wfc_lines']:
+        state_line = out_file[wfc_line]
+        state_dicts.append({
+            'atomnum': int(atomnum_re.findall(state_line)[0]) - 1,
+            'kind_name': element_re.findall(state_line)[0].strip(),
+            'angular_momentum': int(lnum_re.findall(state_line)[0]),
+            'magnetic_number': int(mnum_re.findall(state_line)[0]) - 1,
+        })
+
+    new_state_dicts = []
+    for i, state_dict in enumerate(state_dicts):
+        state_dict = state_dict.copy()
+        state_dict['radial_nodes'] = sum(1 for j in range(i - 1, -1, -1) if state_dict == state_dicts[j])
+        new_state_dicts.append(state_dict)
+
+    sites = out_info_dict['structure'].sites
+    for state_dict in new_state_dicts:
+        state_dict['position'] = sites[state_dict.pop('atomnum')].position
+
+    return new_state_dicts
+
+
+class Site(object):  # pylint: disable=useless-object-inheritance,too-few-public-methods
+    """Object with the interface of a site of a `StructureData` that is used by the parser."""
+
+    def __init__(self, position):
+        self.position = position
+
+
+class Structure(object):  # pylint: disable=useless-object-inheritance,too-few-public-methods
+    """Object with the interface of a `StructureData` that is used by the parser."""
+
+    def __init__(self, num_atoms):
+        self.sites = [Site((float(index), 0., 0.)) for index in range(num_atoms)]
+
+
+def generate_stdout(num_wfc, num_kpoints, num_bands, num_coefficients, seed=0):
+    """Return the lines of the projections section of a `projwfc.x` stdout for the given dimensions."""
+    random = numpy.random.RandomState(seed)
+    lines = ['\n']
+
+    # Each atom has a 3s, 3p and 3d shell and a second s shell, such that some states have radial nodes
+    shells = [(0, 1), (1, 3), (2, 5), (0, 1)]
+    states = [(atom, l, m) for atom in range(num_wfc) for l, ms in shells for m in range(1, ms + 1)][:num_wfc]
+
+    for index, (atom, l, m) in enumerate(states):
+        lines.append('     state #{:4d}: atom {:3d} (Si ), wfc  1 (l={} m={:2d})\n'.format(index + 1, atom + 1, l, m))
+
+    for _ in range(num_kpoints):
+        lines.append('\n k =   0.0000000000  0.0000000000  0.0000000000\n')
+        for band in range(num_bands):
+            lines.append('==== e({:4d}) = {:11.5f} eV ==== \n'.format(band + 1, random.uniform(-10, 10)))
+            states = random.choice(num_wfc, num_coefficients, replace=False) + 1
+            terms = ['{:.3f}*[#{:4d}]+'.format(random.uniform(0, 0.5), state) for state in states]
+            for start in range(0, len(terms), 5):
+                lines.append('{}{}\n'.format('     psi = ' if start == 0 else '          +', ''.join(terms[start:start + 5])))
+            lines.append('    |psi|^2 = 0.997\n')
+
+    return lines
+
+
+def get_out_info_dict(lines, num_kpoints, num_bands):
+    """Return the technical internals of the stdout that are determined by the parser before the projections."""
+    wfc_lines = [index for index, line in enumerate(lines) if 'state #' in line]
+
+    return {
+        'out_file': lines,
+        'e_lines': [index for index, line in enumerate(lines) if '==== e(' in line],
+        'psi_lines': [index for index, line in enumerate(lines) if '|psi|^2' in line],
+        'wfc_lines': wfc_lines,
+        'k_states': num_kpoints,
+        'num_bands': num_bands,
+        'spin_down': False,
+        'structure': Structure(len(wfc_lines)),
+    }
+
+
+def generate_pdos(num_energies, num_columns, seed=0):
+    """Return the content of a `pdos_atm` file with the given number of energies and pdos columns."""
+    random = numpy.random.RandomState(seed)
+    lines = ['# E (eV)   ldos(E)   {}\n'.format('   '.join(['pdos(E)'] * num_columns))]
+    for energy in numpy.linspace(-10, 10, num_energies):
+        lines.append('{:7.3f}{}\n'.format(energy, ''.join(
+            '{:11.3E}'.format(value) for value in random.uniform(0, 1, num_columns + 1))))
+    return ''.join(lines)
+
+
+@click.command()
+@click.option('-w', '--wfc', type=int, default=500, show_default=True, help='Number of atomic states.')
+@click.option('-k', '--kpoints', type=int, default=20, show_default=True, help='Number of k-points.')
+@click.option('-b', '--bands', type=int, default=250, show_default=True, help='Number of bands.')
+@click.option('-c', '--coefficients', type=int, default=40, show_default=True, help='Coefficients per band.')
+def benchmark(wfc, kpoints, bands, coefficients):
+    """Compare the vectorized projection and pdos readers to the original implementation."""
+    lines = generate_stdout(wfc, kpoints, bands, coefficients)
+    out_info_dict = get_out_info_dict(lines, kpoints, bands)
+    click.echo('stdout of {:.1f} MB with {} states, {} k-points and {} bands'.format(
+        sum(len(line) for line in lines) / 1E6, wfc, kpoints, bands))
+
+    expected, elapsed_loop = timed(parse_band_projections_loop, out_info_dict)
+    result, elapsed_vectorized = timed(parse_band_projections, out_info_dict)
+
+    for array, array_expected in zip(result, expected):
+        assert numpy.array_equal(array, array_expected), 'the parsed projections differ'
+
+    click.echo('projections: loop {:.3f} s, vectorized {:.3f} s, speedup {:.1f}x'.format(
+        elapsed_loop, elapsed_vectorized, elapsed_loop / elapsed_vectorized))
+
+    expected, elapsed_loop = timed(parse_state_lines_quadratic, out_info_dict)
+    result, elapsed_vectorized = timed(parse_state_lines, out_info_dict)
+
+    assert result == expected, 'the parsed states differ'
+
+    click.echo('states:      quadratic {:.3f} s, single pass {:.3f} s, speedup {:.1f}x'.format(
+        elapsed_loop, elapsed_vectorized, elapsed_loop / elapsed_vectorized))
+
+    content = generate_pdos(2000, 3)
+    expected, elapsed_loop = timed(lambda: [numpy.genfromtxt(io.StringIO(content)) for _ in range(wfc // 2)])
+    result, elapsed_vectorized = timed(lambda: [read_pdos_columns(io.StringIO(content)) for _ in range(wfc // 2)])
+
+    assert numpy.array_equal(result[0], expected[0]), 'the parsed pdos differ'
+
+    click.echo('pdos files:  genfromtxt {:.3f} s, fromstring {:.3f} s, speedup {:.1f}x'.format(
+        elapsed_loop, elapsed_vectorized, elapsed_loop / elapsed_vectorized))
+
+
+if __name__ == '__main__':
+    benchmark()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark of the construction of a `ProtocolManager` and the retrieval of its protocol data."""
+from __future__ import absolute_import
+from __future__ import division
+
+import click
+
+from fixtures import setup_path, timed
+
+setup_path()
+
+# pylint: disable=wrong-import-position
+from aiida_quantumespresso.utils.protocols import pw as protocols
+
+
+def get_protocol_data_uncached(name):
+    """Reference implementation that builds the modifiers of all protocols from the jsons on every call."""
+    modifiers = protocols._build_all_protocol_modifiers()[name]  # pylint: disable=protected-access
+    parameters = dict(modifiers['parameters'][modifiers['parameters_default']])
+    parameters['pseudo_data'] = modifiers['pseudo'][modifiers['pseudo_default']]
+    return parameters
+
+
+def get_protocol_data_cached(name):
+    """Construct a `ProtocolManager` and return the protocol data for the default modifiers."""
+    return protocols.ProtocolManager(name).get_protocol_data()
+
+
+@click.command()
+@click.option('-n', '--calls', type=int, default=200, show_default=True, help='Number of calls per implementation.')
+def benchmark(calls):
+    """Time the first and subsequent constructions of a `ProtocolManager` compared to rebuilding all modifiers."""
+    for name in ['theos-ht-1.0', 'testing']:
+        assert get_protocol_data_cached(name) == get_protocol_data_uncached(name), 'the protocol data differs'
+
+        # Invalidate the cache to measure the first construction in a process, which parses the jsons
+        protocols._PROTOCOL_MODIFIERS_CACHE['mtimes'] = None  # pylint: disable=protected-access
+        _, elapsed_first = timed(get_protocol_data_cached, name)
+
+        _, elapsed_uncached = timed(get_protocol_data_uncached, name, repetitions=calls)
+        _, elapsed_cached = timed(get_protocol_data_cached, name, repetitions=calls)
+
+        click.echo('protocol `{}`: uncached {:.2f} ms/call, cached first call {:.2f} ms, then {:.3f} ms/call'.format(
+            name, elapsed_uncached * 1E3, elapsed_first * 1E3, elapsed_cached * 1E3))
+
+
+if __name__ == '__main__':
+    benchmark()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark of the per-call cost of the validation of `pw.x` inputs by `calculations.helpers.pw_input_helper`."""
+from __future__ import absolute_import
+from __future__ import division
+import io
+import os
+import tempfile
+
+import click
+
+from fixtures import setup_path, timed
+
+setup_path()
+
+# pylint: disable=wrong-import-position
+from aiida_quantumespresso.calculations import helpers
+from aiida_quantumespresso.calculations.helpers import compile_input_spec, get_input_spec, pw_input_helper
+
+
+class Kind(object):  # pylint: disable=too-few-public-methods,useless-object-inheritance
+    """Minimal stand-in for a `Kind`, since the helper only needs the kind names of the structure."""
+
+    def __init__(self, name):
+        self.name = name
+
+
+class Structure(object):  # pylint: disable=too-few-public-methods,useless-object-inheritance
+    """Minimal stand-in for a `StructureData`, since the helper only needs the kinds of the structure."""
+
+    kinds = [Kind('Si'), Kind('O')]
+
+
+PARAMETERS = {
+    'CONTROL': {
+        'calculation': 'vc-relax',
+        'tprnfor': True,
+        'tstress': True,
+    },
+    'SYSTEM': {
+        'ecutwfc': 40,
+        'ecutrho': 320,
+        'occupations': 'smearing',
+        'smearing': 'cold',
+        'degauss': 0.02,
+        'hubbard_u': {
+            'Si': 1.0
+        },
+        'starting_magnetization': {
+            'O': 0.2
+        },
+    },
+    'ELECTRONS': {
+        'conv_thr': 1.E-10,
+        'mixing_beta': 0.4,
+    },
+    'IONS': {},
+    'CELL': {
+        'cell_dofree': 'all',
+    },
+}
+
+
+@click.command()
+@click.option('-v', '--version', type=str, default='6.4', show_default=True, help='Version of the input specification.')
+@click.option('-n', '--calls', type=int, default=2000, show_default=True, help='Number of validated inputs.')
+def benchmark(version, calls):
+    """Time the compilation and caching of the input specification and the validation of a typical input."""
+    structure = Structure()
+    filepath_xml = os.path.join(os.path.dirname(helpers.__file__), 'INPUT_PW-{}.xml'.format(version))
+
+    def compile_spec():
+        with io.open(filepath_xml, 'rb') as handle:
+            return compile_input_spec(handle)
+
+    def validate_uncached():
+        get_input_spec(version, use_cache=False)
+        return pw_input_helper(PARAMETERS, structure, version=version)
+
+    _, elapsed = timed(compile_spec, repetitions=10)
+    click.echo('Compilation of INPUT_PW-{}.xml: {:.2f} ms'.format(version, elapsed * 1000))
+
+    dirpath = tempfile.mkdtemp()
+    filepath_cache = os.path.join(dirpath, 'cache.json')
+    helpers._dump_input_spec_cache(compile_spec(), filepath_cache)  # pylint: disable=protected-access
+    load_cache = helpers._load_input_spec_cache  # pylint: disable=protected-access
+    _, elapsed = timed(load_cache, filepath_cache, filepath_xml, repetitions=10)
+    os.remove(filepath_cache)
+    os.rmdir(dirpath)
+    click.echo('Loading the JSON cache: {:.2f} ms'.format(elapsed * 1000))
+
+    _, elapsed = timed(validate_uncached, repetitions=max(calls // 100, 1))
+    click.echo('Validation compiling the specification on every call: {:.1f} us/call'.format(elapsed * 1E6))
+
+    get_input_spec(version)
+    _, elapsed = timed(pw_input_helper, PARAMETERS, structure, version=version, repetitions=calls)
+    click.echo('Validation with the indexed specification in memory: {:.1f} us/call'.format(elapsed * 1E6))
+
+
+if __name__ == '__main__':
+    benchmark()  # pylint: disable=no-value-for-parameter
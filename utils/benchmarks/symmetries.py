@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark of the reduction of the parsed symmetry operations by `parsers.parse_raw.pw.reduce_symmetries`."""
+from __future__ import absolute_import
+from __future__ import division
+import copy
+import logging
+
+import click
+import numpy
+
+from fixtures import setup_path, timed
+
+setup_path()
+
+# pylint: disable=wrong-import-position
+from aiida_quantumespresso.parsers.parse_raw.pw import get_symmetry_mapping, reduce_symmetries
+from aiida_quantumespresso.utils.linalg import are_matrices_equal
+
+
+def reduce_symmetries_linear(parsed_parameters, parsed_structure, logger):
+    """Reference implementation that rebuilds the symmetry mapping and searches the names linearly on every call."""
+    cell_T = numpy.transpose(parsed_structure['cell']['lattice_vectors'])
+    cell_Tinv = numpy.linalg.inv(cell_T)
+    possible_symmetries = get_symmetry_mapping()
+
+    for symmetry_type in ['symmetries', 'lattice_symmetries']:
+        new_symmetries = []
+        for this_sym in parsed_parameters[symmetry_type]:
+            name = this_sym['name'].strip()
+            for i, this in enumerate(possible_symmetries):
+                if name == this['name'].strip():
+                    index = i
+                    break
+            else:
+                logger.error('Symmetry {} not found'.format(name))
+                new_symmetries.append({'all_symmetries': this_sym})
+                continue
+
+            rotation_cart_new = possible_symmetries[index]['matrix']
+            rotation_cart_old = numpy.dot(cell_T, numpy.dot(this_sym['rotation'], cell_Tinv))
+            inversion = possible_symmetries[index]['inversion']
+            if are_matrices_equal(rotation_cart_old, rotation_cart_new, swap_sign_matrix_b=inversion):
+                new_symmetries.append({'t_rev': this_sym['t_rev'], 'symmetry_number': index})
+            else:
+                new_symmetries.append({'all_symmetries': this_sym})
+
+        parsed_parameters[symmetry_type] = new_symmetries
+
+
+def generate_symmetries(number_of_symmetries):
+    """Return the parsed parameters and structure with the given number of crystal symmetries.
+
+    The structure has a cubic cell, such that the rotations in crystal coordinates are the cartesian rotations. The
+    first `number_of_symmetries` of the 64 operations are crystal symmetries and the others are lattice symmetries.
+    """
+    operations = []
+    for symmetry in get_symmetry_mapping():
+        rotation = symmetry['matrix'] * (-1 if symmetry['inversion'] else 1)
+        operations.append({'name': symmetry['name'], 'rotation': rotation.tolist(), 't_rev': '0'})
+
+    parsed_parameters = {
+        'symmetries': operations[:number_of_symmetries],
+        'lattice_symmetries': operations[number_of_symmetries:],
+    }
+    parsed_structure = {'cell': {'lattice_vectors': (numpy.eye(3) * 5.43).tolist()}}
+
+    return parsed_parameters, parsed_structure
+
+
+def time_reduce_symmetries(function, repetitions, parsed_parameters, parsed_structure, logger):
+    """Call the function on copies of the parameters, since they are modified, and return the average wall time."""
+    copies = iter([copy.deepcopy(parsed_parameters) for _ in range(repetitions)])
+    _, elapsed = timed(lambda: function(next(copies), parsed_structure, logger), repetitions=repetitions)
+    return elapsed
+
+
+@click.command()
+@click.option('-n', '--calls', type=int, default=2000, show_default=True, help='Number of reduced outputs.')
+def benchmark(calls):
+    """Time the reduction of the 64 symmetry operations, of which either 48 or all 64 are crystal symmetries."""
+    logger = logging.getLogger(__name__)
+
+    for number_of_symmetries in [48, 64]:
+        parsed_parameters, parsed_structure = generate_symmetries(number_of_symmetries)
+
+        expected = copy.deepcopy(parsed_parameters)
+        reduced = copy.deepcopy(parsed_parameters)
+        reduce_symmetries_linear(expected, parsed_structure, logger)
+        reduce_symmetries(reduced, parsed_structure, logger)
+        assert reduced == expected, 'the reduced symmetries differ from the reference implementation'
+
+        arguments = (calls, parsed_parameters, parsed_structure, logger)
+        elapsed_linear = time_reduce_symmetries(reduce_symmetries_linear, *arguments)
+        elapsed_indexed = time_reduce_symmetries(reduce_symmetries, *arguments)
+
+        click.echo('{} crystal symmetries: linear search {:.1f} us/call, symmetry index {:.1f} us/call'.format(
+            number_of_symmetries, elapsed_linear * 1E6, elapsed_indexed * 1E6))
+
+
+if __name__ == '__main__':
+    benchmark()  # pylint: disable=no-value-for-parameter
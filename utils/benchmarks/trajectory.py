@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark of the memory used to accumulate the trajectory while parsing the stdout of a long `pw.x` run.
+
+The stdout is generated by replicating an ionic step of the `vcrelax_success` fixture with the `fixtures` module next
+to this script. It is parsed with the streaming parser, once accumulating the trajectory in the columnar buffer that
+the parser uses and once in nested python lists as before, after which the trajectory is converted to the numpy
+arrays that would be stored in the `TrajectoryData`.
+"""
+from __future__ import absolute_import
+from __future__ import division
+import gc
+import io
+import os
+import shutil
+import tempfile
+
+import click
+import numpy
+
+import fixtures
+
+fixtures.setup_path()
+
+# pylint: disable=wrong-import-position
+from aiida_quantumespresso.parsers.parse_raw.pw_stream import PwStdoutStreamParser
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+
+class ListTrajectory(dict):
+    """Reference implementation of the trajectory accumulation with nested python lists."""
+
+    number_of_atoms = None
+
+    def append(self, key, frame):
+        self.setdefault(key, []).append(frame)
+
+    def trim(self):
+        pass
+
+
+def parse_trajectory(filepath, trajectory_class):
+    """Parse the stdout, accumulating the trajectory in the given class, and return the trajectory as numpy arrays."""
+    parser = PwStdoutStreamParser({})
+    parser.trajectory_data = trajectory_class()
+
+    with io.open(filepath, 'r') as handle:
+        parser.feed(handle)
+
+    parsed_data, _ = parser.finalize()
+
+    return {key: numpy.asarray(value) for key, value in parsed_data['trajectory'].items()}
+
+
+def measure(filepath, trajectory_class):
+    """Return the wall time, the peak traced memory and the memory retained by the arrays of the trajectory."""
+    gc.collect()
+    tracemalloc.start()
+    arrays, elapsed = fixtures.timed(parse_trajectory, filepath, trajectory_class)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return arrays, elapsed, peak, retained
+
+
+@click.command()
+@click.option('-s', '--steps', type=int, default=10000, show_default=True, help='Number of ionic steps.')
+def benchmark(steps):
+    """Compare the memory of the columnar trajectory buffer to nested python lists on a synthetic long run."""
+    from aiida_quantumespresso.utils.buffers import TrajectoryBuffer
+
+    if tracemalloc is None:
+        raise click.ClickException('the benchmark requires `tracemalloc`, which is only available on Python 3')
+
+    dirpath = tempfile.mkdtemp()
+
+    try:
+        fixtures.scale_pw(dirpath, steps)
+        filepath = os.path.join(dirpath, 'aiida.out')
+        size = os.path.getsize(filepath)
+
+        expected, elapsed_lists, peak_lists, retained_lists = measure(filepath, ListTrajectory)
+        arrays, elapsed_buffer, peak_buffer, retained_buffer = measure(filepath, TrajectoryBuffer)
+    finally:
+        shutil.rmtree(dirpath)
+
+    assert sorted(arrays) == sorted(expected), 'the trajectories contain different quantities'
+    for key, value in expected.items():
+        assert numpy.array_equal(arrays[key], value), 'the trajectories differ for `{}`'.format(key)
+
+    frames = len(arrays['energy'])
+    nbytes = sum(array.nbytes for array in arrays.values())
+    click.echo('stdout of {:.1f} MB with {} frames, the trajectory arrays are {:.2f} MB'.format(
+        size / 1E6, frames, nbytes / 1E6))
+
+    for name, elapsed, peak, retained in [
+        ('lists', elapsed_lists, peak_lists, retained_lists),
+        ('buffer', elapsed_buffer, peak_buffer, retained_buffer),
+    ]:
+        click.echo('{:>6}: {:.2f} s, peak memory {:.2f} MB, retained {:.2f} MB'.format(
+            name, elapsed, peak / 1E6, retained / 1E6))
+
+
+if __name__ == '__main__':
+    benchmark()  # pylint: disable=no-value-for-parameter